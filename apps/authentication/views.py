@@ -8,6 +8,7 @@ from django.urls import reverse_lazy
 from .forms import CustomUserCreationForm, OTPVerificationForm, CustomLoginForm
 from .models import User
 from apps.billing.models import Credits
+from core.flow_state import load_flow_state, new_token, pop_flow_state, save_flow_state
 
 import random
 
@@ -40,11 +41,12 @@ class SignUpView(View):
 
             # TODO: Implement a real email sending service here.
             otp = generate_otp()
-            # In a real app, you'd save this OTP to a temporary cache or model field
-            # and email it to the user. For now, we'll simulate.
+            # The OTP is kept in the short-lived flow state; the (cookie-backed)
+            # session only carries the token that finds it.
             print(f"OTP for {user.email} is: {otp}")
-            request.session['otp_for_verification'] = otp
-            request.session['unverified_user_id'] = user.id
+            token = new_token()
+            save_flow_state('signup', token, {'user_id': user.id, 'otp': otp})
+            request.session['signup_token'] = token
             
             messages.success(request, 'Registration successful! Please check your email for an OTP.')
             return redirect('authentication:verify_otp')
@@ -60,28 +62,28 @@ class VerifyOTPView(View):
     template_name = 'authentication/verify_otp.html'
 
     def get(self, request, *args, **kwargs):
-        if 'unverified_user_id' not in request.session:
+        if load_flow_state('signup', request.session.get('signup_token')) is None:
             return redirect('authentication:signup')
         return render(request, self.template_name, {'form': self.form_class()})
 
     def post(self, request, *args, **kwargs):
-        user_id = request.session.get('unverified_user_id')
-        correct_otp = request.session.get('otp_for_verification')
-        if not user_id or not correct_otp:
+        token = request.session.get('signup_token')
+        state = load_flow_state('signup', token)
+        if state is None:
             return redirect('authentication:signup')
 
         form = self.form_class(request.POST)
         if form.is_valid():
-            if form.cleaned_data['otp'] == correct_otp:
+            if form.cleaned_data['otp'] == state['otp']:
                 try:
-                    user = User.objects.get(id=user_id)
+                    user = User.objects.get(id=state['user_id'])
                     user.is_active = True
                     user.is_verified = True
                     user.save()
 
-                    # Clean up session
-                    del request.session['unverified_user_id']
-                    del request.session['otp_for_verification']
+                    # Clean up the flow state
+                    pop_flow_state('signup', token)
+                    del request.session['signup_token']
 
                     login(request, user)
                     messages.success(request, 'Your account has been verified successfully!')
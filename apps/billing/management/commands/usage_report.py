@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from apps.billing.usage import DIMENSIONS, usage_summary
+
+
+class Command(BaseCommand):
+    help = "Prints AI usage totals (calls, tokens, latency, worth in credits) grouped by user, model, prompt or operation."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--by', choices=list(DIMENSIONS), default='model')
+        parser.add_argument('--days', type=int, default=30)
+        parser.add_argument('--limit', type=int, default=20, help="Rows to print, most tokens first.")
+
+    def handle(self, *args, **options):
+        rows = usage_summary(options['by'], days=options['days'])[:options['limit']]
+        columns = DIMENSIONS[options['by']][-1:]
+        self.stdout.write(
+            f"{options['by']:<28} {'calls':>7} {'failed':>7} {'prompt tok':>11} {'output tok':>11} "
+            f"{'total tok':>11} {'avg ms':>8} {'credits':>9}"
+        )
+        for row in rows:
+            label = ' '.join(str(row[column] or '-') for column in columns)
+            self.stdout.write(
+                f"{label[:28]:<28} {row['calls']:>7} {row['failures']:>7} {row['prompt_tokens']:>11} "
+                f"{row['output_tokens']:>11} {row['total_tokens']:>11} {row['avg_latency_ms']:>8} {row['credits']:>9.2f}"
+            )
+        if not rows:
+            self.stdout.write(f"No AI usage in the last {options['days']} days.")
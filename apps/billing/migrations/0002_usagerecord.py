@@ -0,0 +1,88 @@
+# Generated by Django 4.2.13 on 2026-10-19 19:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("billing", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UsageRecord",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "operation",
+                    models.CharField(
+                        choices=[
+                            ("TEXT", "Text"),
+                            ("VARIANTS", "Text variants"),
+                            ("IMAGE", "Image"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("model_name", models.CharField(max_length=50)),
+                (
+                    "prompt_version",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        help_text="The prompt template the call was made with (see core/prompts.py).",
+                        max_length=50,
+                    ),
+                ),
+                ("prompt_tokens", models.PositiveIntegerField(default=0)),
+                ("output_tokens", models.PositiveIntegerField(default=0)),
+                ("total_tokens", models.PositiveIntegerField(default=0)),
+                (
+                    "latency_ms",
+                    models.PositiveIntegerField(
+                        help_text="How long the call took, in milliseconds."
+                    ),
+                ),
+                (
+                    "ok",
+                    models.BooleanField(
+                        default=True, help_text="Whether the call succeeded."
+                    ),
+                ),
+                ("created_at", models.DateTimeField(db_index=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="usage_records",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["user", "created_at"], name="billing_usage_user_idx"
+                    ),
+                    models.Index(
+                        fields=["model_name", "created_at"],
+                        name="billing_usage_model_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -95,3 +95,49 @@ class Transaction(models.Model):
         """
         logging.info(f"Transaction accessed: {self.gateway_txn_id} for user: {self.user.username if self.user else 'Unknown'} with status: {self.status}")
         return f"Txn {self.gateway_txn_id} by {self.user.username if self.user else 'Unknown'} - {self.status}"
+
+
+
+class UsageRecord(models.Model):
+    """
+    One call to the AI: the tokens it used and how long it took. Written in
+    batches by the usage meter (see core/metering.py), so `created_at` is
+    set when the call is made rather than when the row is saved.
+    """
+    
+    OPERATION_CHOICES = [
+        ('TEXT', 'Text'),
+        ('VARIANTS', 'Text variants'),
+        ('IMAGE', 'Image'),
+    ]
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='usage_records'
+    )
+    operation = models.CharField(max_length=20, choices=OPERATION_CHOICES)
+    model_name = models.CharField(max_length=50)
+    prompt_version = models.CharField(
+        max_length=50,
+        blank=True,
+        default='',
+        help_text="The prompt template the call was made with (see core/prompts.py)."
+    )
+    prompt_tokens = models.PositiveIntegerField(default=0)
+    output_tokens = models.PositiveIntegerField(default=0)
+    total_tokens = models.PositiveIntegerField(default=0)
+    latency_ms = models.PositiveIntegerField(help_text="How long the call took, in milliseconds.")
+    ok = models.BooleanField(default=True, help_text="Whether the call succeeded.")
+    created_at = models.DateTimeField(db_index=True)
+    
+    def __str__(self):
+        return f"{self.operation} on {self.model_name}: {self.total_tokens} tokens"
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='billing_usage_user_idx'),
+            models.Index(fields=['model_name', 'created_at'], name='billing_usage_model_idx'),
+        ]
@@ -0,0 +1,38 @@
+import math
+
+from django.conf import settings
+
+# Credits charged for the parts of a generation. With settings.TOKEN_PRICING
+# the text is charged by its tokens instead, with TEXT_CREDIT_COST as the least.
+TEXT_CREDIT_COST = 1
+IMAGE_CREDIT_COST = 3
+# Text served from the prompt cache is the user's own earlier generation,
+# already paid for, and costs no AI call: it is not charged again.
+CACHED_TEXT_CREDIT_COST = 0
+
+
+def minimum_cost(generate_image: bool) -> int:
+    """The least a generation can cost; the balance is checked against this before calling the AI."""
+    return TEXT_CREDIT_COST + (IMAGE_CREDIT_COST if generate_image else 0)
+
+
+def text_cost(usage) -> int:
+    """
+    The credits for the text of a generation whose AI calls were collected
+    in `usage` (a core.metering.Usage). Only the first call to succeed is
+    charged: a hedge racing it (see core/hedging.py) is ours to pay for.
+    """
+    if not settings.TOKEN_PRICING:
+        return TEXT_CREDIT_COST
+    calls = [record for record in usage.records if record.ok and record.operation != 'IMAGE']
+    if not calls:
+        return TEXT_CREDIT_COST
+    call = calls[0]
+    rate = settings.CREDITS_PER_1K_TOKENS.get(call.model_name, max(settings.CREDITS_PER_1K_TOKENS.values()))
+    return max(TEXT_CREDIT_COST, math.ceil(call.total_tokens * rate / 1000))
+
+
+def generation_cost(usage, generate_image: bool, cached: bool = False) -> int:
+    """The credits to charge for a finished generation; `cached` if its text came from the prompt cache."""
+    text = CACHED_TEXT_CREDIT_COST if cached else text_cost(usage)
+    return text + (IMAGE_CREDIT_COST if generate_image else 0)
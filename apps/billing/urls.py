@@ -1,5 +1,6 @@
+from django.conf import settings
 from django.urls import path
-from .views import PricingView, PaymentWebhookView
+from .views import PricingView, PaymentWebhookView, AsyncPaymentWebhookView, UsageView
 
 # The app_name variable helps Django distinguish between URL names
 # from different apps.
@@ -12,5 +13,8 @@ urlpatterns = [
     # This creates a dynamic URL to handle incomming webhooks from different gateways.
     # example: /billing/webhook/razorpay or /billing/webhook/stripe/
     # The <str: gateway> part captures the gateway's name and passes it to the view.
-    path('webhook/<str:gateway>/', PaymentWebhookView.as_view(), name='webhook'),
+    path('webhook/<str:gateway>/', (AsyncPaymentWebhookView if settings.ASYNC_VIEWS else PaymentWebhookView).as_view(), name='webhook'),
+    
+    # Token and call totals of the user's AI usage, e.g. /billing/usage/model/
+    path('usage/<str:dimension>/', UsageView.as_view(), name='usage'),
 ]
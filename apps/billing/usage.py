@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Avg, Case, Count, ExpressionWrapper, F, FloatField, Q, Sum, Value, When
+from django.utils.timezone import now
+
+from .models import UsageRecord
+
+# What usage can be grouped by, and the columns each grouping reports.
+DIMENSIONS = {
+    'user': ('user_id', 'user__username'),
+    'model': ('model_name',),
+    'prompt': ('prompt_version',),
+    'operation': ('operation',),
+}
+
+
+def _credits():
+    """The credits the tokens of a row are worth at the token-pricing rates."""
+    rate = Case(
+        *[When(model_name=model, then=Value(per_1k / 1000)) for model, per_1k in settings.CREDITS_PER_1K_TOKENS.items()],
+        default=Value(max(settings.CREDITS_PER_1K_TOKENS.values()) / 1000),
+        output_field=FloatField(),
+    )
+    return Sum(ExpressionWrapper(rate * F('total_tokens'), output_field=FloatField()))
+
+
+def usage_summary(dimension: str, days: int = 30, user=None) -> list:
+    """
+    Returns the AI usage of the last `days` days grouped by `dimension` (a
+    key of DIMENSIONS), most tokens first: calls, failures, token counts,
+    average latency and the tokens' worth in credits. Pass `user` to only
+    count that user's calls.
+    """
+    queryset = UsageRecord.objects.filter(created_at__gte=now() - timedelta(days=days))
+    if user is not None:
+        queryset = queryset.filter(user=user)
+    # credits comes first: later annotations shadow the token fields it reads.
+    rows = queryset.values(*DIMENSIONS[dimension]).annotate(
+        credits=_credits(),
+        calls=Count('id'),
+        failures=Count('id', filter=Q(ok=False)),
+        prompt_tokens=Sum('prompt_tokens'),
+        output_tokens=Sum('output_tokens'),
+        total_tokens=Sum('total_tokens'),
+        avg_latency_ms=Avg('latency_ms'),
+    ).order_by('-total_tokens', *DIMENSIONS[dimension])
+    return [
+        {**row, 'avg_latency_ms': round(row['avg_latency_ms'] or 0), 'credits': round(row['credits'] or 0, 2)}
+        for row in rows
+    ]
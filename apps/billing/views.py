@@ -2,17 +2,19 @@ import os
 import json
 import hmac
 import hashlib
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
-from django.http import HttpResponse, HttpResponseBadRequest
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse
 from django.db import transaction
 
 from .forms import CreditPurchaseForm
 from .models import Transaction, Credits
+from .usage import DIMENSIONS, usage_summary
 
 # --- Pricing Configuration ---
 PRICING_PLANS = {
@@ -73,6 +75,77 @@ class PricingView(LoginRequiredMixin, View):
         # You can manually trigger the webhook for testing.
         return redirect('billing:pricing')
 
+def verify_webhook(request, gateway):
+    """Checks the webhook's signature. Returns an error response, or None if the request is genuine."""
+    # This secret key is provided by your payment gateway dashboard.
+    # It MUST be set in your environment variables.
+    webhook_secret = os.getenv(f"{gateway.upper()}_WEBHOOK_SECRET")
+    if not webhook_secret:
+        print(f"ERROR: Webhook secret for {gateway.upper()} is not configured.")
+        return HttpResponse(status=500)
+
+    # --- Signature Verification (Example for Razorpay) ---
+    try:
+        # Get the signature from the request headers
+        signature = request.headers.get('X-Razorpay-Signature')
+        if not signature:
+            return HttpResponseBadRequest("Signature missing.")
+        
+        # Verify the signature
+        generated_signature = hmac.new(webhook_secret.encode(), request.body, hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(generated_signature, signature):
+            return HttpResponseBadRequest("Invalid signature.")
+    except Exception as e:
+        print(f"ERROR: Signature verification failed: {e}")
+        return HttpResponseBadRequest("Invalid request.")
+    return None
+
+
+def process_webhook(body):
+    """Applies a verified webhook's event and returns the response for the gateway."""
+    try:
+        payload = json.loads(body)
+        event_type = payload.get('event')
+
+        # We only care about successful payment events
+        if event_type == 'payment.captured' or event_type == 'order.paid':
+            # Get the transaction ID from the payload
+            payment_entity = payload.get('payload', {}).get('payment', {}).get('entity', {})
+            gateway_txn_id = payment_entity.get('order_id') or payment_entity.get('id')
+
+            if not gateway_txn_id:
+                return HttpResponseBadRequest("Transaction ID missing in payload.")
+
+            with transaction.atomic():
+                # Find the corresponding transaction in our database
+                txn_to_update = Transaction.objects.select_for_update().get(
+                    gateway_txn_id=gateway_txn_id, status='PENDING'
+                )
+                
+                # Update its status to 'COMPLETED'
+                txn_to_update.status = 'COMPLETED'
+                txn_to_update.save()
+                
+                # Add the purchased credits to the user's account
+                user_credits, _ = Credits.objects.get_or_create(user=txn_to_update.user)
+                user_credits.balance += txn_to_update.credits_purchased
+                user_credits.save()
+                
+            print(f"SUCCESS: Processed webhook for Txn ID: {gateway_txn_id}")
+        else:
+            print(f"INFO: Received unhandled event type: {event_type}")
+
+    except Transaction.DoesNotExist:
+        print(f"ERROR: Received webhook for an unknown or already processed transaction.")
+        return HttpResponseBadRequest("Transaction not found or already processed.")
+    except Exception as e:
+        print(f"ERROR: An error occurred processing webhook: {e}")
+        return HttpResponse(status=500)
+    
+    # Return a 200 OK to the gateway to acknowledge receipt.
+    return HttpResponse(status=200)
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class PaymentWebhookView(View):
     """
@@ -80,67 +153,42 @@ class PaymentWebhookView(View):
     This view MUST be protected by signature verification.
     """
     def post(self, request, gateway, *args, **kwargs):
-        # This secret key is provided by your payment gateway dashboard.
-        # It MUST be set in your environment variables.
-        webhook_secret = os.getenv(f"{gateway.upper()}_WEBHOOK_SECRET")
-        if not webhook_secret:
-            print(f"ERROR: Webhook secret for {gateway.upper()} is not configured.")
-            return HttpResponse(status=500)
-
-        # --- Signature Verification (Example for Razorpay) ---
-        try:
-            # Get the signature from the request headers
-            signature = request.headers.get('X-Razorpay-Signature')
-            if not signature:
-                return HttpResponseBadRequest("Signature missing.")
-            
-            # Verify the signature
-            generated_signature = hmac.new(webhook_secret.encode(), request.body, hashlib.sha256).hexdigest()
-            if not hmac.compare_digest(generated_signature, signature):
-                return HttpResponseBadRequest("Invalid signature.")
-        except Exception as e:
-            print(f"ERROR: Signature verification failed: {e}")
-            return HttpResponseBadRequest("Invalid request.")
-        # --- End Verification ---
-        
+        error = verify_webhook(request, gateway)
+        if error is not None:
+            return error
+        return process_webhook(request.body)
+
+
+class AsyncPaymentWebhookView(PaymentWebhookView):
+    """
+    PaymentWebhookView for the ASGI deployment. Django 4.2's transactions are
+    synchronous, so the update itself runs in a worker thread.
+    """
+    async def post(self, request, gateway, *args, **kwargs):
+        error = verify_webhook(request, gateway)
+        if error is not None:
+            return error
+        return await sync_to_async(process_webhook)(request.body)
+
+
+
+class UsageView(LoginRequiredMixin, View):
+    """
+    JSON totals of the user's AI usage (tokens, calls, latency), e.g.
+    /billing/usage/model/?days=30 or /billing/usage/prompt/. Staff can pass
+    scope=all to total every user's usage, and group it by user.
+    """
+    max_days = 365
+
+    def get(self, request, dimension, *args, **kwargs):
+        if dimension not in DIMENSIONS:
+            raise Http404(f"Unknown usage dimension: {dimension}")
         try:
-            payload = json.loads(request.body)
-            event_type = payload.get('event')
-
-            # We only care about successful payment events
-            if event_type == 'payment.captured' or event_type == 'order.paid':
-                # Get the transaction ID from the payload
-                payment_entity = payload.get('payload', {}).get('payment', {}).get('entity', {})
-                gateway_txn_id = payment_entity.get('order_id') or payment_entity.get('id')
-
-                if not gateway_txn_id:
-                    return HttpResponseBadRequest("Transaction ID missing in payload.")
-
-                with transaction.atomic():
-                    # Find the corresponding transaction in our database
-                    txn_to_update = Transaction.objects.select_for_update().get(
-                        gateway_txn_id=gateway_txn_id, status='PENDING'
-                    )
-                    
-                    # Update its status to 'COMPLETED'
-                    txn_to_update.status = 'COMPLETED'
-                    txn_to_update.save()
-                    
-                    # Add the purchased credits to the user's account
-                    user_credits, _ = Credits.objects.get_or_create(user=txn_to_update.user)
-                    user_credits.balance += txn_to_update.credits_purchased
-                    user_credits.save()
-                    
-                print(f"SUCCESS: Processed webhook for Txn ID: {gateway_txn_id}")
-            else:
-                print(f"INFO: Received unhandled event type: {event_type}")
-
-        except Transaction.DoesNotExist:
-            print(f"ERROR: Received webhook for an unknown or already processed transaction.")
-            return HttpResponseBadRequest("Transaction not found or already processed.")
-        except Exception as e:
-            print(f"ERROR: An error occurred processing webhook: {e}")
-            return HttpResponse(status=500)
-        
-        # Return a 200 OK to the gateway to acknowledge receipt.
-        return HttpResponse(status=200)
\ No newline at end of file
+            days = min(max(int(request.GET.get('days', 30)), 1), self.max_days)
+        except ValueError:
+            return HttpResponseBadRequest("days must be a number.")
+
+        user = None if request.user.is_staff and request.GET.get('scope') == 'all' else request.user
+        if dimension == 'user' and user is not None:
+            raise Http404("Usage by user is only available to staff with scope=all.")
+        return JsonResponse({'dimension': dimension, 'days': days, 'results': usage_summary(dimension, days, user)})
@@ -0,0 +1,97 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import BooleanField, Count
+from django.db.models.expressions import RawSQL
+from django.db.models.fields.json import KT
+from django.db.models.functions import Lower, TruncDate
+from django.utils.timezone import now
+
+from .models import ContentHistory
+
+# Grouping expressions over the generation inputs. They match the expression
+# indexes declared on ContentHistory.Meta, so per-user aggregates are
+# answered from the index instead of parsing every row.
+DIMENSIONS = {
+    'niche': Lower(KT('input_params__niche')),
+    'tone': KT('input_params__tone'),
+}
+# The tags string split into a normalized array. Must match the GIN index
+# expression in migration 0007 exactly (PostgreSQL only).
+TAGS_SQL = r"regexp_split_to_array(lower(btrim(input_params ->> 'tags')), '\s*,\s*')"
+
+
+def _window(user, days: int, filters: dict = None):
+    """
+    Returns the content created in the last `days` days, for one user or for
+    everyone when `user` is None, narrowed by optional niche/tone/tag filters.
+    """
+    queryset = ContentHistory.objects.filter(created_at__gte=now() - timedelta(days=days))
+    if user is not None:
+        queryset = queryset.filter(user=user)
+
+    filters = filters or {}
+    if filters.get('niche'):
+        queryset = queryset.alias(niche_value=DIMENSIONS['niche']).filter(niche_value=filters['niche'].strip().lower())
+    if filters.get('tone'):
+        if connection.vendor == 'postgresql':
+            # A containment test can use the jsonb_path_ops GIN index.
+            queryset = queryset.filter(input_params__contains={'tone': filters['tone']})
+        else:
+            queryset = queryset.filter(input_params__tone=filters['tone'])
+    if filters.get('tag'):
+        tag = filters['tag'].strip().lower()
+        if connection.vendor == 'postgresql':
+            queryset = queryset.filter(RawSQL(f"{TAGS_SQL} @> ARRAY[%s]", (tag,), output_field=BooleanField()))
+        else:
+            queryset = queryset.filter(input_params__tags__icontains=tag)
+    return queryset
+
+
+def generations_per_day(user, dimension: str, days: int = 30, filters: dict = None) -> list:
+    """
+    Counts generations per day for each value of `dimension`.
+
+    Args:
+        user: The owner of the content, or None for every user.
+        dimension: A key of DIMENSIONS, e.g. 'niche'.
+        days: How many days back to look.
+        filters: Optional {'niche': ..., 'tone': ..., 'tag': ...} to narrow the rows.
+
+    Returns:
+        A list of {'day': date, 'value': str, 'count': int} dicts, oldest day first.
+    """
+    rows = (
+        _window(user, days, filters)
+        .annotate(day=TruncDate('created_at'), value=DIMENSIONS[dimension])
+        .values('day', 'value')
+        .annotate(count=Count('id'))
+        .order_by('day', '-count', 'value')
+    )
+    return list(rows)
+
+
+def top_tags(user, days: int = 30, limit: int = 20, filters: dict = None) -> list:
+    """Returns the most used tags as {'value': tag, 'count': int} dicts, most used first."""
+    queryset = _window(user, days, filters)
+    if connection.vendor == 'postgresql':
+        tags_sql, params = queryset.annotate(
+            tag=RawSQL(f"unnest({TAGS_SQL})", ())
+        ).values('tag').order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT tag, COUNT(*) FROM ({tags_sql}) AS tags WHERE tag <> '' "
+                f"GROUP BY tag ORDER BY 2 DESC, 1 LIMIT %s",
+                [*params, limit],
+            )
+            return [{'value': tag, 'count': count} for tag, count in cursor.fetchall()]
+    return _top_tags_fallback(queryset, limit)
+
+
+def _top_tags_fallback(queryset, limit):
+    """Counts tags in Python for databases without array functions (SQLite in development)."""
+    counts = Counter()
+    for tags in queryset.values_list(KT('input_params__tags'), flat=True).iterator(chunk_size=2000):
+        counts.update(tag.strip().lower() for tag in (tags or '').split(',') if tag.strip())
+    return [{'value': tag, 'count': count} for tag, count in counts.most_common(limit)]
@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class DashboardConfig(AppConfig):
+    name = 'apps.dashboard'
+    label = 'dashboard'
+    default_auto_field = 'django.db.models.BigAutoField'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+
+        # Register the cache invalidation signal handlers.
+        from . import signals
+
+        post_migrate.connect(signals.restore_search_triggers, sender=self)
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from core.cache import TwoTierCache
+from core.db.routers import pin_to_primary
+from .models import ContentHistory
+from apps.billing.models import Credits
+
+# Per-user fragments for the dashboard sidebar. Entries are invalidated by the
+# post_save / post_delete signals wired up in `signals.py`.
+sidebar_cache = TwoTierCache(
+    prefix='dashboard',
+    local_ttl=settings.DASHBOARD_CACHE_LOCAL_TTL,
+    shared_ttl=settings.DASHBOARD_CACHE_SHARED_TTL,
+)
+
+HISTORY_TEMPLATE = 'dashboard/_history.html'
+
+
+def get_credit_balance(user) -> int:
+    """Returns the user's credit balance, creating the Credits row if needed."""
+    def load():
+        user_credits, _ = Credits.objects.get_or_create(user=user)
+        return user_credits.balance
+    return sidebar_cache.get_or_set(f"credits:{user.pk}", load)
+
+
+def get_rendered_history(user) -> str:
+    """Returns the rendered HTML for the user's most recent content history."""
+    def load():
+        content_history = ContentHistory.objects.filter(user=user)[:settings.DASHBOARD_HISTORY_LIMIT]
+        return str(render_to_string(HISTORY_TEMPLATE, {'content_history': content_history}))
+    # The fragment is rendered (and escaped) by our own template before caching.
+    return mark_safe(sidebar_cache.get_or_set(f"history:{user.pk}", load))
+
+
+# Invalidation also pins the user to the primary database for a few seconds:
+# otherwise the next page load could refill the cache from a replica that has
+# not caught up yet, and keep serving the old value for the whole TTL.
+
+def invalidate_credits(user_id):
+    sidebar_cache.delete(f"credits:{user_id}")
+    pin_to_primary(user_id)
+
+
+def invalidate_history(user_id):
+    sidebar_cache.delete(f"history:{user_id}")
+    pin_to_primary(user_id)
@@ -0,0 +1,142 @@
+import time
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils.timezone import now
+
+from core import minhash
+from .models import ContentHistory, ContentSignature
+
+# Per-user LSH indexes over recent content, built lazily from the stored
+# signatures and kept up to date in-process as new content is saved.
+_MAX_CACHED_USERS = 256
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+class _UserIndexes:
+    def __init__(self):
+        self.built_at = time.monotonic()
+        self.inputs = minhash.LSHIndex()
+        self.texts = minhash.LSHIndex()
+
+
+def input_features(params: dict) -> set:
+    """
+    Features describing what was asked for: the words of the free text (as a
+    bag, since inputs are short and often just reordered) plus the categorical choices.
+    """
+    free_text = ' '.join(str(params.get(name) or '') for name in ('title', 'context', 'tags'))
+    features = minhash.shingles(free_text, k=1)
+    for name in ('niche', 'tone', 'platform'):
+        value = str(params.get(name) or '').strip().lower()
+        if value:
+            features.add(f"{name}:{value}")
+    return features
+
+
+def text_features(text: str) -> set:
+    return minhash.shingles(text, k=3)
+
+
+def update_signature(content: ContentHistory) -> ContentSignature:
+    """Computes and stores the signatures for `content`, updating any cached index."""
+    signature, _ = ContentSignature.objects.update_or_create(
+        content=content,
+        defaults={
+            'input_signature': minhash.signature(input_features(content.get_input_params())),
+            'text_signature': minhash.signature(text_features(content.generated_text)),
+        }
+    )
+    with _lock:
+        indexes = _indexes.get(content.user_id)
+        if indexes is not None:
+            indexes.inputs.add(content.pk, bytes(signature.input_signature))
+            indexes.texts.add(content.pk, bytes(signature.text_signature))
+    return signature
+
+
+def add_signatures(contents) -> list:
+    """
+    Signs new content in one query. For rows saved with bulk_create, which
+    sends no post_save signal to sign them one at a time.
+    """
+    signatures = ContentSignature.objects.bulk_create([
+        ContentSignature(
+            content=content,
+            input_signature=minhash.signature(input_features(content.get_input_params())),
+            text_signature=minhash.signature(text_features(content.generated_text)),
+        )
+        for content in contents
+    ])
+    with _lock:
+        for signature in signatures:
+            indexes = _indexes.get(signature.content.user_id)
+            if indexes is not None:
+                indexes.inputs.add(signature.content_id, bytes(signature.input_signature))
+                indexes.texts.add(signature.content_id, bytes(signature.text_signature))
+    return signatures
+
+
+def forget(content_id, user_id):
+    """Drops a deleted piece of content from the cached index."""
+    with _lock:
+        indexes = _indexes.get(user_id)
+        if indexes is not None:
+            indexes.inputs.remove(content_id)
+            indexes.texts.remove(content_id)
+
+
+def _get_indexes(user_id) -> _UserIndexes:
+    with _lock:
+        indexes = _indexes.get(user_id)
+        if indexes is not None and time.monotonic() - indexes.built_at < settings.NEAR_DUPLICATE_INDEX_TTL:
+            _indexes.move_to_end(user_id)
+            return indexes
+
+    # (Re)build from the database. Other instances may have saved content
+    # since our last build, which is why cached indexes expire.
+    indexes = _UserIndexes()
+    since = now() - timedelta(days=settings.NEAR_DUPLICATE_WINDOW_DAYS)
+    rows = ContentSignature.objects.filter(
+        content__user_id=user_id, content__created_at__gte=since
+    ).values_list('content_id', 'input_signature', 'text_signature')
+    for content_id, input_signature, text_signature in rows.iterator(chunk_size=2000):
+        indexes.inputs.add(content_id, bytes(input_signature))
+        indexes.texts.add(content_id, bytes(text_signature))
+
+    with _lock:
+        _indexes[user_id] = indexes
+        _indexes.move_to_end(user_id)
+        while len(_indexes) > _MAX_CACHED_USERS:
+            _indexes.popitem(last=False)
+    return indexes
+
+
+def _resolve(matches, user_id, exclude_id=None):
+    ids = [content_id for content_id, _ in matches if content_id != exclude_id]
+    if not ids:
+        return []
+    since = now() - timedelta(days=settings.NEAR_DUPLICATE_WINDOW_DAYS)
+    objects = ContentHistory.objects.filter(user_id=user_id, created_at__gte=since).in_bulk(ids)
+    return [(objects[content_id], score) for content_id, score in matches if content_id in objects]
+
+
+def find_similar_requests(user, params: dict) -> list:
+    """
+    Returns `(ContentHistory, similarity)` pairs for recent content that was
+    generated from near-identical inputs, most similar first. Used before
+    calling the AI so the user can reuse what they already have.
+    """
+    sig = minhash.signature(input_features(params))
+    matches = _get_indexes(user.pk).inputs.query(sig, settings.NEAR_DUPLICATE_THRESHOLD)
+    return _resolve(matches, user.pk)
+
+
+def find_similar_content(content: ContentHistory) -> list:
+    """Returns `(ContentHistory, similarity)` pairs for recent content whose text is near-identical."""
+    sig = minhash.signature(text_features(content.generated_text))
+    matches = _get_indexes(content.user_id).texts.query(sig, settings.NEAR_DUPLICATE_THRESHOLD)
+    return _resolve(matches, content.user_id, exclude_id=content.pk)
@@ -0,0 +1,139 @@
+import csv
+import json
+import zlib
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import ArchivedContent, ContentHistory, parse_input_params
+
+# Columns written for every exported row, in order.
+EXPORT_FIELDS = [
+    'id', 'created_at', 'title', 'status', 'prompt_version', 'model_name',
+    'variant_group', 'variant', 'input_params', 'generated_text', 'generated_image_url',
+]
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+# Rows fetched per database round trip (and per server-side cursor fetch on PostgreSQL).
+CHUNK_SIZE = 2000
+# Serialized output is gathered into blocks of about this size before being
+# compressed and handed to the server, rather than one tiny write per row.
+BLOCK_SIZE = 64 * 1024
+
+
+def export_rows(queryset, fields=EXPORT_FIELDS, chunk_size=CHUNK_SIZE):
+    """
+    Yields one row (a list of values) per ContentHistory row. Rows are
+    streamed with `.iterator()` as plain tuples, so neither the queryset cache
+    nor model instances ever hold more than one chunk in memory.
+    """
+    params_index = fields.index('input_params') if 'input_params' in fields else None
+    text_index = fields.index('generated_text') if 'generated_text' in fields else None
+    rows = queryset.order_by('pk').values_list(
+        *fields, 'pk', 'legacy_input_params', 'is_archived'
+    ).iterator(chunk_size=chunk_size)
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        # Archived text is fetched for the whole chunk in one query.
+        archived = {}
+        if text_index is not None:
+            archived = ArchivedContent.load_texts(pk for *_, pk, _, is_archived in chunk if is_archived)
+        for *row, pk, legacy, is_archived in chunk:
+            # Rows that have not been backfilled yet still hold their inputs in the legacy column.
+            if params_index is not None and row[params_index] is None:
+                row[params_index] = parse_input_params(legacy)
+            if is_archived and text_index is not None:
+                row[text_index] = archived.get(pk, '')
+            yield row
+
+
+class _Echo:
+    """A file-like object whose write() returns the value, for use with csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows, fields=EXPORT_FIELDS):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        # JSON columns are written as JSON text.
+        yield writer.writerow([
+            json.dumps(value, ensure_ascii=False) if isinstance(value, dict) else value for value in row
+        ])
+
+
+def iter_jsonl(rows, fields=EXPORT_FIELDS):
+    for row in rows:
+        yield json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+SERIALIZERS = {
+    'csv': iter_csv,
+    'jsonl': iter_jsonl,
+}
+
+
+def iter_blocks(lines, block_size=BLOCK_SIZE):
+    """Encodes text lines to UTF-8 and joins them into blocks of roughly `block_size` bytes."""
+    block = []
+    size = 0
+    for line in lines:
+        data = line.encode()
+        block.append(data)
+        size += len(data)
+        if size >= block_size:
+            yield b''.join(block)
+            block = []
+            size = 0
+    if block:
+        yield b''.join(block)
+
+
+def gzip_stream(blocks, level=3):
+    """
+    Compresses a stream of byte blocks into a single gzip member as it goes.
+    Level 3 is about three times faster than zlib's default of 6 on exported
+    text and only a few percent larger, which matters when compressing inline.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_content(queryset, fmt: str = 'csv', compress: bool = False, fields=EXPORT_FIELDS,
+                   chunk_size=CHUNK_SIZE):
+    """
+    Streams a ContentHistory queryset as CSV or JSON Lines.
+
+    Args:
+        queryset: The ContentHistory rows to export.
+        fmt: One of EXPORT_FORMATS.
+        compress: Whether to gzip the output on the fly.
+        fields: The columns to export.
+        chunk_size: Rows fetched per database round trip.
+
+    Returns:
+        An iterator of byte blocks. Memory use is bounded by `chunk_size` and
+        BLOCK_SIZE, not by the number of rows exported.
+    """
+    if fmt not in SERIALIZERS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    rows = export_rows(queryset, fields=fields, chunk_size=chunk_size)
+    blocks = iter_blocks(SERIALIZERS[fmt](rows, fields=fields))
+    return gzip_stream(blocks) if compress else blocks
+
+
+def user_export(user, fmt: str = 'csv', compress: bool = False):
+    """Streams the complete content history of `user`."""
+    return export_content(ContentHistory.objects.filter(user=user), fmt=fmt, compress=compress)
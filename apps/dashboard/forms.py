@@ -1,5 +1,7 @@
 from django import forms
 
+from core.prompts import MAX_VARIANTS
+
 
 class ContentGenerationForm(forms.Form):
     """
@@ -51,6 +53,20 @@ class ContentGenerationForm(forms.Form):
         help_text="Choose the desired writing style."
     )
     
+    # Choices for the target platform; these match SocialConnection.PLATFORM_CHOICES.
+    PLATFORM_CHOICES = [
+        ('', 'Any Platform (Optional)'),
+        ('x_com', 'X.com'),
+        ('linkedin', 'LinkedIn'),
+    ]
+
+    platform = forms.ChoiceField(
+        choices=PLATFORM_CHOICES,
+        required=False,
+        label="Target Platform",
+        help_text="Tailor the content to a specific social platform."
+    )
+    
     tags = forms.CharField(
         required=False,
         label="Keywords or Tags",
@@ -58,12 +74,30 @@ class ContentGenerationForm(forms.Form):
         widget=forms.TextInput(attrs={'placeholder': 'e.g., solar power, green tech, sustainability'})
     )
     
+    # Several options from one AI call, saved as sibling history items.
+    VARIANT_CHOICES = [(1, 'One version')] + [(count, f'{count} versions') for count in range(2, MAX_VARIANTS + 1)]
+
+    variants = forms.TypedChoiceField(
+        choices=VARIANT_CHOICES,
+        coerce=int,
+        empty_value=1,
+        required=False,
+        label="Versions",
+        help_text="Get several different takes to choose from, for the same single credit."
+    )
+    
     generate_image = forms.BooleanField(
         required=False,
         label="Generate a matching image (costs 3 credits)",
         help_text="Create a unique AI-generated image based on your content title and niche."
     )
     
+    allow_similar = forms.BooleanField(
+        required=False,
+        label="Generate anyway, even if I have similar content",
+        help_text="By default we offer to reuse recent content generated from near-identical inputs."
+    )
+    
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Define the common Tailwind CSS classes
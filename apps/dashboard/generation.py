@@ -0,0 +1,180 @@
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+from .models import ContentHistory
+from .prompt_cache import prompt_cache
+from .variants import save_variants
+from apps.billing.models import Credits
+from apps.billing.pricing import generation_cost, minimum_cost
+from core.ai_engine import gemini_client
+from core.async_views import release_connections
+from core.images import delete_images, publish_image
+from core.metering import usage_scope
+from utils.logger import logging
+from core.prompts import variant_platforms
+
+
+def _generation_calls(prompt_data, prompt, model_name, cached):
+    """
+    The AI calls a generation makes. Yields each as `(method, args)`, the
+    name of a `gemini_client` method, and is sent back its result; the
+    caller makes the call, or awaits the method's async counterpart (see
+    `generate_content` and `agenerate_content`).
+
+    Returns `(generated_text, variants, model_name, image)`: the text, or
+    the versions, the model that wrote them and the generated image, if
+    one was asked for. `cached` is a ContentHistory whose text is reused
+    instead of calling the AI (see prompt_cache.py).
+    """
+    variant_count = prompt_data.get('variants') or 1
+    generated_text = variants = image = None
+    if variant_count > 1:
+        variants, model_name = yield 'generate_variants', (
+            prompt, variant_platforms(prompt_data), variant_count, model_name
+        )
+    elif cached is not None:
+        generated_text, model_name = cached.generated_text, cached.model_name
+    else:
+        generated_text, model_name = yield 'generate_text', (prompt, model_name)
+
+    if prompt_data.get('generate_image'):
+        image_prompt = f"An image for: {prompt_data['title']} in the {prompt_data['niche']} niche."
+        image = yield 'generate_image', (image_prompt,)
+    return generated_text, variants, model_name, image
+
+
+def _publish_image(user, image):
+    """
+    Uploads a generated image and its resized versions. Returns
+    `(image_url, image_variants, key_prefix)`.
+    """
+    if image is None:
+        return None, {}, None
+    image_file, content_type = image
+    key_prefix = f"content/{user.pk}/{uuid.uuid4().hex}"
+    with image_file:
+        # The original plus resized WebP/AVIF versions, to R2.
+        image_variants = publish_image(image_file, key_prefix, content_type)
+    return image_variants.pop('original'), image_variants, key_prefix
+
+
+def _discard_image(key_prefix):
+    """Deletes an image published for a generation that was not saved after all."""
+    if key_prefix is None:
+        return
+    try:
+        delete_images(key_prefix)
+    except Exception as e:
+        logging.error(f"Could not delete the image of an unsaved generation, {key_prefix}: {e}")
+
+
+def _remember(content, cached):
+    if cached is None and isinstance(content, ContentHistory):
+        prompt_cache.remember(content)
+
+
+def generate_content(user, prompt_data, prompt, prompt_version, model_name):
+    """
+    Generates the content for `prompt_data`, then debits the user's credits
+    and saves it to their history (see `save_generation`). The AI and image
+    calls are made outside any database transaction; if any step fails,
+    nothing is charged or saved. A recent generation for a near-identical
+    request is reused, if the prompt cache has one.
+
+    Returns the ContentHistory row or, for several versions, the sibling rows.
+    """
+    cached = prompt_cache.lookup(user, prompt_data, prompt_version)
+    with usage_scope(user, prompt_version) as usage:
+        calls = _generation_calls(prompt_data, prompt, model_name, cached)
+        result = None
+        while True:
+            try:
+                method, args = calls.send(result)
+            except StopIteration as done:
+                generated_text, variants, model_name, image = done.value
+                break
+            result = getattr(gemini_client, method)(*args)
+        image_url, image_variants, image_key = _publish_image(user, image)
+
+    cost = generation_cost(usage, prompt_data.get('generate_image'), cached is not None)
+    try:
+        content = save_generation(
+            user, cost, prompt_data, generated_text, image_url, image_variants, prompt_version, model_name, variants
+        )
+    except Exception:
+        # E.g. the credits were spent meanwhile: nothing is saved, so the image goes too.
+        _discard_image(image_key)
+        raise
+    _remember(content, cached)
+    return content
+
+
+async def agenerate_content(user, prompt_data, prompt, prompt_version, model_name):
+    """
+    `generate_content` for the ASGI deployment: the Gemini calls are
+    awaited instead of holding a worker thread.
+    """
+    cached = await sync_to_async(prompt_cache.lookup)(user, prompt_data, prompt_version)
+    await release_connections()
+    with usage_scope(user, prompt_version) as usage:
+        calls = _generation_calls(prompt_data, prompt, model_name, cached)
+        result = None
+        while True:
+            try:
+                method, args = calls.send(result)
+            except StopIteration as done:
+                generated_text, variants, model_name, image = done.value
+                break
+            result = await getattr(gemini_client, f'a{method}')(*args)
+        image_url, image_variants, image_key = await sync_to_async(_publish_image)(user, image)
+
+    cost = generation_cost(usage, prompt_data.get('generate_image'), cached is not None)
+    try:
+        content = await sync_to_async(save_generation)(
+            user, cost, prompt_data, generated_text, image_url, image_variants, prompt_version, model_name, variants
+        )
+    except Exception:
+        await sync_to_async(_discard_image)(image_key)
+        raise
+    _remember(content, cached)
+    return content
+
+
+def save_generation(user, cost, prompt_data, generated_text, image_url, image_variants, prompt_version,
+                    model_name, variants=None):
+    """
+    Debits the credits and saves the content in one short transaction.
+    Returns the ContentHistory row, or with `variants`, the list of sibling
+    rows. A generation that used more tokens than the balance covers takes
+    it to zero.
+    """
+    with transaction.atomic():
+        # Checked again under the row lock: other requests may have spent
+        # credits while this one was waiting on the AI.
+        user_credits = Credits.objects.select_for_update().get(user=user)
+        if user_credits.balance < minimum_cost(prompt_data.get('generate_image')):
+            raise Exception("You don't have enough credits for this operation.")
+        user_credits.balance -= min(cost, user_credits.balance)
+        user_credits.save()
+
+        if variants:
+            # Every version shares the one image.
+            return save_variants(
+                user, prompt_data, variants,
+                generated_image_url=image_url,
+                image_variants=image_variants,
+                prompt_version=prompt_version,
+                model_name=model_name
+            )
+        return ContentHistory.objects.create(
+            user=user,
+            title=prompt_data['title'],
+            input_params=prompt_data,
+            generated_text=generated_text,
+            generated_image_url=image_url,
+            image_variants=image_variants,
+            prompt_version=prompt_version,
+            model_name=model_name
+        )
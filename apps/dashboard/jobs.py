@@ -0,0 +1,18 @@
+from .generation import generate_content
+from apps.billing.models import Credits
+from apps.billing.pricing import minimum_cost
+from core.model_router import model_router
+from core.prompts import build_prompt
+
+
+def resume_generation(job):
+    """
+    Runs a generation cut off by an instance shutting down (see
+    core/lifecycle.py) again from its inputs. The content lands in the
+    user's history, as if the original request had finished.
+    """
+    prompt_data = job.payload
+    if Credits.objects.get(user=job.user).balance < minimum_cost(prompt_data.get('generate_image')):
+        raise Exception("Not enough credits left to finish the generation.")
+    prompt, prompt_version = build_prompt(prompt_data)
+    generate_content(job.user, prompt_data, prompt, prompt_version, model_router.route(prompt_data))
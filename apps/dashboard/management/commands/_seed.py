@@ -0,0 +1,48 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+
+from apps.dashboard.models import ContentHistory
+from core.synthetic import WORDS, NICHES, TONES
+
+# Shared by the benchmark commands. Modules starting with an underscore are
+# not picked up as management commands.
+
+def get_bench_user(username: str):
+    User = get_user_model()
+    user, _ = User.objects.get_or_create(
+        username=username, defaults={'email': f'{username}@example.com', 'is_active': False}
+    )
+    return user
+
+
+def seed_content(user, rows: int, batch_size: int = 5000, seed: int = 42) -> tuple:
+    """
+    Tops the user's history up to `rows` synthetic ContentHistory rows.
+    Returns `(rows_created, seconds_taken)`.
+    """
+    rng = random.Random(seed)
+    existing = ContentHistory.objects.filter(user=user).count()
+    to_create = max(rows - existing, 0)
+    created = to_create
+    start = time.perf_counter()
+    while to_create > 0:
+        batch = min(batch_size, to_create)
+        objects = []
+        for _ in range(batch):
+            title = ' '.join(rng.choices(WORDS, k=4)).title()
+            objects.append(ContentHistory(
+                user=user,
+                title=title,
+                input_params={
+                    'title': title,
+                    'niche': rng.choice(NICHES),
+                    'tone': rng.choice(TONES),
+                    'tags': ', '.join(rng.sample(WORDS, k=3)),
+                },
+                generated_text=' '.join(rng.choices(WORDS, k=120)),
+            ))
+        ContentHistory.objects.bulk_create(objects)
+        to_create -= batch
+    return created, time.perf_counter() - start
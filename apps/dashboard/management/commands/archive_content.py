@@ -0,0 +1,138 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Length
+from django.utils.timezone import now
+
+from apps.dashboard.models import ArchivedContent, ContentHistory
+from apps.dashboard.search import index_archived_text
+
+HOT_TABLE = ContentHistory._meta.db_table
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves the text of old content into the compressed archive table in batches, "
+        "then reports the change in hot-table size and dashboard query latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=settings.CONTENT_ARCHIVE_AFTER_DAYS,
+                            help="Archive content created more than this many days ago.")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--limit', type=int, default=None, help="Stop after archiving this many rows.")
+        parser.add_argument('--vacuum', action='store_true',
+                            help="VACUUM the hot table afterwards so the size report reflects the freed space.")
+        parser.add_argument('--repeat', type=int, default=20, help="Times to run each latency probe.")
+
+    def handle(self, *args, **options):
+        cutoff = now() - timedelta(days=options['older_than'])
+        probe_users = list(
+            ContentHistory.objects.values('user_id').annotate(n=Count('id')).order_by('-n')
+            .values_list('user_id', flat=True)[:5]
+        )
+
+        before_size, before_text = self._table_size(), self._hot_text_bytes()
+        before_latency = self._probe_latency(probe_users, options['repeat'])
+
+        done, original, compressed = self._archive(cutoff, options['batch_size'], options['limit'])
+        if options['vacuum']:
+            self._vacuum()
+
+        after_size, after_text = self._table_size(), self._hot_text_bytes()
+        after_latency = self._probe_latency(probe_users, options['repeat'])
+
+        ratio = original / compressed if compressed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {done} rows: {original / 1024 / 1024:.1f} MiB of text stored as "
+            f"{compressed / 1024 / 1024:.1f} MiB ({ratio:.1f}x)."
+        ))
+        self.stdout.write(f"  hot text: {_mib(before_text)} -> {_mib(after_text)}")
+        if before_size is not None:
+            note = '' if options['vacuum'] else " (run with --vacuum to reclaim the freed space)"
+            self.stdout.write(f"  hot table on disk: {_mib(before_size)} -> {_mib(after_size)}{note}")
+        for name in before_latency:
+            self.stdout.write(
+                f"  {name:18} p50 {before_latency[name]:.2f}ms -> {after_latency[name]:.2f}ms"
+            )
+
+    def _archive(self, cutoff, batch_size, limit):
+        """Archives eligible rows in batches; each batch commits on its own, so the command can be re-run."""
+        candidates = ContentHistory.objects.filter(created_at__lt=cutoff, is_archived=False)
+        done = original = compressed = 0
+        last_pk = 0
+        while limit is None or done < limit:
+            size = batch_size if limit is None else min(batch_size, limit - done)
+            batch = list(
+                candidates.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', 'generated_text')[:size]
+            )
+            if not batch:
+                break
+            archives = [ArchivedContent.from_text(pk, text) for pk, text in batch]
+            with transaction.atomic():
+                ArchivedContent.objects.bulk_create(archives)
+                # Indexed from the text in hand: once cleared, the hot index no longer has it.
+                index_archived_text(batch)
+                ContentHistory.objects.filter(pk__in=[pk for pk, _ in batch]).update(generated_text='', is_archived=True)
+
+            done += len(batch)
+            original += sum(archive.original_size for archive in archives)
+            compressed += sum(len(archive.data) for archive in archives)
+            last_pk = batch[-1][0]
+            self.stdout.write(f"  {done} rows archived (up to id {last_pk})...")
+        return done, original, compressed
+
+    def _hot_text_bytes(self) -> int:
+        return ContentHistory.objects.aggregate(total=Sum(Length('generated_text')))['total'] or 0
+
+    def _table_size(self):
+        """The on-disk size of the hot table including TOAST and indexes, where the database can tell us."""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("SELECT pg_total_relation_size(%s)", [HOT_TABLE])
+                return cursor.fetchone()[0]
+            if connection.vendor == 'sqlite':
+                try:
+                    cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = %s", [HOT_TABLE])
+                    return cursor.fetchone()[0]
+                except Exception:
+                    return None  # SQLite built without the dbstat table.
+        return None
+
+    def _vacuum(self):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f"VACUUM (ANALYZE) {HOT_TABLE}")
+            elif connection.vendor == 'sqlite':
+                cursor.execute("VACUUM")
+
+    def _probe_latency(self, user_ids, repeat) -> dict:
+        """Median latency of the dashboard's history query and a date-range count, in milliseconds."""
+        probes = {
+            'history sidebar': lambda user_id: list(
+                ContentHistory.objects.filter(user_id=user_id)[:settings.DASHBOARD_HISTORY_LIMIT]
+            ),
+            'last 30 days count': lambda user_id: ContentHistory.objects.filter(
+                user_id=user_id, created_at__gte=now() - timedelta(days=30)
+            ).count(),
+        }
+        results = {}
+        for name, probe in probes.items():
+            timings = []
+            for _ in range(repeat):
+                for user_id in user_ids:
+                    start = time.perf_counter()
+                    probe(user_id)
+                    timings.append((time.perf_counter() - start) * 1000)
+            results[name] = statistics.median(timings) if timings else 0.0
+        return results
+
+
+def _mib(size) -> str:
+    return f"{size / 1024 / 1024:.1f} MiB"
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.dashboard.models import ContentHistory, parse_input_params
+
+
+class Command(BaseCommand):
+    help = (
+        "Converts legacy text input_params into the JSON column in small batches. "
+        "Each batch commits on its own, so the command can be stopped and re-run at any time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--sleep', type=float, default=0.0,
+                            help="Seconds to pause between batches, to limit load on a busy database.")
+
+    def handle(self, *args, **options):
+        pending = ContentHistory.objects.filter(input_params__isnull=True, legacy_input_params__isnull=False)
+        self.stdout.write(f"{pending.count()} rows to backfill.")
+
+        done = unparseable = 0
+        last_pk = 0
+        start = time.perf_counter()
+        while True:
+            # Keyset pagination: each batch starts after the last converted row,
+            # so batches stay cheap no matter how far along the backfill is.
+            batch = list(
+                pending.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', 'legacy_input_params')[:options['batch_size']]
+            )
+            if not batch:
+                break
+
+            rows = []
+            for pk, legacy in batch:
+                params = parse_input_params(legacy)
+                if not params and legacy.strip() not in ('', '{}'):
+                    unparseable += 1
+                # Unparseable rows are stored as {} so they are not retried forever.
+                rows.append(ContentHistory(pk=pk, input_params=params))
+            with transaction.atomic():
+                ContentHistory.objects.bulk_update(rows, ['input_params'])
+
+            done += len(rows)
+            last_pk = batch[-1][0]
+            self.stdout.write(f"  {done} rows converted (up to id {last_pk})...")
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfilled {done} rows in {time.perf_counter() - start:.1f}s ({unparseable} could not be parsed)."
+        ))
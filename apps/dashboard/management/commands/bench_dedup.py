@@ -0,0 +1,65 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.dashboard.dedup import input_features
+from core import minhash
+
+# A realistic vocabulary size; a tiny one would put every row in the same LSH buckets.
+_vocab_rng = random.Random(3)
+WORDS = [
+    ''.join(_vocab_rng.choices('abcdefghijklmnopqrstuvwxyz', k=_vocab_rng.randint(3, 9)))
+    for _ in range(5000)
+]
+
+
+class Command(BaseCommand):
+    help = "Measures near-duplicate index lookups against a synthetic history (no database needed)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000, help="History size to index.")
+        parser.add_argument('--queries', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(7)
+
+        def random_params():
+            return {
+                'title': ' '.join(rng.choices(WORDS, k=6)),
+                'context': ' '.join(rng.choices(WORDS, k=20)),
+                'tags': ', '.join(rng.choices(WORDS, k=3)),
+                'niche': rng.choice(['Technology', 'Health', 'Finance']),
+            }
+
+        history = [random_params() for _ in range(options['rows'])]
+        start = time.perf_counter()
+        index = minhash.LSHIndex()
+        for pk, params in enumerate(history):
+            index.add(pk, minhash.signature(input_features(params)))
+        self.stdout.write(f"Indexed {len(index)} rows in {time.perf_counter() - start:.2f}s")
+
+        signing, lookups, hits = [], [], 0
+        for i in range(options['queries']):
+            # Half the queries are light rewordings of existing content.
+            if i % 2:
+                params = dict(history[rng.randrange(len(history))])
+                params['title'] = params['title'].replace(' ', '  ', 1) + ' today'
+            else:
+                params = random_params()
+            start = time.perf_counter()
+            sig = minhash.signature(input_features(params))
+            signed = time.perf_counter()
+            matches = index.query(sig, 0.8)
+            done = time.perf_counter()
+            signing.append((signed - start) * 1000)
+            lookups.append((done - signed) * 1000)
+            hits += bool(matches)
+
+        lookups.sort()
+        self.stdout.write(f"  signature: p50={statistics.median(signing):.3f}ms")
+        self.stdout.write(
+            f"  lookup:    p50={statistics.median(lookups):.3f}ms  "
+            f"p99={lookups[int(len(lookups) * 0.99) - 1]:.3f}ms  hit rate={hits / options['queries']:.0%}"
+        )
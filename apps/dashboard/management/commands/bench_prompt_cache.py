@@ -0,0 +1,120 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.dashboard.prompt_cache import PromptCache
+from core.embeddings import STOP_WORDS, HashingEmbedder
+from core.synthetic import NICHES, PLATFORMS, TONES
+from core.vector_index import VectorIndex
+
+# A realistic vocabulary size; a tiny one would make unrelated titles look alike.
+_vocab_rng = random.Random(3)
+WORDS = [
+    ''.join(_vocab_rng.choices('abcdefghijklmnopqrstuvwxyz', k=_vocab_rng.randint(3, 9)))
+    for _ in range(5000)
+]
+FILLERS = sorted(STOP_WORDS)
+# The cache is partitioned per user; the history is one (very busy) user's.
+USER_ID = 1
+
+EXAMPLES = [
+    ("AI in healthcare", "healthcare AI"),
+    ("The future of solar energy", "Solar energy: the future"),
+    ("10 startup tips", "10 tips for startups"),
+    ("AI in healthcare", "AI in finance"),
+    ("Remote team leadership", "Remote team burnout"),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the semantic prompt cache's index (apps/dashboard/prompt_cache.py) on synthetic "
+        "requests: hit rate for rephrased requests, false hits for new ones, LSH recall against an "
+        "exact scan, lookup latency and memory per 100k entries. No database needed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entries', type=int, default=100_000, help="Cached generations to index.")
+        parser.add_argument('--queries', type=int, default=2000)
+        parser.add_argument('--threshold', type=float, default=0.9)
+        parser.add_argument('--tables', type=int, default=8, help="LSH tables.")
+        parser.add_argument('--bits', type=int, default=8, help="Bits per LSH code.")
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        embedder = HashingEmbedder()
+        cache = PromptCache(threshold=options['threshold'], capacity=options['entries'], ttl=None)
+
+        def random_request():
+            return {
+                'title': ' '.join(rng.choices(WORDS, k=rng.randint(3, 7))),
+                'tags': ', '.join(rng.choices(WORDS, k=rng.randint(0, 3))),
+                'niche': rng.choice(NICHES),
+                'tone': rng.choice(TONES + ['']),
+                'platform': rng.choice(PLATFORMS + ['']),
+            }
+
+        def rephrase(data):
+            # Reordered words, a stop word or two, different case and punctuation.
+            words = data['title'].split()
+            rng.shuffle(words)
+            for _ in range(rng.randint(0, 2)):
+                words.insert(rng.randrange(len(words) + 1), rng.choice(FILLERS))
+            title = ' '.join(words).title() + rng.choice(['', '?', '!', ':'])
+            return {**data, 'title': title}
+
+        self.stdout.write("Example similarities:")
+        for a, b in EXAMPLES:
+            self.stdout.write(f"  {float(embedder.embed(a) @ embedder.embed(b)):.2f}  {a!r} / {b!r}")
+
+        index = VectorIndex(embedder.dim, capacity=options['entries'], tables=options['tables'], bits=options['bits'])
+        history = [random_request() for _ in range(options['entries'])]
+        start = time.perf_counter()
+        for key, data in enumerate(history):
+            index.add(key, cache._partition(USER_ID, data, 'v1'), embedder.embed(cache._text(data)))
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"Indexed {len(index)} entries in {elapsed:.1f}s ({elapsed / len(index) * 1e6:.0f}µs each) "
+            f"across {len(cache._partitions)} partitions"
+        )
+
+        lookups, exact_lookups = [], []
+        hits = false_hits = recall_misses = exact_hits = 0
+        rephrased = options['queries'] // 2
+        for i in range(options['queries']):
+            repeat = i < rephrased
+            data = rephrase(rng.choice(history)) if repeat else random_request()
+            partition = cache._partition(USER_ID, data, 'v1')
+            start = time.perf_counter()
+            vector = embedder.embed(cache._text(data))
+            match = index.search(vector, partition, options['threshold'])
+            lookups.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            exact = index.search(vector, partition, options['threshold'], exact=True)
+            exact_lookups.append((time.perf_counter() - start) * 1000)
+            if repeat:
+                hits += match is not None
+            else:
+                false_hits += match is not None
+            if exact is not None:
+                exact_hits += 1
+                recall_misses += match is None or match[0] != exact[0]
+
+        lookups.sort()
+        exact_lookups.sort()
+        fresh = options['queries'] - rephrased
+        self.stdout.write(f"  hit rate (rephrased): {hits / rephrased:.1%}")
+        self.stdout.write(f"  false hits (new):     {false_hits / fresh:.1%}")
+        self.stdout.write(f"  LSH recall vs exact:  {1 - recall_misses / max(exact_hits, 1):.1%}")
+        self.stdout.write(
+            f"  lookup (embed+search): p50={statistics.median(lookups):.3f}ms  "
+            f"p99={lookups[int(len(lookups) * 0.99) - 1]:.3f}ms"
+        )
+        self.stdout.write(
+            f"  exact scan:            p50={statistics.median(exact_lookups):.3f}ms  "
+            f"p99={exact_lookups[int(len(exact_lookups) * 0.99) - 1]:.3f}ms"
+        )
+        self.stdout.write(f"  memory: {index.nbytes / len(index) * 100_000 / 2**20:.1f} MiB per 100k entries")
@@ -0,0 +1,45 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.dashboard.models import ContentHistory
+from apps.dashboard.search import search_content
+from ._seed import get_bench_user, seed_content
+
+QUERIES = ["solar energy", "rocket launch", "brand campaign", "electric vehicle battery", "remote team leadership"]
+
+
+class Command(BaseCommand):
+    help = "Seeds a throwaway user with synthetic content and measures full-text search latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help="Number of ContentHistory rows to seed.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=50, help="Times to run each query.")
+        parser.add_argument('--keep', action='store_true', help="Keep the seeded rows afterwards.")
+
+    def handle(self, *args, **options):
+        user = get_bench_user('bench-search')
+        created, seconds = seed_content(user, options['rows'], batch_size=options['batch_size'])
+        self.stdout.write(f"Seeded {created} rows in {seconds:.1f}s "
+                          f"({connection.vendor}, {options['rows']} rows total)")
+
+        try:
+            for query in QUERIES:
+                timings = []
+                for i in range(options['repeat']):
+                    start = time.perf_counter()
+                    page = search_content(user, query, page=1 + i % 3)
+                    timings.append((time.perf_counter() - start) * 1000)
+                timings.sort()
+                self.stdout.write(
+                    f"  {query!r:28} matches={page.total:>8}  "
+                    f"p50={statistics.median(timings):.1f}ms  "
+                    f"p95={timings[int(len(timings) * 0.95) - 1]:.1f}ms  max={timings[-1]:.1f}ms"
+                )
+        finally:
+            if not options['keep']:
+                ContentHistory.objects.filter(user=user).delete()
+                user.delete()
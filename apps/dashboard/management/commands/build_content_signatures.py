@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from apps.dashboard.dedup import update_signature
+from apps.dashboard.models import ContentHistory
+
+
+class Command(BaseCommand):
+    help = "Computes near-duplicate signatures for content that does not have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--rebuild', action='store_true', help="Recompute signatures for every row.")
+
+    def handle(self, *args, **options):
+        queryset = ContentHistory.objects.order_by('pk')
+        if not options['rebuild']:
+            queryset = queryset.filter(signature__isnull=True)
+
+        done = 0
+        for content in queryset.iterator(chunk_size=options['batch_size']):
+            update_signature(content)
+            done += 1
+            if done % options['batch_size'] == 0:
+                self.stdout.write(f"  {done} signed...")
+        self.stdout.write(self.style.SUCCESS(f"Signed {done} content rows."))
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.13 on 2026-10-19 17:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dashboard", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contenthistory",
+            name="prompt_version",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="The id of the prompt template used for generation (for A/B analysis).",
+                max_length=50,
+            ),
+        ),
+    ]
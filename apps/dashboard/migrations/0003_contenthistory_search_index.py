@@ -0,0 +1,75 @@
+from django.db import migrations
+
+# The full-text index is database specific, so it is created with raw SQL
+# rather than model fields. See apps/dashboard/search.py for the queries.
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE dashboard_contenthistory
+    ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(generated_text, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX dashboard_contenthistory_search_gin ON dashboard_contenthistory USING GIN (search_vector)",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS dashboard_contenthistory_search_gin",
+    "ALTER TABLE dashboard_contenthistory DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE dashboard_contenthistory_fts USING fts5(
+        title, generated_text, content='dashboard_contenthistory', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER dashboard_contenthistory_fts_insert AFTER INSERT ON dashboard_contenthistory BEGIN
+        INSERT INTO dashboard_contenthistory_fts(rowid, title, generated_text)
+        VALUES (new.id, new.title, new.generated_text);
+    END
+    """,
+    """
+    CREATE TRIGGER dashboard_contenthistory_fts_delete AFTER DELETE ON dashboard_contenthistory BEGIN
+        INSERT INTO dashboard_contenthistory_fts(dashboard_contenthistory_fts, rowid, title, generated_text)
+        VALUES ('delete', old.id, old.title, old.generated_text);
+    END
+    """,
+    """
+    CREATE TRIGGER dashboard_contenthistory_fts_update AFTER UPDATE OF title, generated_text ON dashboard_contenthistory BEGIN
+        INSERT INTO dashboard_contenthistory_fts(dashboard_contenthistory_fts, rowid, title, generated_text)
+        VALUES ('delete', old.id, old.title, old.generated_text);
+        INSERT INTO dashboard_contenthistory_fts(rowid, title, generated_text)
+        VALUES (new.id, new.title, new.generated_text);
+    END
+    """,
+    "INSERT INTO dashboard_contenthistory_fts(dashboard_contenthistory_fts) VALUES ('rebuild')",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS dashboard_contenthistory_fts_update",
+    "DROP TRIGGER IF EXISTS dashboard_contenthistory_fts_delete",
+    "DROP TRIGGER IF EXISTS dashboard_contenthistory_fts_insert",
+    "DROP TABLE IF EXISTS dashboard_contenthistory_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0002_contenthistory_prompt_version"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"postgresql": POSTGRES_FORWARD, "sqlite": SQLITE_FORWARD}),
+            _run({"postgresql": POSTGRES_REVERSE, "sqlite": SQLITE_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.13 on 2026-10-19 17:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dashboard", "0003_contenthistory_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContentSignature",
+            fields=[
+                (
+                    "content",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="signature",
+                        serialize=False,
+                        to="dashboard.contenthistory",
+                    ),
+                ),
+                (
+                    "input_signature",
+                    models.BinaryField(
+                        help_text="Signature of the generation inputs (title, context, tags, niche, tone, platform)."
+                    ),
+                ),
+                (
+                    "text_signature",
+                    models.BinaryField(help_text="Signature of the generated text."),
+                ),
+            ],
+        ),
+    ]
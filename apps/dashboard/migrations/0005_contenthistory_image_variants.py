@@ -0,0 +1,22 @@
+# Generated by Django 4.2.13 on 2026-10-19 17:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dashboard", "0004_contentsignature"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contenthistory",
+            name="image_variants",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="URLs of the resized WebP/AVIF versions of the generated image, by format and width.",
+            ),
+        ),
+    ]
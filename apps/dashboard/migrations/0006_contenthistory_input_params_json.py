@@ -0,0 +1,63 @@
+from django.db import migrations, models
+import django.db.models.fields.json
+import django.db.models.functions.text
+
+# Existing input_params values are Python reprs rather than JSON, so the
+# column cannot simply be cast. It is renamed to legacy_input_params and a
+# new JSON column takes its place; `manage.py backfill_input_params` then
+# converts old rows in batches, outside of this migration.
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0005_contenthistory_image_variants"),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name="contenthistory",
+            old_name="input_params",
+            new_name="legacy_input_params",
+        ),
+        migrations.AlterField(
+            model_name="contenthistory",
+            name="legacy_input_params",
+            field=models.TextField(
+                blank=True,
+                editable=False,
+                help_text="The pre-JSON text form of input_params, for rows awaiting backfill.",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="contenthistory",
+            name="input_params",
+            field=models.JSONField(
+                blank=True,
+                help_text="A JSON object containig all user inputs for generation.",
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="contenthistory",
+            index=models.Index(
+                models.F("user"),
+                django.db.models.functions.text.Lower(
+                    django.db.models.fields.json.KeyTextTransform(
+                        "niche", "input_params"
+                    )
+                ),
+                models.F("created_at"),
+                name="dashboard_ch_user_niche_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="contenthistory",
+            index=models.Index(
+                models.F("user"),
+                django.db.models.fields.json.KeyTextTransform("tone", "input_params"),
+                models.F("created_at"),
+                name="dashboard_ch_user_tone_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# GIN indexes are PostgreSQL only, so like the search index (0003) they are
+# created with raw SQL. The tag expression must match TAGS_SQL in
+# apps/dashboard/analytics.py exactly for the planner to use the index.
+
+POSTGRES_FORWARD = [
+    # Containment filters such as input_params @> '{"niche": "Technology"}'.
+    "CREATE INDEX dashboard_ch_params_gin ON dashboard_contenthistory USING GIN (input_params jsonb_path_ops)",
+    # Tag lookups and counts over the comma-separated tags string.
+    r"""
+    CREATE INDEX dashboard_ch_tags_gin ON dashboard_contenthistory
+    USING GIN ((regexp_split_to_array(lower(btrim(input_params ->> 'tags')), '\s*,\s*')))
+    """,
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS dashboard_ch_tags_gin",
+    "DROP INDEX IF EXISTS dashboard_ch_params_gin",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0006_contenthistory_input_params_json"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"postgresql": POSTGRES_FORWARD}),
+            _run({"postgresql": POSTGRES_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.13 on 2026-10-19 17:40
+
+import apps.dashboard.models
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def set_external_storage(apps, schema_editor):
+    # The archive is already zstd-compressed, so PostgreSQL should store it
+    # out of line without trying (and failing) to compress it again.
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            "ALTER TABLE dashboard_archivedcontent ALTER COLUMN data SET STORAGE EXTERNAL"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dashboard", "0007_contenthistory_input_params_gin"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedContent",
+            fields=[
+                (
+                    "content",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="archive",
+                        serialize=False,
+                        to="dashboard.contenthistory",
+                    ),
+                ),
+                (
+                    "codec",
+                    models.CharField(
+                        default="zstd",
+                        help_text="The codec used to compress `data` (see core/compression.py).",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "data",
+                    models.BinaryField(help_text="The compressed generated text."),
+                ),
+                (
+                    "original_size",
+                    models.PositiveIntegerField(
+                        help_text="The size of the uncompressed text in bytes."
+                    ),
+                ),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="contenthistory",
+            name="is_archived",
+            field=models.BooleanField(
+                default=False,
+                help_text="Whether generated_text has been moved to the compressed archive table.",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="contenthistory",
+            name="generated_text",
+            field=apps.dashboard.models.ArchivableTextField(
+                help_text="The full text content generation by the AI."
+            ),
+        ),
+        migrations.RunPython(set_external_storage, migrations.RunPython.noop),
+    ]
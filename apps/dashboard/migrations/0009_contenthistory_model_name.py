@@ -0,0 +1,23 @@
+# Generated by Django 4.2.13 on 2026-10-19 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dashboard", "0008_content_archive"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contenthistory",
+            name="model_name",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="The Gemini model that generated the text (see core/model_router.py).",
+                max_length=50,
+            ),
+        ),
+    ]
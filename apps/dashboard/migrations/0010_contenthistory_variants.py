@@ -0,0 +1,32 @@
+# Generated by Django 4.2.13 on 2026-10-19 18:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dashboard", "0009_contenthistory_model_name"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contenthistory",
+            name="variant",
+            field=models.PositiveSmallIntegerField(
+                blank=True,
+                help_text="The number of this option within its variant group, from 1.",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="contenthistory",
+            name="variant_group",
+            field=models.UUIDField(
+                blank=True,
+                db_index=True,
+                help_text="Shared by the variants generated together in one request.",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def fix_posted_x(apps, schema_editor):
+    # Posts to X were recorded as 'POSTED_X_COM', which is not a status choice.
+    ContentHistory = apps.get_model('dashboard', 'ContentHistory')
+    ContentHistory.objects.filter(status='POSTED_X_COM').update(status='POSTED_X')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dashboard", "0010_contenthistory_variants"),
+    ]
+
+    operations = [
+        migrations.RunPython(fix_posted_x, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+from django.db import migrations
+
+from core.compression import decompress_text
+
+# Archiving clears the hot-table text the 0003 index is built from, so the
+# body of archived content gets an index of its own. See
+# apps/dashboard/search.py for the queries.
+
+POSTGRES_FORWARD = [
+    "ALTER TABLE dashboard_archivedcontent ADD COLUMN search_vector tsvector",
+    "CREATE INDEX dashboard_archivedcontent_search_gin ON dashboard_archivedcontent USING GIN (search_vector)",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS dashboard_archivedcontent_search_gin",
+    "ALTER TABLE dashboard_archivedcontent DROP COLUMN IF EXISTS search_vector",
+]
+
+# Contentless (content=''), so the index does not keep an uncompressed copy
+# of the text the archive exists to shrink.
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE dashboard_archivedcontent_fts USING fts5(generated_text, content='')",
+]
+SQLITE_REVERSE = [
+    "DROP TABLE IF EXISTS dashboard_archivedcontent_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+def index_archived_content(apps, schema_editor):
+    """Indexes the text of content archived before this migration."""
+    from apps.dashboard.search import index_archived_text
+
+    ArchivedContent = apps.get_model("dashboard", "ArchivedContent")
+    using = schema_editor.connection.alias
+    rows = ArchivedContent.objects.using(using).values_list("content_id", "codec", "data")
+    batch = []
+    for content_id, codec, data in rows.iterator(chunk_size=500):
+        batch.append((content_id, decompress_text(data, codec)))
+        if len(batch) == 500:
+            index_archived_text(batch, using)
+            batch = []
+    index_archived_text(batch, using)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0011_contenthistory_posted_x_status"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"postgresql": POSTGRES_FORWARD, "sqlite": SQLITE_FORWARD}),
+            _run({"postgresql": POSTGRES_REVERSE, "sqlite": SQLITE_REVERSE}),
+        ),
+        migrations.RunPython(index_archived_content, migrations.RunPython.noop),
+    ]
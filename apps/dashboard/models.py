@@ -1,6 +1,64 @@
-from django.db import models
+import ast
+import json
+
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.query_utils import DeferredAttribute
+from django.db.models.fields.json import KT
+from django.db.models.functions import Lower
 from django.conf import settings
 
+from core.compression import ZSTD, compress_text, decompress_text
+
+def parse_input_params(value) -> dict:
+    """
+    Parses a stored `input_params` value into a dict.
+    Older rows hold a Python repr of the form data rather than JSON.
+    """
+    if isinstance(value, dict):
+        return value
+    try:
+        params = json.loads(value)
+    except (TypeError, ValueError):
+        try:
+            params = ast.literal_eval(value)
+        except (TypeError, ValueError, SyntaxError):
+            params = {}
+    return params if isinstance(params, dict) else {}
+
+
+class ArchivedTextDescriptor(DeferredAttribute):
+    """
+    Reads through to ArchivedContent for rows whose text has been archived,
+    so `content.generated_text` works the same for hot and archived rows.
+    The archived text is loaded on first access and kept on the instance.
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if value or not instance.is_archived:
+            return value
+        if '_archived_text' not in instance.__dict__:
+            instance.__dict__['_archived_text'] = ArchivedContent.load_texts([instance.pk]).get(instance.pk, '')
+        return instance.__dict__['_archived_text']
+
+    def __set__(self, instance, value):
+        # Defining __set__ makes this a data descriptor, so reads go through
+        # __get__ even once the hot-table value is in the instance __dict__.
+        instance.__dict__[self.field.attname] = value
+
+
+class ArchivableTextField(models.TextField):
+    """A TextField whose value may live in ArchivedContent (see ArchivedTextDescriptor)."""
+    descriptor_class = ArchivedTextDescriptor
+
+    def pre_save(self, model_instance, add):
+        # Save what belongs in the hot table, never the lazily loaded archive copy.
+        return model_instance.__dict__.get(self.attname)
+
+
 # This model mirrors the `content_history` table in our D1 SQL schema.
 # It is not used for database migrations but for data validation, serialization,
 # and providing an object-oriented interface to our data within Django.
@@ -30,10 +88,21 @@ class ContentHistory(models.Model):
     
     # JSONField is perfect for storing flexibal set of key value pairs
     # From the content generation form (niche, contextn tone, tags, etc)
-    input_params = models.TextField(
+    input_params = models.JSONField(
+        null=True,
+        blank=True,
         help_text="A JSON object containig all user inputs for generation."
     )
-    generated_text = models.TextField(
+    # Rows created before input_params became a JSONField kept a Python repr
+    # of the form data here. `backfill_input_params` converts them; once it
+    # has run everywhere this column can be dropped.
+    legacy_input_params = models.TextField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="The pre-JSON text form of input_params, for rows awaiting backfill."
+    )
+    generated_text = ArchivableTextField(
         help_text="The full text content generation by the AI."
     )
     generated_image_url = models.URLField(
@@ -42,6 +111,36 @@ class ContentHistory(models.Model):
         null=True,
         help_text="URL of the AI-generated image, if requested."
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="URLs of the resized WebP/AVIF versions of the generated image, by format and width."
+    )
+    prompt_version = models.CharField(
+        max_length=50,
+        blank=True,
+        default='',
+        help_text="The id of the prompt template used for generation (for A/B analysis)."
+    )
+    model_name = models.CharField(
+        max_length=50,
+        blank=True,
+        default='',
+        help_text="The Gemini model that generated the text (see core/model_router.py)."
+    )
+    # Options generated together in one request are sibling rows sharing a
+    # variant_group; single generations leave both fields empty.
+    variant_group = models.UUIDField(
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text="Shared by the variants generated together in one request."
+    )
+    variant = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        help_text="The number of this option within its variant group, from 1."
+    )
     status = models.CharField(
         max_length=20,
         choices=STATUS_CHOICE,
@@ -52,6 +151,10 @@ class ContentHistory(models.Model):
         auto_now_add=True,
         help_text="The timestamp when the content was generated."
     )
+    is_archived = models.BooleanField(
+        default=False,
+        help_text="Whether generated_text has been moved to the compressed archive table."
+    )
     
     def __str__(self):
         """
@@ -59,10 +162,113 @@ class ContentHistory(models.Model):
         """
         return f"'{self.title}' by {self.user.username} on {self.created_at.strftime('%Y-%m-%d')}"
     
+    def save(self, *args, **kwargs):
+        # Giving archived content new text brings it back to the hot table.
+        restored = self.is_archived and bool(self.__dict__.get('generated_text'))
+        if restored:
+            self.is_archived = False
+            self.__dict__.pop('_archived_text', None)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'is_archived'}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if restored:
+                ArchivedContent.objects.filter(content_id=self.pk).delete()
+    
+    def get_input_params(self) -> dict:
+        """Returns the generation inputs as a dict."""
+        if self.input_params is None:
+            return parse_input_params(self.legacy_input_params)
+        return parse_input_params(self.input_params)
+    
     class Meta:
         ordering = ["-created_at"]
         verbose_name_plural = 'Content Histories'
+        # Back the per-user analytics in analytics.py. The expressions must stay
+        # identical to the ones used there, or the database cannot use them.
+        # PostgreSQL also gets GIN indexes for containment and tag lookups (migration 0007).
+        indexes = [
+            models.Index(
+                F('user'), Lower(KT('input_params__niche')), F('created_at'),
+                name='dashboard_ch_user_niche_idx',
+            ),
+            models.Index(
+                F('user'), KT('input_params__tone'), F('created_at'),
+                name='dashboard_ch_user_tone_idx',
+            ),
+        ]
+
+
+class ContentSignature(models.Model):
+    """
+    MinHash signatures of a piece of content, used to spot near-duplicates.
+    Signatures are packed arrays of 32-bit integers (see core/minhash.py).
+    """
+    
+    content = models.OneToOneField(
+        ContentHistory,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='signature'
+    )
+    
+    input_signature = models.BinaryField(
+        help_text="Signature of the generation inputs (title, context, tags, niche, tone, platform)."
+    )
+    text_signature = models.BinaryField(
+        help_text="Signature of the generated text."
+    )
     
+    def __str__(self):
+        return f"Signature for content #{self.content_id}"
+
+
+class ArchivedContent(models.Model):
+    """
+    The zstd-compressed text of content moved out of the hot ContentHistory
+    table by `manage.py archive_content`. Keeping large, rarely read text
+    here keeps the hot table (and its scans and vacuums) small.
+    """
+    
+    content = models.OneToOneField(
+        ContentHistory,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='archive'
+    )
+    codec = models.CharField(
+        max_length=20,
+        default=ZSTD,
+        help_text="The codec used to compress `data` (see core/compression.py)."
+    )
+    data = models.BinaryField(
+        help_text="The compressed generated text."
+    )
+    original_size = models.PositiveIntegerField(
+        help_text="The size of the uncompressed text in bytes."
+    )
+    archived_at = models.DateTimeField(
+        auto_now_add=True
+    )
+    
+    def __str__(self):
+        return f"Archive for content #{self.content_id}"
     
+    @classmethod
+    def from_text(cls, content_id, text: str) -> 'ArchivedContent':
+        return cls(content_id=content_id, data=compress_text(text), original_size=len(text.encode()))
     
+    @classmethod
+    def load_texts(cls, content_ids) -> dict:
+        """Returns {content_id: text} for the given archived content, in one query."""
+        rows = cls.objects.filter(content_id__in=list(content_ids)).values_list('content_id', 'codec', 'data')
+        return {content_id: decompress_text(data, codec) for content_id, codec, data in rows}
     
+    @classmethod
+    def prefetch(cls, contents):
+        """Loads the archived text of several ContentHistory objects at once, avoiding a query per object."""
+        pending = [content for content in contents if content.is_archived and '_archived_text' not in content.__dict__]
+        if pending:
+            texts = cls.load_texts(content.pk for content in pending)
+            for content in pending:
+                content.__dict__['_archived_text'] = texts.get(content.pk, '')
@@ -0,0 +1,122 @@
+import threading
+import time
+
+from django.conf import settings
+
+from .models import ContentHistory
+
+
+class PromptCache:
+    """
+    A semantic cache in front of the Gemini text calls. Recent generations
+    are indexed by an embedding of their title and tags, partitioned by
+    user, prompt template, niche, tone and platform; a request close enough
+    to one of them (`threshold` cosine similarity) is served its text, so
+    rephrasings such as "AI in healthcare" and "healthcare AI" share one
+    generation. Generated content belongs to the user it was generated
+    for, so a user is only ever served their own.
+
+    Only the ContentHistory id is kept per entry; the text is read from the
+    database on a hit. The index is per process and built up as content is
+    generated. The embedding model is loaded on first use.
+    """
+
+    def __init__(self, threshold: float, capacity: int, ttl: float, model_name: str = '', enabled: bool = True):
+        self.threshold = threshold
+        self.capacity = capacity
+        self.ttl = ttl
+        self.model_name = model_name
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._embedder = None
+        self._index = None
+        self._partitions = {}
+        self.stats = {'lookups': 0, 'hits': 0, 'entries': 0, 'lookup_seconds': 0.0}
+
+    def cacheable(self, data: dict) -> bool:
+        """
+        Whether a request may be served from (and added to) the cache. The
+        context is free text that may be private, so requests with one are
+        left out, as are requests for several versions, and requests that
+        asked to generate anyway.
+        """
+        return (
+            self.enabled
+            and not data.get('context')
+            and not data.get('allow_similar')
+            and (data.get('variants') or 1) == 1
+        )
+
+    def lookup(self, user, data: dict, prompt_version: str):
+        """Returns the user's ContentHistory to reuse for this request, or None."""
+        if not self.cacheable(data):
+            return None
+        started = time.perf_counter()
+        index, embedder = self._get_index()
+        partition = self._partition(user.pk, data, prompt_version)
+        match = index.search(embedder.embed(self._text(data)), partition, self.threshold)
+        content = None
+        if match is not None:
+            content = ContentHistory.objects.filter(pk=match[0], user=user).first()
+            if content is None:
+                index.remove(match[0])
+        with self._lock:
+            self.stats['lookups'] += 1
+            self.stats['hits'] += content is not None
+            self.stats['lookup_seconds'] += time.perf_counter() - started
+        return content
+
+    def remember(self, content: ContentHistory):
+        """Adds freshly generated content to the cache."""
+        data = content.get_input_params()
+        if not self.cacheable(data):
+            return
+        index, embedder = self._get_index()
+        partition = self._partition(content.user_id, data, content.prompt_version)
+        index.add(content.pk, partition, embedder.embed(self._text(data)))
+        with self._lock:
+            self.stats['entries'] = len(index)
+
+    def forget(self, content_id):
+        if self._index is not None:
+            self._index.remove(content_id)
+
+    @staticmethod
+    def _text(data: dict) -> str:
+        return f"{data.get('title') or ''} {data.get('tags') or ''}"
+
+    def _partition(self, user_id: int, data: dict, prompt_version: str) -> int:
+        key = (
+            user_id,
+            prompt_version,
+            (data.get('niche') or '').strip().lower(),
+            (data.get('tone') or '').lower(),
+            (data.get('platform') or '').lower(),
+        )
+        with self._lock:
+            return self._partitions.setdefault(key, len(self._partitions))
+
+    def warm(self):
+        """Loads the embedding model and creates the index, ahead of the first request."""
+        if self.enabled:
+            self._get_index()
+
+    def _get_index(self):
+        with self._lock:
+            if self._index is None:
+                # Imported here, so numpy and any embedding model load with the cache, not at startup.
+                from core.embeddings import get_embedder
+                from core.vector_index import VectorIndex
+
+                self._embedder = get_embedder(self.model_name)
+                self._index = VectorIndex(self._embedder.dim, capacity=self.capacity, ttl=self.ttl)
+            return self._index, self._embedder
+
+
+prompt_cache = PromptCache(
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    capacity=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+    ttl=settings.SEMANTIC_CACHE_TTL,
+    model_name=settings.SEMANTIC_CACHE_MODEL,
+    enabled=settings.SEMANTIC_CACHE,
+)
@@ -0,0 +1,224 @@
+import re
+from dataclasses import dataclass, field
+
+from django.db import connection, connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from .models import ArchivedContent, ContentHistory
+
+# The search index itself is created by migration 0003:
+# - PostgreSQL: a generated `search_vector` tsvector column with a GIN index.
+# - SQLite: an FTS5 table kept in sync by triggers.
+# Both are updated by the database on every ContentHistory insert/update/delete.
+FTS_TABLE = 'dashboard_contenthistory_fts'
+SEARCH_CONFIG = 'english'
+
+# Archiving empties generated_text in the hot table, and with it the body
+# text in the index above. The body of archived content is indexed separately
+# by migration 0012, from the text as it is archived (see index_archived_text):
+# - PostgreSQL: a `search_vector` tsvector column on the archive table.
+# - SQLite: a contentless FTS5 table, so the index holds no copy of the text.
+ARCHIVE_TABLE = 'dashboard_archivedcontent'
+ARCHIVE_FTS_TABLE = 'dashboard_archivedcontent_fts'
+
+# SQLite cannot alter most columns in place, so Django rebuilds the table for
+# many schema changes, and the rebuild silently drops these triggers. They are
+# recreated after every migrate by restore_sqlite_triggers().
+SQLITE_TRIGGERS = {
+    f'{FTS_TABLE}_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON dashboard_contenthistory BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, title, generated_text)
+            VALUES (new.id, new.title, new.generated_text);
+        END
+    """,
+    f'{FTS_TABLE}_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON dashboard_contenthistory BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, generated_text)
+            VALUES ('delete', old.id, old.title, old.generated_text);
+        END
+    """,
+    f'{FTS_TABLE}_update': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+        AFTER UPDATE OF title, generated_text ON dashboard_contenthistory BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, generated_text)
+            VALUES ('delete', old.id, old.title, old.generated_text);
+            INSERT INTO {FTS_TABLE}(rowid, title, generated_text)
+            VALUES (new.id, new.title, new.generated_text);
+        END
+    """,
+}
+
+
+def restore_sqlite_triggers(using='default') -> list:
+    """
+    Recreates any missing FTS sync triggers and, if some were missing, rebuilds
+    the index from the table. Returns the names of the recreated triggers.
+    """
+    conn = connections[using]
+    if conn.vendor != 'sqlite':
+        return []
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT type, name FROM sqlite_master WHERE name LIKE %s", [f'{FTS_TABLE}%'])
+        existing = {name: kind for kind, name in cursor.fetchall()}
+        if existing.get(FTS_TABLE) != 'table':
+            return []  # The search migration has not been applied.
+        missing = [name for name in SQLITE_TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(SQLITE_TRIGGERS[name])
+        if missing:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return missing
+
+
+def index_archived_text(rows, using='default'):
+    """
+    Adds the text of content being archived to the archive search index.
+    `rows` are `(content_id, text)` pairs whose ArchivedContent rows exist;
+    call this before the hot-table text is cleared, in the same transaction.
+    """
+    conn = connections[using]
+    rows = list(rows)
+    if not rows:
+        return
+    with conn.cursor() as cursor:
+        if conn.vendor == 'postgresql':
+            cursor.executemany(
+                f"UPDATE {ARCHIVE_TABLE} SET search_vector = setweight(to_tsvector('{SEARCH_CONFIG}', %s), 'B') "
+                f"WHERE content_id = %s",
+                [(text, content_id) for content_id, text in rows],
+            )
+        elif conn.vendor == 'sqlite':
+            cursor.executemany(
+                f"INSERT INTO {ARCHIVE_FTS_TABLE}(rowid, generated_text) VALUES (%s, %s)", rows
+            )
+
+
+def unindex_archived_text(content_id, text, using='default'):
+    """
+    Removes archived content from the SQLite archive index. A contentless
+    FTS5 table can only forget a row given the text it was indexed with.
+    (The PostgreSQL vector goes with its row.)
+    """
+    conn = connections[using]
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {ARCHIVE_FTS_TABLE}({ARCHIVE_FTS_TABLE}, rowid, generated_text) VALUES ('delete', %s, %s)",
+            [content_id, text],
+        )
+
+
+@dataclass
+class SearchPage:
+    """One page of ranked search results."""
+    query: str
+    page: int
+    page_size: int
+    total: int
+    results: list = field(default_factory=list)
+
+    @property
+    def has_previous(self) -> bool:
+        return self.page > 1
+
+    @property
+    def has_next(self) -> bool:
+        return self.page * self.page_size < self.total
+
+
+def search_content(user, query: str, page: int = 1, page_size: int = 20) -> SearchPage:
+    """
+    Runs a ranked full-text search over the user's content history.
+
+    Args:
+        user: The owner of the content.
+        query: Free-form search text from the user.
+        page: 1-based page number.
+        page_size: Number of results per page.
+
+    Returns:
+        A SearchPage whose results are ContentHistory objects, best match first.
+    """
+    query = (query or '').strip()
+    page = max(page, 1)
+    if not query:
+        return SearchPage(query=query, page=page, page_size=page_size, total=0)
+
+    offset = (page - 1) * page_size
+    if connection.vendor == 'postgresql':
+        ids, total = _search_postgres(user.pk, query, offset, page_size)
+    elif connection.vendor == 'sqlite':
+        ids, total = _search_sqlite(user.pk, query, offset, page_size)
+    else:
+        ids, total = _search_fallback(user.pk, query, offset, page_size)
+
+    objects = ContentHistory.objects.in_bulk(ids)
+    results = [objects[pk] for pk in ids if pk in objects]
+    ArchivedContent.prefetch(results)
+    return SearchPage(query=query, page=page, page_size=page_size, total=total, results=results)
+
+
+def _search_postgres(user_id, query, offset, limit):
+    ts_query = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+    hot_vector = 'dashboard_contenthistory.search_vector'
+    # Archived rows match on their title here or their body in the archive;
+    # each side can use its own GIN index.
+    archived_matches = (
+        f"dashboard_contenthistory.id IN (SELECT content_id FROM {ARCHIVE_TABLE} "
+        f"WHERE {ARCHIVE_TABLE}.search_vector @@ {ts_query})"
+    )
+    archived_vector = (
+        f"coalesce((SELECT {ARCHIVE_TABLE}.search_vector FROM {ARCHIVE_TABLE} "
+        f"WHERE {ARCHIVE_TABLE}.content_id = dashboard_contenthistory.id), '')"
+    )
+    matches = ContentHistory.objects.filter(
+        RawSQL(f"({hot_vector} @@ {ts_query} OR {archived_matches})", (query, query), output_field=BooleanField()),
+        user_id=user_id,
+    )
+    ranked = matches.annotate(
+        rank=RawSQL(
+            f"ts_rank_cd({hot_vector} || {archived_vector}, {ts_query})", (query,), output_field=FloatField()
+        )
+    ).order_by('-rank', '-created_at')
+    ids = list(ranked.values_list('id', flat=True)[offset:offset + limit])
+    return ids, matches.count()
+
+
+def _fts5_query(query: str) -> str:
+    """Quotes each word so user input cannot inject FTS5 query syntax."""
+    return ' '.join(f'"{word}"' for word in re.findall(r'\w+', query))
+
+
+def _search_sqlite(user_id, query, offset, limit):
+    match = _fts5_query(query)
+    if not match:
+        return [], 0
+    # Matches from the hot index and the archive index of archived bodies.
+    # bm25() is lower-is-better; titles weigh more than the body text.
+    # CROSS JOIN makes SQLite run each MATCH once and then look rows up by id,
+    # instead of re-running the full-text query for every row of the user.
+    base = (
+        f"FROM (SELECT rowid AS id, bm25({FTS_TABLE}, 10.0, 1.0) AS rank FROM {FTS_TABLE} "
+        f"WHERE {FTS_TABLE} MATCH %s "
+        f"UNION ALL SELECT rowid, bm25({ARCHIVE_FTS_TABLE}) FROM {ARCHIVE_FTS_TABLE} "
+        f"WHERE {ARCHIVE_FTS_TABLE} MATCH %s) m "
+        f"CROSS JOIN dashboard_contenthistory h ON h.id = m.id WHERE h.user_id = %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT h.id {base} GROUP BY h.id ORDER BY MIN(m.rank), h.created_at DESC LIMIT %s OFFSET %s",
+            [match, match, user_id, limit, offset],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute(f"SELECT COUNT(DISTINCT h.id) {base}", [match, match, user_id])
+        total = cursor.fetchone()[0]
+    return ids, total
+
+
+def _search_fallback(user_id, query, offset, limit):
+    """Unranked substring search for databases without a full-text index."""
+    matches = ContentHistory.objects.filter(user_id=user_id, generated_text__icontains=query)
+    ids = list(matches.values_list('id', flat=True)[offset:offset + limit])
+    return ids, matches.count()
@@ -0,0 +1,57 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import invalidate_credits, invalidate_history
+from .dedup import update_signature, forget
+from .prompt_cache import prompt_cache
+from .search import restore_sqlite_triggers, unindex_archived_text
+from .models import ArchivedContent, ContentHistory
+from apps.billing.models import Credits
+from core.compression import decompress_text
+from utils.logger import logging
+
+
+@receiver([post_save, post_delete], sender=Credits)
+def credits_changed(sender, instance, **kwargs):
+    """Drops the cached balance whenever a user's Credits row changes."""
+    user_id = instance.user_id
+    # Wait for the commit so a concurrent read cannot re-cache the old value.
+    transaction.on_commit(lambda: invalidate_credits(user_id))
+
+
+@receiver([post_save, post_delete], sender=ContentHistory)
+def content_history_changed(sender, instance, **kwargs):
+    """Drops the cached history fragment whenever a user's content changes."""
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_history(user_id))
+
+
+@receiver(post_save, sender=ContentHistory)
+def content_history_saved(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Computes near-duplicate signatures for new content. Plain status updates
+    are skipped; saves that touch the inputs or text are re-signed.
+    """
+    signed_fields = {'title', 'input_params', 'generated_text'}
+    if created or (update_fields and signed_fields & set(update_fields)):
+        update_signature(instance)
+
+
+@receiver(post_delete, sender=ContentHistory)
+def content_history_deleted(sender, instance, **kwargs):
+    forget(instance.pk, instance.user_id)
+    prompt_cache.forget(instance.pk)
+
+
+@receiver(post_delete, sender=ArchivedContent)
+def archived_content_deleted(sender, instance, using, **kwargs):
+    """Drops restored or deleted content from the archive search index."""
+    unindex_archived_text(instance.content_id, decompress_text(instance.data, instance.codec), using)
+
+
+def restore_search_triggers(sender, using='default', **kwargs):
+    """Puts back the SQLite full-text triggers after migrations that rebuilt the table."""
+    restored = restore_sqlite_triggers(using)
+    if restored:
+        logging.info(f"Recreated SQLite full-text triggers: {', '.join(restored)}")
@@ -0,0 +1,131 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils.timezone import now
+
+from apps.authentication.models import User
+from apps.dashboard.analytics import DIMENSIONS, _window, generations_per_day, top_tags
+from apps.dashboard.models import ContentHistory, parse_input_params
+
+
+@pytest.fixture
+def alice(db):
+    return User.objects.create_user('alice', 'alice@example.com', 'pw')
+
+
+def generated(user, days_ago=0, **params):
+    content = ContentHistory.objects.create(user=user, title='Post', input_params=params, generated_text='Text')
+    if days_ago:
+        ContentHistory.objects.filter(pk=content.pk).update(created_at=now() - timedelta(days=days_ago))
+    return content
+
+
+def legacy(user, value):
+    content = ContentHistory.objects.create(user=user, title='Old', generated_text='Text')
+    ContentHistory.objects.filter(pk=content.pk).update(input_params=None, legacy_input_params=value)
+    return content
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('{"niche": "Food"}', {'niche': 'Food'}),
+    ("{'niche': 'Food', 'variants': 2}", {'niche': 'Food', 'variants': 2}),
+    ('not a dict', {}),
+    ('[1, 2]', {}),
+    (None, {}),
+    ({'niche': 'Food'}, {'niche': 'Food'}),
+])
+def test_legacy_input_params_are_parsed(value, expected):
+    assert parse_input_params(value) == expected
+
+
+def test_backfill_converts_legacy_rows_and_can_be_rerun(alice):
+    rows = [legacy(alice, "{'niche': 'Food'}"), legacy(alice, '{"tone": "Casual"}'), legacy(alice, 'garbage')]
+    fresh = generated(alice, niche='Travel')
+    assert ContentHistory.objects.get(pk=rows[0].pk).get_input_params() == {'niche': 'Food'}
+
+    output = StringIO()
+    call_command('backfill_input_params', '--batch-size', '2', stdout=output)
+
+    assert 'Backfilled 3 rows' in output.getvalue() and '(1 could not be parsed)' in output.getvalue()
+    params = dict(ContentHistory.objects.values_list('pk', 'input_params'))
+    assert [params[row.pk] for row in rows] == [{'niche': 'Food'}, {'tone': 'Casual'}, {}]
+    assert params[fresh.pk] == {'niche': 'Travel'}
+
+    call_command('backfill_input_params', stdout=output)
+    assert '0 rows to backfill' in output.getvalue()
+
+
+def test_generations_are_counted_per_day_and_niche(alice):
+    bob = User.objects.create_user('bob', 'bob@example.com', 'pw')
+    generated(alice, niche='Food')
+    generated(alice, niche='food ')  # Not stripped, so its own value.
+    generated(alice, niche='FOOD')
+    generated(alice, niche='Travel')
+    generated(alice, days_ago=2, niche='Food')
+    generated(alice, days_ago=40, niche='Food')
+    generated(bob, niche='Food')
+
+    rows = generations_per_day(alice, 'niche', days=30)
+
+    today, two_days_ago = now().date(), (now() - timedelta(days=2)).date()
+    assert rows == [
+        {'day': two_days_ago, 'value': 'food', 'count': 1},
+        {'day': today, 'value': 'food', 'count': 2},
+        {'day': today, 'value': 'food ', 'count': 1},
+        {'day': today, 'value': 'travel', 'count': 1},
+    ]
+    assert sum(row['count'] for row in generations_per_day(None, 'niche', days=30)) == 6
+
+
+def test_filters_narrow_the_window(alice):
+    generated(alice, niche='Food', tone='Casual', tags='Recipes, vegan')
+    generated(alice, niche='Food', tone='Formal', tags='recipes')
+    generated(alice, niche='Travel', tone='Casual', tags='trains')
+
+    assert _window(alice, 30, {'niche': ' FOOD '}).count() == 2
+    assert _window(alice, 30, {'tone': 'Casual'}).count() == 2
+    assert _window(alice, 30, {'tag': 'Vegan'}).count() == 1
+    assert _window(alice, 30, {'niche': 'food', 'tone': 'Casual'}).count() == 1
+
+
+def test_top_tags_are_normalised(alice):
+    generated(alice, tags='Recipes, vegan')
+    generated(alice, tags='recipes ,  ')
+    generated(alice, tags='')
+
+    assert top_tags(alice) == [{'value': 'recipes', 'count': 2}, {'value': 'vegan', 'count': 1}]
+
+
+@pytest.mark.skipif(connection.vendor != 'postgresql', reason="The expression and GIN indexes are for PostgreSQL.")
+@pytest.mark.parametrize('filters, index', [
+    ({'niche': 'food'}, 'dashboard_ch_user_niche_idx'),
+    ({'tone': 'Casual'}, 'dashboard_ch_params_gin'),
+    ({'tag': 'recipes'}, 'dashboard_ch_tags_gin'),
+])
+def test_filters_use_the_input_params_indexes(alice, filters, index):
+    generated(alice, niche='Food', tone='Casual', tags='recipes')
+    sql, params = _window(alice, 30, filters).values('pk').query.sql_with_params()
+
+    with connection.cursor() as cursor:
+        # The table is tiny, so a sequential scan would otherwise win.
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute(f"EXPLAIN {sql}", params)
+        plan = ' '.join(row[0] for row in cursor.fetchall())
+
+    assert index in plan
+
+
+def test_analytics_view(alice, client):
+    generated(alice, niche='Food', tags='recipes')
+    client.force_login(alice)
+
+    niche = client.get('/dashboard/analytics/niche/?days=7', secure=True).json()
+    assert niche['days'] == 7
+    assert [row['value'] for row in niche['results']] == ['food']
+    tags = client.get('/dashboard/analytics/tags/?niche=food', secure=True).json()
+    assert tags['filters'] == {'niche': 'food'} and tags['results'] == [{'value': 'recipes', 'count': 1}]
+    assert client.get('/dashboard/analytics/colour/', secure=True).status_code == 404
+    assert client.get('/dashboard/analytics/niche/?days=week', secure=True).status_code == 400
@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+
+import pytest
+from django.core.cache import cache as shared_cache
+
+from apps.authentication.models import User
+from apps.billing.models import Credits
+from apps.dashboard import cache as dashboard_cache
+from apps.dashboard.cache import get_credit_balance, get_rendered_history, sidebar_cache
+from apps.dashboard.models import ContentHistory
+from core import cache as core_cache
+from core.cache import TwoTierCache
+
+
+@pytest.fixture(autouse=True)
+def caches():
+    shared_cache.clear()
+    sidebar_cache.clear_local()
+    yield
+    shared_cache.clear()
+    sidebar_cache.clear_local()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(core_cache, 'time', SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+@pytest.fixture
+def alice(db):
+    user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+    Credits.objects.create(user=user, balance=10)
+    return user
+
+
+def test_values_are_loaded_once_and_served_from_each_tier(clock):
+    tiers = TwoTierCache('tests', local_ttl=5, shared_ttl=60)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return 'value'
+
+    assert tiers.get_or_set('key', loader) == 'value'
+    shared_cache.delete('tests:key')
+    assert tiers.get_or_set('key', loader) == 'value'  # The local tier.
+
+    shared_cache.set('tests:key', 'shared value')
+    clock.now += 6
+    assert tiers.get_or_set('key', loader) == 'shared value'  # The local entry expired.
+    assert loads == [1]
+
+    tiers.delete('key')
+    assert tiers.get_or_set('key', loader) == 'value'
+    assert loads == [1, 1]
+
+
+def test_local_tier_keeps_the_most_recently_used_entries(clock):
+    tiers = TwoTierCache('tests', max_entries=2)
+    for key in ('a', 'b'):
+        tiers.get_or_set(key, lambda: key)
+    tiers.get_or_set('a', lambda: 'unused')
+    tiers.get_or_set('c', lambda: 'c')
+
+    assert tiers._local.get('tests:a') == 'a'
+    assert tiers._local.get('tests:b') is None
+
+
+def test_dashboard_sidebar_is_cached(alice, django_assert_num_queries):
+    ContentHistory.objects.create(user=alice, title='First post', generated_text='Text')
+    assert get_credit_balance(alice) == 10
+    assert 'First post' in get_rendered_history(alice)
+
+    with django_assert_num_queries(0):
+        assert get_credit_balance(alice) == 10
+        assert 'First post' in get_rendered_history(alice)
+
+
+def test_changes_invalidate_the_sidebar_and_pin_the_user(alice, monkeypatch, django_capture_on_commit_callbacks):
+    pinned = []
+    monkeypatch.setattr(dashboard_cache, 'pin_to_primary', pinned.append)
+    get_credit_balance(alice)
+    get_rendered_history(alice)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Credits.objects.filter(user=alice).update(balance=3)
+        credits = Credits.objects.get(user=alice)
+        credits.save()
+        content = ContentHistory.objects.create(user=alice, title='Second post', generated_text='Text')
+
+    assert get_credit_balance(alice) == 3
+    assert 'Second post' in get_rendered_history(alice)
+    assert pinned == [alice.pk, alice.pk]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        content.delete()
+    assert 'Second post' not in get_rendered_history(alice)
+
+
+def test_balance_is_created_for_users_without_credits(db):
+    bob = User.objects.create_user('bob', 'bob@example.com', 'pw')
+
+    assert get_credit_balance(bob) == Credits._meta.get_field('balance').default
+    assert Credits.objects.filter(user=bob).exists()
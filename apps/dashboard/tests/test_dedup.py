@@ -0,0 +1,68 @@
+import pytest
+
+from apps.authentication.models import User
+from apps.dashboard import dedup
+from apps.dashboard.models import ContentHistory
+
+REQUEST = {
+    'title': 'The future of solar energy in Europe',
+    'niche': 'Technology',
+    'tone': 'Casual',
+    'tags': 'solar power, green tech',
+}
+
+
+@pytest.fixture(autouse=True)
+def fresh_indexes():
+    dedup._indexes.clear()
+    yield
+    dedup._indexes.clear()
+
+
+@pytest.fixture
+def alice():
+    return User.objects.create_user('alice', 'alice@example.com', 'pw')
+
+
+def generated(user, text="Solar panels keep getting cheaper and more efficient every single year.", **data):
+    return ContentHistory.objects.create(
+        user=user, title=data['title'], input_params=data, generated_text=text,
+    )
+
+
+@pytest.mark.django_db
+def test_reworded_request_finds_the_earlier_content(alice):
+    content = generated(alice, **REQUEST)
+
+    similar = dedup.find_similar_requests(alice, {**REQUEST, 'title': 'Solar energy in Europe: the future'})
+
+    assert [item for item, _ in similar] == [content]
+
+
+@pytest.mark.django_db
+def test_different_request_or_user_finds_nothing(alice):
+    bob = User.objects.create_user('bob', 'bob@example.com', 'pw')
+    generated(alice, **REQUEST)
+
+    assert dedup.find_similar_requests(alice, {**REQUEST, 'title': 'Hiring your first engineer'}) == []
+    assert dedup.find_similar_requests(bob, REQUEST) == []
+
+
+@pytest.mark.django_db
+def test_new_and_deleted_content_update_a_cached_index(alice):
+    first = generated(alice, **REQUEST)
+    assert dedup.find_similar_requests(alice, REQUEST)
+
+    second = generated(alice, **REQUEST)
+    first.delete()
+
+    assert [item for item, _ in dedup.find_similar_requests(alice, REQUEST)] == [second]
+
+
+@pytest.mark.django_db
+def test_near_identical_text_is_flagged_but_not_the_content_itself(alice):
+    text = ' '.join(f"Point {i}: solar panels keep getting cheaper and more efficient." for i in range(8))
+    earlier = generated(alice, text=text, **REQUEST)
+    later = generated(alice, text=text.replace('more efficient.', 'more efficient every year.', 1), **{**REQUEST, 'title': 'Something else'})
+
+    assert [item for item, _ in dedup.find_similar_content(later)] == [earlier]
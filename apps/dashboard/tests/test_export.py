@@ -0,0 +1,93 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from apps.authentication.models import User
+from apps.dashboard import export
+from apps.dashboard.export import EXPORT_FIELDS, export_content
+from apps.dashboard.models import ArchivedContent, ContentHistory
+
+TEXT = 'Line one, with "quotes" and a comma.\nLine two: café ☕'
+
+
+@pytest.fixture
+def alice(db):
+    user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+    for n in range(5):
+        ContentHistory.objects.create(
+            user=user, title=f'Post {n}', input_params={'niche': 'Food', 'n': n}, generated_text=f'{TEXT} #{n}'
+        )
+    return user
+
+
+def exported(queryset, fmt, compress, **kwargs):
+    return b''.join(export_content(queryset, fmt=fmt, compress=compress, **kwargs))
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'jsonl'])
+def test_gzipped_export_decompresses_to_the_plain_export(alice, monkeypatch, fmt):
+    # Small chunks and blocks, so the export spans several of each.
+    iter_blocks = export.iter_blocks
+    monkeypatch.setattr(export, 'iter_blocks', lambda lines: iter_blocks(lines, block_size=100))
+    rows = ContentHistory.objects.filter(user=alice)
+
+    blocks = list(export_content(rows, fmt=fmt, chunk_size=2))
+    compressed = exported(rows, fmt, compress=True, chunk_size=2)
+
+    assert len(blocks) > 2
+    assert gzip.decompress(compressed) == b''.join(blocks)
+
+
+def test_jsonl_export_round_trips(alice):
+    lines = gzip.decompress(exported(ContentHistory.objects.filter(user=alice), 'jsonl', True)).decode().splitlines()
+
+    records = [json.loads(line) for line in lines]
+    assert [record['title'] for record in records] == [f'Post {n}' for n in range(5)]
+    assert records[3]['generated_text'] == f'{TEXT} #3'
+    assert records[3]['input_params'] == {'niche': 'Food', 'n': 3}
+    assert set(records[0]) == set(EXPORT_FIELDS)
+
+
+def test_csv_export_round_trips(alice):
+    text = exported(ContentHistory.objects.filter(user=alice), 'csv', False).decode()
+
+    header, *rows = csv.reader(io.StringIO(text))
+    assert header == EXPORT_FIELDS
+    assert len(rows) == 5
+    row = dict(zip(header, rows[2]))
+    assert row['generated_text'] == f'{TEXT} #2'
+    assert json.loads(row['input_params']) == {'niche': 'Food', 'n': 2}
+
+
+def test_export_includes_archived_text_and_legacy_inputs(alice):
+    archived, legacy = ContentHistory.objects.filter(user=alice).order_by('pk')[:2]
+    ArchivedContent.from_text(archived.pk, 'From the archive').save()
+    ContentHistory.objects.filter(pk=archived.pk).update(generated_text='', is_archived=True)
+    ContentHistory.objects.filter(pk=legacy.pk).update(input_params=None, legacy_input_params="{'niche': 'Old'}")
+
+    lines = exported(ContentHistory.objects.filter(user=alice), 'jsonl', False).decode().splitlines()
+
+    records = {record['id']: record for record in map(json.loads, lines)}
+    assert records[archived.pk]['generated_text'] == 'From the archive'
+    assert records[legacy.pk]['input_params'] == {'niche': 'Old'}
+
+
+def test_export_view_gzips_when_the_client_accepts_it(alice, client):
+    client.force_login(alice)
+
+    response = client.get('/dashboard/export/?format=jsonl', HTTP_ACCEPT_ENCODING='gzip, br', secure=True)
+
+    assert response['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response['Vary']
+    assert 'attachment; filename="aygentx-content-' in response['Content-Disposition']
+    lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+    assert len(lines) == 5
+
+
+def test_export_view_rejects_unknown_formats(alice, client):
+    client.force_login(alice)
+
+    assert client.get('/dashboard/export/?format=xml', secure=True).status_code == 400
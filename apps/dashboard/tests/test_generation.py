@@ -0,0 +1,132 @@
+import io
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from apps.authentication.models import User
+from apps.billing.models import Credits
+from apps.dashboard import generation
+from apps.dashboard.generation import agenerate_content, generate_content
+from apps.dashboard.models import ContentHistory
+from apps.dashboard.prompt_cache import PromptCache
+from core.ai_engine import gemini_client
+
+REQUEST = {'title': 'AI in healthcare', 'niche': 'Health'}
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    cache = PromptCache(threshold=0.9, capacity=100, ttl=3600)
+    monkeypatch.setattr(generation, 'prompt_cache', cache)
+    return cache
+
+
+@pytest.fixture
+def user():
+    user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+    Credits.objects.create(user=user, balance=10)
+    return user
+
+
+@pytest.mark.django_db
+def test_debits_made_during_the_ai_call_are_kept(user, monkeypatch):
+    def generate_text(prompt, model_name):
+        # Another request spends credits while this one waits on the AI.
+        Credits.objects.filter(user=user).update(balance=4)
+        return "Generated", model_name
+
+    monkeypatch.setattr(gemini_client, 'generate_text', generate_text)
+    generate_content(user, REQUEST, 'prompt', 'general-v1', 'gemini-2.5-flash')
+
+    assert Credits.objects.get(user=user).balance == 3
+
+
+@pytest.mark.django_db
+def test_balance_spent_during_the_ai_call_saves_nothing(user, monkeypatch):
+    def generate_text(prompt, model_name):
+        Credits.objects.filter(user=user).update(balance=0)
+        return "Generated", model_name
+
+    monkeypatch.setattr(gemini_client, 'generate_text', generate_text)
+    with pytest.raises(Exception, match="enough credits"):
+        generate_content(user, REQUEST, 'prompt', 'general-v1', 'gemini-2.5-flash')
+
+    assert not ContentHistory.objects.exists()
+
+
+@pytest.mark.django_db
+def test_sync_and_async_generation_save_the_same(user, monkeypatch):
+    async def agenerate_text(prompt, model_name):
+        return "Generated", model_name
+
+    def generate_image(prompt):
+        return io.BytesIO(b'image'), 'image/png'
+
+    async def agenerate_image(prompt):
+        return generate_image(prompt)
+
+    def publish_image(image_file, key, content_type):
+        assert image_file.read() == b'image'
+        return {'original': f'https://cdn.example.com/{key}', 'webp': {512: f'https://cdn.example.com/{key}-512.webp'}}
+
+    monkeypatch.setattr(gemini_client, 'generate_text', lambda prompt, model_name: ("Generated", model_name))
+    monkeypatch.setattr(gemini_client, 'agenerate_text', agenerate_text)
+    monkeypatch.setattr(gemini_client, 'generate_image', generate_image)
+    monkeypatch.setattr(gemini_client, 'agenerate_image', agenerate_image)
+    monkeypatch.setattr(generation, 'publish_image', publish_image)
+    request = {**REQUEST, 'generate_image': True, 'allow_similar': True}
+
+    rows = [
+        generate_content(user, request, 'prompt', 'general-v1', 'gemini-2.5-flash'),
+        # Run as the ASGI handler would: its database work on this thread.
+        async_to_sync(agenerate_content)(user, request, 'prompt', 'general-v1', 'gemini-2.5-flash'),
+    ]
+
+    for row in rows:
+        assert row.generated_text == "Generated"
+        assert row.model_name == 'gemini-2.5-flash'
+        assert row.generated_image_url.startswith('https://cdn.example.com/content/')
+        assert list(row.image_variants) == ['webp']
+    assert ContentHistory.objects.filter(user=user).count() == 2
+
+
+@pytest.mark.django_db
+def test_text_served_from_the_prompt_cache_is_not_charged_again(user, cache, monkeypatch):
+    calls = []
+
+    def generate_text(prompt, model_name):
+        calls.append(prompt)
+        return "Generated", model_name
+
+    monkeypatch.setattr(gemini_client, 'generate_text', generate_text)
+    first = generate_content(user, REQUEST, 'prompt', 'general-v1', 'gemini-2.5-flash')
+    assert Credits.objects.get(user=user).balance == 9
+
+    again = generate_content(user, REQUEST, 'prompt', 'general-v1', 'gemini-2.5-flash')
+
+    assert len(calls) == 1
+    assert again.pk != first.pk
+    assert again.generated_text == first.generated_text
+    assert Credits.objects.get(user=user).balance == 9
+    assert cache.stats['hits'] == 1
+
+
+@pytest.mark.django_db
+def test_image_of_a_generation_that_is_not_saved_is_deleted(user, monkeypatch):
+    deleted = []
+
+    def generate_text(prompt, model_name):
+        Credits.objects.filter(user=user).update(balance=0)
+        return "Generated", model_name
+
+    monkeypatch.setattr(gemini_client, 'generate_text', generate_text)
+    monkeypatch.setattr(gemini_client, 'generate_image', lambda prompt: (io.BytesIO(b'image'), 'image/png'))
+    monkeypatch.setattr(generation, 'publish_image', lambda image_file, key, content_type: {'original': key})
+    monkeypatch.setattr(generation, 'delete_images', deleted.append)
+
+    with pytest.raises(Exception, match="enough credits"):
+        generate_content(user, {**REQUEST, 'generate_image': True}, 'prompt', 'general-v1', 'gemini-2.5-flash')
+
+    assert len(deleted) == 1
+    assert deleted[0].startswith(f'content/{user.pk}/')
+    assert not ContentHistory.objects.exists()
@@ -0,0 +1,50 @@
+import pytest
+
+from apps.authentication.models import User
+from apps.dashboard.models import ContentHistory
+from apps.dashboard.prompt_cache import PromptCache
+
+REQUEST = {'title': 'AI in healthcare', 'niche': 'Health', 'tone': 'Casual', 'platform': 'x_com', 'tags': 'ai'}
+
+
+@pytest.fixture
+def cache():
+    return PromptCache(threshold=0.9, capacity=100, ttl=3600)
+
+
+def generated(user, **data):
+    return ContentHistory.objects.create(
+        user=user,
+        title=data['title'],
+        input_params=data,
+        generated_text=f"Generated for {user.username}",
+        prompt_version='x_com-v1',
+    )
+
+
+@pytest.mark.django_db
+def test_rephrased_request_is_served_the_users_own_content(cache):
+    alice = User.objects.create_user('alice', 'alice@example.com', 'pw')
+    content = generated(alice, **REQUEST)
+    cache.remember(content)
+
+    assert cache.lookup(alice, {**REQUEST, 'title': 'Healthcare AI!'}, 'x_com-v1') == content
+
+
+@pytest.mark.django_db
+def test_another_users_content_is_never_served(cache):
+    alice = User.objects.create_user('alice', 'alice@example.com', 'pw')
+    bob = User.objects.create_user('bob', 'bob@example.com', 'pw')
+    cache.remember(generated(alice, **REQUEST))
+
+    assert cache.lookup(bob, REQUEST, 'x_com-v1') is None
+    assert cache.stats['hits'] == 0
+
+
+@pytest.mark.django_db
+def test_requests_with_private_context_are_not_cached(cache):
+    alice = User.objects.create_user('alice', 'alice@example.com', 'pw')
+    cache.remember(generated(alice, **REQUEST, context='Our Q3 numbers'))
+
+    assert cache.lookup(alice, REQUEST, 'x_com-v1') is None
+    assert cache.lookup(alice, {**REQUEST, 'context': 'Our Q3 numbers'}, 'x_com-v1') is None
@@ -0,0 +1,134 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import connection
+from django.utils.timezone import now
+
+from apps.authentication.models import User
+from apps.dashboard.models import ArchivedContent, ContentHistory
+from apps.dashboard.search import FTS_TABLE, SQLITE_TRIGGERS, search_content
+
+
+@pytest.fixture
+def alice(db):
+    return User.objects.create_user('alice', 'alice@example.com', 'pw')
+
+
+def written(user, title, text, days_ago=0):
+    content = ContentHistory.objects.create(user=user, title=title, generated_text=text)
+    if days_ago:
+        ContentHistory.objects.filter(pk=content.pk).update(created_at=now() - timedelta(days=days_ago))
+    return content
+
+
+def archive():
+    call_command('archive_content', '--older-than', '1', '--repeat', '1', stdout=StringIO())
+
+
+def test_archived_content_is_found_by_its_body(alice):
+    content = written(alice, 'How plants eat', 'Leaves turn light into sugar by photosynthesis.', days_ago=30)
+    archive()
+
+    assert ContentHistory.objects.get(pk=content.pk).is_archived
+    results = search_content(alice, 'photosynthesis')
+    assert results.total == 1
+    assert results.results == [content]
+    assert results.results[0].generated_text.startswith('Leaves turn light')
+    assert search_content(alice, 'plants').total == 1
+
+
+def test_restored_content_is_found_once(alice):
+    content = written(alice, 'How plants eat', 'Leaves turn light into sugar by photosynthesis.', days_ago=30)
+    archive()
+
+    content = ContentHistory.objects.get(pk=content.pk)
+    content.generated_text = 'Roots drink water.'
+    content.save()
+
+    assert not ArchivedContent.objects.filter(content_id=content.pk).exists()
+    assert search_content(alice, 'photosynthesis').total == 0
+    assert search_content(alice, 'roots').total == 1
+
+
+def test_deleted_archived_content_is_not_found(alice):
+    content = written(alice, 'How plants eat', 'Leaves turn light into sugar by photosynthesis.', days_ago=30)
+    written(alice, 'Photosynthesis', 'A new post.')
+    archive()
+
+    content.delete()
+
+    assert search_content(alice, 'photosynthesis').total == 1
+
+
+def test_search_matches_the_title_and_the_body(alice):
+    by_title = written(alice, 'Photosynthesis explained', 'How leaves work.')
+    by_body = written(alice, 'Garden notes', 'Photosynthesis needs light.')
+
+    results = search_content(alice, 'photosynthesis')
+
+    assert results.total == 2
+    # Titles weigh more than the body text.
+    assert results.results == [by_title, by_body]
+    assert search_content(alice, 'leaves').results == [by_title]
+
+
+def test_search_only_returns_the_users_own_content(alice):
+    bob = User.objects.create_user('bob', 'bob@example.com', 'pw')
+    mine = written(alice, 'Garden notes', 'Photosynthesis needs light.')
+    written(bob, 'Garden notes', 'Photosynthesis needs light.')
+
+    assert search_content(alice, 'photosynthesis').results == [mine]
+
+
+def test_search_query_syntax_is_treated_as_words(alice):
+    content = written(alice, 'Garden notes', 'Photosynthesis needs light.')
+
+    assert search_content(alice, 'light" OR title:*').results == []
+    assert search_content(alice, 'needs (light)').results == [content]
+    assert search_content(alice, '  ').total == 0
+
+
+def test_search_pages_results(alice):
+    for day in range(3):
+        written(alice, f'Note {day}', 'Photosynthesis needs light.', days_ago=day)
+
+    first = search_content(alice, 'photosynthesis', page=1, page_size=2)
+    second = search_content(alice, 'photosynthesis', page=2, page_size=2)
+
+    assert first.total == second.total == 3
+    assert first.has_next and not second.has_next
+    assert [c.title for c in first.results + second.results] == ['Note 0', 'Note 1', 'Note 2']
+
+
+def test_search_sees_updated_text(alice):
+    content = written(alice, 'Garden notes', 'Photosynthesis needs light.')
+
+    content.title = 'Root notes'
+    content.generated_text = 'Roots drink water.'
+    content.save()
+
+    assert search_content(alice, 'photosynthesis').total == 0
+    assert search_content(alice, 'garden').total == 0
+    assert search_content(alice, 'roots').results == [content]
+
+
+def test_post_migrate_restores_dropped_triggers(alice):
+    with connection.cursor() as cursor:
+        for name in SQLITE_TRIGGERS:
+            cursor.execute(f"DROP TRIGGER {name}")
+    # Written while the table had no triggers, as after a table rebuild.
+    content = written(alice, 'Garden notes', 'Photosynthesis needs light.')
+    assert search_content(alice, 'photosynthesis').total == 0
+
+    emit_post_migrate_signal(0, False, 'default')
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s", [f'{FTS_TABLE}%'])
+        assert {name for name, in cursor.fetchall()} == set(SQLITE_TRIGGERS)
+    # The index is rebuilt from the table, and kept in sync again.
+    assert search_content(alice, 'photosynthesis').results == [content]
+    content.delete()
+    assert search_content(alice, 'photosynthesis').total == 0
@@ -1,5 +1,6 @@
+from django.conf import settings
 from django.urls import path # Corrected import
-from .views import DashboardView
+from .views import DashboardView, AsyncDashboardView, ContentSearchView, ContentExportView, ContentAnalyticsView
 
 # The app_name variable helps Django distinguish between URL names
 # From different apps
@@ -9,5 +10,14 @@ app_name = 'dashboard'
 urlpatterns = [
     # This maps the root URL of this app (/dashboard/) to our main view.
     # The name 'dashboard' will be used in templates and redirects.
-    path('', DashboardView.as_view(), name='dashboard')
+    path('', (AsyncDashboardView if settings.ASYNC_VIEWS else DashboardView).as_view(), name='dashboard'),
+
+    # Full-text search over the user's content history, e.g. /dashboard/search/?q=solar
+    path('search/', ContentSearchView.as_view(), name='search'),
+
+    # Streaming download of the user's history, e.g. /dashboard/export/?format=jsonl
+    path('export/', ContentExportView.as_view(), name='export'),
+
+    # JSON aggregates, e.g. /dashboard/analytics/niche/?days=30 or /dashboard/analytics/tags/
+    path('analytics/<str:dimension>/', ContentAnalyticsView.as_view(), name='analytics'),
 ]
\ No newline at end of file
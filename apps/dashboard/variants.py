@@ -0,0 +1,37 @@
+import uuid
+
+from django.db import transaction
+
+from .cache import invalidate_history
+from .dedup import add_signatures
+from .models import ContentHistory
+
+
+def save_variants(user, prompt_data: dict, variants: list, **fields) -> list:
+    """
+    Saves the variants of one generation (see GeminiClient.generate_variants)
+    as sibling ContentHistory rows sharing a `variant_group`, in a single
+    bulk_create: one row per variant and platform, with the platform in the
+    row's input_params. `fields` (image, prompt version, model) are set on
+    every row.
+
+    bulk_create sends no post_save signals, so the rows are signed and the
+    cached history dropped here.
+    """
+    group = uuid.uuid4()
+    contents = ContentHistory.objects.bulk_create([
+        ContentHistory(
+            user=user,
+            title=prompt_data['title'],
+            input_params={**prompt_data, 'platform': platform},
+            generated_text=text,
+            variant_group=group,
+            variant=number,
+            **fields
+        )
+        for number, variant in enumerate(variants, 1)
+        for platform, text in variant.items()
+    ])
+    add_signatures(contents)
+    transaction.on_commit(lambda: invalidate_history(user.pk))
+    return contents
@@ -1,13 +1,29 @@
+import re
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, JsonResponse, StreamingHttpResponse, HttpResponseBadRequest
+from django.conf import settings
 from django.shortcuts import render, redirect
+from django.utils.cache import patch_vary_headers
+from django.utils.timezone import now
 from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
-from django.db import transaction
 
 from .forms import ContentGenerationForm
-from .models import ContentHistory
+from .cache import get_credit_balance, get_rendered_history
+from .search import search_content
+from .export import EXPORT_FORMATS, user_export
+from .analytics import DIMENSIONS, generations_per_day, top_tags
+from .dedup import find_similar_requests, find_similar_content
+from .generation import agenerate_content, generate_content
 from apps.billing.models import Credits
-from core.ai_engine import gemini_client # We still use our AI engine
+from apps.billing.pricing import minimum_cost
+from core.lifecycle import lifecycle
+from core.model_router import model_router
+from core.async_views import AsyncLoginRequiredMixin, aiter_sync
+from core.prompts import build_prompt
 
 class DashboardView(LoginRequiredMixin, View):
     """
@@ -15,63 +31,34 @@ class DashboardView(LoginRequiredMixin, View):
     """
     template_name = 'dashboard/dashboard.html'
     form_class = ContentGenerationForm
+    # Time for up to two Gemini calls (see DeadlineMiddleware).
+    request_budget = settings.GENERATION_REQUEST_BUDGET
+    # Generations are rate limited per user and queued fairly (see AdmissionMiddleware).
+    admission_control = True
+    # Not started while the instance shuts down (see DrainMiddleware).
+    long_running = True
 
     def get(self, request, *args, **kwargs):
         form = self.form_class()
-        
-        # Use the standard Django ORM to fetch data
-        content_history = ContentHistory.objects.filter(user=request.user)
-        user_credits, _ = Credits.objects.get_or_create(user=request.user)
-
-        context = {
-            'form': form,
-            'content_history': content_history,
-            'credits': user_credits.balance
-        }
-        return render(request, self.template_name, context)
+        return render(request, self.template_name, self._get_context(request, form))
 
     def post(self, request, *args, **kwargs):
         form = self.form_class(request.POST)
         
         if form.is_valid():
-            cost = 1
-            if form.cleaned_data.get('generate_image'):
-                cost += 3
-
-            user_credits = Credits.objects.get(user=request.user)
-            if user_credits.balance < cost:
-                messages.error(request, f"You don't have enough credits for this operation.")
-                return redirect('dashboard:dashboard')
+            refused = self._refuse(request, form)
+            if refused is not None:
+                return refused
 
             prompt_data = form.cleaned_data
-            prompt = self._build_prompt(prompt_data)
-            
+            prompt, prompt_version = build_prompt(prompt_data)
+            model_name = model_router.route(prompt_data)
+
             try:
-                # Use a database transaction for safety. If any step fails,
-                # the entire operation is rolled back.
-                with transaction.atomic():
-                    # 1. Call the AI to generate content.
-                    generated_text = gemini_client.generate_text(prompt)
-                    
-                    image_url = None
-                    if prompt_data.get('generate_image'):
-                        image_prompt = f"An image for: {prompt_data['title']} in the {prompt_data['niche']} niche."
-                        image_url = gemini_client.generate_image(image_prompt) # This would upload to R2
-
-                    # 2. Deduct credits from the user's account.
-                    user_credits.balance -= cost
-                    user_credits.save()
-
-                    # 3. Save the generated content to the user's history.
-                    ContentHistory.objects.create(
-                        user=request.user,
-                        title=prompt_data['title'],
-                        input_params=prompt_data,
-                        generated_text=generated_text,
-                        generated_image_url=image_url
-                    )
-
-                messages.success(request, "Content generated successfully!")
+                # Checkpointed for another instance if this one shuts down meanwhile.
+                with lifecycle.job('generation', request.user, prompt_data):
+                    content = generate_content(request.user, prompt_data, prompt, prompt_version, model_name)
+                self._report(request, content)
 
             except Exception as e:
                 messages.error(request, f"An error occurred during generation: {e}")
@@ -79,23 +66,164 @@ class DashboardView(LoginRequiredMixin, View):
             return redirect('dashboard:dashboard')
         
         # Re-render the page with form errors if invalid
-        content_history = ContentHistory.objects.filter(user=request.user)
-        user_credits, _ = Credits.objects.get_or_create(user=request.user)
-        context = {
+        return render(request, self.template_name, self._get_context(request, form))
+
+    def _refuse(self, request, form):
+        """
+        Returns the response that turns a valid request away before any
+        generation, or None to go ahead.
+        """
+        # Offer to reuse recent content generated from near-identical inputs
+        # instead of paying for (and charging credits for) another generation.
+        if not form.cleaned_data.get('allow_similar'):
+            similar = find_similar_requests(request.user, form.cleaned_data)
+            if similar:
+                item, score = similar[0]
+                messages.info(
+                    request,
+                    f"You generated very similar content on {item.created_at:%b %d, %Y}: "
+                    f"'{item.title}' ({score:.0%} similar). It's in your history and no credits were used. "
+                    f"Tick 'Generate anyway' to create a new version."
+                )
+                return render(request, self.template_name, self._get_context(request, form))
+
+        # The final cost is known once the AI has answered (see apps/billing/pricing.py).
+        cost = minimum_cost(form.cleaned_data.get('generate_image'))
+
+        user_credits = Credits.objects.get(user=request.user)
+        if user_credits.balance < cost:
+            messages.error(request, f"You don't have enough credits for this operation.")
+            return redirect('dashboard:dashboard')
+        return None
+
+    def _report(self, request, content):
+        """Tells the user about their new content."""
+        if isinstance(content, list):
+            versions = len({row.variant for row in content})
+            messages.success(request, f"{versions} versions generated! Pick your favourite from your history.")
+            return
+        messages.success(request, "Content generated successfully!")
+        similar = find_similar_content(content)
+        if similar:
+            messages.warning(request, f"Heads up: this is very similar to '{similar[0][0].title}' in your history.")
+
+    def _get_context(self, request, form):
+        """
+        Builds the page context. The credit balance and the rendered history
+        sidebar come from the per-user cache, so repeat loads skip the database.
+        """
+        return {
             'form': form,
-            'content_history': content_history,
-            'credits': user_credits.balance
+            'history_html': get_rendered_history(request.user),
+            'credits': get_credit_balance(request.user),
         }
-        return render(request, self.template_name, context)
-
-    def _build_prompt(self, data):
-        """Helper method to construct a detailed prompt from form data."""
-        prompt = f"Generate content with the following specifications:\n"
-        prompt += f"- Title: {data['title']}\n"
-        prompt += f"- Niche/Industry: {data['niche']}\n"
-        if data.get('context'):
-            prompt += f"- Context/Details: {data['context']}\n"
-        if data.get('tags'):
-            prompt += f"- Important Keywords/Tags: {data['tags']}\n"
-        prompt += "\nPlease provide a comprehensive and well-structured piece of content."
-        return prompt
\ No newline at end of file
+
+
+
+class AsyncDashboardView(AsyncLoginRequiredMixin, DashboardView):
+    """
+    DashboardView for the ASGI deployment (settings.ASYNC_VIEWS). The Gemini
+    calls are awaited instead of holding a worker thread, so an instance can
+    have many generations in flight (see generation.agenerate_content).
+    """
+
+    async def get(self, request, *args, **kwargs):
+        return await sync_to_async(self._render)(request, self.form_class())
+
+    async def post(self, request, *args, **kwargs):
+        form = self.form_class(request.POST)
+        if not form.is_valid():
+            return await sync_to_async(self._render)(request, form)
+
+        refused = await sync_to_async(self._refuse)(request, form)
+        if refused is not None:
+            return refused
+
+        prompt_data = form.cleaned_data
+        prompt, prompt_version = build_prompt(prompt_data)
+        model_name = model_router.route(prompt_data)
+
+        try:
+            # Checkpointed for another instance if this one shuts down meanwhile.
+            with lifecycle.job('generation', request.user, prompt_data):
+                content = await agenerate_content(request.user, prompt_data, prompt, prompt_version, model_name)
+            await sync_to_async(self._report)(request, content)
+
+        except Exception as e:
+            messages.error(request, f"An error occurred during generation: {e}")
+
+        return redirect('dashboard:dashboard')
+
+    def _render(self, request, form):
+        return render(request, self.template_name, self._get_context(request, form))
+
+
+class ContentSearchView(LoginRequiredMixin, View):
+    """
+    Full-text search over the user's content history, best matches first.
+    """
+    template_name = 'dashboard/search.html'
+    page_size = 20
+
+    def get(self, request, *args, **kwargs):
+        query = request.GET.get('q', '')
+        try:
+            page = int(request.GET.get('page', 1))
+        except ValueError:
+            page = 1
+
+        results = search_content(request.user, query, page=page, page_size=self.page_size)
+        return render(request, self.template_name, {'search': results})
+
+
+class ContentExportView(LoginRequiredMixin, View):
+    """
+    Downloads the user's full content history as CSV or JSON Lines.
+    The response is streamed, and gzipped on the fly when the client accepts it,
+    so large accounts never have to be held in memory.
+    """
+    accepts_gzip_re = re.compile(r'\bgzip\b')
+
+    def get(self, request, *args, **kwargs):
+        fmt = request.GET.get('format', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            return HttpResponseBadRequest(f"Unsupported export format: {fmt}")
+
+        compress = bool(self.accepts_gzip_re.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+        chunks = user_export(request.user, fmt=fmt, compress=compress)
+        if isinstance(request, ASGIRequest):
+            chunks = aiter_sync(chunks)
+        response = StreamingHttpResponse(chunks, content_type=EXPORT_FORMATS[fmt])
+        filename = f"aygentx-content-{now():%Y%m%d}.{fmt}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        if compress:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+class ContentAnalyticsView(LoginRequiredMixin, View):
+    """
+    JSON aggregates over the user's generation inputs, e.g.
+    /dashboard/analytics/niche/?days=30 (generations per niche per day) or
+    /dashboard/analytics/tags/?niche=Technology. Staff can pass scope=all
+    to aggregate across every user.
+    """
+    max_days = 365
+
+    def get(self, request, dimension, *args, **kwargs):
+        if dimension not in DIMENSIONS and dimension != 'tags':
+            raise Http404(f"Unknown analytics dimension: {dimension}")
+        try:
+            days = min(max(int(request.GET.get('days', 30)), 1), self.max_days)
+        except ValueError:
+            return HttpResponseBadRequest("days must be a number.")
+
+        user = None if request.user.is_staff and request.GET.get('scope') == 'all' else request.user
+        filters = {name: request.GET.get(name) for name in ('niche', 'tone', 'tag') if request.GET.get(name)}
+
+        if dimension == 'tags':
+            results = top_tags(user, days=days, filters=filters)
+        else:
+            results = generations_per_day(user, dimension, days=days, filters=filters)
+        return JsonResponse({'dimension': dimension, 'days': days, 'filters': filters, 'results': results})
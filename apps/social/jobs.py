@@ -0,0 +1,23 @@
+from .models import SocialConnection
+from .postprocessing import prepare_posts
+from .views import publish_post, record_post
+from apps.dashboard.models import ContentHistory
+
+
+def resume_post(job):
+    """
+    Finishes a post cut off by an instance shutting down (see
+    core/lifecycle.py): the parts of a thread already posted are skipped,
+    and the post's credit is charged once it is done.
+    """
+    content = ContentHistory.objects.get(id=job.payload['content_id'], user=job.user)
+    platform = job.payload['platform']
+    connection = SocialConnection.objects.get(user=job.user, platform=platform)
+    posts = prepare_posts(platform, content.generated_text, content.get_input_params().get('tags', ''))
+    try:
+        publish_post(connection, platform, posts, job.state)
+    finally:
+        # Whatever got posted is not posted again on the next attempt.
+        job.save(update_fields=['state', 'updated_at'])
+
+    record_post(job.user, content.pk, platform)
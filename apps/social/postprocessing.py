@@ -0,0 +1,255 @@
+import re
+
+# --- Platform limits ---
+# X counts characters with weights (most CJK and emoji count double, URLs
+# always count as 23). LinkedIn counts plain characters.
+PLATFORM_LIMITS = {
+    'x_com': {'max_length': 280, 'max_parts': 25},
+    'linkedin': {'max_length': 3000, 'max_parts': 1},
+}
+
+X_URL_LENGTH = 23
+# Code point ranges that X weighs as a single character; everything else counts as two.
+X_SINGLE_WEIGHT_RANGES = ((0, 4351), (8192, 8205), (8208, 8223), (8242, 8247))
+
+URL_RE = re.compile(r'https?://\S+')
+SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+MARKDOWN_HEADING_RE = re.compile(r'^\s{0,3}#{1,6}\s+', re.MULTILINE)
+MARKDOWN_EMPHASIS_RE = re.compile(r'(\*\*|__)')
+LINE_BREAK = '\n'
+PARAGRAPH_BREAK = '\n\n'
+
+
+def plain_length(text: str) -> int:
+    return len(text)
+
+
+def x_weighted_length(text: str) -> int:
+    """Returns the length of `text` as X's API counts it."""
+    length = 0
+    last = 0
+    for match in URL_RE.finditer(text):
+        length += _x_char_weights(text[last:match.start()]) + X_URL_LENGTH
+        last = match.end()
+    return length + _x_char_weights(text[last:])
+
+
+def _x_char_weights(text: str) -> int:
+    total = 0
+    for char in text:
+        code = ord(char)
+        total += 1 if any(low <= code <= high for low, high in X_SINGLE_WEIGHT_RANGES) else 2
+    return total
+
+
+LENGTH_FUNCTIONS = {
+    'x_com': x_weighted_length,
+    'linkedin': plain_length,
+}
+
+
+def extract_hashtags(tags: str, existing_text: str = '') -> list:
+    """
+    Turns a comma-separated tag string (e.g. "solar power, green tech") into
+    hashtags (e.g. ["#SolarPower", "#GreenTech"]), skipping any that already
+    appear in `existing_text`.
+    """
+    if not tags:
+        return []
+    present = {tag.lower() for tag in re.findall(r'#\w+', existing_text)}
+    hashtags = []
+    for tag in tags.split(','):
+        words = re.findall(r'\w+', tag)
+        if not words:
+            continue
+        hashtag = '#' + ''.join(word[:1].upper() + word[1:] for word in words)
+        if hashtag.lower() not in present:
+            present.add(hashtag.lower())
+            hashtags.append(hashtag)
+    return hashtags
+
+
+# --- Streaming stages ---
+# Each stage is a generator that consumes the previous one, so parts are
+# produced lazily and a pipeline can stop as soon as it has what it needs.
+# Pieces travel with the separator that joins them to the piece before:
+# a space within a line, or the line or paragraph break the text had.
+
+def paragraphs(text: str):
+    """
+    Yields cleaned paragraphs with markdown emphasis and heading markers
+    removed. Line breaks within a paragraph are kept, so a heading or list
+    item is never run into the next line.
+    """
+    text = MARKDOWN_HEADING_RE.sub('', text)
+    text = MARKDOWN_EMPHASIS_RE.sub('', text)
+    for paragraph in re.split(r'\n\s*\n', text):
+        lines = [' '.join(line.split()) for line in paragraph.splitlines()]
+        paragraph = '\n'.join(line for line in lines if line)
+        if paragraph:
+            yield paragraph
+
+
+def sentences(paragraph_stream):
+    """Yields `(sentence, separator)` tuples. A line break always ends a sentence."""
+    separator = PARAGRAPH_BREAK
+    for paragraph in paragraph_stream:
+        for line in paragraph.split('\n'):
+            for sentence in SENTENCE_END_RE.split(line):
+                if sentence:
+                    yield sentence, separator
+                    separator = ' '
+            separator = LINE_BREAK
+        separator = PARAGRAPH_BREAK
+
+
+def fit_pieces(sentence_stream, limit: int, length_fn):
+    """
+    Yields pieces no longer than `limit`. Sentences that are too long are
+    split at word boundaries, and single words that are still too long are
+    hard-cut.
+    """
+    for sentence, separator in sentence_stream:
+        if length_fn(sentence) <= limit:
+            yield sentence, separator
+            continue
+        current = ''
+        for word in sentence.split(' '):
+            while length_fn(word) > limit:
+                cut = limit
+                while length_fn(word[:cut]) > limit:
+                    cut -= 1
+                if current:
+                    yield current, separator
+                    separator = ' '
+                    current = ''
+                yield word[:cut], separator
+                separator = ' '
+                word = word[cut:]
+            if not word:
+                continue
+            candidate = f"{current} {word}" if current else word
+            if length_fn(candidate) <= limit:
+                current = candidate
+            else:
+                yield current, separator
+                separator = ' '
+                current = word
+        if current:
+            yield current, separator
+
+
+def pack(piece_stream, limit: int, length_fn):
+    """Greedily packs pieces into parts no longer than `limit`."""
+    current = ''
+    for piece, separator in piece_stream:
+        if not current:
+            current = piece
+            continue
+        candidate = current + separator + piece
+        if length_fn(candidate) <= limit:
+            current = candidate
+        else:
+            yield current
+            current = piece
+    if current:
+        yield current
+
+
+# --- Platform pipelines ---
+
+def build_x_thread(text: str, tags: str = '') -> list:
+    """
+    Splits `text` into a thread of posts that each fit X's limit, numbering
+    them when there is more than one and appending hashtags to the last post
+    when they fit.
+    """
+    limits = PLATFORM_LIMITS['x_com']
+    limit = limits['max_length']
+    length_fn = LENGTH_FUNCTIONS['x_com']
+
+    posts = list(pack(fit_pieces(sentences(paragraphs(text)), limit, length_fn), limit, length_fn))
+    # Re-pack until the space reserved for the " (i/n)" suffix is wide enough.
+    reserved = 0
+    while len(posts) > 1:
+        needed = len(f" ({len(posts)}/{len(posts)})")
+        if needed <= reserved:
+            break
+        reserved = needed
+        part_limit = limit - reserved
+        posts = list(pack(fit_pieces(sentences(paragraphs(text)), part_limit, length_fn), part_limit, length_fn))
+
+    if len(posts) > 1:
+        posts = [f"{post} ({index}/{len(posts)})" for index, post in enumerate(posts, start=1)]
+
+    hashtags = extract_hashtags(tags, text)
+    if posts and hashtags:
+        posts[-1] = _append_hashtags(posts[-1], hashtags, limit, length_fn, separator=' ')
+    return posts
+
+
+def build_linkedin_post(text: str, tags: str = '') -> list:
+    """
+    Trims `text` at a sentence boundary so that it, plus a trailing line of
+    hashtags, fits LinkedIn's limit.
+    """
+    limit = PLATFORM_LIMITS['linkedin']['max_length']
+    length_fn = LENGTH_FUNCTIONS['linkedin']
+
+    hashtags = extract_hashtags(tags, text)
+    hashtag_line = ' '.join(hashtags)
+    body_limit = limit - (len(hashtag_line) + 2 if hashtag_line else 0)
+
+    parts = pack(fit_pieces(sentences(paragraphs(text)), body_limit, length_fn), body_limit, length_fn)
+    body = next(parts, '')
+    if not body:
+        return []
+    return [_append_hashtags(body, hashtags, limit, length_fn, separator='\n\n')]
+
+
+def _append_hashtags(post: str, hashtags: list, limit: int, length_fn, separator: str) -> str:
+    """Appends as many hashtags as fit within `limit`."""
+    fitting = []
+    for hashtag in hashtags:
+        candidate = post + separator + ' '.join(fitting + [hashtag])
+        if length_fn(candidate) > limit:
+            break
+        fitting.append(hashtag)
+    if not fitting:
+        return post
+    return post + separator + ' '.join(fitting)
+
+
+PLATFORM_PIPELINES = {
+    'x_com': build_x_thread,
+    'linkedin': build_linkedin_post,
+}
+
+
+def prepare_posts(platform: str, text: str, tags: str = '') -> list:
+    """
+    Fits generated content to a platform's limits before any network call.
+
+    Returns:
+        A list of post bodies, in order (more than one means an X thread).
+
+    Raises:
+        ValueError: If the platform is unknown or the content cannot be posted
+            (it is empty, or it would need more parts than the platform allows).
+    """
+    if platform not in PLATFORM_PIPELINES:
+        raise ValueError(f"Posting to {platform} is not supported.")
+
+    posts = PLATFORM_PIPELINES[platform](text or '', tags or '')
+    limits = PLATFORM_LIMITS[platform]
+    length_fn = LENGTH_FUNCTIONS[platform]
+
+    if not posts:
+        raise ValueError("There is no content to post.")
+    if len(posts) > limits['max_parts']:
+        raise ValueError(f"The content is too long to post ({len(posts)} parts, the maximum is {limits['max_parts']}).")
+    for post in posts:
+        if length_fn(post) > limits['max_length']:
+            # Should be unreachable, but never spend an API call on a post that will be rejected.
+            raise ValueError("The content could not be fitted to the platform's length limit.")
+    return posts
@@ -0,0 +1,149 @@
+import asyncio
+import itertools
+from io import StringIO
+from types import SimpleNamespace
+
+import pytest
+from django.core.management import call_command
+
+from apps.authentication.models import User
+from apps.billing.models import Credits
+from apps.dashboard.models import ContentHistory
+from apps.social import views
+from apps.social.models import SocialConnection
+from apps.social.postprocessing import prepare_posts
+from core.lifecycle import Lifecycle
+from core.models import PendingJob
+
+# Long enough to go out as a thread of several parts.
+THREAD_TEXT = ' '.join([("word " * 50).strip() + "."] * 12)
+
+
+class FakeSession:
+    """Stands in for OAuth2Session, recording the posts made and answering like X."""
+    sent = []
+    fail_after = None
+    ids = itertools.count(2)
+
+    def __init__(self, client_id, token=None):
+        pass
+
+    def mount(self, prefix, adapter):
+        pass
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        if self.fail_after is not None and len(self.sent) >= self.fail_after:
+            return SimpleNamespace(status_code=503, text='Service Unavailable')
+        self.sent.append(json)
+        tweet_id = f"t{next(self.ids)}"
+        return SimpleNamespace(status_code=201, json=lambda: {'data': {'id': tweet_id}}, headers={})
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(FakeSession, 'sent', [])
+    monkeypatch.setattr(FakeSession, 'fail_after', None)
+    monkeypatch.setattr(FakeSession, 'ids', itertools.count(2))
+    monkeypatch.setattr(views, 'OAuth2Session', FakeSession)
+    return FakeSession
+
+
+@pytest.fixture
+def user():
+    user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+    Credits.objects.create(user=user, balance=10)
+    connection = SocialConnection(user=user, platform='x_com', profile_id='alice')
+    connection.access_token = 'token'
+    connection.save()
+    return user
+
+
+@pytest.fixture
+def content(user):
+    return ContentHistory.objects.create(
+        user=user, input_params={'title': 'AI', 'tags': ''}, generated_text=THREAD_TEXT,
+    )
+
+
+def interrupted_post(content, posted):
+    """Checkpoints a post to X that was cut off after `posted` parts, as a draining instance would."""
+    lifecycle = Lifecycle()
+    with pytest.raises(asyncio.CancelledError):
+        with lifecycle.job('social_post', content.user, {'content_id': content.pk, 'platform': 'x_com'}) as job:
+            job.state['posted'] = posted
+            # Draining (without the drain thread) when the request is cut off.
+            lifecycle.draining_since = 0
+            raise asyncio.CancelledError()
+    assert lifecycle.in_flight() == 0
+    assert lifecycle.checkpoint() == 1
+    return PendingJob.objects.get()
+
+
+@pytest.mark.django_db
+def test_finished_job_leaves_no_checkpoint(content):
+    lifecycle = Lifecycle()
+    with pytest.raises(ValueError):
+        with lifecycle.job('social_post', content.user, {'content_id': content.pk, 'platform': 'x_com'}):
+            # Draining (without the drain thread): checkpointed while in flight.
+            lifecycle.draining_since = 0
+            lifecycle.checkpoint()
+            assert PendingJob.objects.count() == 1
+            raise ValueError("Posting failed.")
+
+    # Failing is finishing: the error was reported, there is nothing to resume.
+    lifecycle.checkpoint()
+    assert not PendingJob.objects.exists()
+
+
+@pytest.mark.django_db
+def test_interrupted_thread_is_resumed_after_the_last_part_posted(content, session):
+    posts = prepare_posts('x_com', THREAD_TEXT)
+    assert len(posts) > 2
+    job = interrupted_post(content, ['t1'])
+    assert job.state == {'posted': ['t1']}
+
+    call_command('resume_jobs', '--min-age', '0', stdout=StringIO())
+
+    assert [post['text'] for post in session.sent] == posts[1:]
+    assert session.sent[0]['reply'] == {'in_reply_to_tweet_id': 't1'}
+    assert session.sent[1]['reply'] == {'in_reply_to_tweet_id': 't2'}
+    assert not PendingJob.objects.exists()
+    assert Credits.objects.get(user=content.user).balance == 9
+    content.refresh_from_db()
+    assert content.status == 'POSTED_X'
+
+
+@pytest.mark.django_db
+def test_failed_resumption_keeps_what_was_posted(content, session):
+    posts = prepare_posts('x_com', THREAD_TEXT)
+    interrupted_post(content, ['t1'])
+    session.fail_after = 1
+
+    call_command('resume_jobs', '--min-age', '0', stdout=StringIO())
+
+    job = PendingJob.objects.get()
+    assert job.status == 'PENDING'
+    assert job.state == {'posted': ['t1', 't2']}
+    assert Credits.objects.get(user=content.user).balance == 10
+
+    # The next run carries on from the third part.
+    session.fail_after = None
+    call_command('resume_jobs', '--min-age', '0', stdout=StringIO())
+
+    assert [post['text'] for post in session.sent] == posts[1:]
+    assert session.sent[1]['reply'] == {'in_reply_to_tweet_id': 't2'}
+    assert not PendingJob.objects.exists()
+    assert Credits.objects.get(user=content.user).balance == 9
+
+
+@pytest.mark.django_db
+def test_linkedin_post_already_made_is_not_made_again(user, session):
+    connection = SocialConnection(user=user, platform='linkedin', profile_id='alice')
+    connection.access_token = 'token'
+    progress = {'posted': ['urn:li:share:1']}
+
+    views.publish_post(connection, 'linkedin', ["Hello"], progress)
+
+    assert session.sent == []
+    assert progress == {'posted': ['urn:li:share:1']}
+
@@ -0,0 +1,80 @@
+import pytest
+
+from apps.social.postprocessing import (
+    PLATFORM_LIMITS, build_linkedin_post, build_x_thread, prepare_posts, x_weighted_length,
+)
+
+X_LIMIT = PLATFORM_LIMITS['x_com']['max_length']
+
+
+@pytest.mark.parametrize('text, length', [
+    ('hello', 5),
+    ('héllo wörld', 11),
+    ('日本語', 6),
+    ('ok 👍', 5),
+    ('see https://example.com/a/very/long/path?with=query', 4 + 23),
+    ('https://a.co and https://b.co', 23 + 5 + 23),
+])
+def test_x_weighted_length(text, length):
+    assert x_weighted_length(text) == length
+
+
+def test_short_post_is_one_unnumbered_part():
+    assert build_x_thread("Short and sweet.") == ["Short and sweet."]
+
+
+def test_long_post_is_a_numbered_thread_within_the_limit():
+    text = ' '.join(f"Sentence number {i} says something useful." for i in range(40))
+    posts = build_x_thread(text)
+
+    assert len(posts) > 1
+    for index, post in enumerate(posts, start=1):
+        assert post.endswith(f" ({index}/{len(posts)})")
+        assert x_weighted_length(post) <= X_LIMIT
+
+
+def test_numbering_that_needs_more_room_is_repacked():
+    # Ten sentences that each fit alone, but not with a " (10/10)" suffix.
+    sentence = ("word " * 60)[:272] + "."
+    posts = build_x_thread(' '.join([sentence] * 10))
+
+    assert len(posts) > 10
+    assert all(x_weighted_length(post) <= X_LIMIT for post in posts)
+    assert [post.rsplit(' ', 1)[1] for post in posts] == [f"({i}/{len(posts)})" for i in range(1, len(posts) + 1)]
+
+
+def test_double_weight_text_is_split_by_weighted_length():
+    posts = build_x_thread("日本語のテキスト。" * 40)
+
+    assert len(posts) > 1
+    assert all(x_weighted_length(post) <= X_LIMIT for post in posts)
+
+
+def test_heading_without_punctuation_is_not_run_into_the_first_sentence():
+    posts = build_x_thread("## 5 Tips for Growth\nFirst tip: ship often.\n- Measure everything\n- Iterate")
+
+    assert posts == ["5 Tips for Growth\nFirst tip: ship often.\n- Measure everything\n- Iterate"]
+
+
+def test_hashtags_are_added_to_the_last_part_when_they_fit():
+    posts = build_x_thread("Solar is getting cheaper. #Solar is everywhere.", tags="solar, green tech")
+
+    assert posts == ["Solar is getting cheaper. #Solar is everywhere. #GreenTech"]
+
+
+def test_linkedin_post_keeps_paragraphs_and_is_trimmed_at_a_sentence():
+    text = "First paragraph.\n\n" + "A long sentence that keeps going. " * 200
+    (post,) = build_linkedin_post(text, tags="leadership")
+
+    assert post.startswith("First paragraph.\n\nA long sentence")
+    assert post.endswith("going.\n\n#Leadership")
+    assert len(post) <= PLATFORM_LIMITS['linkedin']['max_length']
+
+
+def test_prepare_posts_rejects_what_cannot_be_posted():
+    with pytest.raises(ValueError, match="no content"):
+        prepare_posts('x_com', "   ")
+    with pytest.raises(ValueError, match="too long"):
+        prepare_posts('x_com', "Word. " * 3000)
+    with pytest.raises(ValueError, match="not supported"):
+        prepare_posts('facebook', "Hello.")
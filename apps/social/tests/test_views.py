@@ -0,0 +1,19 @@
+import pytest
+
+from apps.dashboard.models import ContentHistory
+from apps.social.views import posted_status
+
+
+@pytest.mark.parametrize('status, platform, expected', [
+    ('DRAFT', 'x_com', 'POSTED_X'),
+    ('DRAFT', 'linkedin', 'POSTED_LINKEDIN'),
+    ('POSTED_X', 'x_com', 'POSTED_X'),
+    ('POSTED_X', 'linkedin', 'POSTED_ALL'),
+    ('POSTED_LINKEDIN', 'x_com', 'POSTED_ALL'),
+    ('POSTED_ALL', 'x_com', 'POSTED_ALL'),
+])
+def test_posted_status_is_a_status_choice(status, platform, expected):
+    choices = dict(ContentHistory.STATUS_CHOICE)
+
+    assert posted_status(status, platform) == expected
+    assert expected in choices
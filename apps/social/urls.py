@@ -1,5 +1,9 @@
+from django.conf import settings
 from django.urls import path
-from .views import SocialConnectionsView, OAuthRedirectView, OAuthCallbackView, PostToSocialView
+from .views import (
+    SocialConnectionsView, OAuthRedirectView, OAuthCallbackView, PostToSocialView,
+    AsyncOAuthCallbackView, AsyncPostToSocialView,
+)
 
 # The app_name variable helps Django distinguish between URL names
 # from different apps.
@@ -16,9 +20,9 @@ urlpatterns = [
 
     # The URL the social platform redirects back to after authorization
     # e.g., /social/callback/x_com/
-    path('callback/<str:platform>/', OAuthCallbackView.as_view(), name='oauth_callback'),
+    path('callback/<str:platform>/', (AsyncOAuthCallbackView if settings.ASYNC_VIEWS else OAuthCallbackView).as_view(), name='oauth_callback'),
 
     # The URL to trigger posting a piece of content to a platform
     # e.g., /social/post/123/x_com/
-    path('post/<int:content_id>/<str:platform>/', PostToSocialView.as_view(), name='post_to_social'),
+    path('post/<int:content_id>/<str:platform>/', (AsyncPostToSocialView if settings.ASYNC_VIEWS else PostToSocialView).as_view(), name='post_to_social'),
 ]
@@ -1,18 +1,26 @@
 import os
 import json
 from datetime import datetime, timedelta
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
 from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
+from django.db import transaction
 from django.urls import reverse
 from django.utils.timezone import now
 from requests_oauthlib import OAuth2Session
 from oauthlib.oauth2 import WebApplicationClient
 
 from .models import SocialConnection
+from .postprocessing import prepare_posts
 from apps.dashboard.models import ContentHistory
 from apps.billing.models import Credits
+from core.async_views import AsyncLoginRequiredMixin, release_connections
+from core.deadlines import adeadline_scope, deadline_scope, time_left
+from core.flow_state import pop_flow_state, save_flow_state
+from core.lifecycle import lifecycle
+from core.http import async_client, http_adapter
 
 # --- OAuth Configuration ---
 # These values MUST be set in your environment variables.
@@ -33,9 +41,149 @@ OAUTH_CONFIG = {
         'token_url': 'https://www.linkedin.com/oauth/v2/accessToken',
         'scopes': ['profile', 'w_member_social', 'openid'],
         'user_info_url': 'https://api.linkedin.com/v2/userinfo',
+        'post_url': 'https://api.linkedin.com/v2/ugcPosts',
     }
 }
 
+# The longest any one call to a platform may take, in seconds; calls are also
+# bounded by the time the request has left (see core/deadlines.py).
+PLATFORM_TIMEOUT = 30
+
+
+def get_profile_id(platform, user_info):
+    """Extracts the profile id from the platform's user info response."""
+    if platform == 'x_com':
+        return user_info.get('data', {}).get('username', 'Unknown')
+    if platform == 'linkedin':
+        return user_info.get('sub', 'Unknown') # LinkedIn uses 'sub' for user ID
+    return 'Unknown'
+
+
+def linkedin_post_payload(connection, text):
+    return {
+        "author": f"urn:li:person:{connection.profile_id}",
+        "lifecycleState": "PUBLISHED",
+        "specificContent": {
+            "com.linkedin.ugc.ShareContent": {
+                "shareCommentary": {"text": text},
+                "shareMediaCategory": "NONE",
+            }
+        },
+        "visibility": {"com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"},
+    }
+
+
+def _publish_steps(connection, platform, posts, progress):
+    """
+    The API calls that publish `posts` to `platform`: on X, long content as
+    a thread, each part replying to the previous one. Yields each call as
+    `(url, payload, headers)` and is sent back its response; the caller
+    makes the calls with a client of its own (see `publish_post` and
+    `apublish_post`).
+
+    `progress` records the ids of the parts posted so far, so a post
+    resumed or retried with it (see apps/social/jobs.py) carries on after
+    the last of them and never posts a part twice.
+    """
+    posted = progress.setdefault('posted', [])
+    config = OAUTH_CONFIG[platform]
+
+    if platform == 'x_com':
+        for text in posts[len(posted):]:
+            payload = {"text": text}
+            if posted:
+                payload["reply"] = {"in_reply_to_tweet_id": posted[-1]}
+            response = yield config['post_tweet_url'], payload, {}
+            if response.status_code != 201:
+                raise Exception(f"API Error: {response.text}")
+            posted.append(response.json().get('data', {}).get('id'))
+
+    elif platform == 'linkedin' and not posted:
+        response = yield (
+            config['post_url'], linkedin_post_payload(connection, posts[0]), {'X-Restli-Protocol-Version': '2.0.0'}
+        )
+        if response.status_code != 201:
+            raise Exception(f"API Error: {response.text}")
+        posted.append(response.headers.get('x-restli-id'))
+
+
+def publish_post(connection, platform, posts, progress=None):
+    """Posts `posts` to `platform` with the connection's stored token (see `_publish_steps`)."""
+    progress = {} if progress is None else progress
+    config = OAUTH_CONFIG[platform]
+
+    # The token is automatically decrypted when we access `connection.access_token`
+    token_dict = {'access_token': connection.access_token, 'token_type': 'Bearer'}
+    client = OAuth2Session(config['client_id'], token=token_dict)
+    # Posts go over the process's kept-alive connections (see core/http.py).
+    client.mount('https://', http_adapter())
+
+    steps = _publish_steps(connection, platform, posts, progress)
+    response = None
+    while True:
+        try:
+            url, payload, headers = steps.send(response)
+        except StopIteration:
+            return
+        with deadline_scope('social.post'):
+            response = client.post(
+                url, json=payload, headers=headers, timeout=time_left('social.post', PLATFORM_TIMEOUT)
+            )
+
+
+async def apublish_post(connection, platform, posts, progress=None):
+    """`publish_post` for the ASGI deployment, over the shared async HTTP client."""
+    progress = {} if progress is None else progress
+    authorization = {'Authorization': f"Bearer {connection.access_token}"}
+    await release_connections()
+    client = async_client()
+
+    steps = _publish_steps(connection, platform, posts, progress)
+    response = None
+    while True:
+        try:
+            url, payload, headers = steps.send(response)
+        except StopIteration:
+            return
+        async with adeadline_scope('social.post'):
+            response = await client.post(
+                url, json=payload, headers={**authorization, **headers}, timeout=PLATFORM_TIMEOUT
+            )
+
+
+# The content status after a post to each platform (see ContentHistory.STATUS_CHOICE).
+POSTED_STATUSES = {
+    'x_com': 'POSTED_X',
+    'linkedin': 'POSTED_LINKEDIN',
+}
+
+
+def posted_status(status, platform):
+    """The content status after a successful post to `platform`."""
+    posted = POSTED_STATUSES[platform]
+    if status in ('DRAFT', posted):
+        return posted
+    if 'POSTED' in status:
+        return 'POSTED_ALL'
+    return status
+
+
+def record_post(user, content_id, platform):
+    """
+    Debits the credit for a finished post and marks the content as posted,
+    both under row locks: the rows were read before the (long) calls to the
+    platform, and other posts and generations may have changed them since.
+    A balance spent meanwhile is left at zero; the post has gone out.
+    """
+    with transaction.atomic():
+        user_credits = Credits.objects.select_for_update().get(user=user)
+        user_credits.balance -= min(1, user_credits.balance)
+        user_credits.save()
+
+        content = ContentHistory.objects.select_for_update().get(id=content_id, user=user)
+        content.status = posted_status(content.status, platform)
+        content.save(update_fields=['status'])
+
 
 class SocialConnectionsView(LoginRequiredMixin, View):
     """
@@ -71,7 +219,6 @@ class OAuthRedirectView(LoginRequiredMixin, View):
         
         # For X.com, PKCE is required for security.
         code_verifier = WebApplicationClient(config['client_id']).create_code_verifier(60)
-        request.session['code_verifier'] = code_verifier
         code_challenge = WebApplicationClient(config['client_id']).create_code_challenge(code_verifier, "S256")
         
         authorization_url, state = oauth.authorization_url(
@@ -80,7 +227,12 @@ class OAuthRedirectView(LoginRequiredMixin, View):
             code_challenge_method="S256"
         )
         
-        request.session[f'{platform}_oauth_state'] = state
+        # Kept under the OAuth state itself, which the platform hands back to the callback.
+        save_flow_state('oauth', state, {
+            'user_id': request.user.pk,
+            'platform': platform,
+            'code_verifier': code_verifier,
+        })
         return redirect(authorization_url)
 
 
@@ -94,6 +246,12 @@ class OAuthCallbackView(LoginRequiredMixin, View):
             messages.error(request, "Invalid social platform specified.")
             return redirect('social:connections')
 
+        state = request.GET.get('state')
+        flow = pop_flow_state('oauth', state)
+        if flow is None or flow['user_id'] != request.user.pk or flow['platform'] != platform:
+            messages.error(request, "Your connection request has expired. Please try again.")
+            return redirect('social:connections')
+
         try:
             config = OAUTH_CONFIG[platform]
             callback_url = request.build_absolute_uri(reverse('social:oauth_callback', args=[platform]))
@@ -101,28 +259,27 @@ class OAuthCallbackView(LoginRequiredMixin, View):
             oauth = OAuth2Session(
                 config['client_id'],
                 redirect_uri=callback_url,
-                state=request.session.get(f'{platform}_oauth_state')
+                state=state
             )
             
             # Fetch the token from the platform's token URL.
-            token = oauth.fetch_token(
-                config['token_url'],
-                client_secret=config['client_secret'],
-                authorization_response=request.build_absolute_uri(),
-                code_verifier=request.session.get('code_verifier')
-            )
+            with deadline_scope('oauth.token'):
+                token = oauth.fetch_token(
+                    config['token_url'],
+                    client_secret=config['client_secret'],
+                    authorization_response=request.build_absolute_uri(),
+                    code_verifier=flow['code_verifier'],
+                    timeout=time_left('oauth.token', PLATFORM_TIMEOUT),
+                )
 
             # Fetch user info from the platform's API to get their ID/username.
-            user_info_response = oauth.get(config['user_info_url'])
+            with deadline_scope('oauth.user_info'):
+                user_info_response = oauth.get(
+                    config['user_info_url'], timeout=time_left('oauth.user_info', PLATFORM_TIMEOUT)
+                )
             user_info = user_info_response.json()
             
-            # Extract profile ID differently based on platform
-            if platform == 'x_com':
-                profile_id = user_info.get('data', {}).get('username', 'Unknown')
-            elif platform == 'linkedin':
-                profile_id = user_info.get('sub', 'Unknown') # LinkedIn uses 'sub' for user ID
-            else:
-                profile_id = 'Unknown'
+            profile_id = get_profile_id(platform, user_info)
 
             # Calculate when the token will expire.
             expires_at_timestamp = now() + timedelta(seconds=token.get('expires_in', 3600))
@@ -151,6 +308,9 @@ class PostToSocialView(LoginRequiredMixin, View):
     """
     Handles the action of posting a piece of content to a social platform.
     """
+    # Not started while the instance shuts down (see DrainMiddleware).
+    long_running = True
+
     def post(self, request, content_id, platform, *args, **kwargs):
         # 1. Check user credits (1 credit per post)
         user_credits = Credits.objects.get(user=request.user)
@@ -166,36 +326,141 @@ class PostToSocialView(LoginRequiredMixin, View):
             messages.error(request, "Could not find the content or social connection.")
             return redirect('dashboard:dashboard')
 
-        # 3. Post the content using the stored token
+        # 3. Fit the content to the platform's limits locally, so we never
+        # spend an API call on a post that is bound to be rejected.
         try:
-            config = OAUTH_CONFIG[platform]
-            
-            # The token is automatically decrypted when we access `connection.access_token`
-            token_dict = {'access_token': connection.access_token, 'token_type': 'Bearer'}
-            client = OAuth2Session(config['client_id'], token=token_dict)
-            
-            # Example for posting to X.com
-            if platform == 'x_com':
-                payload = {"text": content.generated_text}
-                response = client.post(config['post_tweet_url'], json=payload)
-                if response.status_code != 201:
-                    raise Exception(f"API Error: {response.text}")
-            
-            # TODO: Add logic for other platforms like LinkedIn here.
+            posts = prepare_posts(platform, content.generated_text, content.get_input_params().get('tags', ''))
+        except ValueError as e:
+            messages.error(request, f"Could not post to {platform.replace('_', ' ').title()}: {e}")
+            return redirect('dashboard:dashboard')
+
+        # 4. Post the content using the stored token. Checkpointed for
+        # another instance if this one shuts down meanwhile.
+        try:
+            with lifecycle.job('social_post', request.user, {'content_id': content.pk, 'platform': platform}) as job:
+                publish_post(connection, platform, posts, job.state)
             
         except Exception as e:
             messages.error(request, f"Failed to post to {platform.title()}. Error: {e}")
             return redirect('dashboard:dashboard')
 
-        # 4. Deduct credit and update content status
-        user_credits.balance -= 1
-        user_credits.save()
+        # 5. Deduct credit and update content status
+        record_post(request.user, content.pk, platform)
+
+        messages.success(request, f"Content successfully posted to {platform.replace('_', ' ').title()}!")
+        return redirect('dashboard:dashboard')
+
+
+# --- Async variants (settings.ASYNC_VIEWS) ---
+# The same flows for the ASGI deployment: calls to the platforms are awaited
+# on the shared async HTTP client instead of holding a worker thread.
+
+class AsyncOAuthCallbackView(AsyncLoginRequiredMixin, View):
+    """
+    OAuthCallbackView for the ASGI deployment. Exchanges the code the same
+    way requests_oauthlib does: client credentials in a Basic auth header,
+    plus the PKCE verifier.
+    """
+    async def get(self, request, platform, *args, **kwargs):
+        if platform not in OAUTH_CONFIG:
+            messages.error(request, "Invalid social platform specified.")
+            return redirect('social:connections')
+
+        state = request.GET.get('state')
+        flow = await sync_to_async(pop_flow_state)('oauth', state)
+        if flow is None or flow['user_id'] != request.user.pk or flow['platform'] != platform:
+            messages.error(request, "Your connection request has expired. Please try again.")
+            return redirect('social:connections')
+
+        try:
+            config = OAUTH_CONFIG[platform]
+            callback_url = request.build_absolute_uri(reverse('social:oauth_callback', args=[platform]))
+            code = request.GET.get('code')
+            if not code:
+                raise Exception(request.GET.get('error_description') or request.GET.get('error') or "No authorization code received.")
+
+            await release_connections()
+            client = async_client()
+            async with adeadline_scope('oauth.token'):
+                response = await client.post(
+                    config['token_url'],
+                    data={
+                        'grant_type': 'authorization_code',
+                        'code': code,
+                        'redirect_uri': callback_url,
+                        'code_verifier': flow['code_verifier'],
+                    },
+                    auth=(config['client_id'] or '', config['client_secret'] or ''),
+                    headers={'Accept': 'application/json'},
+                    timeout=PLATFORM_TIMEOUT,
+                )
+            response.raise_for_status()
+            token = response.json()
+
+            async with adeadline_scope('oauth.user_info'):
+                user_info_response = await client.get(
+                    config['user_info_url'], headers={'Authorization': f"Bearer {token['access_token']}"},
+                    timeout=PLATFORM_TIMEOUT,
+                )
+            profile_id = get_profile_id(platform, user_info_response.json())
+            expires_at_timestamp = now() + timedelta(seconds=token.get('expires_in', 3600))
+
+        except Exception as e:
+            messages.error(request, f"An error occurred during authentication: {e}")
+            return redirect('social:connections')
+
+        await SocialConnection.objects.aupdate_or_create(
+            user=request.user,
+            platform=platform,
+            defaults={
+                'access_token': token['access_token'],
+                'refresh_token': token.get('refresh_token'),
+                'profile_id': profile_id,
+                'expires_at': expires_at_timestamp,
+            }
+        )
+
+        messages.success(request, f"Successfully connected your {platform.replace('_', ' ').title()} account!")
+        return redirect('social:connections')
+
+
+class AsyncPostToSocialView(AsyncLoginRequiredMixin, View):
+    """
+    PostToSocialView for the ASGI deployment.
+    """
+    long_running = True
+
+    async def post(self, request, content_id, platform, *args, **kwargs):
+        user_credits = await Credits.objects.aget(user=request.user)
+        if user_credits.balance < 1:
+            messages.error(request, "You don't have enough credits to post.")
+            return redirect('dashboard:dashboard')
+
+        try:
+            content = await ContentHistory.objects.aget(id=content_id, user=request.user)
+            connection = await SocialConnection.objects.aget(user=request.user, platform=platform)
+        except (ContentHistory.DoesNotExist, SocialConnection.DoesNotExist):
+            messages.error(request, "Could not find the content or social connection.")
+            return redirect('dashboard:dashboard')
+
+        try:
+            # Reading generated_text may query the archive table.
+            posts = await sync_to_async(
+                lambda: prepare_posts(platform, content.generated_text, content.get_input_params().get('tags', ''))
+            )()
+        except ValueError as e:
+            messages.error(request, f"Could not post to {platform.replace('_', ' ').title()}: {e}")
+            return redirect('dashboard:dashboard')
+
+        try:
+            with lifecycle.job('social_post', request.user, {'content_id': content.pk, 'platform': platform}) as job:
+                await apublish_post(connection, platform, posts, job.state)
+
+        except Exception as e:
+            messages.error(request, f"Failed to post to {platform.title()}. Error: {e}")
+            return redirect('dashboard:dashboard')
 
-        if content.status == 'DRAFT':
-            content.status = f'POSTED_{platform.upper()}'
-        elif 'POSTED' in content.status:
-            content.status = 'POSTED_ALL'
-        content.save()
+        await sync_to_async(record_post)(request.user, content.pk, platform)
 
         messages.success(request, f"Content successfully posted to {platform.replace('_', ' ').title()}!")
-        return redirect('dashboard:dashboard')
\ No newline at end of file
+        return redirect('dashboard:dashboard')
@@ -0,0 +1,15 @@
+// Copies the Inter weights we use from @fontsource/inter into static/fonts,
+// so fonts are served by WhiteNoise instead of Google Fonts.
+const fs = require('fs');
+const path = require('path');
+
+const WEIGHTS = [400, 500, 600, 700];
+const source = path.join(__dirname, '..', 'node_modules', '@fontsource', 'inter', 'files');
+const target = path.join(__dirname, '..', 'static', 'fonts');
+
+fs.mkdirSync(target, { recursive: true });
+for (const weight of WEIGHTS) {
+  const name = `inter-latin-${weight}-normal.woff2`;
+  fs.copyFileSync(path.join(source, name), path.join(target, name));
+  console.log(`Copied ${name}`);
+}
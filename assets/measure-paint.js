@@ -0,0 +1,28 @@
+// Measures first paint for a page with Lighthouse (fetched on demand via npx,
+// and needs a local Chrome). Run it against the CDN build and the compiled
+// build to compare, e.g.:
+//   npm run measure:paint -- http://127.0.0.1:8000/auth/login/ 5
+const { execFileSync } = require('child_process');
+
+const url = process.argv[2] || 'http://127.0.0.1:8000/auth/login/';
+const runs = parseInt(process.argv[3] || '3', 10);
+const AUDITS = ['first-contentful-paint', 'largest-contentful-paint', 'render-blocking-resources'];
+
+const results = [];
+for (let i = 0; i < runs; i++) {
+  const output = execFileSync('npx', [
+    '--yes', 'lighthouse@12', url,
+    '--only-categories=performance',
+    '--output=json', '--quiet',
+    '--chrome-flags=--headless=new --no-sandbox',
+  ], { maxBuffer: 64 * 1024 * 1024 });
+  const report = JSON.parse(output.toString());
+  results.push(report.audits);
+}
+
+const median = (values) => values.sort((a, b) => a - b)[Math.floor(values.length / 2)];
+console.log(`${url} (median of ${runs} runs)`);
+for (const audit of AUDITS) {
+  const values = results.map((audits) => audits[audit].numericValue || 0);
+  console.log(`  ${audit}: ${median(values).toFixed(0)} ms`);
+}
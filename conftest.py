@@ -0,0 +1,18 @@
+import os
+
+import django
+
+# The settings come from the environment (see .env.example); the tests need
+# none of the real services, so anything not set gets a throwaway value.
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
+os.environ.setdefault('SECRET_KEY', 'tests')
+os.environ.setdefault('SOCIAL_ENCRYPTION_KEY', 'a' * 43 + '=')
+os.environ.setdefault('GEMINI_API_KEY', 'tests')
+os.environ.setdefault('DATABASE_URL', 'sqlite://:memory:')
+os.environ.setdefault('WARMUP_ENABLED', 'False')
+
+
+def pytest_configure():
+    # Set up here, after the defaults above, rather than by pytest-django
+    # before this file is loaded.
+    django.setup()
@@ -0,0 +1,353 @@
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+
+from core.deadlines import current_deadline
+from utils.logger import logging
+
+# Admission control for the expensive endpoints (views with
+# `admission_control = True`, see AdmissionMiddleware). Each user may make
+# ADMISSION_USER_LIMITS requests over sliding windows, and each process runs
+# at most ADMISSION_MAX_CONCURRENT at once; the rest wait in a queue served
+# round-robin across users, so one user with many requests in line cannot
+# hold up everyone else's. Rejected requests are answered with a 429 and a
+# Retry-After.
+
+UNITS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is not admitted. `retry_after` is in seconds."""
+
+    def __init__(self, reason: str, retry_after: float, message: str):
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(message)
+
+
+def parse_limits(spec: str) -> list:
+    """
+    Parses limits such as "10/minute,100/hour" (or "5/30", in seconds) into
+    a list of (count, seconds).
+    """
+    limits = []
+    for part in filter(None, (part.strip() for part in (spec or '').split(','))):
+        count, _, period = part.partition('/')
+        period = period.strip()
+        seconds = UNITS.get(period) or UNITS.get(period[:-1]) or float(period)
+        limits.append((int(count), float(seconds)))
+    return limits
+
+
+class SlidingWindowLimiter:
+    """
+    Per-key rate limits over sliding windows, for each (count, seconds) in
+    `limits`. A window is estimated from two fixed ones: the current
+    window's count plus the previous window's, weighted by how much of it
+    still overlaps the sliding window. That takes a few integers per key
+    and constant time per check, and is accurate to within a request or two.
+    Requests that are turned away are not counted.
+    """
+
+    def __init__(self, limits: list):
+        self.limits = limits
+        self._lock = threading.Lock()
+        # {key: [[window index, previous count, current count], ...]}, one entry per limit.
+        self._windows = {}
+        self._longest = max((seconds for _, seconds in limits), default=0)
+        self._pruned_at = None
+
+    def hit(self, key, now: float = None):
+        """Counts a request for `key` and returns None, or returns the seconds to wait if it is over a limit."""
+        if not self.limits:
+            return None
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            windows = self._windows.get(key)
+            if windows is None:
+                windows = self._windows[key] = [[0, 0, 0] for _ in self.limits]
+            wait = None
+            for (limit, seconds), window in zip(self.limits, windows):
+                index = int(now // seconds)
+                if window[0] != index:
+                    window[1] = window[2] if window[0] == index - 1 else 0
+                    window[2] = 0
+                    window[0] = index
+                elapsed = now / seconds - index
+                if window[1] * (1 - elapsed) + window[2] >= limit:
+                    # Right at the boundary the wait comes out as 0, but the request is still over.
+                    wait = max(wait or 0.0, self._wait(limit, seconds, window[1], window[2], elapsed))
+            if wait is None:
+                for window in windows:
+                    window[2] += 1
+            if self._pruned_at is None:
+                self._pruned_at = now
+            elif now - self._pruned_at > self._longest:
+                self._prune(now)
+        return wait
+
+    @staticmethod
+    def _wait(limit, seconds, previous, current, elapsed):
+        """Seconds until the estimate drops below `limit` again."""
+        if current < limit:
+            # Within this window, once enough of the previous one has slid out.
+            return (1 - (limit - current) / previous - elapsed) * seconds
+        # In the next window, once enough of this one has.
+        return (1 - elapsed + 1 - limit / current) * seconds
+
+    def _prune(self, now):
+        # Forgets keys whose windows have all slid past.
+        self._pruned_at = now
+        stale = [
+            key for key, windows in self._windows.items()
+            if all(window[0] < int(now // seconds) - 1 for (_, seconds), window in zip(self.limits, windows))
+        ]
+        for key in stale:
+            del self._windows[key]
+
+
+class SharedSlidingWindowLimiter(SlidingWindowLimiter):
+    """
+    SlidingWindowLimiter with the counts in the shared cache (see CACHES),
+    so the limits hold across instances. Costs a cache round trip per
+    check, and counts requests that are turned away too: the count is
+    incremented first and checked after, which is the atomic operation
+    caches offer.
+    """
+
+    def hit(self, key, now: float = None):
+        if not self.limits:
+            return None
+        # Window indexes must agree across instances, so wall-clock time.
+        now = time.time() if now is None else now
+        keys = {}
+        for limit, seconds in self.limits:
+            index = int(now // seconds)
+            keys[(limit, seconds)] = (
+                f"admission:{key}:{seconds:g}:{index - 1}",
+                f"admission:{key}:{seconds:g}:{index}",
+                now / seconds - index,
+            )
+        previous = shared_cache.get_many([previous_key for previous_key, _, _ in keys.values()])
+        wait = None
+        for (limit, seconds), (previous_key, current_key, elapsed) in keys.items():
+            shared_cache.add(current_key, 0, timeout=int(2 * seconds) + 1)
+            try:
+                current = shared_cache.incr(current_key)
+            except ValueError:
+                # Expired between the add and the incr.
+                shared_cache.set(current_key, 1, timeout=int(2 * seconds) + 1)
+                current = 1
+            count = previous.get(previous_key, 0)
+            if count * (1 - elapsed) + current - 1 >= limit:
+                wait = max(wait or 0.0, self._wait(limit, seconds, count, current - 1, elapsed))
+        return wait
+
+
+class _Waiter:
+    """A request waiting for a slot. `wake` is called (once) when it is handed one."""
+    __slots__ = ('wake', 'granted')
+
+    def __init__(self, wake):
+        self.wake = wake
+        self.granted = False
+
+
+class FairGate:
+    """
+    Lets at most `max_concurrent` requests through at once. The others wait
+    in one queue per key (user), and a freed slot goes to the next key in
+    turn, round-robin, so each user with requests waiting gets the same
+    share of the slots however many they queued. A key may have at most
+    `max_queued` requests waiting.
+
+    Works for threads and coroutines alike; a freed slot is handed straight
+    to its waiter, so nothing can jump the queue.
+    """
+
+    def __init__(self, max_concurrent: int, max_queued: int = 2):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiting = 0
+        self._queues = OrderedDict()
+        # Mean time a slot is held, for estimating Retry-After.
+        self._hold = 1.0
+        self.stats = {'admitted': 0, 'queued': 0, 'queue_full': 0, 'timed_out': 0}
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    def acquire(self, key, timeout: float):
+        """Waits up to `timeout` seconds for a slot. Raises AdmissionRejected if none comes."""
+        if self._take():
+            return
+        event = threading.Event()
+        waiter = self._enter(key, event.set)
+        if waiter is None:
+            return
+        if not event.wait(timeout) and self._leave(key, waiter):
+            self._timed_out()
+
+    async def aacquire(self, key, timeout: float):
+        """The async counterpart of acquire()."""
+        if self._take():
+            return
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        waiter = self._enter(key, wake)
+        if waiter is None:
+            return
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            if self._leave(key, waiter):
+                self._timed_out()
+        except asyncio.CancelledError:
+            if not self._leave(key, waiter):
+                self.release(0)
+            raise
+
+    def release(self, held: float):
+        """Frees a slot held for `held` seconds, handing it to the next waiter in turn, if any."""
+        with self._lock:
+            self._hold += (held - self._hold) * 0.1
+            if not self._queues:
+                self._active -= 1
+                return
+            key, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            if queue:
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+            self._waiting -= 1
+            waiter.granted = True
+            self.stats['admitted'] += 1
+        waiter.wake()
+
+    def retry_after(self) -> float:
+        """A guess at how long until a slot frees up for a new request."""
+        with self._lock:
+            return self._hold * (self._waiting + 1) / max(self.max_concurrent, 1)
+
+    def _take(self) -> bool:
+        """Takes a free slot if there is one and nobody is waiting. Saves setting up a waiter."""
+        with self._lock:
+            if self._active < self.max_concurrent and not self._queues:
+                self._active += 1
+                self.stats['admitted'] += 1
+                return True
+            return False
+
+    def _enter(self, key, wake):
+        """Takes a free slot (returning None) or queues a waiter for one."""
+        with self._lock:
+            if self._active < self.max_concurrent and not self._queues:
+                self._active += 1
+                self.stats['admitted'] += 1
+                return None
+            queue = self._queues.get(key)
+            if queue is not None and len(queue) >= self.max_queued:
+                self.stats['queue_full'] += 1
+                full = True
+            else:
+                full = False
+                if queue is None:
+                    queue = self._queues[key] = deque()
+                waiter = _Waiter(wake)
+                queue.append(waiter)
+                self._waiting += 1
+                self.stats['queued'] += 1
+        if full:
+            raise AdmissionRejected(
+                'queue_full', self.retry_after(),
+                "You already have generations waiting. Please wait for them to finish."
+            )
+        return waiter
+
+    def _leave(self, key, waiter) -> bool:
+        """Takes a waiter out of the queue; returns False if it was handed a slot first."""
+        with self._lock:
+            if waiter.granted:
+                return False
+            queue = self._queues[key]
+            queue.remove(waiter)
+            if not queue:
+                del self._queues[key]
+            self._waiting -= 1
+            return True
+
+    def _timed_out(self):
+        with self._lock:
+            self.stats['timed_out'] += 1
+        raise AdmissionRejected('busy', self.retry_after(), "We're busy right now. Please try again shortly.")
+
+
+class Admission:
+    """Per-user rate limits followed by the fair concurrency gate."""
+
+    def __init__(self, limiter: SlidingWindowLimiter, gate: FairGate, queue_timeout: float, enabled: bool = True):
+        self.limiter = limiter
+        self.gate = gate
+        self.queue_timeout = queue_timeout
+        self.enabled = enabled
+        self.stats = {'rate_limited': 0}
+
+    def admit(self, key):
+        """Admits a request for `key`, waiting for a slot if need be. Pair with release()."""
+        self._check_rate(key)
+        self.gate.acquire(key, self._timeout())
+
+    async def aadmit(self, key):
+        self._check_rate(key)
+        await self.gate.aacquire(key, self._timeout())
+
+    def release(self, held: float):
+        self.gate.release(held)
+
+    def _check_rate(self, key):
+        try:
+            wait = self.limiter.hit(key)
+        except Exception as e:
+            # An unreachable shared cache must not take generation down with it.
+            logging.error(f"Admission rate limit check failed, admitting the request: {e}")
+            return
+        if wait is not None:
+            self.stats['rate_limited'] += 1
+            raise AdmissionRejected(
+                'rate_limited', wait,
+                f"You're generating too quickly. Please try again in {max(1, math.ceil(wait))} seconds."
+            )
+
+    def _timeout(self) -> float:
+        # Never waits past the request's own deadline.
+        current = current_deadline()
+        if current is None:
+            return self.queue_timeout
+        return max(0.0, min(self.queue_timeout, current.remaining()))
+
+
+admission = Admission(
+    limiter=(SharedSlidingWindowLimiter if settings.ADMISSION_SHARED_LIMITS else SlidingWindowLimiter)(
+        parse_limits(settings.ADMISSION_USER_LIMITS)
+    ),
+    gate=FairGate(settings.ADMISSION_MAX_CONCURRENT, settings.ADMISSION_MAX_QUEUED_PER_USER),
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+    enabled=settings.ADMISSION_CONTROL,
+)
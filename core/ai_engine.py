@@ -1,6 +1,23 @@
 import os
-import google.generativeai as genai
-from google.generativeai.types import generation_types
+import json
+import time
+import base64
+import tempfile
+from django.conf import settings
+
+from core.deadlines import DeadlineExceeded, adeadline_scope, deadline_scope, time_left
+from core.hedging import Hedger
+from core.http import async_client, session
+from core.json_stream import JSONArrayItems
+from core.metering import record_usage
+from core.model_router import model_router
+from core.prompts import variants_schema
+
+SAFETY_BLOCKED_MESSAGE = "The generated content was blocked for safety reasons. Please try rephrasing your request."
+API_ERROR_MESSAGE = "An error occurred while communicating with the AI. Please try again later. If you repeatedly see this error, please contact support@aygentx.aydie.in"
+# The longest any one call may take, in seconds. Within a request, calls are
+# also bounded by the time the request has left (see core/deadlines.py).
+REQUEST_TIMEOUT = 120
 
 class GeminiClient:
     """ 
@@ -15,70 +32,400 @@ class GeminiClient:
         self.api_key = os.getenv('GEMINI_API_KEY')
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY environment variable not set.")
+
+        # The SDK, used by the sync views only, takes longer to import than
+        # the rest of the application together: it is imported on first use
+        # (see _sdk), so neither starting up nor the async views pay for it.
+        self._genai = None
         
-        genai.configure(api_key=self.api_key)
-        
-        # Initialize the model for text generation
-        self.text_model = genai.GenerativeModel('gemini-2.5-pro')
+        # Text models are chosen per generation (see core/model_router.py);
+        # this one is used when no model is given.
+        self.text_model_name = settings.GEMINI_PRO_MODEL
+        self._text_models = {}
+
+        # Optional hedged text generation (see core/hedging.py): a call still
+        # running at the GEMINI_HEDGE_PERCENTILE of recent latencies is raced
+        # by a second one, to GEMINI_HEDGE_MODEL (e.g. a Flash model) if set.
+        # At most GEMINI_HEDGE_MAX_RATE of calls are hedged. Each model has a
+        # hedger of its own, since each has its own latencies.
+        self.hedge = os.getenv('GEMINI_HEDGE', 'False') == 'True'
+        self.hedge_model_name = os.getenv('GEMINI_HEDGE_MODEL')
+        self._hedgers = {}
         
-        # TODO: Initialize the model for image generation when available/chosen
-        # self.image_model = genai.GenerativeModel('gemini-pro-vision') # Or the specific image model
+        # Imagen model used for image generation (called over REST, see generate_image).
+        self.image_model = os.getenv('GEMINI_IMAGE_MODEL', 'imagen-3.0-generate-002')
+        self.image_endpoint = f"https://generativelanguage.googleapis.com/v1beta/models/{self.image_model}:predict"
         
-    def generate_text(self, prompt: str) -> str:
+    def generate_text(self, prompt: str, model_name: str = None):
         """
         Generates text content based on a given prompt.
 
         Args:
             prompt: The detailed prompt for the AI.
+            model_name: The Gemini model to use (see core/model_router.py).
+                Defaults to `text_model_name`.
 
         Returns:
-            The generated text as a string.
+            A `(text, model_name)` tuple: the generated text, and the model
+            that wrote it (with hedging, possibly the hedge model).
         
         Raises:
             Exception: If the API call fails for any reason.
         """
-        
+        model_name = model_name or self.text_model_name
+        genai = self._sdk()
+        started = time.monotonic()
+        ok = False
         try:
-            response = self.text_model.generate_content(prompt)
-            return response.text
+            with deadline_scope('gemini.text'):
+                hedger = self._hedger(model_name)
+                if hedger:
+                    used_model, response = hedger.call(
+                        lambda: self._generate_content(model_name, prompt),
+                        lambda: self._generate_content(self.hedge_model_name or model_name, prompt),
+                    )
+                else:
+                    used_model, response = self._generate_content(model_name, prompt)
+            text = response.text
+            ok = True
+            return text, used_model
         
-        except generation_types.StopCandidateException as e:
+        except DeadlineExceeded:
+            raise
+        except genai.types.StopCandidateException as e:
+            ok = True  # The model answered; it is the content that was refused.
             # This can happen if the model's response is blocked for safety reason.
             print(f"Error: Generation stopped due to safety settings. {e}")
-            raise Exception("The generated content was blocked for safety reasons. Please try rephrasing your request.")
+            raise Exception(SAFETY_BLOCKED_MESSAGE)
         except Exception as e:
             # Handle other potential API errors (invalid API key, network issues)
             print(f"An unexpected error occurred with the Gemini API: {e}")
-            raise Exception("An error occurred while communicating with the AI. Please try again later. If you repeatedly see this error, please contact support@aygentx.aydie.in")
-        
+            raise Exception(API_ERROR_MESSAGE)
+        finally:
+            model_router.record(model_name, time.monotonic() - started, ok)
+
+    async def agenerate_text(self, prompt: str, model_name: str = None):
+        """
+        Async version of generate_text, for the async views. It calls the REST
+        API through the shared async HTTP client rather than the SDK.
+
+        Returns:
+            A `(text, model_name)` tuple, as generate_text does.
+
+        Raises:
+            Exception: If the API call fails for any reason.
+        """
+        model_name = model_name or self.text_model_name
+        started = time.monotonic()
+        try:
+            async with adeadline_scope('gemini.text'):
+                hedger = self._hedger(model_name)
+                if hedger:
+                    used_model, data = await hedger.acall(
+                        lambda: self._apost_text(model_name, prompt),
+                        lambda: self._apost_text(self.hedge_model_name or model_name, prompt),
+                    )
+                else:
+                    used_model, data = await self._apost_text(model_name, prompt)
+        except DeadlineExceeded:
+            model_router.record(model_name, time.monotonic() - started, False)
+            raise
+        except Exception as e:
+            model_router.record(model_name, time.monotonic() - started, False)
+            print(f"An unexpected error occurred with the Gemini API: {e}")
+            raise Exception(API_ERROR_MESSAGE)
+        model_router.record(model_name, time.monotonic() - started, True)
+
+        candidates = data.get('candidates') or []
+        if not candidates or candidates[0].get('finishReason') == 'SAFETY':
+            print(f"Error: Generation stopped due to safety settings. {data.get('promptFeedback')}")
+            raise Exception(SAFETY_BLOCKED_MESSAGE)
+        parts = candidates[0].get('content', {}).get('parts', [])
+        return ''.join(part.get('text', '') for part in parts), used_model
+
+    def generate_variants(self, prompt: str, platforms: list, count: int, model_name: str = None):
+        """
+        Generates several versions of a piece of content in one call, each
+        written for every one of `platforms` (see core.prompts.build_variants_prompt).
+        The model answers with JSON constrained by a response schema, and is
+        streamed: variants are parsed as they complete, so if the stream
+        breaks off, the variants that did arrive are still returned. Variant
+        calls are not hedged; a second call would double a large answer.
+
+        Returns:
+            A `(variants, model_name)` tuple; `variants` is a list of up to
+            `count` `{platform: text}` dicts.
+
+        Raises:
+            Exception: If the API call fails before any variant is complete.
+        """
+        model_name = model_name or self.text_model_name
+        started = time.monotonic()
+        parser = JSONArrayItems()
+        variants = []
+        usage_metadata = None
+        blocked = False
+        ok = False
+        try:
+            with deadline_scope('gemini.text'):
+                timeout = time_left('gemini.text', REQUEST_TIMEOUT)
+                response = self._text_model(model_name).generate_content(
+                    prompt,
+                    stream=True,
+                    generation_config={'response_mime_type': 'application/json',
+                                       'response_schema': variants_schema(platforms)},
+                    request_options=self._request_options(timeout),
+                )
+                for chunk in response:
+                    # Each chunk carries the usage so far; the last has the totals.
+                    usage_metadata = chunk.usage_metadata
+                    candidate = chunk.candidates[0] if chunk.candidates else None
+                    if candidate is None or candidate.finish_reason.name == 'SAFETY':
+                        blocked = True
+                        break
+                    text = ''.join(part.text for part in candidate.content.parts)
+                    variants += self._complete_variants(parser.feed(text), platforms)
+            ok = True
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"An unexpected error occurred with the Gemini API: {e}")
+            if not variants:
+                raise Exception(API_ERROR_MESSAGE)
+        finally:
+            model_router.record(model_name, time.monotonic() - started, ok)
+            record_usage('VARIANTS', model_name, started, ok, usage_metadata)
+        return self._variants_result(variants, blocked, count), model_name
+
+    async def agenerate_variants(self, prompt: str, platforms: list, count: int, model_name: str = None):
+        """Async version of generate_variants, streaming from the REST API (server-sent events)."""
+        model_name = model_name or self.text_model_name
+        started = time.monotonic()
+        parser = JSONArrayItems()
+        variants = []
+        usage_metadata = None
+        blocked = False
+        ok = False
+        try:
+            async with adeadline_scope('gemini.text'):
+                async with async_client().stream(
+                    'POST',
+                    f"https://generativelanguage.googleapis.com/v1beta/models/{model_name}:streamGenerateContent",
+                    params={'alt': 'sse'},
+                    headers={'x-goog-api-key': self.api_key},
+                    json={
+                        'contents': [{'role': 'user', 'parts': [{'text': prompt}]}],
+                        'generationConfig': {'responseMimeType': 'application/json',
+                                             'responseSchema': variants_schema(platforms)},
+                    },
+                ) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line.startswith('data:'):
+                            continue
+                        event = json.loads(line[5:])
+                        usage_metadata = event.get('usageMetadata') or usage_metadata
+                        candidates = event.get('candidates') or []
+                        if not candidates or candidates[0].get('finishReason') == 'SAFETY':
+                            blocked = True
+                            break
+                        parts = candidates[0].get('content', {}).get('parts', [])
+                        text = ''.join(part.get('text', '') for part in parts)
+                        variants += self._complete_variants(parser.feed(text), platforms)
+            ok = True
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"An unexpected error occurred with the Gemini API: {e}")
+            if not variants:
+                raise Exception(API_ERROR_MESSAGE)
+        finally:
+            model_router.record(model_name, time.monotonic() - started, ok)
+            record_usage('VARIANTS', model_name, started, ok, usage_metadata)
+        return self._variants_result(variants, blocked, count), model_name
+
+    @staticmethod
+    def _complete_variants(items: list, platforms: list) -> list:
+        """The parsed items that have text for every platform, as {platform: text} dicts."""
+        variants = []
+        for item in items:
+            if isinstance(item, dict) and all(isinstance(item.get(p), str) and item[p].strip() for p in platforms):
+                variants.append({platform: item[platform].strip() for platform in platforms})
+        return variants
+
+    @staticmethod
+    def _variants_result(variants: list, blocked: bool, count: int) -> list:
+        if variants:
+            return variants[:count]
+        if blocked:
+            print("Error: Variant generation stopped due to safety settings.")
+            raise Exception(SAFETY_BLOCKED_MESSAGE)
+        print("Error: The variant response held no complete variant.")
+        raise Exception(API_ERROR_MESSAGE)
+
+    def _hedger(self, model_name: str):
+        if not self.hedge:
+            return None
+        if model_name not in self._hedgers:
+            self._hedgers.setdefault(model_name, Hedger(
+                percentile=float(os.getenv('GEMINI_HEDGE_PERCENTILE', '95')),
+                max_rate=float(os.getenv('GEMINI_HEDGE_MAX_RATE', '0.1')),
+            ))
+        return self._hedgers[model_name]
+
+    def warm(self, connect_timeout: float):
+        """
+        Imports and sets up the SDK and the text models, and waits up to
+        `connect_timeout` seconds for the connection to Gemini to open, so
+        the first sync generation does not pay for any of it (see core/warmup.py).
+        """
+        import grpc
+        from google.generativeai import client as genai_client
+
+        for model_name in model_router.models.values():
+            self._text_model(model_name)
+        # Every model shares the SDK's default client. Its gRPC channel
+        # connects lazily; the REST transport has no channel to open.
+        channel = getattr(genai_client.get_default_generative_client().transport, 'grpc_channel', None)
+        if channel is not None:
+            grpc.channel_ready_future(channel).result(timeout=connect_timeout)
+
+    def _sdk(self):
+        if self._genai is None:
+            import google.generativeai as genai
+
+            genai.configure(api_key=self.api_key)
+            self._genai = genai
+        return self._genai
+
+    def _text_model(self, model_name: str):
+        if model_name not in self._text_models:
+            self._text_models[model_name] = self._sdk().GenerativeModel(model_name)
+        return self._text_models[model_name]
+
+    def _generate_content(self, model_name: str, prompt: str):
+        # Each call is metered, including hedges, since each is paid for.
+        started = time.monotonic()
+        timeout = time_left('gemini.text', REQUEST_TIMEOUT)
+        try:
+            response = self._text_model(model_name).generate_content(
+                prompt, request_options=self._request_options(timeout)
+            )
+        except Exception:
+            record_usage('TEXT', model_name, started, ok=False)
+            raise
+        record_usage('TEXT', model_name, started, usage_metadata=response.usage_metadata)
+        return model_name, response
+
+    async def _apost_text(self, model_name: str, prompt: str):
+        started = time.monotonic()
+        try:
+            response = await async_client().post(
+                f"https://generativelanguage.googleapis.com/v1beta/models/{model_name}:generateContent",
+                headers={'x-goog-api-key': self.api_key},
+                json={'contents': [{'role': 'user', 'parts': [{'text': prompt}]}]},
+            )
+            response.raise_for_status()
+            data = response.json()
+        except Exception:
+            record_usage('TEXT', model_name, started, ok=False)
+            raise
+        record_usage('TEXT', model_name, started, usage_metadata=data.get('usageMetadata'))
+        return model_name, data
+
         
-    def generate_image(self, prompt: str) -> str:
+    def generate_image(self, prompt: str):
         """ 
         Generates an image based on a given prompt.
 
-        NOTE: This is a placeholder. The actual implementation will depend on the
-        specific Gemini model and library used for image generation.
-
         Args:
             prompt: The prompt describing the image to be generated.
 
         Returns:
-            A URL to the generated image.        
+            A `(file, content_type)` tuple. `file` is a temporary binary file
+            positioned at the start of the image; it spills to disk above 1 MB
+            and is deleted when closed.
+        
+        Raises:
+            Exception: If the API call fails or returns no image.
         """
-        print(f"--- SIMULATING REAL AI IMAGE GENERATION WITH PROMPT ---\n")
-        # TODO: Replace this with a real call to the Gemini image generation API.
-        # This might involve different library calls or endpoints.
-        try: 
-            # Example of what a real call might look like
-            # response = self.image_model.generate_content(prompt)
-            # image_url = response.image_url
-            # return image_url
-            
-            # For now, we return a placeholder.
-            return "https://placehold.co/1024x1024/4f46e5/ffffff?text=Real+AI+Image"
+        started = time.monotonic()
+        ok = False
+        try:
+            timeout = time_left('gemini.image', REQUEST_TIMEOUT)
+            with deadline_scope('gemini.image'):
+                response = session().post(
+                    self.image_endpoint,
+                    headers={'x-goog-api-key': self.api_key},
+                    json={'instances': [{'prompt': prompt}], 'parameters': {'sampleCount': 1}},
+                    timeout=timeout,
+                )
+            response.raise_for_status()
+            prediction = response.json()['predictions'][0]
+            encoded = prediction['bytesBase64Encoded']
+            content_type = prediction.get('mimeType', 'image/png')
+            ok = True
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             print(f"An unexpected error occured during image generation: {e}")
             raise Exception("An error occured while generating the image.")
+        finally:
+            # Imagen reports no token counts; the call itself is the unit.
+            record_usage('IMAGE', self.image_model, started, ok)
+        return self._decode_image(encoded), content_type
+
+    async def agenerate_image(self, prompt: str):
+        """Async version of generate_image; returns the same `(file, content_type)` tuple."""
+        started = time.monotonic()
+        ok = False
+        try:
+            async with adeadline_scope('gemini.image'):
+                response = await async_client().post(
+                    self.image_endpoint,
+                    headers={'x-goog-api-key': self.api_key},
+                    json={'instances': [{'prompt': prompt}], 'parameters': {'sampleCount': 1}},
+                )
+            response.raise_for_status()
+            prediction = response.json()['predictions'][0]
+            encoded = prediction['bytesBase64Encoded']
+            content_type = prediction.get('mimeType', 'image/png')
+            ok = True
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"An unexpected error occured during image generation: {e}")
+            raise Exception("An error occured while generating the image.")
+        finally:
+            record_usage('IMAGE', self.image_model, started, ok)
+        return self._decode_image(encoded), content_type
+
+    @staticmethod
+    def _request_options(timeout: float) -> dict:
+        # Part of the SDK, so imported with it.
+        from google.api_core import exceptions as core_exceptions, retry
+
+        # The SDK retries unavailable errors for up to 10 minutes by default;
+        # both the call and its retries have to fit in the timeout.
+        return {
+            'timeout': timeout,
+            'retry': retry.Retry(
+                initial=1.0, maximum=10.0, multiplier=1.3,
+                predicate=retry.if_exception_type(core_exceptions.ServiceUnavailable),
+                timeout=timeout,
+            ),
+        }
+
+    @staticmethod
+    def _decode_image(encoded: str):
+        # The API returns base64 JSON; decode it in chunks straight into a
+        # spooled file instead of building a second full copy in memory.
+        image_file = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        chunk_size = 4 * 256 * 1024  # A multiple of 4 keeps base64 chunks aligned.
+        for start in range(0, len(encoded), chunk_size):
+            image_file.write(base64.b64decode(encoded[start:start + chunk_size]))
+        image_file.seek(0)
+        return image_file
         
 # We can create a single instance to be imported across the app
 # to avoid re-initializing the client repeatedly.
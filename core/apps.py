@@ -0,0 +1,30 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        # Bound every database statement made for a request by its deadline.
+        from .deadlines import install_query_deadline
+
+        connection_created.connect(install_query_deadline)
+
+        # Pin users who write to the primary (see core/db/routers.py).
+        from .db.routers import install_write_tracking
+
+        connection_created.connect(install_write_tracking)
+
+        # Drain long-running requests on SIGTERM (see core/lifecycle.py).
+        from .lifecycle import lifecycle
+
+        lifecycle.install_signal_handler()
+
+        # Say so when pages fall back to the Tailwind CDN (see core/static_assets.py).
+        from django.core.checks import register
+
+        from .static_assets import check_css_bundle
+
+        register(check_css_bundle)
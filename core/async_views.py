@@ -0,0 +1,46 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import connections
+
+# Helpers for the async variants of the I/O-bound views (settings.ASYNC_VIEWS).
+# Django 4.2's auth and session machinery is synchronous, so anything that
+# may touch the database runs through sync_to_async; the waiting on Gemini
+# and the social platforms happens on the event loop.
+
+
+class AsyncLoginRequiredMixin(LoginRequiredMixin):
+    """LoginRequiredMixin for views whose handlers are coroutines."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Loading request.user queries the database, so it happens off the event loop.
+        if not await sync_to_async(lambda: request.user.is_authenticated)():
+            return self.handle_no_permission()
+        return await super(LoginRequiredMixin, self).dispatch(request, *args, **kwargs)
+
+
+def _release_pooled_connections():
+    for connection in connections.all(initialized_only=True):
+        if 'POOL' in connection.settings_dict and not connection.in_atomic_block:
+            connection.close()
+
+
+# Returns this request's pooled database connections (see DATABASE_POOL_SIZE)
+# before a long wait on an external API, so a slow API call does not hold a
+# pool slot. The next query borrows a connection again.
+release_connections = sync_to_async(_release_pooled_connections)
+
+
+async def aiter_sync(iterable):
+    """
+    Yields the items of a sync iterable, each pulled on a worker thread.
+
+    Under ASGI, Django 4.2 reads a StreamingHttpResponse's sync iterator
+    into memory in full before sending any of it; this keeps it streaming.
+    """
+    iterator = iter(iterable)
+    done = object()
+    while True:
+        item = await sync_to_async(next)(iterator, done)
+        if item is done:
+            return
+        yield item
@@ -0,0 +1,102 @@
+import time
+import threading
+from collections import OrderedDict
+
+from django.core.cache import cache as shared_cache
+
+
+class LocalCache:
+    """
+    A thread-safe in-process LRU whose entries expire after `ttl` seconds.
+
+    Each process has its own copy, so entries are not invalidated by writes
+    on other instances; keep the TTL short enough for that to be acceptable.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 5):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    return value
+                del self._entries[key]
+        return default
+
+    def set(self, key, value, ttl: float = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class TwoTierCache:
+    """
+    A small two-tier cache: an in-process LRU in front of Django's cache framework.
+
+    Reads hit the local LRU first, then the shared cache, and only fall back
+    to the loader (usually a database query) when both miss. The local tier
+    has a short TTL so that instances which did not see an invalidation
+    converge quickly on the shared value.
+    """
+
+    def __init__(self, prefix: str, max_entries: int = 1024, local_ttl: int = 5, shared_ttl: int = 300):
+        """
+        Args:
+            prefix: Namespace prepended to every key.
+            max_entries: Maximum number of entries kept in the in-process LRU.
+            local_ttl: Seconds an entry lives in the in-process tier.
+            shared_ttl: Seconds an entry lives in the shared (Django) tier.
+        """
+        self.prefix = prefix
+        self.shared_ttl = shared_ttl
+        self._local = LocalCache(max_entries=max_entries, ttl=local_ttl)
+
+    def _key(self, key) -> str:
+        return f"{self.prefix}:{key}"
+
+    def get_or_set(self, key, loader):
+        """
+        Returns the cached value for `key`, calling `loader()` to populate
+        both tiers on a miss.
+        """
+        full_key = self._key(key)
+        value = self._local.get(full_key)
+        if value is not None:
+            return value
+
+        value = shared_cache.get(full_key)
+        if value is None:
+            value = loader()
+            shared_cache.set(full_key, value, self.shared_ttl)
+
+        self._local.set(full_key, value)
+        return value
+
+    def delete(self, key):
+        """Removes `key` from both tiers."""
+        full_key = self._key(key)
+        self._local.delete(full_key)
+        shared_cache.delete(full_key)
+
+    def clear_local(self):
+        """Drops every entry from the in-process tier only."""
+        self._local.clear()
@@ -0,0 +1,21 @@
+import zstandard
+
+# Codec names are stored next to compressed data so the codec can change later
+# without rewriting existing archives.
+ZSTD = 'zstd'
+
+# Archival is a background job and the data is written once, so a fairly high
+# level is worth it; decompression speed does not depend on the level.
+ZSTD_LEVEL = 10
+
+
+def compress_text(text: str, level: int = ZSTD_LEVEL) -> bytes:
+    """Compresses UTF-8 text with zstd. The frame records its size, so decompression needs no hints."""
+    # Compressor objects are cheap to create and not thread-safe, so one is made per call.
+    return zstandard.ZstdCompressor(level=level).compress(text.encode())
+
+
+def decompress_text(data: bytes, codec: str = ZSTD) -> str:
+    if codec != ZSTD:
+        raise ValueError(f"Unknown compression codec: {codec}")
+    return zstandard.ZstdDecompressor().decompress(bytes(data)).decode()
@@ -0,0 +1,85 @@
+import os
+import threading
+
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from core.db.pool import ConnectionPool, PoolTimeout
+from core.deadlines import check_deadline, time_left
+
+# The PostgreSQL backend, with connections borrowed from a per-process pool
+# (core/db/pool.py) instead of being opened per thread. Configured through
+# the database's POOL settings; see DATABASE_POOL_* in project/settings.py.
+# Use it with CONN_MAX_AGE = 0, so each request hands its connection back
+# to the pool when it finishes instead of holding it for the thread.
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def is_usable(connection) -> bool:
+    if connection.closed:
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        if not connection.autocommit:
+            connection.rollback()
+        return True
+    except base.Database.Error:
+        return False
+
+
+def get_pool(alias: str):
+    """Returns the current process's pool for `alias`, if one has been created."""
+    return _pools.get((alias, os.getpid()))
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    @property
+    def pool(self) -> ConnectionPool:
+        # Keyed by process id too: a forked child must not share its parent's sockets.
+        key = (self.alias, os.getpid())
+        with _pools_lock:
+            if key not in _pools:
+                options = self.settings_dict.get('POOL', {})
+                _pools[key] = ConnectionPool(
+                    name=self.alias,
+                    check=is_usable,
+                    max_size=options.get('MAX_SIZE', 4),
+                    timeout=options.get('TIMEOUT', 10.0),
+                    max_lifetime=options.get('MAX_LIFETIME', 1800.0),
+                    max_idle=options.get('MAX_IDLE', 300.0),
+                    check_after=options.get('CHECK_AFTER', 30.0),
+                )
+            return _pools[key]
+
+    def get_new_connection(self, conn_params):
+        # Set while connecting by the parent class; pooled connections were
+        # all opened with the same options, so the same level applies.
+        self.isolation_level = IsolationLevel(
+            self.settings_dict['OPTIONS'].get('isolation_level', IsolationLevel.READ_COMMITTED)
+        )
+        # A request waits for a connection no longer than it has left.
+        timeout = time_left('database.pool', self.pool.timeout)
+        try:
+            return self.pool.getconn(
+                lambda: super(DatabaseWrapper, self).get_new_connection(conn_params), timeout=timeout
+            )
+        except PoolTimeout as e:
+            check_deadline('database.pool')
+            raise self.Database.OperationalError(str(e)) from e
+
+    def _close(self):
+        if self.connection is None:
+            return
+        connection = self.connection
+        discard = bool(connection.closed)
+        if not discard and connection.info.transaction_status != self.Database.extensions.TRANSACTION_STATUS_IDLE:
+            # Never hand the next borrower an open (or failed) transaction.
+            try:
+                connection.rollback()
+            except self.Database.Error:
+                discard = True
+        self.pool.putconn(connection, discard=discard)
@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import deque
+
+from utils.logger import logging
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the pool's timeout."""
+
+
+class _Waiter:
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+
+class ConnectionPool:
+    """
+    A thread-safe pool of DB-API connections, shared by every thread of a process.
+
+    At most `max_size` connections exist at once. Borrowers queue for up to
+    `timeout` seconds for one to be returned, and are served in arrival
+    order, so a busy thread cannot starve the others. Idle
+    connections are handed out most recently used first, so a burst's
+    surplus connections sit unused and are closed after `max_idle` seconds.
+    Connections older than `max_lifetime` are replaced, and a connection that
+    has been idle for more than `check_after` seconds is health-checked
+    before it is handed out.
+    """
+
+    def __init__(self, name: str, check, max_size: int = 4, timeout: float = 10.0,
+                 max_lifetime: float = 1800.0, max_idle: float = 300.0, check_after: float = 30.0):
+        """
+        Args:
+            name: Used in log messages and errors.
+            check: Callable taking a connection and returning whether it is usable.
+        """
+        self.name = name
+        self.check = check
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.check_after = check_after
+        self._lock = threading.Lock()
+        self._borrowed = 0  # Slots taken, whether or not the borrower has its connection yet.
+        self._waiters = deque()  # Borrowers queued for a slot, first come first served.
+        self._idle = deque()  # (connection, created_at, returned_at); most recently returned last.
+        self._created_at = {}  # id(connection) -> creation time, for connections that are checked out.
+        self.stats = {'created': 0, 'closed': 0, 'checked_out': 0, 'waits': 0, 'failed_checks': 0, 'timeouts': 0}
+
+    def getconn(self, connect, timeout: float = None):
+        """
+        Borrows a connection, calling `connect()` to open a new one if none are
+        idle. Waits at most `timeout` seconds (default: the pool's) for one.
+        """
+        self._acquire_slot(self.timeout if timeout is None else timeout)
+        try:
+            connection, created_at = self._take_idle()
+            if connection is None:
+                connection, created_at = connect(), time.monotonic()
+                self._count('created')
+        except BaseException:
+            self._release_slot()
+            raise
+        with self._lock:
+            self._created_at[id(connection)] = created_at
+            self.stats['checked_out'] += 1
+        return connection
+
+    def putconn(self, connection, discard: bool = False):
+        """Returns a borrowed connection. Pass `discard=True` for connections that are broken."""
+        try:
+            with self._lock:
+                created_at = self._created_at.pop(id(connection), None)
+            now = time.monotonic()
+            if discard or created_at is None or now - created_at > self.max_lifetime:
+                self._close(connection)
+            else:
+                with self._lock:
+                    self._idle.append((connection, created_at, now))
+            self._prune_idle(now)
+        finally:
+            self._release_slot()
+
+    def close(self):
+        """Closes every idle connection. Connections that are checked out are closed when returned."""
+        self.max_lifetime = -1
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for connection, *_ in idle:
+            self._close(connection)
+
+    @property
+    def size(self) -> dict:
+        with self._lock:
+            return {'idle': len(self._idle), 'in_use': len(self._created_at)}
+
+    def _acquire_slot(self, timeout):
+        with self._lock:
+            if self._borrowed < self.max_size and not self._waiters:
+                self._borrowed += 1
+                return
+            waiter = _Waiter()
+            self._waiters.append(waiter)
+            self.stats['waits'] += 1
+        if waiter.event.wait(timeout):
+            return
+        with self._lock:
+            if waiter.granted:  # Handed a slot just as the wait timed out.
+                return
+            self._waiters.remove(waiter)
+            self.stats['timeouts'] += 1
+        raise PoolTimeout(f"No connection available in pool '{self.name}' within {timeout:.1f}s "
+                          f"({self.max_size} connections in use).")
+
+    def _release_slot(self):
+        with self._lock:
+            if self._waiters:
+                # The slot passes straight to the longest waiter.
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                waiter.event.set()
+            else:
+                self._borrowed -= 1
+
+    def _take_idle(self):
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None, None
+                connection, created_at, returned_at = self._idle.pop()
+            if now - created_at > self.max_lifetime:
+                self._close(connection)
+                continue
+            if now - returned_at > self.check_after and not self.check(connection):
+                self._count('failed_checks')
+                logging.warning(f"Discarding a broken connection from pool '{self.name}'.")
+                self._close(connection)
+                continue
+            return connection, created_at
+
+    def _prune_idle(self, now):
+        expired = []
+        with self._lock:
+            # The least recently used connections are at the left.
+            while self._idle and now - self._idle[0][2] > self.max_idle:
+                expired.append(self._idle.popleft()[0])
+        for connection in expired:
+            self._close(connection)
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _close(self, connection):
+        self._count('closed')
+        try:
+            connection.close()
+        except Exception as e:
+            logging.warning(f"Error closing a connection from pool '{self.name}': {e}")
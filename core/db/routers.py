@@ -0,0 +1,162 @@
+import re
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+
+# Sends the reads of selected read-only pages to the 'replica' database.
+# ReplicaRoutingMiddleware decides per request; everything else (writes,
+# reads outside those pages, management commands) uses 'default'.
+#
+# A replica lags behind the primary, so a user whose data has just changed
+# is pinned to the primary for DATABASE_REPLICA_STICKY_SECONDS. Pins live in
+# the shared cache so that every instance sees them; with the default
+# in-process cache they only hold on the instance that set them.
+
+REPLICA = 'replica'
+
+
+@dataclass
+class RoutingState:
+    """Per-request routing decisions, set up by ReplicaRoutingMiddleware."""
+    use_replica: bool = False
+    wrote: bool = False
+
+
+_state = ContextVar('db_routing_state', default=None)
+
+# Writes to these apps do not change what the replica-served pages show.
+IGNORED_WRITE_APPS = {'sessions'}
+
+# A request has written once it runs one of these statements. Django asks
+# the router for the write database for reads too (get_or_create's lookup,
+# select_for_update), so the router alone cannot tell.
+WRITE_STATEMENT = re.compile(r'\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+["`]?(\w+)', re.IGNORECASE)
+
+
+def replica_configured() -> bool:
+    return REPLICA in settings.DATABASES
+
+
+def _pin_key(user_id) -> str:
+    return f"db:pin:{user_id}"
+
+
+def pin_to_primary(user_id):
+    """Reads for this user go to the primary until the replica has caught up with a change."""
+    if replica_configured() and user_id is not None:
+        cache.set(_pin_key(user_id), True, settings.DATABASE_REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user_id) -> bool:
+    return bool(cache.get(_pin_key(user_id)))
+
+
+@lru_cache(maxsize=None)
+def _ignored_tables() -> frozenset:
+    return frozenset(
+        model._meta.db_table
+        for config in apps.get_app_configs() if config.label in IGNORED_WRITE_APPS
+        for model in config.get_models()
+    )
+
+
+def track_writes(execute, sql, params, many, context):
+    state = _state.get()
+    if state is not None and not state.wrote:
+        match = WRITE_STATEMENT.match(sql)
+        if match and match.group(1) not in _ignored_tables():
+            state.wrote = True
+    return execute(sql, params, many, context)
+
+
+def install_write_tracking(sender, connection, **kwargs):
+    # Installed on every connection (see CoreConfig.ready).
+    if track_writes not in connection.execute_wrappers:
+        connection.execute_wrappers.append(track_writes)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is not None and state.use_replica and not state.wrote:
+            return REPLICA
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        # Whether the request actually writes is seen by track_writes.
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Serves GET and HEAD requests for the views named in DATABASE_REPLICA_VIEWS
+    from the replica, unless the user is pinned to the primary. A request
+    that writes pins its user, so the pages they see next reflect the write.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not replica_configured():
+            return self.get_response(request)
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote:
+            self.pin_writer(request)
+        return response
+
+    async def __acall__(self, request):
+        if not replica_configured():
+            return await self.get_response(request)
+        # Code run through sync_to_async sees a copy of this context, and so the same state.
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote:
+            await sync_to_async(self.pin_writer)(request)
+        return response
+
+    @staticmethod
+    def pin_writer(request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        if (
+            state is not None
+            and request.method in ('GET', 'HEAD')
+            and request.resolver_match.view_name in settings.DATABASE_REPLICA_VIEWS
+        ):
+            # The user id comes from the session rather than request.user, so
+            # that loading the user itself can be served by the replica too.
+            user_id = request.session.get(SESSION_KEY)
+            state.use_replica = user_id is not None and not is_pinned(user_id)
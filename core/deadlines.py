@@ -0,0 +1,193 @@
+import asyncio
+import contextvars
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from django.db import OperationalError
+
+from utils.logger import logging
+
+# Request time budgets. DeadlineMiddleware gives every request a deadline
+# (settings.REQUEST_BUDGET, or the view's `request_budget`), held in a context
+# variable so it follows the request onto sync_to_async threads. Outbound
+# calls size their timeouts from the time left, database statements get a
+# matching statement_timeout on PostgreSQL, and work that would start after
+# the deadline is refused with DeadlineExceeded instead of being attempted.
+
+_current = contextvars.ContextVar('deadline', default=None)
+
+# Times a budget ran out, by stage: {'gemini.text': 3, 'database': 1, ...}.
+stats = {}
+_stats_lock = threading.Lock()
+
+# PostgreSQL's error code for a statement cancelled by statement_timeout.
+QUERY_CANCELED = '57014'
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the current request's time budget runs out."""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        super().__init__("This took too long and was cancelled. Please try again.")
+
+
+class Deadline:
+    """A point in time, `budget` seconds after it was set, by which a request must be done."""
+
+    def __init__(self, budget: float, label: str = ''):
+        self.label = label
+        self.started_at = time.monotonic()
+        self.set_budget(budget)
+
+    def set_budget(self, budget: float):
+        """Moves the deadline to `budget` seconds after the start."""
+        self.budget = budget
+        self.expires_at = self.started_at + budget
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+
+def current_deadline():
+    """The deadline of the request being handled, or None outside of one."""
+    return _current.get()
+
+
+@contextmanager
+def deadline(budget: float, label: str = ''):
+    """Runs the block with a deadline `budget` seconds away (or the enclosing one, if that is sooner)."""
+    outer = _current.get()
+    inner = Deadline(budget, label)
+    if outer is not None and outer.expires_at < inner.expires_at:
+        inner = outer
+    token = _current.set(inner)
+    try:
+        yield inner
+    finally:
+        _current.reset(token)
+
+
+def record_exceeded(stage: str):
+    """Counts a budget overrun in `stats` and logs it."""
+    with _stats_lock:
+        stats[stage] = stats.get(stage, 0) + 1
+    current = _current.get()
+    where = f" ({current.label or 'budget'}: {current.budget:g}s)" if current is not None else ''
+    logging.warning(f"Request budget exceeded during {stage}{where}.")
+
+
+def check_deadline(stage: str):
+    """Raises DeadlineExceeded if the current request is out of time."""
+    current = _current.get()
+    if current is not None and current.expired:
+        record_exceeded(stage)
+        raise DeadlineExceeded(stage)
+
+
+def time_left(stage: str, cap: float = None):
+    """
+    The timeout to give a call made now: the time left in the current
+    request, at most `cap` seconds. Outside a request this is just `cap`.
+
+    Raises:
+        DeadlineExceeded: If there is no time left for the call at all.
+    """
+    current = _current.get()
+    if current is None:
+        return cap
+    check_deadline(stage)
+    remaining = current.remaining()
+    return remaining if cap is None else min(cap, remaining)
+
+
+@contextmanager
+def deadline_scope(stage: str):
+    """
+    Wraps a blocking call that was given a timeout from `time_left`. The
+    timeout surfaces as the client library's own error; if the request is
+    out of time by then, it is raised as DeadlineExceeded instead.
+    """
+    try:
+        yield
+    except DeadlineExceeded:
+        raise
+    except Exception:
+        check_deadline(stage)
+        raise
+
+
+@asynccontextmanager
+async def adeadline_scope(stage: str):
+    """
+    The async counterpart of deadline_scope. The block is also cancelled
+    when the deadline passes, however far along its I/O is.
+    """
+    current = _current.get()
+    if current is None:
+        yield
+        return
+    check_deadline(stage)
+    try:
+        async with asyncio.timeout(current.remaining()):
+            yield
+    except DeadlineExceeded:
+        raise
+    except Exception:
+        check_deadline(stage)
+        raise
+
+
+# --- Database statements ---
+# Installed on every connection (see CoreConfig.ready). Queries made after
+# the deadline are refused, and on PostgreSQL the session's statement_timeout
+# is lowered to the time left, so a slow query is cancelled by the server when
+# the request runs out of time. The timeout is only set again once it
+# overshoots the time left by more than STATEMENT_TIMEOUT_SLACK (or a second),
+# not before every query.
+
+STATEMENT_TIMEOUT_SLACK = 0.25
+
+
+def _statement_timeout(connection, cursor, current):
+    timeout_ms = 0 if current is None else max(1, int(current.remaining() * 1000))
+    applied = connection.__dict__.get('_deadline_statement_timeout')
+    if applied is not None and applied[0] is current:
+        applied_ms = applied[1]
+        if current is None or applied_ms - timeout_ms <= max(1000, timeout_ms * STATEMENT_TIMEOUT_SLACK):
+            return
+    # A SET inside a transaction that is rolled back is undone; the server
+    # then keeps the timeout it had before, which is never a tighter one.
+    cursor.execute(f"SET statement_timeout = {timeout_ms}")
+    connection._deadline_statement_timeout = (current, timeout_ms)
+
+
+def enforce_query_deadline(execute, sql, params, many, context):
+    current = _current.get()
+    connection = context['connection']
+    if current is not None:
+        check_deadline('database')
+    if connection.vendor == 'postgresql':
+        _statement_timeout(connection, context['cursor'].cursor, current)
+    try:
+        return execute(sql, params, many, context)
+    except OperationalError as e:
+        if current is not None and getattr(e.__cause__, 'pgcode', None) == QUERY_CANCELED:
+            record_exceeded('database')
+            raise DeadlineExceeded('database') from e
+        raise
+
+
+def install_query_deadline(sender, connection, **kwargs):
+    # A new (or newly borrowed) connection's statement_timeout is unknown.
+    connection._deadline_statement_timeout = None
+    if enforce_query_deadline not in connection.execute_wrappers:
+        connection.execute_wrappers.append(enforce_query_deadline)
@@ -0,0 +1,79 @@
+import re
+import zlib
+
+import numpy as np
+
+from utils.logger import logging
+
+_WORD_RE = re.compile(r'\w+')
+
+# Words that say nothing about what a post is about.
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from how in into is it its of on or our the this to what why with you your".split()
+)
+
+
+class HashingEmbedder:
+    """
+    Embeds text as a signed feature-hashing vector of its words and their
+    character trigrams, normalised to unit length so cosine similarity is a
+    dot product. Word order and stop words are ignored ("AI in healthcare"
+    and "healthcare AI" embed alike), and the trigrams give partial credit
+    to other forms of a word ("startup" and "startups"). Nothing to load
+    or train, and well under a millisecond per title.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def features(self, text: str) -> dict:
+        """{feature: weight}: each word weighs 1, and its trigrams 1 between them."""
+        features = {}
+        for word in _WORD_RE.findall((text or '').lower()):
+            if word in STOP_WORDS:
+                continue
+            features[word] = features.get(word, 0.0) + 1.0
+            padded = f"<{word}>"
+            trigrams = [padded[i:i + 3] for i in range(len(padded) - 2)]
+            for trigram in trigrams:
+                key = f"#{trigram}"
+                features[key] = features.get(key, 0.0) + 1.0 / len(trigrams)
+        return features
+
+    def embed(self, text: str) -> np.ndarray:
+        features = self.features(text)
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if not features:
+            return vector
+        hashes = np.array([zlib.crc32(feature.encode()) for feature in features], dtype=np.uint32)
+        # The top bit picks the sign, so collisions cancel out rather than pile up.
+        signs = np.where(hashes >> 31, -1.0, 1.0).astype(np.float32)
+        np.add.at(vector, hashes % self.dim, signs * np.fromiter(features.values(), np.float32, len(features)))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SentenceEmbedder:
+    """Embeds with a local sentence-transformers model, on the CPU."""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device='cpu')
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.model.encode(text, normalize_embeddings=True).astype(np.float32)
+
+
+def get_embedder(model_name: str = ''):
+    """
+    Returns a SentenceEmbedder for `model_name` if one is given and
+    sentence-transformers is installed, otherwise a HashingEmbedder.
+    """
+    if model_name:
+        try:
+            return SentenceEmbedder(model_name)
+        except ImportError:
+            logging.warning(f"sentence-transformers is not installed; embedding with the hashing vectorizer instead of {model_name}.")
+    return HashingEmbedder()
@@ -0,0 +1,38 @@
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Short-lived state for multi-step flows (OTP verification, OAuth
+# handshakes), kept in the shared cache rather than the session. It expires
+# on its own after FLOW_STATE_TTL seconds, and a request that only starts a
+# flow no longer writes a server-side session. Behind more than one
+# instance, the cache must be shared (see CACHES) for the next step of a
+# flow to find the state, whichever instance serves it.
+
+
+def _key(kind: str, token: str) -> str:
+    return f"flow:{kind}:{token}"
+
+
+def new_token() -> str:
+    return secrets.token_urlsafe(24)
+
+
+def save_flow_state(kind: str, token: str, data: dict, ttl: int = None):
+    cache.set(_key(kind, token), data, settings.FLOW_STATE_TTL if ttl is None else ttl)
+
+
+def load_flow_state(kind: str, token: str):
+    """Returns the state saved under `token`, or None if there is none or it has expired."""
+    if not token:
+        return None
+    return cache.get(_key(kind, token))
+
+
+def pop_flow_state(kind: str, token: str):
+    """Like load_flow_state, but also removes the state so it can only be used once."""
+    data = load_flow_state(kind, token)
+    if data is not None:
+        cache.delete(_key(kind, token))
+    return data
@@ -0,0 +1,163 @@
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Threads the sync hedged calls run on, so the caller can wait on two at once."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix='hedge')
+        return _executor
+
+
+class Hedger:
+    """
+    Hedged requests, for cutting tail latency. If the primary call has not
+    returned after the `percentile`th percentile of recent latencies, a
+    second (hedge) call is made and the first to succeed wins; the other is
+    cancelled.
+
+    Hedges are rationed by a token bucket: every call adds `max_rate` of a
+    token (up to `burst`), and a hedge spends one, so at most about
+    `max_rate` of calls are hedged even when the upstream slows down across
+    the board. No call is hedged until `min_samples` latencies are known.
+
+    Only the primary's latencies set the delay. A primary that loses to its
+    hedge is recorded at the time it was cancelled, a lower bound, so slow
+    calls keep counting towards the tail.
+    """
+
+    def __init__(self, percentile: float = 95, max_rate: float = 0.1, burst: float = 10,
+                 window: int = 500, min_samples: int = 20, min_delay: float = 0.0):
+        self.percentile = percentile
+        self.max_rate = max_rate
+        self.burst = burst
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._tokens = burst
+        self.stats = {'calls': 0, 'hedged': 0, 'hedge_wins': 0, 'capped': 0}
+
+    def delay(self):
+        """Seconds to wait for the primary before hedging, or None while there are too few samples."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return max(self.min_delay, ordered[index])
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def call(self, primary, hedge):
+        """
+        Returns primary() or, if it is slow, whichever of primary() and
+        hedge() succeeds first. Sync calls cannot be interrupted, so the
+        loser is abandoned: its thread is freed once the call returns.
+        """
+        delay = self._start()
+        started = time.monotonic()
+        if delay is None:
+            return self._timed(primary, started)
+
+        first = _get_executor().submit(contextvars.copy_context().run, self._timed, primary, started)
+        done, _ = wait([first], timeout=delay)
+        if done or not self._take_token():
+            return first.result()
+        second = _get_executor().submit(contextvars.copy_context().run, hedge)
+
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if future is second:
+                        self._count('hedge_wins')
+                    return future.result()
+                if future is first or error is None:
+                    error = future.exception()
+        raise error
+
+    async def acall(self, primary, hedge):
+        """
+        The async counterpart of call(): `primary` and `hedge` return
+        awaitables. The loser is cancelled, as are both calls if the caller
+        is.
+        """
+        delay = self._start()
+        started = time.monotonic()
+        if delay is None:
+            return await self._atimed(primary, started)
+
+        first = asyncio.ensure_future(self._atimed(primary, started))
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self._take_token():
+                return await first
+            second = asyncio.ensure_future(hedge())
+            tasks.append(second)
+
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self._count('hedge_wins')
+                        return task.result()
+                    if task is first or error is None:
+                        error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _start(self):
+        """Counts a call and adds to the hedge budget; returns the hedge delay, or None not to hedge."""
+        with self._lock:
+            self.stats['calls'] += 1
+            self._tokens = min(self.burst, self._tokens + self.max_rate)
+        return self.delay()
+
+    def _take_token(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                self.stats['capped'] += 1
+                return False
+            self._tokens -= 1
+            self.stats['hedged'] += 1
+            return True
+
+    def _timed(self, primary, started):
+        result = primary()
+        self.record(time.monotonic() - started)
+        return result
+
+    async def _atimed(self, primary, started):
+        try:
+            result = await primary()
+        except asyncio.CancelledError:
+            self.record(time.monotonic() - started)
+            raise
+        self.record(time.monotonic() - started)
+        return result
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
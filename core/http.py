@@ -0,0 +1,50 @@
+import asyncio
+import weakref
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+# Shared async HTTP client for the async views (Gemini, the social platforms).
+# Connections are pooled per event loop: under the ASGI worker there is one
+# loop per process, so every request shares one pool. Code that runs async
+# views from sync code (the dev server, the test client) gets a short-lived
+# loop per request, and with it a client of its own.
+
+_clients = weakref.WeakKeyDictionary()
+
+
+def async_client():
+    """Returns the shared httpx.AsyncClient for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        # Imported here: only the async views use it.
+        import httpx
+
+        client = _clients[loop] = httpx.AsyncClient(
+            timeout=httpx.Timeout(120, connect=10),
+            limits=httpx.Limits(max_connections=settings.ASYNC_HTTP_MAX_CONNECTIONS),
+        )
+    return client
+
+
+# The sync views' equivalent: one connection pool per process, shared by
+# every thread, so calls to the same host reuse a kept-alive connection
+# instead of each opening (and TLS-handshaking) one of its own. Sessions
+# that carry per-user state, such as OAuth2Session, mount the adapter.
+
+_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=settings.HTTP_POOL_SIZE)
+_session = requests.Session()
+_session.mount('https://', _adapter)
+_session.mount('http://', _adapter)
+
+
+def http_adapter() -> HTTPAdapter:
+    """Returns the shared connection pool, for mounting on a session of one's own."""
+    return _adapter
+
+
+def session() -> requests.Session:
+    """Returns the shared session."""
+    return _session
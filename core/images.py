@@ -0,0 +1,175 @@
+import os
+import shutil
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait
+
+from django.conf import settings
+from PIL import Image, features
+
+from core.deadlines import check_deadline, deadline_scope, time_left
+from utils.logger import logging
+
+# Derivative formats: (format name, Pillow format, file extension, content type, save options)
+VARIANT_FORMATS = [
+    ('webp', 'WEBP', 'webp', 'image/webp', {'quality': 80, 'method': 4}),
+    ('avif', 'AVIF', 'avif', 'image/avif', {'quality': 50}),
+]
+
+_pool = None
+_pool_lock = threading.Lock()
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """
+    Returns the shared worker pool used for resizing and encoding. Workers are
+    spawned rather than forked, since the web process runs several threads.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def _get_s3_client():
+    """
+    Returns a shared boto3 S3 client. boto3 clients are thread-safe and keep
+    a pool of keep-alive connections, so one client serves every request.
+    """
+    global _s3_client
+    with _s3_client_lock:
+        if _s3_client is None:
+            import boto3
+            from botocore.config import Config
+
+            _s3_client = boto3.client(
+                's3',
+                endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                config=Config(
+                    max_pool_connections=settings.IMAGE_UPLOAD_POOL_SIZE,
+                    retries={'max_attempts': 3, 'mode': 'standard'},
+                ),
+            )
+        return _s3_client
+
+
+def render_variant(source_path: str, pil_format: str, width: int, dest_path: str, options: dict) -> str:
+    """
+    Resizes the image at `source_path` to fit `width` and encodes it to
+    `dest_path`. Runs in a worker process and only passes file paths, so
+    image data never crosses the process boundary.
+    """
+    with Image.open(source_path) as image:
+        image.draft('RGB', (width, width))  # Lets JPEG sources decode at a reduced size.
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        image.thumbnail((width, width), Image.LANCZOS)
+        image.save(dest_path, pil_format, **options)
+    return dest_path
+
+
+def _public_url(key: str) -> str:
+    if settings.AWS_S3_CUSTOM_DOMAIN:
+        return f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{key}"
+    return f"{settings.AWS_S3_ENDPOINT_URL.rstrip('/')}/{settings.AWS_STORAGE_BUCKET_NAME}/{key}"
+
+
+def _upload(path: str, key: str, content_type: str) -> str:
+    """Streams a file to object storage (multipart above the threshold) and returns its URL."""
+    from boto3.s3.transfer import TransferConfig
+
+    check_deadline('images.upload')
+    extra_args = {
+        'ContentType': content_type,
+        # Keys are unique per generation, so the objects never change.
+        'CacheControl': 'public, max-age=31536000, immutable',
+    }
+    if settings.AWS_DEFAULT_ACL:
+        extra_args['ACL'] = settings.AWS_DEFAULT_ACL
+
+    transfer_config = TransferConfig(
+        multipart_threshold=settings.IMAGE_UPLOAD_CHUNK_SIZE,
+        multipart_chunksize=settings.IMAGE_UPLOAD_CHUNK_SIZE,
+        use_threads=False,
+    )
+    with open(path, 'rb') as fileobj:
+        _get_s3_client().upload_fileobj(
+            fileobj, settings.AWS_STORAGE_BUCKET_NAME, key, ExtraArgs=extra_args, Config=transfer_config
+        )
+    return _public_url(key)
+
+
+def delete_images(key_prefix: str):
+    """Deletes the objects `publish_image` stored under `key_prefix`."""
+    client = _get_s3_client()
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    listing = client.list_objects_v2(Bucket=bucket, Prefix=f"{key_prefix}/")
+    keys = [{'Key': item['Key']} for item in listing.get('Contents', [])]
+    if keys:
+        client.delete_objects(Bucket=bucket, Delete={'Objects': keys, 'Quiet': True})
+
+
+def publish_image(source, key_prefix: str, content_type: str = 'image/png') -> dict:
+    """
+    Stores an image and its resized WebP/AVIF derivatives in object storage.
+    If any of it fails, whatever was uploaded is deleted again.
+
+    Args:
+        source: A readable binary file object positioned at the start of the image.
+        key_prefix: Object key prefix, e.g. "content/42/9f1c...".
+        content_type: The content type of the source image.
+
+    Returns:
+        A dict of public URLs: {"original": url, "webp": {"256": url, ...}, "avif": {...}}.
+    """
+    formats = [fmt for fmt in VARIANT_FORMATS if features.check(fmt[0])]
+    if len(formats) < len(VARIANT_FORMATS):
+        logging.warning("Pillow lacks support for some image formats; skipping: "
+                        f"{[fmt[0] for fmt in VARIANT_FORMATS if fmt not in formats]}")
+
+    variants = {name: {} for name, *_ in formats}
+    with tempfile.TemporaryDirectory(prefix='aygentx-image-') as workdir:
+        extension = content_type.split('/')[-1]
+        source_path = os.path.join(workdir, f"original.{extension}")
+        with open(source_path, 'wb') as out:
+            shutil.copyfileobj(source, out, length=1024 * 1024)
+
+        pool = _get_pool()
+        futures = {}
+        for name, pil_format, file_extension, variant_type, options in formats:
+            for width in settings.IMAGE_VARIANT_WIDTHS:
+                dest_path = os.path.join(workdir, f"{width}.{file_extension}")
+                future = pool.submit(render_variant, source_path, pil_format, width, dest_path, options)
+                futures[future] = (name, width, file_extension, variant_type)
+
+        # Upload the original while the workers encode, then each variant as it finishes.
+        try:
+            original_url = _upload(source_path, f"{key_prefix}/original.{extension}", content_type)
+            with deadline_scope('images.encode'):
+                for future in as_completed(futures, timeout=time_left('images.encode')):
+                    name, width, file_extension, variant_type = futures[future]
+                    path = future.result()
+                    variants[name][str(width)] = _upload(path, f"{key_prefix}/{width}.{file_extension}", variant_type)
+        except BaseException:
+            # Don't leave the workers encoding variants nobody will upload,
+            # and wait for the ones already encoding: they write into
+            # `workdir`, which is removed on the way out.
+            for future in futures:
+                future.cancel()
+            wait(futures)
+            try:
+                delete_images(key_prefix)
+            except Exception as e:
+                logging.error(f"Could not delete the partly published image {key_prefix}: {e}")
+            raise
+
+    return {'original': original_url, **variants}
@@ -0,0 +1,64 @@
+import json
+
+# What may follow a complete number or literal inside an array.
+_ITEM_ENDS = tuple(' \t\r\n,]')
+
+
+class JSONArrayItems:
+    """
+    Parses the items of a JSON array as its text arrives in chunks, e.g.
+    from a streamed model response. `feed` returns the items completed by
+    each chunk, so callers can use the first items before the last arrive,
+    and keep the complete ones if the stream is cut short.
+
+    Text before the opening bracket (such as a Markdown code fence) is
+    skipped, as is anything after the closing one.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._started = False
+        self.done = False
+
+    def feed(self, chunk: str) -> list:
+        """Adds a chunk of text and returns the items it completed."""
+        if self.done:
+            return []
+        self._buffer += chunk
+        if not self._started:
+            start = self._buffer.find('[')
+            if start < 0:
+                return []
+            self._buffer, self._pos, self._started = self._buffer[start + 1:], 0, True
+
+        items = []
+        while True:
+            pos = self._skip(' \t\r\n,')
+            if pos == len(self._buffer):
+                break
+            if self._buffer[pos] == ']':
+                self.done = True
+                break
+            try:
+                item, end = self._decoder.raw_decode(self._buffer, pos)
+            except json.JSONDecodeError:
+                break  # The item is still arriving.
+            if not isinstance(item, (dict, list, str)) and self._buffer[end:end + 1] not in _ITEM_ENDS:
+                # A number or literal may continue in the next chunk: "1." or
+                # "1e" decode as 1 until the digits after them arrive.
+                break
+            items.append(item)
+            self._pos = end
+
+        # Drop the parsed text so the buffer only holds the pending item.
+        self._buffer, self._pos = self._buffer[self._pos:], 0
+        return items
+
+    def _skip(self, characters: str) -> int:
+        pos = self._pos
+        while pos < len(self._buffer) and self._buffer[pos] in characters:
+            pos += 1
+        self._pos = pos
+        return pos
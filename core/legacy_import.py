@@ -0,0 +1,366 @@
+import csv
+import io
+import json
+import sqlite3
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from decimal import Decimal, InvalidOperation
+from typing import Callable
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from apps.billing.models import Credits, Transaction
+from apps.dashboard.models import ContentHistory, parse_input_params
+from apps.social.encryption import encrypt_token
+from apps.social.models import SocialConnection
+
+# Imports the old Cloudflare D1 database (schema: migrations/0001_initial.sql)
+# into the Django tables. Legacy ids are kept, so foreign keys need no mapping
+# and re-running an import skips rows that already exist.
+
+# --- Value conversion ---
+
+COPY_NULL = r'\N'
+
+CONTENT_STATUS_MAP = {
+    'draft': 'DRAFT',
+    'posted_x': 'POSTED_X',
+    'posted_linkedin': 'POSTED_LINKEDIN',
+    'posted_all': 'POSTED_ALL',
+}
+TRANSACTION_STATUS_MAP = {
+    'pending': 'PENDING',
+    'completed': 'COMPLETED',
+    'complete': 'COMPLETED',
+    'success': 'COMPLETED',
+    'succeeded': 'COMPLETED',
+    'failed': 'FAILED',
+    'failure': 'FAILED',
+}
+
+
+def to_datetime(value):
+    """Parses a D1 timestamp ('YYYY-MM-DD HH:MM:SS', stored in UTC)."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def to_date(value):
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value).strip()[:10])
+    except ValueError:
+        return None
+
+
+def to_bool(value) -> bool:
+    return bool(int(value or 0))
+
+
+def to_choice(value, choices, default=None):
+    """Maps a legacy lowercase enum value onto a model choice."""
+    value = (value or '').strip().upper()
+    return value if value in {key for key, _ in choices} else default
+
+
+def to_password(value) -> str:
+    """Keeps Django-format password hashes; anything else becomes unusable and needs a reset."""
+    try:
+        identify_hasher(value)
+        return value
+    except ValueError:
+        return make_password(None)
+
+
+# --- Table specifications ---
+
+@dataclass
+class TableSpec:
+    """How one legacy table maps onto a Django model."""
+    source: str
+    model: type
+    columns: list
+    transform: Callable
+    key: str = 'id'
+    # Whether rows reference users, in which case rows of users that were not
+    # imported are skipped rather than failing the whole chunk.
+    has_user: bool = True
+    # Whether the target keeps the legacy id, so its sequence must be moved past it.
+    keeps_ids: bool = True
+
+
+def _user_row(row):
+    return (
+        row['id'], to_password(row['password']), to_datetime(row['last_login']), to_bool(row['is_superuser']),
+        row['username'], row['first_name'] or '', row['last_name'] or '', to_bool(row['is_staff']),
+        to_bool(row['is_active']), to_datetime(row['date_joined']), row['email'], to_date(row['date_of_birth']),
+        to_choice(row['gender'], get_user_model().GENDER_CHOICES, default='OTHER' if row['gender'] else None),
+        row['profession'], row['how_did_you_hear_about_us'], row['referral_code'], row['country'],
+        row['interests'], to_bool(row['is_verified']),
+    )
+
+
+def _credits_row(row):
+    return (row['user_id'], row['balance'], to_datetime(row['last_updated']))
+
+
+def _content_row(row):
+    return (
+        row['id'], row['user_id'], row['title'], json.dumps(parse_input_params(row['input_params'])),
+        row['generated_text'], row['generated_image_url'],
+        CONTENT_STATUS_MAP.get((row['status'] or '').strip().lower(), 'DRAFT'),
+        to_datetime(row['created_at']), '', '', '{}', False,
+    )
+
+
+def _transaction_row(row):
+    try:
+        amount = Decimal(str(row['amount'])).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        amount = Decimal('0.00')
+    return (
+        row['id'], row['user_id'], to_choice(row['gateway'], Transaction.GATEWAY_CHOICES, default='STRIPE'),
+        row['gateway_txn_id'], amount, to_choice(row['currency'], Transaction.CURRENCY_CHOICES, default='USD'),
+        row['credits_purchased'], TRANSACTION_STATUS_MAP.get((row['status'] or '').strip().lower(), 'PENDING'),
+        to_datetime(row['created_at']),
+    )
+
+
+def _social_row(row):
+    # D1 stored tokens as plain text; they are encrypted at rest from now on.
+    return (
+        row['user_id'], row['platform'], encrypt_token(row['access_token']),
+        encrypt_token(row['refresh_token']) or None, to_datetime(row['expires_at']), row['profile_id'],
+    )
+
+
+def table_specs() -> list:
+    """The legacy tables in import order (users first, since everything references them)."""
+    return [
+        TableSpec(
+            'users', get_user_model(), [
+                'id', 'password', 'last_login', 'is_superuser', 'username', 'first_name', 'last_name',
+                'is_staff', 'is_active', 'date_joined', 'email', 'date_of_birth', 'gender', 'profession',
+                'how_did_you_hear_about_us', 'referral_code', 'country', 'interests', 'is_verified',
+            ],
+            _user_row, has_user=False,
+        ),
+        TableSpec('credits', Credits, ['user_id', 'balance', 'last_updated'], _credits_row, key='user_id', keeps_ids=False),
+        TableSpec(
+            'content_history', ContentHistory, [
+                'id', 'user_id', 'title', 'input_params', 'generated_text', 'generated_image_url',
+                'status', 'created_at', 'prompt_version', 'model_name', 'image_variants', 'is_archived',
+            ],
+            _content_row,
+        ),
+        TableSpec(
+            'transactions', Transaction, [
+                'id', 'user_id', 'gateway', 'gateway_txn_id', 'amount', 'currency',
+                'credits_purchased', 'status', 'created_at',
+            ],
+            _transaction_row,
+        ),
+        TableSpec(
+            'social_connections', SocialConnection,
+            ['user_id', 'platform', 'access_token', 'refresh_token', 'expires_at', 'profile_id'],
+            _social_row, key='rowid', keeps_ids=False,
+        ),
+    ]
+
+
+# --- Reading ---
+
+def read_chunks(source: sqlite3.Connection, spec: TableSpec, after, chunk_size: int):
+    """
+    Yields lists of up to `chunk_size` legacy rows in key order, starting
+    after `after`. Uses keyset pagination, so each chunk is an index range
+    read and memory holds one chunk at a time.
+    """
+    while True:
+        cursor = source.execute(
+            f"SELECT {spec.key} AS _key, * FROM {spec.source} WHERE {spec.key} > ? ORDER BY {spec.key} LIMIT ?",
+            (after, chunk_size),
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return
+        yield rows
+        after = rows[-1]['_key']
+
+
+def _fit(spec: TableSpec, values: tuple) -> tuple:
+    """Truncates strings to the target column lengths, as D1 did not enforce any."""
+    max_lengths = _max_lengths(spec)
+    fitted = []
+    for column, value in zip(spec.columns, values):
+        max_length = max_lengths.get(column)
+        if max_length and isinstance(value, str) and len(value) > max_length:
+            value = value[:max_length]
+        fitted.append(value)
+    return tuple(fitted)
+
+
+_max_length_cache = {}
+
+
+def _max_lengths(spec: TableSpec) -> dict:
+    if spec.source not in _max_length_cache:
+        _max_length_cache[spec.source] = {
+            field.column: field.max_length for field in spec.model._meta.concrete_fields if field.max_length
+        }
+    return _max_length_cache[spec.source]
+
+
+# --- Writing ---
+
+def _copy_csv(rows) -> io.StringIO:
+    """Serializes rows for COPY ... (FORMAT csv, NULL '\\N')."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            COPY_NULL if value is None
+            else ('t' if value else 'f') if isinstance(value, bool)
+            else value.isoformat() if isinstance(value, (datetime, date))
+            else value
+            for value in row
+        ])
+    buffer.seek(0)
+    return buffer
+
+
+def _user_filter(spec: TableSpec, alias: str) -> str:
+    if not spec.has_user:
+        return ''
+    users = get_user_model()._meta.db_table
+    return f"WHERE EXISTS (SELECT 1 FROM {users} WHERE {users}.id = {alias}.user_id)"
+
+
+def write_chunk_copy(spec: TableSpec, rows: list) -> int:
+    """
+    PostgreSQL: streams the chunk into a temporary staging table with
+    COPY FROM STDIN, then moves it across with INSERT ... ON CONFLICT DO
+    NOTHING, so chunks that were already imported are skipped.
+    """
+    table = spec.model._meta.db_table
+    columns = ', '.join(spec.columns)
+    with connection.cursor() as cursor:
+        # Only the imported columns, without constraints: tables whose ids are
+        # not kept get theirs from the identity column on the final INSERT.
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE import_stage ON COMMIT DROP AS SELECT {columns} FROM {table} WITH NO DATA"
+        )
+        cursor.copy_expert(
+            f"COPY import_stage ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')", _copy_csv(rows)
+        )
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}) SELECT {columns} FROM import_stage AS stage "
+            f"{_user_filter(spec, 'stage')} ON CONFLICT DO NOTHING"
+        )
+        return cursor.rowcount
+
+
+def write_chunk_insert(spec: TableSpec, rows: list) -> int:
+    """
+    Other databases (SQLite in development): a batched INSERT that skips
+    conflicting rows. A plain INSERT is used rather than bulk_create because
+    bulk_create would overwrite the legacy auto_now(_add) timestamps.
+    """
+    table = spec.model._meta.db_table
+    placeholders = ', '.join(['%s'] * len(spec.columns))
+    params = [
+        [_adapt(value) for value in row] + ([row[spec.columns.index('user_id')]] if spec.has_user else [])
+        for row in rows
+    ]
+    users = get_user_model()._meta.db_table
+    user_filter = f" WHERE EXISTS (SELECT 1 FROM {users} WHERE {users}.id = %s)" if spec.has_user else ' WHERE true'
+    with connection.cursor() as cursor:
+        before = _count(cursor, table)
+        cursor.executemany(
+            f"INSERT INTO {table} ({', '.join(spec.columns)}) SELECT {placeholders}{user_filter} ON CONFLICT DO NOTHING",
+            params,
+        )
+        return _count(cursor, table) - before
+
+
+def _adapt(value):
+    if isinstance(value, datetime):
+        return connection.ops.adapt_datetimefield_value(value)
+    if isinstance(value, date):
+        return connection.ops.adapt_datefield_value(value)
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _count(cursor, table) -> int:
+    # executemany's rowcount is unreliable for INSERT ... SELECT on SQLite.
+    cursor.execute(f"SELECT COUNT(*) FROM {table}")
+    return cursor.fetchone()[0]
+
+
+def import_table(source: sqlite3.Connection, spec: TableSpec, after, chunk_size: int, on_chunk=None) -> tuple:
+    """
+    Imports one legacy table in chunks, each in its own transaction.
+
+    Args:
+        source: The D1 SQLite database.
+        spec: The table mapping.
+        after: Resume after this legacy key (0 to start from the beginning).
+        chunk_size: Rows per chunk.
+        on_chunk: Called as on_chunk(last_key, read, written) after each committed chunk.
+
+    Returns:
+        (rows_read, rows_written)
+    """
+    write = write_chunk_copy if connection.vendor == 'postgresql' else write_chunk_insert
+    read = written = 0
+    for chunk in read_chunks(source, spec, after, chunk_size):
+        rows = [_fit(spec, spec.transform(row)) for row in chunk]
+        with transaction.atomic():
+            written += write(spec, rows)
+        read += len(chunk)
+        if on_chunk:
+            on_chunk(chunk[-1]['_key'], read, written)
+
+    if spec.keeps_ids:
+        # New rows created through Django must not collide with imported ids.
+        with connection.cursor() as cursor:
+            for statement in connection.ops.sequence_reset_sql(no_style(), [spec.model]):
+                cursor.execute(statement)
+    return read, written
+
+
+def find_user_id_conflicts(source: sqlite3.Connection, chunk_size: int, limit: int = 10) -> list:
+    """
+    Returns up to `limit` (legacy_id, legacy_email, existing_email) tuples for
+    legacy user ids that already belong to a different user in the target
+    database. Importing on top of them would attach legacy content to the
+    wrong accounts, since ids are kept.
+    """
+    User = get_user_model()
+    spec = TableSpec('users', User, [], None)
+    conflicts = []
+    for chunk in read_chunks(source, spec, 0, chunk_size):
+        existing = dict(User.objects.filter(pk__in=[row['id'] for row in chunk]).values_list('pk', 'email'))
+        for row in chunk:
+            if row['id'] in existing and existing[row['id']].lower() != (row['email'] or '').lower():
+                conflicts.append((row['id'], row['email'], existing[row['id']]))
+                if len(conflicts) >= limit:
+                    return conflicts
+    return conflicts
+
+
+def open_source(path: str) -> sqlite3.Connection:
+    source = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    source.row_factory = sqlite3.Row
+    return source
@@ -0,0 +1,213 @@
+import atexit
+import signal
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+from core.models import PendingJob
+from utils.logger import logging
+
+# Graceful shutdown. Cloud Run sends SIGTERM before stopping an instance and
+# kills it LIFECYCLE_DRAIN_TIMEOUT-and-a-bit seconds later. From the SIGTERM
+# on, long-running requests (views with `long_running = True`) are refused
+# with a 503, and those in flight are given until the drain timeout to
+# finish. Meanwhile they are checkpointed to PendingJob rows every
+# LIFECYCLE_CHECKPOINT_INTERVAL seconds, with their inputs and progress, and
+# a job's row is deleted as soon as it finishes; whatever is left when the
+# process dies is finished on another instance by `manage.py resume_jobs`.
+
+# How each kind of job is finished when resumed: a function taking the PendingJob.
+RESUMERS = {
+    'generation': 'apps.dashboard.jobs.resume_generation',
+    'social_post': 'apps.social.jobs.resume_post',
+}
+
+
+class ShuttingDown(Exception):
+    """Raised when long-running work is started on an instance that is shutting down."""
+
+    def __init__(self):
+        super().__init__("This server is restarting. Please try again in a moment.")
+
+
+@dataclass
+class Job:
+    """A long-running request in flight. `state` records its progress, for resuming it."""
+    kind: str
+    user_id: int
+    payload: dict
+    state: dict = field(default_factory=dict)
+    id: uuid.UUID = field(default_factory=uuid.uuid4)
+    interrupted: bool = False
+
+
+class Lifecycle:
+    """Tracks the long-running requests in flight, and drains them on shutdown."""
+
+    def __init__(self, drain_timeout: float = 8, checkpoint_interval: float = 0.5):
+        self.drain_timeout = drain_timeout
+        self.checkpoint_interval = checkpoint_interval
+        self.draining_since = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._drain_thread = None
+        self._jobs = {}
+        # Jobs that finished since the drain began, whose checkpoints are to be deleted.
+        self._finished = set()
+        self.stats = {
+            'started': 0, 'finished': 0, 'interrupted': 0, 'abandoned': 0, 'refused': 0, 'checkpointed': 0,
+        }
+
+    @property
+    def draining(self) -> bool:
+        return self.draining_since is not None
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(not job.interrupted for job in self._jobs.values())
+
+    @contextmanager
+    def job(self, kind: str, user, payload: dict):
+        """
+        Runs the block as a job of `kind` for `user`, resumable from `payload`
+        (JSON) and the yielded Job's `state`. A block that raises an Exception
+        has finished (its error was the outcome). One that is cancelled or
+        exits the process while the instance drains is interrupted, and left
+        to be resumed; at any other time it was abandoned (the client went
+        away, say) and is dropped, never to be charged for.
+
+        Raises:
+            ShuttingDown: If the instance is draining.
+        """
+        if self.draining:
+            with self._lock:
+                self.stats['refused'] += 1
+            raise ShuttingDown()
+        job = Job(kind, user.pk, payload)
+        with self._lock:
+            self._jobs[job.id] = job
+            self.stats['started'] += 1
+        abandoned = False
+        try:
+            yield job
+        except BaseException as e:
+            if not isinstance(e, Exception):
+                job.interrupted = self.draining
+                abandoned = not self.draining
+            raise
+        finally:
+            with self._lock:
+                if job.interrupted:
+                    self.stats['interrupted'] += 1
+                else:
+                    del self._jobs[job.id]
+                    self.stats['abandoned' if abandoned else 'finished'] += 1
+                    if self.draining:
+                        self._finished.add(job.id)
+            if self.draining:
+                self._wakeup.set()
+
+    def begin_drain(self, reason: str = 'SIGTERM'):
+        """
+        Stops taking new jobs and starts checkpointing the ones in flight.
+        Safe to call from a signal handler: the database work happens on a
+        thread of its own.
+        """
+        with self._lock:
+            if self.draining:
+                return
+            self.draining_since = time.monotonic()
+        logging.info(f"{reason}: draining {self.in_flight()} job(s) for up to {self.drain_timeout:g}s.")
+        self._drain_thread = threading.Thread(target=self._drain, name='lifecycle-drain', daemon=True)
+        self._drain_thread.start()
+        atexit.register(self.checkpoint)
+
+    def wait_drained(self, timeout: float = None):
+        """Waits until every job has finished or been interrupted, and the last checkpoint is written."""
+        if self._drain_thread is not None:
+            self._drain_thread.join(timeout)
+
+    def checkpoint(self) -> int:
+        """
+        Saves every job in flight (or interrupted) as a PendingJob, and
+        deletes the checkpoints of the jobs that have finished since.
+        Returns the number saved.
+        """
+        with self._lock:
+            jobs = [(job, dict(job.state)) for job in self._jobs.values()]
+            finished, self._finished = self._finished, set()
+        for job, state in jobs:
+            PendingJob.objects.update_or_create(
+                id=job.id,
+                defaults={'kind': job.kind, 'user_id': job.user_id, 'payload': job.payload, 'state': state},
+            )
+        if finished:
+            PendingJob.objects.filter(id__in=finished).delete()
+        with self._lock:
+            self.stats['checkpointed'] = len(jobs)
+        return len(jobs)
+
+    def install_signal_handler(self):
+        """
+        Drains on SIGTERM, then hands the signal on to the server's own
+        handler, which stops it taking connections and waits for the
+        requests in flight. Only installed over a server's handler, in the
+        main thread; under Uvicorn see core/workers.py instead.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return
+        previous = signal.getsignal(signal.SIGTERM)
+        if not callable(previous):
+            return
+
+        def handle_sigterm(signum, frame):
+            self.begin_drain()
+            previous(signum, frame)
+
+        signal.signal(signal.SIGTERM, handle_sigterm)
+
+    def _drain(self):
+        # Checkpoints until no job is running, also past the drain timeout:
+        # the server may leave them running until the process is killed.
+        deadline = self.draining_since + self.drain_timeout
+        overran = False
+        try:
+            while True:
+                running = self.in_flight()
+                try:
+                    self.checkpoint()
+                except Exception as e:
+                    logging.error(f"Could not checkpoint the jobs in flight: {e}")
+                if not running:
+                    break
+                if not overran and time.monotonic() >= deadline:
+                    overran = True
+                    logging.warning(f"{running} job(s) still running after {self.drain_timeout:g}s.")
+                self._wakeup.wait(self.checkpoint_interval)
+                self._wakeup.clear()
+            # Written now, in case the process is killed before its exit hooks run.
+            from core.metering import meter
+            meter.flush()
+            logging.info(
+                f"Drain done after {time.monotonic() - self.draining_since:.1f}s: "
+                f"{self.stats['checkpointed']} job(s) saved for resumption."
+            )
+        finally:
+            connections.close_all()
+
+
+def resume(job: PendingJob):
+    """Finishes a PendingJob, with the resumer for its kind."""
+    import_string(RESUMERS[job.kind])(job)
+
+
+lifecycle = Lifecycle(
+    drain_timeout=settings.LIFECYCLE_DRAIN_TIMEOUT,
+    checkpoint_interval=settings.LIFECYCLE_CHECKPOINT_INTERVAL,
+)
@@ -0,0 +1,390 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import httpx
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, connections
+from django.test import Client
+from django.urls import reverse
+
+from apps.billing.models import Transaction
+from apps.dashboard import generation as dashboard_generation, views as dashboard_views
+from apps.social import views as social_views
+from apps.social.models import SocialConnection
+from core.metering import record_usage
+from core.synthetic import PLANS, random_params, seeded_user_count, username
+
+# Replays a mix of dashboard, billing, webhook and posting traffic against
+# the app in-process with Django's test client, while Gemini and the social
+# platforms are replaced by stubs with a configurable latency. Requests go
+# through the full middleware, session, ORM and template stack, so the
+# numbers reflect the app and its database rather than the network.
+
+# Relative weight of each scenario in the default traffic mix.
+DEFAULT_MIX = {
+    'dashboard_get': 40,
+    'dashboard_post': 15,
+    'pricing_get': 15,
+    'pricing_post': 5,
+    'webhook': 10,
+    'post_to_social': 15,
+}
+# The status code each scenario is expected to return.
+EXPECTED_STATUS = {
+    'dashboard_get': 200,
+    'dashboard_post': 302,
+    'pricing_get': 200,
+    'pricing_post': 302,
+    'webhook': 200,
+    'post_to_social': 302,
+}
+WEBHOOK_GATEWAY = 'razorpay'
+WEBHOOK_SECRET = 'loadtest-webhook-secret'
+
+
+def parse_mix(value: str) -> dict:
+    """Parses "dashboard_get=50,webhook=10" into a mix, checking the scenario names."""
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Unknown scenario '{name}'. Choose from: {', '.join(DEFAULT_MIX)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class _StubResponse:
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self._data = data
+        self.text = json.dumps(data)
+
+    def json(self):
+        return self._data
+
+
+class StubGeminiClient:
+    """Stands in for core.ai_engine.GeminiClient: sleeps for the configured latency, then returns filler text."""
+
+    def __init__(self, latency: float, seed: int = None):
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def _sleep(self):
+        time.sleep(self.latency * self._jitter())
+
+    def _jitter(self):
+        with self.lock:
+            return self.rng.uniform(0.5, 1.5)
+
+    def generate_text(self, prompt: str, model_name: str = None):
+        started = time.monotonic()
+        self._sleep()
+        text = self._text(prompt)
+        self._record('TEXT', model_name, started, prompt, text)
+        return text, model_name or 'stub'
+
+    async def agenerate_text(self, prompt: str, model_name: str = None):
+        started = time.monotonic()
+        await asyncio.sleep(self.latency * self._jitter())
+        text = self._text(prompt)
+        self._record('TEXT', model_name, started, prompt, text)
+        return text, model_name or 'stub'
+
+    def generate_variants(self, prompt: str, platforms: list, count: int, model_name: str = None):
+        started = time.monotonic()
+        self._sleep()
+        text = self._text(prompt)
+        self._record('VARIANTS', model_name, started, prompt, text * len(platforms) * count)
+        return [{platform: text for platform in platforms}] * count, model_name or 'stub'
+
+    async def agenerate_variants(self, prompt: str, platforms: list, count: int, model_name: str = None):
+        started = time.monotonic()
+        await asyncio.sleep(self.latency * self._jitter())
+        text = self._text(prompt)
+        self._record('VARIANTS', model_name, started, prompt, text * len(platforms) * count)
+        return [{platform: text for platform in platforms}] * count, model_name or 'stub'
+
+    @staticmethod
+    def _record(operation, model_name, started, prompt, text):
+        # Metered like real calls, at roughly four characters per token.
+        record_usage(operation, model_name or 'stub', started, usage_metadata={
+            'promptTokenCount': len(prompt) // 4,
+            'candidatesTokenCount': len(text) // 4,
+            'totalTokenCount': (len(prompt) + len(text)) // 4,
+        })
+
+    @staticmethod
+    def _text(prompt):
+        return f"Load test content for a prompt of {len(prompt)} characters. " * 20
+
+    def generate_image(self, prompt: str):
+        raise Exception("Image generation is not available during load tests.")
+
+    async def agenerate_image(self, prompt: str):
+        self.generate_image(prompt)
+
+
+class StubOAuth2Session:
+    """Stands in for requests_oauthlib.OAuth2Session when posting: every post succeeds after `latency` seconds."""
+    latency = 0.0
+
+    def __init__(self, client_id=None, token=None, **kwargs):
+        self.token = token
+
+    def mount(self, prefix, adapter):
+        pass
+
+    def post(self, url, json=None, headers=None, **kwargs):
+        time.sleep(self.latency)
+        return _StubResponse(201, {'data': {'id': str(random.getrandbits(63))}})
+
+
+class StubPlatformTransport(httpx.AsyncBaseTransport):
+    """The async views' equivalent of StubOAuth2Session: every request succeeds after `latency` seconds."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def handle_async_request(self, request):
+        await asyncio.sleep(self.latency)
+        return httpx.Response(201, json={'data': {'id': str(random.getrandbits(63))}})
+
+
+@contextmanager
+def stub_backends(ai_latency: float, oauth_latency: float, seed: int = None):
+    """Swaps the Gemini client and the social platforms' APIs for stubs, and provides a webhook secret."""
+    secret_name = f"{WEBHOOK_GATEWAY.upper()}_WEBHOOK_SECRET"
+    saved = (
+        dashboard_views.gemini_client, dashboard_generation.gemini_client, social_views.OAuth2Session,
+        social_views.async_client, os.environ.get(secret_name),
+    )
+    StubOAuth2Session.latency = oauth_latency
+    platform_client = httpx.AsyncClient(transport=StubPlatformTransport(oauth_latency))
+    dashboard_views.gemini_client = dashboard_generation.gemini_client = StubGeminiClient(ai_latency, seed)
+    social_views.OAuth2Session = StubOAuth2Session
+    social_views.async_client = lambda: platform_client
+    os.environ[secret_name] = WEBHOOK_SECRET
+    try:
+        yield
+    finally:
+        (dashboard_views.gemini_client, dashboard_generation.gemini_client, social_views.OAuth2Session,
+         social_views.async_client, secret) = saved
+        if secret is None:
+            os.environ.pop(secret_name, None)
+        else:
+            os.environ[secret_name] = secret
+
+
+def sign_webhook(txn_id: str):
+    """Returns the body and signature of a payment.captured webhook for `txn_id`."""
+    body = json.dumps({
+        'event': 'payment.captured',
+        'payload': {'payment': {'entity': {'order_id': txn_id}}},
+    }).encode()
+    return body, hmac.new(WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+
+
+def make_client(host: str) -> Client:
+    # Requests arrive the way they do behind Cloud Run's HTTPS proxy, so
+    # SECURE_SSL_REDIRECT (on whenever DEBUG is off) does not redirect them.
+    return Client(HTTP_HOST=host, HTTP_X_FORWARDED_PROTO='https')
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(q / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class Results:
+    """Thread-safe latency and error tally per scenario."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = {}
+
+    def record(self, name: str, seconds: float, error: str = None):
+        with self.lock:
+            self.latencies[name].append(seconds * 1000)
+            if error:
+                self.errors[name] += 1
+                self.error_samples.setdefault(name, error)
+
+    def summary(self, elapsed: float) -> list:
+        """One dict per scenario (plus an "all" row) with count, errors, throughput and latency percentiles in ms."""
+        rows = []
+        everything = []
+        for name in sorted(self.latencies):
+            values = sorted(self.latencies[name])
+            everything.extend(values)
+            rows.append(self._row(name, values, self.errors[name], elapsed))
+        rows.append(self._row('all', sorted(everything), sum(self.errors.values()), elapsed))
+        return rows
+
+    @staticmethod
+    def _row(name, values, errors, elapsed):
+        return {
+            'scenario': name,
+            'requests': len(values),
+            'errors': errors,
+            'rps': len(values) / elapsed if elapsed else 0.0,
+            'p50': percentile(values, 50),
+            'p90': percentile(values, 90),
+            'p95': percentile(values, 95),
+            'p99': percentile(values, 99),
+            'max': values[-1] if values else 0.0,
+        }
+
+
+class VirtualUser:
+    """A logged-in synthetic user with the ids the scenarios need."""
+
+    def __init__(self, user, host: str, history=50):
+        self.user = user
+        self.client = make_client(host)
+        self.client.force_login(user)
+        self.content_ids = list(
+            user.content_history.order_by('-pk').values_list('pk', flat=True)[:history]
+        )
+        self.platforms = list(SocialConnection.objects.filter(user=user).values_list('platform', flat=True))
+
+
+class LoadTest:
+    """
+    Drives `concurrency` worker threads, each cycling through its share of
+    the virtual users and picking scenarios by weight from `mix`, until
+    `duration` seconds have passed or `max_requests` requests have been made.
+    """
+
+    def __init__(self, prefix='load', users=100, concurrency=8, mix=None, seed=None):
+        self.prefix = prefix
+        self.user_count = users
+        self.concurrency = concurrency
+        self.mix = mix or DEFAULT_MIX
+        # Unseeded by default: replaying identical generation requests run after
+        # run would mostly exercise the near-duplicate check rather than generation.
+        self.rng = random.Random(seed)
+        self.host = next((host for host in settings.ALLOWED_HOSTS if host not in ('*', '')), 'localhost').lstrip('.')
+        self.results = Results()
+        self.pending_txns = deque()
+        self.pending_lock = threading.Lock()
+        self.sent = 0
+        self.sent_lock = threading.Lock()
+
+    def prepare(self):
+        """Logs in a random sample of the seeded users and collects the pending payments to confirm."""
+        available = seeded_user_count(self.prefix)
+        if not available:
+            raise ValueError(f"No synthetic users with the prefix '{self.prefix}'. Run `manage.py seed_synthetic` first.")
+        sample = self.rng.sample(range(available), min(self.user_count, available))
+        users = get_user_model().objects.filter(username__in=[username(self.prefix, number) for number in sample])
+        self.users = [VirtualUser(user, self.host) for user in users]
+        self.pending_txns.extend(
+            Transaction.objects.filter(gateway_txn_id__startswith=f"{self.prefix}_", status='PENDING')
+            .values_list('gateway_txn_id', flat=True)[:100_000]
+        )
+        if len(self.users) < self.concurrency:
+            raise ValueError(f"Only {len(self.users)} synthetic users are available; use at least one per worker.")
+
+    def run(self, duration: float = 30.0, max_requests: int = None) -> float:
+        """Runs the load and returns the elapsed seconds. Results are in `self.results`."""
+        self.deadline = time.monotonic() + duration
+        self.max_requests = max_requests
+        workers = [
+            threading.Thread(
+                target=self._worker, args=(index, random.Random(self.rng.getrandbits(64))), name=f"loadtest-{index}"
+            )
+            for index in range(self.concurrency)
+        ]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return time.perf_counter() - start
+
+    def _next_request(self) -> bool:
+        if time.monotonic() >= self.deadline:
+            return False
+        with self.sent_lock:
+            if self.max_requests is not None and self.sent >= self.max_requests:
+                return False
+            self.sent += 1
+        return True
+
+    def _worker(self, index: int, rng: random.Random):
+        users = self.users[index::self.concurrency]
+        webhook_client = make_client(self.host)
+        names, weights = list(self.mix), list(self.mix.values())
+        try:
+            turn = 0
+            while self._next_request():
+                user = users[turn % len(users)]
+                turn += 1
+                name = rng.choices(names, weights)[0]
+                start = time.perf_counter()
+                try:
+                    response = getattr(self, name)(webhook_client if name == 'webhook' else user, rng)
+                    if response is None:
+                        continue  # Not applicable to this user.
+                    error = None
+                    if response.status_code != EXPECTED_STATUS[name]:
+                        error = f"HTTP {response.status_code}"
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                finally:
+                    # The test client skips this request_finished handler, which a real
+                    # server runs: it returns pooled connections and honours CONN_MAX_AGE.
+                    close_old_connections()
+                self.results.record(name, time.perf_counter() - start, error)
+        finally:
+            # Each thread has its own database connections.
+            connections.close_all()
+
+    # --- Scenarios ---
+
+    def dashboard_get(self, user, rng):
+        return user.client.get(reverse('dashboard:dashboard'))
+
+    def dashboard_post(self, user, rng):
+        params = random_params(rng)
+        data = {key: value for key, value in params.items() if value not in ('', False)}
+        return user.client.post(reverse('dashboard:dashboard'), data)
+
+    def pricing_get(self, user, rng):
+        return user.client.get(reverse('billing:pricing'))
+
+    def pricing_post(self, user, rng):
+        return user.client.post(reverse('billing:pricing'), {'plan_id': rng.choice(PLANS)['id']})
+
+    def webhook(self, client, rng):
+        with self.pending_lock:
+            txn_id = self.pending_txns.popleft() if self.pending_txns else f"{self.prefix}_missing_{rng.getrandbits(32)}"
+        body, signature = sign_webhook(txn_id)
+        return client.post(
+            reverse('billing:webhook', args=[WEBHOOK_GATEWAY]), body,
+            content_type='application/json', HTTP_X_RAZORPAY_SIGNATURE=signature,
+        )
+
+    def post_to_social(self, user, rng):
+        if not user.content_ids or not user.platforms:
+            return None
+        content_id = rng.choice(user.content_ids)
+        platform = rng.choice(user.platforms)
+        return user.client.post(reverse('social:post_to_social', args=[content_id, platform]))
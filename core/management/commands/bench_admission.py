@@ -0,0 +1,98 @@
+import asyncio
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.admission import Admission, AdmissionRejected, FairGate, SlidingWindowLimiter
+from core.loadtest import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the overhead of generation admission control (core/admission.py) per request, then "
+        "simulates one client flooding the endpoint while other users make single requests, and compares "
+        "how long the other users wait for a slot with a plain first-come queue and with the fair queue."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checks', type=int, default=200_000, help="Admissions timed for the overhead.")
+        parser.add_argument('--keys', type=int, default=10_000, help="Distinct users in the overhead run.")
+        parser.add_argument('--slots', type=int, default=4, help="Concurrent generations in the simulation.")
+        parser.add_argument('--flood', type=int, default=200, help="Requests the flooding client sends at once.")
+        parser.add_argument('--users', type=int, default=50, help="Other users, making one request each.")
+        parser.add_argument('--service-ms', type=float, default=20, help="Time a generation holds its slot.")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        self.measure_overhead(options)
+        self.stdout.write(
+            f"\n{options['flood']} requests from one client, {options['users']} other users, "
+            f"{options['slots']} slots, {options['service_ms']:.0f}ms per generation:"
+        )
+        self.stdout.write(f"{'queue':>22} {'p50 wait':>9} {'p99 wait':>9} {'max wait':>9} {'flood rejected':>15}")
+        for label, keyed, max_queued in (
+            ('first come', False, options['flood'] + options['users']),
+            ('fair', True, options['flood']),
+            ('fair, 2 queued/user', True, 2),
+        ):
+            gate = FairGate(options['slots'], max_queued)
+            waits, rejected = asyncio.run(self.simulate(gate, keyed, options))
+            waits.sort()
+            self.stdout.write(
+                f"{label:>22} {percentile(waits, 50):>7.0f}ms {percentile(waits, 99):>7.0f}ms "
+                f"{waits[-1]:>7.0f}ms {rejected:>15}"
+            )
+
+    def measure_overhead(self, options):
+        rng = random.Random(options['seed'])
+        keys = [rng.randrange(options['keys']) for _ in range(options['checks'])]
+        limiter = SlidingWindowLimiter([(10**9, 60), (10**9, 3600)])
+        admission = Admission(limiter, FairGate(10**9), queue_timeout=1)
+
+        started = time.perf_counter()
+        for key in keys:
+            limiter.hit(key)
+        per_hit = (time.perf_counter() - started) / len(keys)
+
+        started = time.perf_counter()
+        for key in keys:
+            admission.admit(key)
+            admission.release(0.0)
+        per_admission = (time.perf_counter() - started) / len(keys)
+
+        self.stdout.write(
+            f"Overhead over {len(keys)} requests from {options['keys']} users: "
+            f"rate limits {per_hit * 1e6:.2f}µs, rate limits + slot {per_admission * 1e6:.2f}µs per request"
+        )
+
+    async def simulate(self, gate, keyed, options):
+        rng = random.Random(options['seed'])
+        service = options['service_ms'] / 1000
+        # Long enough that nothing times out: the comparison is of waits.
+        timeout = service * (options['flood'] + options['users'])
+        waits = []
+        rejected = 0
+
+        async def request(key, delay):
+            nonlocal rejected
+            await asyncio.sleep(delay)
+            started = time.monotonic()
+            try:
+                await gate.aacquire(key if keyed else None, timeout)
+            except AdmissionRejected:
+                rejected += 1
+                return
+            waited = time.monotonic() - started
+            await asyncio.sleep(service)
+            gate.release(service)
+            if key != 'flood':
+                waits.append(waited * 1000)
+
+        # The other users arrive while the flood is being worked through.
+        spread = service * options['flood'] / options['slots'] / 2
+        await asyncio.gather(
+            *(request('flood', 0) for _ in range(options['flood'])),
+            *(request(f"user{i}", rng.uniform(0, spread)) for i in range(options['users'])),
+        )
+        return waits, rejected
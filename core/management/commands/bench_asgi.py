@@ -0,0 +1,238 @@
+import asyncio
+import functools
+import json
+import os
+import resource
+import secrets
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from core.loadtest import (
+    EXPECTED_STATUS, WEBHOOK_GATEWAY, LoadTest, parse_mix, percentile, sign_webhook, stub_backends,
+)
+from core.synthetic import PLANS, random_params
+
+# Each server runs in a child process of its own (this command with --server),
+# so that ASYNC_VIEWS picks the matching views and each gets a fresh process
+# to measure, as a single instance would be.
+SERVERS = {
+    'wsgi': 'False',  # server: ASYNC_VIEWS
+    'asgi': 'True',
+}
+DEFAULT_MIX = 'dashboard_post=50,post_to_social=30,webhook=10,dashboard_get=10'
+RESULT_PREFIX = 'RESULT '
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures how many concurrent requests one instance handles under WSGI (gunicorn-style worker "
+        "threads, sync views) and ASGI (one event loop, async views), with Gemini and the social platforms "
+        "stubbed out with a fixed latency. Requests go in-process through project.wsgi / project.asgi with "
+        "the full middleware stack. Uses the users from `manage.py seed_synthetic`; on PostgreSQL, set "
+        "DATABASE_POOL_SIZE, since ASGI requests do not keep per-thread connections."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', default='8,32,128',
+                            help="Comma-separated numbers of clients with a request in flight.")
+        parser.add_argument('--duration', type=float, default=10, help="Seconds per concurrency level.")
+        parser.add_argument('--threads', type=int, default=8, help="WSGI worker threads (gunicorn --threads).")
+        # Gemini 2.5 Pro takes seconds per generation, far longer than the app's own work.
+        parser.add_argument('--ai-latency-ms', type=float, default=2000)
+        parser.add_argument('--oauth-latency-ms', type=float, default=300)
+        parser.add_argument('--mix', default=DEFAULT_MIX, help="Scenario weights, as for `manage.py loadtest`.")
+        parser.add_argument('--prefix', default='load', help="Username prefix of users seeded by seed_synthetic.")
+        parser.add_argument('--server', choices=list(SERVERS), help="Run a single server in this process.")
+
+    def handle(self, *args, **options):
+        try:
+            parse_mix(options['mix'])
+        except ValueError as e:
+            raise CommandError(e)
+        if options['server']:
+            return self.run_server(options)
+
+        forwarded = [
+            '--concurrency', options['concurrency'], '--duration', str(options['duration']),
+            '--threads', str(options['threads']), '--ai-latency-ms', str(options['ai_latency_ms']),
+            '--oauth-latency-ms', str(options['oauth_latency_ms']), '--mix', options['mix'],
+            '--prefix', options['prefix'],
+        ]
+        results = {}
+        for server, async_views in SERVERS.items():
+            self.stdout.write(f"Running {server}...")
+            # Without warm-up, which would connect to the real backends the stubs stand in for.
+            child = subprocess.run(
+                [sys.executable, sys.argv[0], 'bench_asgi', '--server', server, *forwarded],
+                env={**os.environ, 'ASYNC_VIEWS': async_views, 'WARMUP_ENABLED': 'False'},
+                stdout=subprocess.PIPE, text=True,
+            )
+            if child.returncode:
+                raise CommandError(f"The {server} run failed.")
+            results[server] = [
+                json.loads(line[len(RESULT_PREFIX):]) for line in child.stdout.splitlines()
+                if line.startswith(RESULT_PREFIX)
+            ]
+
+        self.stdout.write(
+            f"Stub latency: Gemini {options['ai_latency_ms']:.0f}ms, platforms {options['oauth_latency_ms']:.0f}ms; "
+            f"WSGI with {options['threads']} threads"
+        )
+        header = f"{'req/s':>8} {'p50':>8} {'p95':>8} {'errors':>7} {'threads':>8}"
+        self.stdout.write(f"{'clients':>8} | {'wsgi':^43} | {'asgi':^43}")
+        self.stdout.write(f"{'':>8} | {header} | {header}")
+        for wsgi, asgi in zip(results['wsgi'], results['asgi']):
+            cells = [
+                f"{r['rps']:>8.1f} {r['p50']:>6.0f}ms {r['p95']:>6.0f}ms {r['errors']:>7} {r['peak_threads']:>8}"
+                for r in (wsgi, asgi)
+            ]
+            self.stdout.write(f"{wsgi['clients']:>8} | {cells[0]} | {cells[1]}")
+        for server, rows in results.items():
+            samples = {name: error for row in rows for name, error in row['error_samples'].items()}
+            for name, error in samples.items():
+                self.stdout.write(f"{server} {name}: {error}")
+            if rows:
+                self.stdout.write(f"{server} peak RSS: {rows[-1]['rss_mib']:.0f} MiB")
+
+    # --- One server, in this process ---
+
+    def run_server(self, options):
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        load = LoadTest(prefix=options['prefix'], users=max(levels), concurrency=1, mix=parse_mix(options['mix']))
+        try:
+            load.prepare()
+        except ValueError as e:
+            raise CommandError(e)
+        self.csrf_token = secrets.token_hex(16)
+
+        drive = self.drive_asgi if options['server'] == 'asgi' else self.drive_wsgi
+        with stub_backends(options['ai_latency_ms'] / 1000, options['oauth_latency_ms'] / 1000):
+            for level in levels:
+                users = load.users[:level]
+                result = asyncio.run(drive(load, users, options))
+                result['clients'] = level
+                result['rss_mib'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+                self.stdout.write(RESULT_PREFIX + json.dumps(result))
+
+    def client_kwargs(self, load, user):
+        origin = f"https://{load.host}"
+        return {
+            'base_url': origin,
+            'cookies': {
+                settings.SESSION_COOKIE_NAME: user.client.cookies[settings.SESSION_COOKIE_NAME].value,
+                settings.CSRF_COOKIE_NAME: self.csrf_token,
+            },
+            'headers': {'X-CSRFToken': self.csrf_token, 'Origin': origin},
+            'timeout': 120,
+        }
+
+    async def drive_wsgi(self, load, users, options):
+        from project.wsgi import application
+
+        transport = httpx.WSGITransport(app=application)
+        clients = [httpx.Client(transport=transport, **self.client_kwargs(load, user)) for user in users]
+        # Clients queue for the worker threads, as requests do for gunicorn's.
+        pool = ThreadPoolExecutor(options['threads'])
+        loop = asyncio.get_running_loop()
+
+        async def request(client, method, url, kwargs):
+            return await loop.run_in_executor(pool, functools.partial(client.request, method, url, **kwargs))
+
+        try:
+            return await self.drive(load, users, clients, request, options)
+        finally:
+            pool.shutdown()
+            for client in clients:
+                client.close()
+
+    async def drive_asgi(self, load, users, options):
+        from project.asgi import application
+
+        transport = httpx.ASGITransport(app=application)
+        clients = [httpx.AsyncClient(transport=transport, **self.client_kwargs(load, user)) for user in users]
+
+        async def request(client, method, url, kwargs):
+            return await client.request(method, url, **kwargs)
+
+        try:
+            return await self.drive(load, users, clients, request, options)
+        finally:
+            for client in clients:
+                await client.aclose()
+
+    async def drive(self, load, users, clients, request, options):
+        names, weights = list(load.mix), list(load.mix.values())
+        latencies = []
+        errors = {}
+        error_samples = {}
+        deadline = time.monotonic() + options['duration']
+        peak_threads = threading.active_count()
+
+        async def client_loop(user, client):
+            nonlocal peak_threads
+            while time.monotonic() < deadline:
+                name = load.rng.choices(names, weights)[0]
+                prepared = self.build_request(load, user, name)
+                if prepared is None:
+                    continue
+                start = time.perf_counter()
+                try:
+                    response = await request(client, *prepared)
+                    error = None
+                    if response.status_code != EXPECTED_STATUS[name]:
+                        error = f"HTTP {response.status_code}"
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                latencies.append((time.perf_counter() - start) * 1000)
+                peak_threads = max(peak_threads, threading.active_count())
+                if error:
+                    errors[name] = errors.get(name, 0) + 1
+                    error_samples.setdefault(name, error)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(user, client) for user, client in zip(users, clients)))
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        return {
+            'requests': len(latencies),
+            'errors': sum(errors.values()),
+            'error_samples': error_samples,
+            'rps': len(latencies) / elapsed,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'peak_threads': peak_threads,
+        }
+
+    def build_request(self, load, user, name):
+        """(method, url, httpx kwargs) for the scenario, as LoadTest makes them; None if it does not apply."""
+        rng = load.rng
+        if name == 'dashboard_get':
+            return 'GET', reverse('dashboard:dashboard'), {}
+        if name == 'dashboard_post':
+            params = random_params(rng)
+            data = {key: value for key, value in params.items() if value not in ('', False)}
+            return 'POST', reverse('dashboard:dashboard'), {'data': data}
+        if name == 'pricing_get':
+            return 'GET', reverse('billing:pricing'), {}
+        if name == 'pricing_post':
+            return 'POST', reverse('billing:pricing'), {'data': {'plan_id': rng.choice(PLANS)['id']}}
+        if name == 'webhook':
+            txn_id = load.pending_txns.popleft() if load.pending_txns else f"{load.prefix}_missing_{rng.getrandbits(32)}"
+            body, signature = sign_webhook(txn_id)
+            return 'POST', reverse('billing:webhook', args=[WEBHOOK_GATEWAY]), {
+                'content': body,
+                'headers': {'Content-Type': 'application/json', 'X-Razorpay-Signature': signature},
+            }
+        if name == 'post_to_social':
+            if not user.content_ids or not user.platforms:
+                return None
+            content_id = rng.choice(user.content_ids)
+            return 'POST', reverse('social:post_to_social', args=[content_id, rng.choice(user.platforms)]), {}
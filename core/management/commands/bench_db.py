@@ -0,0 +1,201 @@
+import copy
+import random
+import statistics
+import threading
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.db.utils import load_backend
+from django.urls import reverse
+
+from core.db.backends.postgresql_pool.base import get_pool
+from core.db.routers import REPLICA, replica_configured
+from core.loadtest import LoadTest, stub_backends
+
+HISTORY_SQL = (
+    "SELECT id, title, status, created_at FROM dashboard_contenthistory "
+    "WHERE user_id = %s ORDER BY created_at DESC LIMIT 20"
+)
+CREDITS_SQL = "SELECT balance FROM billing_credits WHERE user_id = %s"
+
+# Connection handling per mode: (engine, CONN_MAX_AGE).
+MODES = {
+    'per-request': ('django.db.backends.postgresql', 0),
+    'persistent': ('django.db.backends.postgresql', 600),
+    'pooled': ('core.db.backends.postgresql_pool', 0),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares a new connection per request, persistent per-thread connections and the connection "
+        "pool under threaded load (PostgreSQL). With --routing, also measures how many reads the replica "
+        "takes and checks read-your-writes; for a local stand-in, point DATABASE_REPLICA_URL at a copy "
+        "of the database (e.g. CREATE DATABASE replica TEMPLATE primary, or a copied SQLite file)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help="Request threads (gunicorn --threads).")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per thread.")
+        parser.add_argument('--pool-size', type=int, default=4)
+        parser.add_argument('--work-ms', type=float, default=20,
+                            help="Time each request spends outside the database (view logic, rendering).")
+        parser.add_argument('--routing', action='store_true', help="Benchmark replica routing instead.")
+        parser.add_argument('--routing-requests', type=int, default=200)
+        parser.add_argument('--prefix', default='load', help="Username prefix of users seeded by seed_synthetic.")
+
+    def handle(self, *args, **options):
+        if options['routing']:
+            return self.bench_routing(options)
+        if connection.vendor != 'postgresql':
+            raise CommandError("The connection benchmark needs PostgreSQL; use --routing for the routing benchmark.")
+
+        user_ids = list(get_user_model().objects.values_list('id', flat=True)[:1000])
+        if not user_ids:
+            raise CommandError("No users to query; run `manage.py seed_synthetic` first.")
+        self.stdout.write(
+            f"{options['threads']} threads x {options['requests']} requests, {options['work_ms']:.0f}ms of "
+            f"non-database work per request, pool size {options['pool_size']}"
+        )
+        self.stdout.write(f"{'mode':12} {'req/s':>8} {'p50':>7} {'p99':>7} {'connects':>9} {'peak conns':>11}")
+        for mode in MODES:
+            result = self.run_mode(mode, user_ids, options)
+            self.stdout.write(
+                f"{mode:12} {result['rps']:>8.1f} {result['p50']:>6.1f}ms {result['p99']:>6.1f}ms "
+                f"{result['connects']:>9} {result['peak']:>11}"
+            )
+
+    def run_mode(self, mode, user_ids, options):
+        engine, max_age = MODES[mode]
+        alias = f"bench-{mode}"
+        settings_dict = copy.deepcopy(connections['default'].settings_dict)
+        settings_dict.update(ENGINE=engine, CONN_MAX_AGE=max_age, POOL={'MAX_SIZE': options['pool_size']})
+        settings_dict['OPTIONS']['application_name'] = alias
+        backend = load_backend(engine)
+
+        connects = []
+        def count_connect(sender, connection, **kwargs):
+            if connection.alias == alias:
+                connects.append(1)
+        connection_created.connect(count_connect)
+
+        latencies = []
+        latencies_lock = threading.Lock()
+        work = options['work_ms'] / 1000
+
+        def worker(seed):
+            rng = random.Random(seed)
+            db = backend.DatabaseWrapper(settings_dict, alias)
+            timings = []
+            for _ in range(options['requests']):
+                user_id = rng.choice(user_ids)
+                start = time.perf_counter()
+                time.sleep(work / 2)
+                with db.cursor() as cursor:
+                    cursor.execute(CREDITS_SQL, [user_id])
+                    cursor.fetchall()
+                    cursor.execute(HISTORY_SQL, [user_id])
+                    cursor.fetchall()
+                time.sleep(work / 2)
+                # What Django does when a request finishes.
+                db.close_if_unusable_or_obsolete()
+                timings.append((time.perf_counter() - start) * 1000)
+            db.close()
+            with latencies_lock:
+                latencies.extend(timings)
+
+        peak = [0]
+        running = threading.Event()
+        running.set()
+
+        def sample_connections():
+            while running.is_set():
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT count(*) FROM pg_stat_activity WHERE application_name = %s", [alias])
+                    peak[0] = max(peak[0], cursor.fetchone()[0])
+                time.sleep(0.005)
+            connection.close()
+
+        sampler = threading.Thread(target=sample_connections)
+        sampler.start()
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(options['threads'])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        running.clear()
+        sampler.join()
+        connection_created.disconnect(count_connect)
+
+        pool = get_pool(alias)
+        if pool is not None:
+            connects = [1] * pool.stats['created']
+            pool.close()
+        latencies.sort()
+        return {
+            'rps': len(latencies) / elapsed,
+            'p50': statistics.median(latencies),
+            'p99': latencies[int(len(latencies) * 0.99) - 1],
+            'connects': len(connects),
+            'peak': peak[0],
+        }
+
+    def bench_routing(self, options):
+        if not replica_configured():
+            raise CommandError("Set DATABASE_REPLICA_URL to benchmark replica routing.")
+        load = LoadTest(prefix=options['prefix'], users=20, concurrency=1)
+        try:
+            load.prepare()
+        except ValueError as e:
+            raise CommandError(e)
+
+        queries = {'default': 0, REPLICA: 0}
+
+        def counter(alias):
+            def count(execute, sql, params, many, context):
+                queries[alias] += 1
+                return execute(sql, params, many, context)
+            return count
+
+        pages = [
+            reverse('dashboard:search') + '?q=energy',
+            reverse('dashboard:analytics', args=['niche']),
+            reverse('billing:pricing'),
+            reverse('social:connections'),
+        ]
+        rng = random.Random(0)
+        with connections['default'].execute_wrapper(counter('default')), \
+                connections[REPLICA].execute_wrapper(counter(REPLICA)):
+            start = time.perf_counter()
+            for _ in range(options['routing_requests']):
+                rng.choice(load.users).client.get(rng.choice(pages))
+            elapsed = time.perf_counter() - start
+            read_queries = dict(queries)
+
+            # Read-your-writes: generate content, then search for it straight away.
+            # A stand-in replica that is a plain copy never receives the new row,
+            # so the search only finds it if the follow-up read went to the primary.
+            found = 0
+            with stub_backends(0, 0):
+                for user in load.users:
+                    marker = f"zz{uuid.uuid4().hex[:10]}"
+                    title = f"Routing check {marker}"
+                    user.client.post(reverse('dashboard:dashboard'), {
+                        'title': title, 'niche': 'Technology', 'allow_similar': 'on',
+                    })
+                    response = user.client.get(reverse('dashboard:search') + f"?q={marker}")
+                    found += title in response.content.decode()
+
+        total = sum(read_queries.values()) or 1
+        self.stdout.write(
+            f"{options['routing_requests']} read-only page loads in {elapsed:.1f}s: "
+            f"{read_queries[REPLICA]} queries on the replica, {read_queries['default']} on the primary "
+            f"({read_queries[REPLICA] / total:.0%} offloaded)"
+        )
+        self.stdout.write(f"Read-your-writes: new content visible right after generating it for {found}/{len(load.users)} users")
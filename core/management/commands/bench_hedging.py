@@ -0,0 +1,107 @@
+import asyncio
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.hedging import Hedger
+from core.loadtest import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulates Gemini text calls with a long latency tail and compares the latency and the cost of "
+        "calls made without hedging and with hedging (core/hedging.py) at several hedge percentiles. "
+        "Time is scaled down so a run takes seconds; latencies are reported at full scale."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=2000, help="Measured calls per configuration.")
+        parser.add_argument('--warmup', type=int, default=200, help="Calls made first to fill the latency window.")
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--percentiles', default='90,95,99', help="Comma-separated hedge percentiles to try.")
+        parser.add_argument('--max-rate', type=float, default=0.1, help="Most calls that may be hedged.")
+        parser.add_argument('--median-ms', type=float, default=4000, help="Median latency of the primary model.")
+        parser.add_argument('--tail-probability', type=float, default=0.05,
+                            help="Share of calls that are slow, e.g. queued behind other work upstream.")
+        parser.add_argument('--tail-factor', type=float, default=5, help="How many times slower a slow call is.")
+        parser.add_argument('--hedge-speed', type=float, default=1.0,
+                            help="Hedge model latency relative to the primary's (e.g. 0.4 for a Flash model).")
+        parser.add_argument('--hedge-cost', type=float, default=1.0,
+                            help="Cost of a hedge call relative to a primary call (e.g. 0.1 for a Flash model).")
+        parser.add_argument('--time-scale', type=float, default=0.01, help="Seconds slept per simulated second.")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        try:
+            levels = [float(level) for level in options['percentiles'].split(',')]
+        except ValueError:
+            raise CommandError("--percentiles must be comma-separated numbers.")
+        self.rng = random.Random(options['seed'])
+
+        self.stdout.write(
+            f"Primary median {options['median_ms']:.0f}ms, {options['tail_probability']:.0%} of calls "
+            f"{options['tail_factor']:g}x slower; hedge model {options['hedge_speed']:g}x the latency "
+            f"at {options['hedge_cost']:g}x the cost; at most {options['max_rate']:.0%} of calls hedged."
+        )
+        self.stdout.write(
+            f"{'hedging':>10} {'p50':>9} {'p95':>9} {'p99':>9} {'hedged':>8} {'won':>6} {'extra cost':>11}"
+        )
+        baseline = None
+        for level in [None, *levels]:
+            latencies, stats = asyncio.run(self.run(level, options))
+            p99 = percentile(latencies, 99)
+            baseline = baseline or p99
+            hedged = stats['hedged'] / stats['calls']
+            won = stats['hedge_wins'] / stats['hedged'] if stats['hedged'] else 0
+            # Losing calls are paid for too: the upstream finishes them either way.
+            extra_cost = hedged * options['hedge_cost']
+            label = 'off' if level is None else f"p{level:g}"
+            self.stdout.write(
+                f"{label:>10} {percentile(latencies, 50):>7.0f}ms {percentile(latencies, 95):>7.0f}ms "
+                f"{p99:>7.0f}ms {hedged:>8.1%} {won:>6.0%} {extra_cost:>+11.1%}"
+                + ('' if level is None else f"  (p99 {p99 / baseline - 1:+.0%})")
+            )
+
+    async def run(self, level, options):
+        """Latencies (full-scale ms) of the measured calls, and the hedger's stats for them."""
+        scale = options['time_scale']
+        hedger = Hedger(percentile=level, max_rate=options['max_rate']) if level else None
+        stats = {'calls': 0, 'hedged': 0, 'hedge_wins': 0}
+
+        def latency(speed=1.0):
+            seconds = options['median_ms'] / 1000 * self.rng.lognormvariate(0, 0.3) * speed
+            if self.rng.random() < options['tail_probability']:
+                seconds *= options['tail_factor']
+            return seconds * scale
+
+        async def primary():
+            await asyncio.sleep(latency())
+
+        async def hedge():
+            await asyncio.sleep(latency(options['hedge_speed']))
+
+        async def calls(count, latencies):
+            queue = iter(range(count))
+            loop = asyncio.get_running_loop()
+
+            async def worker():
+                for _ in queue:
+                    start = loop.time()
+                    if hedger:
+                        await hedger.acall(primary, hedge)
+                    else:
+                        await primary()
+                        stats['calls'] += 1
+                    latencies.append((loop.time() - start) / scale * 1000)
+
+            await asyncio.gather(*(worker() for _ in range(options['concurrency'])))
+
+        await calls(options['warmup'], [])
+        if hedger:
+            stats = hedger.stats = dict.fromkeys(hedger.stats, 0)
+        else:
+            stats['calls'] = 0
+        latencies = []
+        await calls(options['calls'], latencies)
+        latencies.sort()
+        return latencies, stats
@@ -0,0 +1,87 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.prompts import PLATFORM_GUIDELINES, get_prompt_template
+
+
+def _concat_prompt(data):
+    """The previous `+=` based prompt builder, kept here as the baseline."""
+    prompt = f"Generate content with the following specifications:\n"
+    prompt += f"- Title: {data['title']}\n"
+    prompt += f"- Niche/Industry: {data['niche']}\n"
+    if data.get('context'):
+        prompt += f"- Context/Details: {data['context']}\n"
+    if data.get('tags'):
+        prompt += f"- Important Keywords/Tags: {data['tags']}\n"
+    prompt += "\nPlease provide a comprehensive and well-structured piece of content."
+    return prompt
+
+
+def _handwritten_prompt(data):
+    """A `+=` builder written out by hand for the prompts the templates render, tone and platform included."""
+    prompt = f"Generate content with the following specifications:\n"
+    prompt += f"- Title: {data['title']}\n"
+    prompt += f"- Niche/Industry: {data['niche']}\n"
+    if data.get('tone'):
+        prompt += f"- Tone of Voice: {data['tone']}\n"
+    if data.get('context'):
+        prompt += f"- Context/Details: {data['context']}\n"
+    if data.get('tags'):
+        prompt += f"- Important Keywords/Tags: {data['tags']}\n"
+    platform = (data.get('platform') or '').lower()
+    if platform in PLATFORM_GUIDELINES:
+        prompt += "\n" + PLATFORM_GUIDELINES[platform]
+    else:
+        prompt += "\nPlease provide a comprehensive and well-structured piece of content."
+    return prompt
+
+
+class Command(BaseCommand):
+    help = "Benchmarks prompt rendering: versioned templates vs. string concatenation."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100_000, help="Number of prompts to render.")
+
+    def handle(self, *args, **options):
+        count = options['count']
+        niches = ['Technology', 'Marketing', 'Health', 'Space', 'Finance']
+        tones = ['', 'Casual', 'Formal', 'Humorous']
+        platforms = ['', 'x_com', 'linkedin']
+        samples = [
+            {
+                'title': f"Post number {i}",
+                'niche': niches[i % len(niches)],
+                'tone': tones[i % len(tones)],
+                'platform': platforms[i % len(platforms)],
+                'context': "Focus on solar and wind power, mention recent policy changes." if i % 2 else '',
+                'tags': "solar power, green tech, sustainability" if i % 3 else '',
+            }
+            for i in range(64)
+        ]
+
+        start = time.perf_counter()
+        for i in range(count):
+            _concat_prompt(samples[i % len(samples)])
+        concat_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(count):
+            _handwritten_prompt(samples[i % len(samples)])
+        handwritten_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(count):
+            data = samples[i % len(samples)]
+            get_prompt_template(data).render(data)
+        template_seconds = time.perf_counter() - start
+
+        for data in samples:
+            assert get_prompt_template(data).render(data) == _handwritten_prompt(data)
+
+        self.stdout.write(f"Rendered {count} prompts")
+        self.stdout.write(f"  concatenation:      {concat_seconds:.3f}s ({concat_seconds / count * 1e6:.2f} us/prompt)")
+        self.stdout.write(
+            f"  same, full prompts: {handwritten_seconds:.3f}s ({handwritten_seconds / count * 1e6:.2f} us/prompt)"
+        )
+        self.stdout.write(f"  templates:          {template_seconds:.3f}s ({template_seconds / count * 1e6:.2f} us/prompt)")
@@ -0,0 +1,98 @@
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.flow_state import load_flow_state
+from core.loadtest import make_client
+
+ENGINES = [
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+    'core.sessions',
+]
+USERNAME_PREFIX = 'sessbench-'
+
+
+class Command(BaseCommand):
+    help = (
+        "Walks a user through signup, OTP verification, a few logged-in pages, the start of an OAuth "
+        "connection and logout under each session engine, counting the database queries per request "
+        "and how many of them touch the sessions table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=5, help="Journeys per engine.")
+        parser.add_argument('--page-views', type=int, default=5, help="Dashboard loads per journey.")
+        parser.add_argument('--engines', default=','.join(ENGINES), help="Comma-separated SESSION_ENGINE values.")
+
+    def handle(self, *args, **options):
+        engines = [engine.strip() for engine in options['engines'].split(',')]
+        # {step: {engine: [total queries, session queries, requests]}}
+        counts = defaultdict(lambda: defaultdict(lambda: [0, 0, 0]))
+        try:
+            for engine in engines:
+                with override_settings(SESSION_ENGINE=engine):
+                    for _ in range(options['rounds']):
+                        self.journey(engine, counts, options['page_views'])
+        finally:
+            get_user_model().objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+        names = [engine.rsplit('.', 1)[-1] for engine in engines]
+        self.stdout.write("Queries per request (of which on the sessions table):")
+        self.stdout.write(f"{'step':24}" + ''.join(f"{name:>16}" for name in names))
+        totals = defaultdict(lambda: [0, 0])
+        for step, by_engine in counts.items():
+            cells = []
+            for engine in engines:
+                queries, session_queries, requests = by_engine[engine]
+                totals[engine][0] += queries / options['rounds']
+                totals[engine][1] += session_queries / options['rounds']
+                cells.append(f"{queries / requests:>9.1f} ({session_queries / requests:.1f})")
+            self.stdout.write(f"{step:24}" + ''.join(f"{cell:>16}" for cell in cells))
+        self.stdout.write(
+            f"{'per journey':24}"
+            + ''.join(f"{f'{totals[e][0]:.1f} ({totals[e][1]:.1f})':>16}" for e in engines)
+        )
+
+    def journey(self, engine, counts, page_views):
+        host = next((host for host in settings.ALLOWED_HOSTS if host not in ('*', '')), 'localhost').lstrip('.')
+        client = make_client(host)
+        name = f"{USERNAME_PREFIX}{uuid.uuid4().hex[:12]}"
+
+        def request(step, method, url, data=None):
+            queries = [0, 0]
+
+            def count(execute, sql, params, many, context):
+                queries[0] += 1
+                queries[1] += 'django_session' in sql
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(count):
+                response = getattr(client, method)(url, data or {})
+            tally = counts[step][engine]
+            tally[0] += queries[0]
+            tally[1] += queries[1]
+            tally[2] += 1
+            return response
+
+        request('login page', 'get', reverse('authentication:login'))
+        request('signup', 'post', reverse('authentication:signup'), {
+            'first_name': 'Session', 'last_name': 'Bench', 'username': name, 'email': f"{name}@example.com",
+            'password': 'bench-password-1', 'confirm_password': 'bench-password-1',
+            'date_of_birth': '1990-01-01', 'country': 'IN', 'how_did_you_hear_about_us': 'social_media',
+        })
+        request('verify OTP page', 'get', reverse('authentication:verify_otp'))
+        otp = load_flow_state('signup', client.session['signup_token'])['otp']
+        request('verify OTP (logs in)', 'post', reverse('authentication:verify_otp'), {'otp': otp})
+        for _ in range(page_views):
+            request('dashboard', 'get', reverse('dashboard:dashboard'))
+        request('pricing', 'get', reverse('billing:pricing'))
+        request('connections', 'get', reverse('social:connections'))
+        request('OAuth connect', 'get', reverse('social:oauth_connect', args=['x_com']))
+        request('logout', 'get', reverse('authentication:logout'))
@@ -0,0 +1,84 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.legacy_import import find_user_id_conflicts, import_table, open_source, table_specs
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports a D1 (SQLite) export of the old schema into the Django tables, using COPY on PostgreSQL. "
+        "Progress is checkpointed after every chunk, so an interrupted import resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help="Path to the D1 SQLite export.")
+        parser.add_argument('--chunk-size', type=int, default=10000)
+        parser.add_argument('--tables', nargs='+', help="Only import these legacy tables (in schema order).")
+        parser.add_argument('--state', help="Checkpoint file. Defaults to <source>.import-state.json.")
+        parser.add_argument('--restart', action='store_true', help="Ignore any checkpoint and start over.")
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['source']):
+            raise CommandError(f"No such file: {options['source']}")
+        state_path = options['state'] or f"{options['source']}.import-state.json"
+        state = {}
+        if os.path.exists(state_path) and not options['restart']:
+            with open(state_path) as state_file:
+                state = json.load(state_file)
+            self.stdout.write(f"Resuming from {state_path}.")
+
+        specs = table_specs()
+        if options['tables']:
+            unknown = set(options['tables']) - {spec.source for spec in specs}
+            if unknown:
+                raise CommandError(f"Unknown legacy tables: {', '.join(sorted(unknown))}")
+            specs = [spec for spec in specs if spec.source in options['tables']]
+
+        source = open_source(options['source'])
+        conflicts = find_user_id_conflicts(source, options['chunk_size'])
+        if conflicts:
+            examples = '; '.join(f"id {pk}: {legacy} vs existing {existing}" for pk, legacy, existing in conflicts)
+            raise CommandError(
+                f"Legacy user ids are already taken by other users in this database ({examples}). "
+                f"Import into a database without conflicting users."
+            )
+
+        method = 'COPY' if connection.vendor == 'postgresql' else 'INSERT'
+        self.stdout.write(f"Importing into {connection.vendor} using {method}.")
+        started = time.perf_counter()
+        for spec in specs:
+            table_started = time.perf_counter()
+
+            def checkpoint(last_key, read, written, table=spec.source):
+                state[table] = last_key
+                _save_state(state_path, state)
+                rate = read / (time.perf_counter() - table_started)
+                self.stdout.write(f"  {table}: {read} read, {written} written ({rate:,.0f} rows/s)", ending='\r')
+                self.stdout.flush()
+
+            read, written = import_table(
+                source, spec, state.get(spec.source, 0), options['chunk_size'], on_chunk=checkpoint
+            )
+            skipped = read - written
+            self.stdout.write(
+                f"  {spec.source}: {read} read, {written} written"
+                f"{f', {skipped} skipped (already imported, conflicting or orphaned)' if skipped else ''}"
+                f" in {time.perf_counter() - table_started:.1f}s" + ' ' * 10
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Import finished in {time.perf_counter() - started:.1f}s."))
+        self.stdout.write(
+            "Run `manage.py build_content_signatures` to enable near-duplicate detection for imported content."
+        )
+
+
+def _save_state(path, state):
+    # Write-then-rename, so a crash never leaves a half-written checkpoint.
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w') as state_file:
+        json.dump(state, state_file)
+    os.replace(temporary, path)
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.admission import admission
+from core.loadtest import DEFAULT_MIX, LoadTest, parse_mix, stub_backends
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays mixed dashboard, pricing, webhook and posting traffic as users seeded by "
+        "`manage.py seed_synthetic`, with stubbed AI and OAuth backends, and reports "
+        "throughput and latency percentiles per endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=30, help="Seconds to run for.")
+        parser.add_argument('--requests', type=int, help="Stop after this many requests instead.")
+        parser.add_argument('--concurrency', type=int, default=8, help="Number of worker threads.")
+        parser.add_argument('--users', type=int, default=100, help="Number of seeded users to log in as.")
+        parser.add_argument('--prefix', default='load', help="Username prefix used by seed_synthetic.")
+        parser.add_argument(
+            '--mix', type=parse_mix,
+            help=f"Scenario weights, e.g. dashboard_get=50,webhook=10. "
+                 f"Default: {','.join(f'{name}={weight}' for name, weight in DEFAULT_MIX.items())}",
+        )
+        parser.add_argument('--ai-latency-ms', type=float, default=200, help="Mean latency of the stubbed Gemini calls.")
+        parser.add_argument('--oauth-latency-ms', type=float, default=50, help="Latency of each stubbed social post.")
+        parser.add_argument('--seed', type=int, help="Seed for a repeatable run. Random by default.")
+        parser.add_argument(
+            '--admission', action='store_true',
+            help="Keep admission control on for generation. Off by default, since its per-user "
+                 "rate limits would turn away most of the replayed traffic.",
+        )
+
+    def handle(self, *args, **options):
+        load = LoadTest(
+            prefix=options['prefix'],
+            users=options['users'],
+            concurrency=options['concurrency'],
+            mix=options['mix'],
+            seed=options['seed'],
+        )
+        try:
+            load.prepare()
+        except ValueError as e:
+            raise CommandError(e)
+
+        self.stdout.write(
+            f"Running {options['concurrency']} workers as {len(load.users)} users against {connection.vendor} "
+            f"(AI {options['ai_latency_ms']:.0f}ms, OAuth {options['oauth_latency_ms']:.0f}ms stubbed)..."
+        )
+        admission.enabled = options['admission']
+        with stub_backends(options['ai_latency_ms'] / 1000, options['oauth_latency_ms'] / 1000, seed=options['seed']):
+            elapsed = load.run(duration=options['duration'], max_requests=options['requests'])
+
+        self.stdout.write(f"{'scenario':16} {'requests':>8} {'errors':>6} {'req/s':>8} "
+                          f"{'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'max':>8}  (ms)")
+        for row in load.results.summary(elapsed):
+            self.stdout.write(
+                f"{row['scenario']:16} {row['requests']:>8} {row['errors']:>6} {row['rps']:>8.1f} "
+                f"{row['p50']:>8.1f} {row['p90']:>8.1f} {row['p95']:>8.1f} {row['p99']:>8.1f} {row['max']:>8.1f}"
+            )
+        for name, error in sorted(load.results.error_samples.items()):
+            self.stdout.write(self.style.WARNING(f"  first {name} error: {error}"))
+        self.stdout.write(f"Ran for {elapsed:.1f}s.")
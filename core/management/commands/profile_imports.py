@@ -0,0 +1,211 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# The project's own top-level packages; the rest is third-party (or the standard library).
+PROJECT_PACKAGES = ('apps', 'core', 'project', 'utils')
+# Namespace packages, grouped by their first two components (google.generativeai, google.protobuf, ...).
+NAMESPACE_PACKAGES = ('google',)
+
+STAGE_MARK = 'profile_imports stage:'
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+
+# Boots the project the way a server worker does, up to the point it can
+# serve a request, reporting when each stage ends. Warm-up (core/warmup.py)
+# is left off: it runs on a thread of its own, after the boot.
+BOOT = f"""
+import os, sys, time
+
+def done(stage, started):
+    sys.stderr.write(f"{STAGE_MARK} {{stage}} {{time.perf_counter() - started}}\\n")
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
+started = time.perf_counter()
+from django.conf import settings
+settings.INSTALLED_APPS
+done('settings', started)
+
+started = time.perf_counter()
+import django
+django.setup()
+done('apps', started)
+
+started = time.perf_counter()
+from django.utils.module_loading import import_string
+import_string(settings.ASGI_APPLICATION if settings.ASYNC_VIEWS else settings.WSGI_APPLICATION)
+done('application', started)
+
+started = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+done('urls', started)
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Profiles the imports made while the project boots (settings, apps, the server application, the "
+        "URLconf), with Python's -X importtime, in a fresh process. Breaks the time down by stage, by "
+        "package (with the project module that pulled each one in) and by project module; records the "
+        "result in a history file and compares it with the previous run; and fails if the imports take "
+        "longer than the budget (STARTUP_IMPORT_BUDGET_MS)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3, help="Boots to profile; the fastest is reported.")
+        parser.add_argument('--top', type=int, default=15, help="Rows per table.")
+        parser.add_argument(
+            '--budget-ms', type=float, default=settings.STARTUP_IMPORT_BUDGET_MS,
+            help="Most the boot's imports may take, in milliseconds. 0 for no budget.",
+        )
+        parser.add_argument(
+            '--history', default=os.path.join(settings.BASE_DIR, 'logs', 'import_times.jsonl'),
+            help="JSON Lines file each run is appended to. Empty to keep no history.",
+        )
+
+    def handle(self, *args, **options):
+        profile = min((self.boot() for _ in range(options['runs'])), key=lambda p: p['total_ms'])
+        top = options['top']
+
+        self.stdout.write(f"Boot imports: {profile['total_ms']:.0f}ms ({profile['wall_ms']:.0f}ms wall)")
+        self.stdout.write(f"\n{'stage':<14} {'imports':>9} {'wall':>9}")
+        for stage, result in profile['stages'].items():
+            self.stdout.write(f"{stage:<14} {result['imports_ms']:>7.0f}ms {result['wall_ms']:>7.0f}ms")
+
+        self.stdout.write(f"\n{'package':<32} {'self':>9}  imported by")
+        for group, ms in Counter(profile['groups']).most_common(top):
+            self.stdout.write(f"{group:<32} {ms:>7.1f}ms  {profile['imported_by'].get(group, '')}")
+
+        self.stdout.write(f"\n{'project module':<32} {'with its imports':>17}")
+        for module, ms in Counter(profile['modules']).most_common(top):
+            self.stdout.write(f"{module:<32} {ms:>15.1f}ms")
+
+        if options['history']:
+            self.compare(profile, options['history'], top)
+
+        budget = options['budget_ms']
+        if budget and profile['total_ms'] > budget:
+            raise CommandError(f"Boot imports took {profile['total_ms']:.0f}ms, over the {budget:.0f}ms budget.")
+        if budget:
+            self.stdout.write(self.style.SUCCESS(
+                f"\nWithin the {budget:.0f}ms budget ({profile['total_ms'] / budget:.0%})."
+            ))
+
+    def boot(self) -> dict:
+        env = {**os.environ, 'WARMUP_ENABLED': 'False'}
+        child = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        if child.returncode:
+            raise CommandError(f"The project failed to boot:\n{child.stderr[-2000:]}")
+        return self.parse(child.stderr.splitlines())
+
+    @staticmethod
+    def parse(lines: list) -> dict:
+        # -X importtime writes a line per module once it has been imported,
+        # after the modules it imported itself, indented one level deeper.
+        imports = []  # (stage index, self µs, cumulative µs, depth, module)
+        stages = {}
+        for line in lines:
+            if line.startswith(STAGE_MARK):
+                stage, seconds = line[len(STAGE_MARK):].split()
+                stages[stage] = {'imports_ms': 0.0, 'wall_ms': float(seconds) * 1000}
+                continue
+            match = IMPORT_LINE.match(line)
+            if match:
+                imports.append((
+                    len(stages), int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2, match.group(4)
+                ))
+
+        names = list(stages)
+        groups = Counter()
+        modules = {}
+        imported_by = defaultdict(Counter)
+        # Read backwards, every module comes after the one that imported it.
+        parents = []
+        for stage, self_us, cumulative_us, depth, module in reversed(imports):
+            while parents and parents[-1][0] >= depth:
+                parents.pop()
+            parents.append((depth, module))
+            if stage < len(names):
+                stages[names[stage]]['imports_ms'] += self_us / 1000
+            group = _group(module)
+            groups[group] += self_us / 1000
+            if module.split('.')[0] in PROJECT_PACKAGES:
+                modules[module] = cumulative_us / 1000
+            else:
+                importer = next(
+                    (name for _, name in reversed(parents[:-1]) if name.split('.')[0] in PROJECT_PACKAGES),
+                    '(django)',
+                )
+                imported_by[group][importer] += self_us
+
+        return {
+            'total_ms': sum(result['imports_ms'] for result in stages.values()),
+            'wall_ms': sum(result['wall_ms'] for result in stages.values()),
+            'stages': stages,
+            'groups': dict(groups),
+            'modules': modules,
+            # The project module that pulled in most of each package.
+            'imported_by': {group: counts.most_common(1)[0][0] for group, counts in imported_by.items()},
+        }
+
+    def compare(self, profile: dict, path: str, top: int):
+        previous = None
+        if os.path.exists(path):
+            with open(path) as history:
+                lines = [line for line in history if line.strip()]
+            if lines:
+                previous = json.loads(lines[-1])
+
+        record = {
+            'at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': _commit(),
+            'total_ms': round(profile['total_ms'], 1),
+            'wall_ms': round(profile['wall_ms'], 1),
+            'stages': {stage: round(result['imports_ms'], 1) for stage, result in profile['stages'].items()},
+            'groups': {group: round(ms, 1) for group, ms in Counter(profile['groups']).most_common(50)},
+        }
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a') as history:
+            history.write(json.dumps(record) + '\n')
+
+        if previous is None:
+            self.stdout.write(f"\nRecorded in {path}.")
+            return
+        self.stdout.write(
+            f"\nSince {previous['at']} ({previous.get('commit') or 'unknown commit'}): "
+            f"{record['total_ms'] - previous['total_ms']:+.0f}ms"
+        )
+        changes = Counter({
+            group: record['groups'].get(group, 0) - previous['groups'].get(group, 0)
+            for group in set(record['groups']) | set(previous['groups'])
+        })
+        for group, delta in sorted(changes.items(), key=lambda item: -abs(item[1]))[:top]:
+            if abs(delta) >= 1:
+                self.stdout.write(f"  {group:<30} {delta:+7.1f}ms")
+
+
+def _group(module: str) -> str:
+    parts = module.split('.')
+    if parts[0] == 'apps' or parts[0] in NAMESPACE_PACKAGES:
+        return '.'.join(parts[:2])
+    return parts[0]
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+from django.utils.timezone import now
+
+from core.lifecycle import resume
+from core.models import PendingJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Finishes the generations and social posts that instances shut down in the middle of "
+        "(see core/lifecycle.py). Run it on a schedule, e.g. every minute."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100, help="Most jobs to resume in this run.")
+        parser.add_argument(
+            '--min-age', type=float, default=2 * settings.LIFECYCLE_DRAIN_TIMEOUT,
+            help="Seconds a checkpoint must have been left alone, so the instance that wrote it is gone.",
+        )
+        parser.add_argument(
+            '--stale-after', type=float, default=900,
+            help="Seconds after which a job another run claimed, but never finished, is tried again.",
+        )
+        parser.add_argument(
+            '--max-age', type=float, default=settings.LIFECYCLE_MAX_AGE,
+            help="Seconds after its request a job is no longer resumed, but failed.",
+        )
+
+    def handle(self, *args, **options):
+        current = now()
+        ready = PendingJob.objects.filter(
+            Q(status='PENDING', updated_at__lte=current - timedelta(seconds=options['min_age']))
+            | Q(status='RUNNING', updated_at__lte=current - timedelta(seconds=options['stale_after']))
+        )
+        # Finishing a generation or post the user gave up on long ago would charge them for it.
+        expired = ready.filter(created_at__lte=current - timedelta(seconds=options['max_age'])).update(
+            status='FAILED', error="Too old to resume.", updated_at=current
+        )
+        if expired:
+            self.stdout.write(self.style.WARNING(f"Gave up on {expired} job(s) too old to resume."))
+        jobs = ready.select_related('user').order_by('created_at')[:options['limit']]
+
+        resumed = failed = 0
+        for job in jobs:
+            # Claimed with a conditional update, so concurrent runs never take the same job.
+            claimed = PendingJob.objects.filter(pk=job.pk, status=job.status, updated_at=job.updated_at).update(
+                status='RUNNING', attempts=F('attempts') + 1, updated_at=now()
+            )
+            if not claimed:
+                continue
+            job.refresh_from_db(fields=['status', 'attempts', 'updated_at'])
+            label = f"{job.kind} {job.pk} for user {job.user_id}"
+            try:
+                resume(job)
+            except Exception as e:
+                failed += 1
+                status = 'FAILED' if job.attempts >= settings.LIFECYCLE_MAX_ATTEMPTS else 'PENDING'
+                PendingJob.objects.filter(pk=job.pk).update(status=status, error=str(e), updated_at=now())
+                self.stdout.write(self.style.WARNING(
+                    f"{label} failed (attempt {job.attempts}, now {status}): {e}"
+                ))
+            else:
+                resumed += 1
+                job.delete()
+                self.stdout.write(f"Resumed {label}.")
+
+        self.stdout.write(self.style.SUCCESS(f"Resumed {resumed} job(s); {failed} failed."))
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.synthetic import Seeder
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-seeds synthetic users with credits, content history, transactions and social connections "
+        "for load testing (see `manage.py loadtest`)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000, help="Number of users to add.")
+        parser.add_argument('--content-per-user', type=int, default=20)
+        parser.add_argument('--transactions-per-user', type=int, default=3)
+        parser.add_argument('--connections-per-user', type=int, default=2, choices=[0, 1, 2])
+        parser.add_argument('--prefix', default='load', help="Username prefix; users are named <prefix>-<n>.")
+        parser.add_argument('--password', default='loadtest', help="Password shared by every seeded user.")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Users per transaction, and rows per INSERT.")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        seeder = Seeder(
+            prefix=options['prefix'],
+            content_per_user=options['content_per_user'],
+            transactions_per_user=options['transactions_per_user'],
+            connections_per_user=options['connections_per_user'],
+            password=options['password'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+        )
+        started = time.perf_counter()
+
+        def progress(done):
+            rate = done / (time.perf_counter() - started)
+            self.stdout.write(f"  {done}/{options['users']} users ({rate:,.0f} users/s)", ending='\r')
+            self.stdout.flush()
+
+        counts, seconds = seeder.seed(options['users'], on_batch=progress)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"Seeded {connection.vendor} in {elapsed:.1f}s:" + ' ' * 20)
+        for model, count in counts.items():
+            rate = count / seconds[model] if seconds[model] else 0
+            self.stdout.write(f"  {model:18} {count:>10} rows in {seconds[model]:6.1f}s ({rate:,.0f} rows/s)")
@@ -0,0 +1,179 @@
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connections
+from django.utils.timezone import now
+
+from apps.billing.models import UsageRecord
+from utils.logger import logging
+
+_current = ContextVar('usage_scope', default=None)
+
+
+@dataclass
+class Usage:
+    """The AI calls made within a usage_scope, typically one request's."""
+    user_id: int = None
+    prompt_version: str = ''
+    records: list = field(default_factory=list)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(record.total_tokens for record in self.records)
+
+
+@contextmanager
+def usage_scope(user=None, prompt_version: str = ''):
+    """
+    Attributes the AI calls made inside the block to `user` and
+    `prompt_version`, and collects them on the yielded Usage, e.g. to price
+    a generation by its tokens. Calls made outside any scope are metered
+    without a user.
+    """
+    usage = Usage(user_id=user.pk if user is not None else None, prompt_version=prompt_version)
+    token = _current.set(usage)
+    try:
+        yield usage
+    finally:
+        _current.reset(token)
+
+
+def record_usage(operation: str, model_name: str, started: float, ok: bool = True, usage_metadata=None):
+    """
+    Meters one AI call that began at `started` (time.monotonic()).
+    `usage_metadata` is the response's token counts: the SDK's
+    `usage_metadata` or the REST API's `usageMetadata`; failed calls and
+    image calls have none.
+    """
+    prompt_tokens, output_tokens, total_tokens = _token_counts(usage_metadata)
+    usage = _current.get()
+    record = UsageRecord(
+        user_id=usage.user_id if usage else None,
+        operation=operation,
+        model_name=model_name,
+        prompt_version=usage.prompt_version if usage else '',
+        prompt_tokens=prompt_tokens,
+        output_tokens=output_tokens,
+        total_tokens=total_tokens,
+        latency_ms=int((time.monotonic() - started) * 1000),
+        ok=ok,
+        created_at=now(),
+    )
+    if usage is not None:
+        usage.records.append(record)
+    meter.add(record)
+    return record
+
+
+def _token_counts(usage_metadata) -> tuple:
+    if not usage_metadata:
+        return 0, 0, 0
+    if isinstance(usage_metadata, dict):
+        prompt_tokens = usage_metadata.get('promptTokenCount', 0)
+        output_tokens = usage_metadata.get('candidatesTokenCount', 0)
+        total_tokens = usage_metadata.get('totalTokenCount', 0)
+    else:
+        prompt_tokens = usage_metadata.prompt_token_count
+        output_tokens = usage_metadata.candidates_token_count
+        total_tokens = usage_metadata.total_token_count
+    # The total includes any tokens the model spent thinking.
+    return prompt_tokens, output_tokens, max(total_tokens, prompt_tokens + output_tokens)
+
+
+class UsageMeter:
+    """
+    Buffers UsageRecords in memory and writes them with bulk_create from a
+    background thread, so metering adds no database write to the request.
+    The thread writes once `batch_size` records are waiting, and at least
+    every `flush_interval` seconds; records left at exit are written then.
+    A failed write is retried with the next batch. Beyond `max_buffer`
+    unwritten records the oldest are dropped.
+    """
+
+    def __init__(self, batch_size: int = 200, flush_interval: float = 10.0, max_buffer: int = 10000,
+                 enabled: bool = True):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._buffer = deque(maxlen=max_buffer)
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.stats = {'recorded': 0, 'written': 0, 'dropped': 0, 'failed_flushes': 0}
+
+    def add(self, record):
+        if not self.enabled:
+            return
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.stats['dropped'] += 1
+            self._buffer.append(record)
+            self.stats['recorded'] += 1
+            full = len(self._buffer) >= self.batch_size
+        self._ensure_thread()
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Writes the buffered records now; returns how many were written."""
+        with self._lock:
+            batch = list(self._buffer)
+            self._buffer.clear()
+        if not batch:
+            return 0
+        try:
+            UsageRecord.objects.bulk_create(batch, batch_size=500)
+        except Exception as e:
+            logging.error(f"Could not write {len(batch)} usage records, keeping them for the next flush: {e}")
+            with self._lock:
+                self.stats['failed_flushes'] += 1
+                room = self._buffer.maxlen - len(self._buffer)
+                self.stats['dropped'] += max(0, len(batch) - room)
+                self._buffer.extendleft(reversed(batch[-room:] if room else []))
+            return 0
+        with self._lock:
+            self.stats['written'] += len(batch)
+        return len(batch)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def _ensure_thread(self):
+        # Started on first use, and again in a forked worker, where the
+        # parent's thread does not exist.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='usage-meter', daemon=True)
+            self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                # Hand this thread's connection back between flushes.
+                connections.close_all()
+
+
+meter = UsageMeter(
+    batch_size=settings.USAGE_BATCH_SIZE,
+    flush_interval=settings.USAGE_FLUSH_INTERVAL,
+    max_buffer=settings.USAGE_MAX_BUFFER,
+    enabled=settings.USAGE_METERING,
+)
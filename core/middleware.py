@@ -0,0 +1,240 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from core.admission import AdmissionRejected, admission
+from core.deadlines import DeadlineExceeded, deadline, record_exceeded
+from core.lifecycle import ShuttingDown, lifecycle
+from core.warmup import warmup
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise's middleware, usable without a thread hop under ASGI.
+
+    WhiteNoise's own middleware is synchronous, so under ASGI Django would run
+    it, and every request it passes on, through a worker thread. Here only
+    the static files themselves are served from a thread; other requests go
+    straight through to the async handler.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class DeadlineMiddleware:
+    """
+    Gives every request a time budget (see core/deadlines.py): REQUEST_BUDGET
+    seconds, or the `request_budget` of the view's class. Outbound calls and
+    database statements made for the request are bounded by it. Requests
+    that run out of time get a 504 unless the view handles it itself.
+    A streaming response's body is not covered, since it is sent after
+    the view returns.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+            # Async twins, so Django does not run these through a thread under ASGI.
+            self.process_view = self.aprocess_view
+            self.process_exception = self.aprocess_exception
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with deadline(settings.REQUEST_BUDGET, f"{request.method} {request.path}") as request.deadline:
+            response = self.get_response(request)
+            self.record_overrun(request)
+        return response
+
+    async def __acall__(self, request):
+        with deadline(settings.REQUEST_BUDGET, f"{request.method} {request.path}") as request.deadline:
+            response = await self.get_response(request)
+            self.record_overrun(request)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'view_class', view_func)
+        budget = getattr(view, 'request_budget', None)
+        if budget is not None:
+            request.deadline.set_budget(budget)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        DeadlineMiddleware.process_view(self, request, view_func, view_args, view_kwargs)
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, DeadlineExceeded):
+            return HttpResponse(str(exception), status=504, content_type='text/plain')
+
+    async def aprocess_exception(self, request, exception):
+        return DeadlineMiddleware.process_exception(self, request, exception)
+
+    @staticmethod
+    def record_overrun(request):
+        # Counts requests that finished after their deadline, whichever step ran long.
+        if request.deadline.expired:
+            record_exceeded('request')
+
+
+class HealthCheckMiddleware:
+    """
+    Answers the probes: /healthz (liveness) with a 200 while the process is
+    up, and /readyz (readiness) with a 200 once the instance has warmed up
+    (see core/warmup.py), or a 503 before that and while it is shutting
+    down, with each warm-up phase's timing. Placed ahead of the host and
+    HTTPS checks, since probes come over plain HTTP to the container's own
+    address.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.path == '/healthz':
+            return self.alive()
+        if request.path == '/readyz':
+            return self.readiness(*warmup.readiness())
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if request.path == '/healthz':
+            return self.alive()
+        if request.path == '/readyz':
+            if settings.ASYNC_VIEWS:
+                await warmup.awarm_http()
+            return self.readiness(*await sync_to_async(warmup.readiness)())
+        return await self.get_response(request)
+
+    @staticmethod
+    def alive():
+        return HttpResponse('ok', content_type='text/plain')
+
+    @staticmethod
+    def readiness(ready, details):
+        return JsonResponse({'ready': ready, **details}, status=200 if ready else 503)
+
+
+class DrainMiddleware:
+    """
+    Refuses new requests to `long_running` views with a 503 once the
+    instance has started shutting down (see core/lifecycle.py), so they can
+    be retried on an instance that will be around to finish them.
+    """
+    sync_capable = True
+    async_capable = True
+    retry_after = 5
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'view_class', view_func)
+        if lifecycle.draining and request.method == 'POST' and getattr(view, 'long_running', False):
+            response = HttpResponse(str(ShuttingDown()), status=503, content_type='text/plain')
+            response['Retry-After'] = str(self.retry_after)
+            return response
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        return DrainMiddleware.process_view(self, request, view_func, view_args, view_kwargs)
+
+
+class AdmissionMiddleware:
+    """
+    Admission control (see core/admission.py) for the views that ask for it
+    with `admission_control = True`: their POSTs by signed-in users are
+    rate limited per user and wait their turn for one of a limited number
+    of slots, held until the view returns. Requests that are turned away
+    get a 429 with a Retry-After header.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        try:
+            return self.get_response(request)
+        finally:
+            self.release(request)
+
+    async def __acall__(self, request):
+        try:
+            return await self.get_response(request)
+        finally:
+            self.release(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self.applies(request, view_func) and request.user.is_authenticated:
+            try:
+                admission.admit(request.user.pk)
+            except AdmissionRejected as e:
+                return self.rejected(e)
+            request.admitted_at = time.monotonic()
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        # Loading request.user queries the database, so it happens off the event loop.
+        if self.applies(request, view_func) and await sync_to_async(lambda: request.user.is_authenticated)():
+            try:
+                await admission.aadmit(request.user.pk)
+            except AdmissionRejected as e:
+                return self.rejected(e)
+            request.admitted_at = time.monotonic()
+
+    @staticmethod
+    def applies(request, view_func) -> bool:
+        view = getattr(view_func, 'view_class', view_func)
+        return admission.enabled and request.method == 'POST' and getattr(view, 'admission_control', False)
+
+    @staticmethod
+    def release(request):
+        admitted_at = getattr(request, 'admitted_at', None)
+        if admitted_at is not None:
+            admission.release(time.monotonic() - admitted_at)
+
+    @staticmethod
+    def rejected(error):
+        response = HttpResponse(str(error), status=429, content_type='text/plain')
+        response['Retry-After'] = str(error.retry_after)
+        return response
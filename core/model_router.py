@@ -0,0 +1,141 @@
+import threading
+import time
+
+from django.conf import settings
+
+from utils.logger import logging
+
+# Rules are checked in order; None matches any value. The first match wins.
+# (platform, tones, most context characters, tier)
+ROUTING_RULES = [
+    # Short posts with little background gain nothing from the Pro model.
+    ('x_com', None, 600, 'flash'),
+    (None, {'casual', 'humorous', 'inspirational'}, 300, 'flash'),
+    (None, None, None, 'pro'),
+]
+
+# Where a degraded tier's traffic goes.
+FALLBACK_TIERS = {'pro': 'flash', 'flash': 'pro'}
+
+
+def classify(data: dict) -> str:
+    """Returns the model tier for a generation request (ContentGenerationForm data)."""
+    platform = (data.get('platform') or '').lower()
+    tone = (data.get('tone') or '').lower()
+    context_length = len(data.get('context') or '') + len(data.get('tags') or '')
+    for rule_platform, rule_tones, max_context, tier in ROUTING_RULES:
+        if rule_platform not in (None, platform):
+            continue
+        if rule_tones is not None and tone not in rule_tones:
+            continue
+        if max_context is not None and context_length > max_context:
+            continue
+        return tier
+    return 'pro'
+
+
+class ModelHealth:
+    """Exponentially weighted moving averages of one model's latency and failure rate."""
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.latency = None
+        self.failure_rate = 0.0
+        self.samples = 0
+        self.last_call = 0.0
+
+    def record(self, seconds: float, ok: bool):
+        failure = 0.0 if ok else 1.0
+        if self.latency is None:
+            self.latency, self.failure_rate = seconds, failure
+        else:
+            self.latency += self.alpha * (seconds - self.latency)
+            self.failure_rate += self.alpha * (failure - self.failure_rate)
+        self.samples += 1
+
+
+class ModelRouter:
+    """
+    Picks the Gemini model for each generation: the tier `classify` chooses,
+    unless that tier is degraded, when its traffic goes to the fallback tier.
+
+    A tier is degraded once its latency EWMA is above its `max_latency` or
+    its failure-rate EWMA is above `max_failure_rate` (after `min_samples`
+    calls). While degraded, one request every `probe_interval` seconds still
+    goes to it, so it is seen to recover. Health is tracked per process.
+    """
+
+    def __init__(self, models: dict, max_latency: dict, max_failure_rate: float = 0.3,
+                 alpha: float = 0.2, min_samples: int = 5, probe_interval: float = 30.0, enabled: bool = True):
+        """
+        Args:
+            models: Model name per tier, e.g. {'pro': 'gemini-2.5-pro', 'flash': 'gemini-2.5-flash'}.
+            max_latency: Latency limit in seconds per tier.
+        """
+        self.models = models
+        self.max_latency = max_latency
+        self.max_failure_rate = max_failure_rate
+        self.min_samples = min_samples
+        self.probe_interval = probe_interval
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._health = {tier: ModelHealth(alpha) for tier in models}
+        self._tiers = {model: tier for tier, model in models.items()}
+        self._degraded = set()
+
+    def route(self, data: dict) -> str:
+        """Returns the name of the model to generate `data` with."""
+        if not self.enabled:
+            return self.models['pro']
+        tier = classify(data)
+        fallback = FALLBACK_TIERS[tier]
+        with self._lock:
+            if tier in self._degraded and fallback not in self._degraded:
+                health = self._health[tier]
+                if time.monotonic() - health.last_call < self.probe_interval:
+                    tier = fallback
+            self._health[tier].last_call = time.monotonic()
+        return self.models[tier]
+
+    def record(self, model: str, seconds: float, ok: bool):
+        """Updates the health of `model` with the outcome of a call to it."""
+        tier = self._tiers.get(model)
+        if tier is None:
+            return
+        with self._lock:
+            health = self._health[tier]
+            health.record(seconds, ok)
+            degraded = health.samples >= self.min_samples and (
+                health.latency > self.max_latency[tier] or health.failure_rate > self.max_failure_rate
+            )
+            changed = degraded != (tier in self._degraded)
+            if degraded:
+                self._degraded.add(tier)
+            else:
+                self._degraded.discard(tier)
+        if changed:
+            state = 'degraded, routing to the fallback' if degraded else 'recovered'
+            logging.warning(f"Model {model} {state} (latency {health.latency:.1f}s, "
+                            f"failure rate {health.failure_rate:.0%}).")
+
+    def health(self) -> dict:
+        """{tier: {'model', 'latency', 'failure_rate', 'samples', 'degraded'}}"""
+        with self._lock:
+            return {
+                tier: {
+                    'model': self.models[tier],
+                    'latency': health.latency,
+                    'failure_rate': health.failure_rate,
+                    'samples': health.samples,
+                    'degraded': tier in self._degraded,
+                }
+                for tier, health in self._health.items()
+            }
+
+
+model_router = ModelRouter(
+    models={'pro': settings.GEMINI_PRO_MODEL, 'flash': settings.GEMINI_FLASH_MODEL},
+    max_latency={'pro': settings.GEMINI_PRO_MAX_LATENCY, 'flash': settings.GEMINI_FLASH_MAX_LATENCY},
+    max_failure_rate=settings.GEMINI_MAX_FAILURE_RATE,
+    enabled=settings.GEMINI_MODEL_ROUTING,
+)
@@ -0,0 +1,46 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+
+
+class PendingJob(models.Model):
+    """
+    A long-running request (a generation or a social post) that was still in
+    flight when its instance shut down, saved with its inputs and progress so
+    another instance can finish it (see core/lifecycle.py and
+    `manage.py resume_jobs`). The row is deleted once the job is done.
+    """
+
+    KIND_CHOICES = [
+        ('generation', 'Generation'),
+        ('social_post', 'Social post'),
+    ]
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('FAILED', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='pending_jobs'
+    )
+    payload = models.JSONField(default=dict, help_text="The request's inputs.")
+    state = models.JSONField(default=dict, help_text="Progress made before the shutdown, e.g. posts already sent.")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveSmallIntegerField(default=0, help_text="Times resumption was tried.")
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for {self.user_id} ({self.status})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'updated_at'], name='core_pendingjob_status_idx'),
+        ]
@@ -0,0 +1,196 @@
+from functools import lru_cache
+from string import Formatter
+
+
+class PromptTemplate:
+    """
+    A versioned prompt template: a list of `str.format` lines, rendered in
+    order and joined.
+
+    Each line may name a field it depends on; the line is skipped when
+    that field is empty in the render data. The lines are compiled once
+    into a `render(data)` function made of f-strings, the same code as a
+    hand-written `+=` builder, with consecutive lines merged.
+    """
+
+    def __init__(self, version: str, lines: list):
+        """
+        Args:
+            version: A unique id stored with every generation (used for A/B analysis).
+            lines: A list of `(text, required_field)` tuples. `text` uses
+                `str.format` style `{field}` placeholders and `required_field`
+                may be None for lines that are always rendered.
+        """
+        self.version = version
+        self.lines = tuple(lines)
+        self.render = self._compile(self.lines)
+
+    def _compile(self, lines):
+        """Generates and compiles the source of a `render(data)` function."""
+        fields = {}
+
+        def local(field):
+            # Fields become locals (_0, _1, ...): field names may clash with Python's.
+            return fields.setdefault(field, f"_{len(fields)}")
+
+        def fstring(texts):
+            source = []
+            for text in texts:
+                for literal, field, spec, conversion in Formatter().parse(text):
+                    source.append(literal.replace('{', '{{').replace('}', '}}'))
+                    if field is not None:
+                        source.append('{' + local(field) + (f'!{conversion}' if conversion else '')
+                                      + (f':{spec}' if spec else '') + '}')
+            return 'f' + repr(''.join(source))
+
+        # Consecutive lines with the same condition are rendered as one f-string.
+        runs = []
+        for text, required_field in lines:
+            if runs and runs[-1][0] == required_field:
+                runs[-1][1].append(text)
+            else:
+                runs.append((required_field, [text]))
+        body = []
+        for required_field, texts in runs:
+            if required_field is None:
+                body.append(f"        prompt += {fstring(texts)}")
+            else:
+                body.append(f"        if {local(required_field)}:")
+                body.append(f"            prompt += {fstring(texts)}")
+
+        optional = {required_field for _, required_field in lines}
+        source = ["def render(data):", "    get = data.get", "    try:"]
+        source += [
+            f"        {name} = get({field!r}, '')" if field in optional else f"        {name} = data[{field!r}]"
+            for field, name in fields.items()
+        ]
+        source.append("        prompt = ''")
+        source += body
+        source += [
+            "    except KeyError:",
+            "        # Missing fields render empty.",
+            "        return render({**defaults, **data})",
+            "    return prompt",
+        ]
+        namespace = {'defaults': dict.fromkeys(fields, '')}
+        exec(compile('\n'.join(source), f"<prompt template {self.version}>", 'exec'), namespace)
+        render = namespace['render']
+        render.__doc__ = "Renders the template with the given form data."
+        return render
+
+
+# Lines shared by every template. Bump the template version whenever these change.
+_SPEC_LINES = [
+    ("Generate content with the following specifications:\n", None),
+    ("- Title: {title}\n", None),
+    ("- Niche/Industry: {niche}\n", None),
+    ("- Tone of Voice: {tone}\n", 'tone'),
+    ("- Context/Details: {context}\n", 'context'),
+    ("- Important Keywords/Tags: {tags}\n", 'tags'),
+]
+
+# How to write for each platform; shared by the platform templates and the variant prompts.
+PLATFORM_GUIDELINES = {
+    'x_com': ("Write a concise post for X.com. Keep it under 280 characters if possible; "
+              "if it must be longer, write it as a short thread of self-contained sentences."),
+    'linkedin': ("Write a professional LinkedIn post with a strong opening line, short paragraphs "
+                 "and a clear takeaway. Keep it under 3000 characters."),
+}
+
+PROMPT_TEMPLATES = {
+    'general-v1': PromptTemplate('general-v1', _SPEC_LINES + [
+        ("\nPlease provide a comprehensive and well-structured piece of content.", None),
+    ]),
+    'x_com-v1': PromptTemplate('x_com-v1', _SPEC_LINES + [
+        ("\n" + PLATFORM_GUIDELINES['x_com'], None),
+    ]),
+    'linkedin-v1': PromptTemplate('linkedin-v1', _SPEC_LINES + [
+        ("\n" + PLATFORM_GUIDELINES['linkedin'], None),
+    ]),
+}
+
+# Rules are checked in order; None matches any value. The first match wins.
+# (platform, tone, niche, template_id)
+TEMPLATE_RULES = [
+    ('x_com', None, None, 'x_com-v1'),
+    ('linkedin', None, None, 'linkedin-v1'),
+    (None, None, None, 'general-v1'),
+]
+
+
+@lru_cache(maxsize=1024)
+def _select_template(platform: str, tone: str, niche: str) -> PromptTemplate:
+    # Cached on the raw form values; normalised here, once per distinct request.
+    platform = (platform or '').lower()
+    tone = (tone or '').lower()
+    niche = (niche or '').strip().lower()
+    for rule_platform, rule_tone, rule_niche, template_id in TEMPLATE_RULES:
+        if rule_platform not in (None, platform):
+            continue
+        if rule_tone not in (None, tone):
+            continue
+        if rule_niche not in (None, niche):
+            continue
+        return PROMPT_TEMPLATES[template_id]
+    return PROMPT_TEMPLATES['general-v1']
+
+
+def get_prompt_template(data: dict) -> PromptTemplate:
+    """Returns the template for the niche/tone/platform in `data`."""
+    return _select_template(data.get('platform'), data.get('tone'), data.get('niche'))
+
+
+# --- Variants ---
+
+# Several options generated in one call (see GeminiClient.generate_variants).
+VARIANTS_TEMPLATE = PromptTemplate('variants-v1', _SPEC_LINES)
+MAX_VARIANTS = 4
+
+
+def variant_platforms(data: dict) -> list:
+    """The platforms each variant is written for: the chosen one, or every platform."""
+    platform = (data.get('platform') or '').lower()
+    return [platform] if platform in PLATFORM_GUIDELINES else list(PLATFORM_GUIDELINES)
+
+
+def build_variants_prompt(data: dict, count: int, platforms: list):
+    """
+    Returns the prompt asking for `count` variants of the content in `data`,
+    each written for every one of `platforms`, and the template version.
+    The answer's shape is fixed by `variants_schema`.
+    """
+    lines = [
+        VARIANTS_TEMPLATE.render(data),
+        f"\nWrite {count} distinctly different versions of this content: vary the angle, "
+        f"the opening hook and the structure, not just the wording.",
+        " For each version, write:",
+    ]
+    for platform in platforms:
+        lines.append(f"\n- {platform}: {PLATFORM_GUIDELINES[platform]}")
+    lines.append(f"\nAnswer with a JSON array of {count} objects, one per version.")
+    return ''.join(lines), VARIANTS_TEMPLATE.version
+
+
+def build_prompt(data: dict):
+    """
+    Returns the prompt for a generation request and the version of the
+    template that built it. Requests for several versions get the variants
+    prompt.
+    """
+    count = data.get('variants') or 1
+    if count > 1:
+        return build_variants_prompt(data, count, variant_platforms(data))
+    template = get_prompt_template(data)
+    return template.render(data), template.version
+
+
+def variants_schema(platforms: list) -> dict:
+    """The response schema for `build_variants_prompt`: an array of {platform: text} objects."""
+    return {
+        'type': 'ARRAY',
+        'items': {
+            'type': 'OBJECT',
+            'properties': {platform: {'type': 'STRING'} for platform in platforms},
+            'required': list(platforms),
+        },
+    }
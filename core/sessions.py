@@ -0,0 +1,106 @@
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends import cached_db
+from django.core import signing
+
+from core.cache import LocalCache
+
+# A session engine (SESSION_ENGINE = 'core.sessions') that keeps most
+# requests away from the sessions table:
+#
+# - Anonymous sessions (signup, OTP verification, the login page) live in a
+#   signed cookie, as with Django's signed_cookies engine. They never hold a
+#   login, and must not hold secrets: the client can read the cookie.
+# - Once a user logs in, the session moves server-side and is stored like
+#   Django's cached_db engine: written through to the database, read from
+#   the shared cache, with an in-process tier (SESSION_LOCAL_CACHE_TTL
+#   seconds) in front of that. A logout on one instance reaches the
+#   in-process tier of the others only when their entry expires.
+#
+# Server-side session keys are 32 lowercase alphanumerics, while signed
+# cookie values always contain ':', which tells the two apart.
+
+SIGNED_COOKIE_SALT = 'core.sessions'
+
+_local = LocalCache(max_entries=10_000, ttl=settings.SESSION_LOCAL_CACHE_TTL)
+
+
+def _is_signed(session_key) -> bool:
+    return bool(session_key) and ':' in session_key
+
+
+class SessionStore(cached_db.SessionStore):
+
+    def load(self):
+        if _is_signed(self.session_key):
+            return self._load_signed()
+        data = _local.get(self.cache_key)
+        if data is None:
+            data = super().load()
+            if self.session_key is not None:
+                _local.set(self.cache_key, data)
+        return dict(data)
+
+    def _load_signed(self):
+        try:
+            return signing.loads(
+                self.session_key,
+                serializer=self.serializer,
+                max_age=self.get_session_cookie_age(),
+                salt=SIGNED_COOKIE_SALT,
+            )
+        except Exception:
+            # BadSignature, a malformed value or an expired cookie: start afresh.
+            self.create()
+            return {}
+
+    def exists(self, session_key):
+        if _is_signed(session_key):
+            return False
+        return super().exists(session_key)
+
+    def save(self, must_create=False):
+        data = self._get_session(no_load=must_create)
+        if SESSION_KEY not in data:
+            self._save_signed(data)
+            return
+        if _is_signed(self.session_key):
+            # Logging in: the next line gives the session a server-side key.
+            self._session_key = None
+        super().save(must_create=must_create)
+        _local.set(self.cache_key, dict(data))
+
+    def _save_signed(self, data):
+        previous = self.session_key
+        self._session_key = signing.dumps(
+            data, compress=True, salt=SIGNED_COOKIE_SALT, serializer=self.serializer,
+        )
+        if previous and not _is_signed(previous):
+            # Whatever the server held for this session no longer applies.
+            self._delete_server_side(previous)
+
+    def create(self):
+        if SESSION_KEY not in self._get_session(no_load=True):
+            # Anonymous sessions get their (signed) key when they are saved.
+            self._session_key = None
+            self.modified = True
+            return
+        super().create()
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            session_key = self.session_key
+        if session_key is None:
+            return
+        if _is_signed(session_key):
+            # Nothing server-side; a signed cookie cannot be revoked.
+            if session_key == self.session_key:
+                self._session_key = None
+                self._session_cache = {}
+                self.modified = True
+            return
+        self._delete_server_side(session_key)
+
+    def _delete_server_side(self, session_key):
+        _local.delete(self.cache_key_prefix + session_key)
+        super().delete(session_key)
@@ -0,0 +1,33 @@
+from functools import lru_cache
+
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.checks import Warning
+
+# Built by `npm run build` (the Dockerfile's asset stage), not committed.
+BUNDLE = 'css/app.css'
+
+
+@lru_cache(maxsize=None)
+def bundle_built() -> bool:
+    """Whether the compiled Tailwind bundle is there, collected or in static/."""
+    return staticfiles_storage.exists(BUNDLE) or finders.find(BUNDLE) is not None
+
+
+def static_assets(request):
+    """
+    Template context for base.html. Without the bundle the page falls back to
+    the Tailwind CDN, which compiles the CSS in the browser; linking a missing
+    file would leave pages unstyled, or fail to render under the manifest storage.
+    """
+    return {'css_bundle_built': bundle_built()}
+
+
+def check_css_bundle(app_configs, **kwargs):
+    if bundle_built():
+        return []
+    return [Warning(
+        f"static/{BUNDLE} has not been built, so pages load Tailwind from its CDN instead.",
+        hint="Run `npm install && npm run build` before collectstatic (the Docker image does this).",
+        id='core.W001',
+    )]
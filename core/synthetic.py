@@ -0,0 +1,171 @@
+import random
+import secrets
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import reset_queries, transaction
+from django.utils.timezone import now
+
+from apps.billing.models import Credits, Transaction
+from apps.billing.views import PRICING_PLANS
+from apps.dashboard.forms import ContentGenerationForm
+from apps.dashboard.models import ContentHistory
+from apps.social.encryption import encrypt_token
+from apps.social.models import SocialConnection
+
+# Synthetic users, content, payments and social connections for load tests
+# (see `manage.py seed_synthetic` and `manage.py loadtest`). Everything is
+# written with bulk_create, so no signals run: seeded content has no
+# near-duplicate signatures until `build_content_signatures` is run.
+
+WORDS = (
+    "solar wind energy policy market growth startup funding health fitness nutrition "
+    "space rocket launch satellite marketing brand audience campaign finance crypto "
+    "investing climate battery electric vehicle software cloud security privacy data "
+    "learning education career remote team leadership product design customer sales"
+).split()
+NICHES = ['Technology', 'Marketing', 'Health', 'Space', 'Finance', 'Education', 'Climate']
+TONES = [value for value, _ in ContentGenerationForm.TONE_CHOICES if value]
+PLATFORMS = [value for value, _ in SocialConnection.PLATFORM_CHOICES]
+PLANS = PRICING_PLANS['usd'] + PRICING_PLANS['inr']
+
+CONTENT_STATUSES = (['DRAFT'] * 6) + ['POSTED_X', 'POSTED_LINKEDIN', 'POSTED_ALL']
+TRANSACTION_STATUSES = (['COMPLETED'] * 7) + (['PENDING'] * 2) + ['FAILED']
+
+# Fernet encryption costs far more than building a row, so tokens are
+# encrypted once and shared across the seeded connections.
+TOKEN_POOL_SIZE = 64
+STARTING_BALANCE = 1_000_000
+
+
+def username(prefix: str, number: int) -> str:
+    return f"{prefix}-{number}"
+
+
+def random_params(rng: random.Random) -> dict:
+    """Generation inputs shaped like ContentGenerationForm.cleaned_data."""
+    title = ' '.join(rng.choices(WORDS, k=rng.randint(3, 7))).title()
+    return {
+        'title': title,
+        'niche': rng.choice(NICHES),
+        'context': ' '.join(rng.choices(WORDS, k=rng.randint(0, 20))),
+        'tone': rng.choice(TONES + ['']),
+        'platform': rng.choice(PLATFORMS + ['']),
+        'tags': ', '.join(rng.sample(WORDS, k=rng.randint(1, 5))),
+        'generate_image': False,
+        'allow_similar': False,
+    }
+
+
+def random_text(rng: random.Random) -> str:
+    return ' '.join(rng.choices(WORDS, k=rng.randint(60, 250)))
+
+
+def seeded_user_count(prefix: str) -> int:
+    return get_user_model().objects.filter(username__startswith=f"{prefix}-").count()
+
+
+class Seeder:
+    """
+    Bulk-creates synthetic rows, one batch of users (and everything that
+    belongs to them) per transaction. Usernames are `<prefix>-<n>`; running
+    again with the same prefix adds more users after the existing ones.
+    """
+
+    def __init__(self, prefix='load', content_per_user=20, transactions_per_user=3,
+                 connections_per_user=2, password='loadtest', batch_size=5000, seed=42):
+        self.prefix = prefix
+        self.content_per_user = content_per_user
+        self.transactions_per_user = transactions_per_user
+        self.connections_per_user = min(connections_per_user, len(PLATFORMS))
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        # One hash for every user: hashing is deliberately slow.
+        self.password_hash = make_password(password)
+        self.tokens = [encrypt_token(secrets.token_urlsafe(32)) for _ in range(TOKEN_POOL_SIZE)]
+        self.counts = {model.__name__: 0 for model in (get_user_model(), Credits, ContentHistory, Transaction, SocialConnection)}
+        self.seconds = dict.fromkeys(self.counts, 0.0)
+
+    def _bulk_create(self, model, objects):
+        """Inserts `objects` (any iterable) `batch_size` rows at a time, so only one batch is built at once."""
+        start = time.perf_counter()
+        objects = iter(objects)
+        while batch := list(islice(objects, self.batch_size)):
+            model.objects.bulk_create(batch)
+            self.counts[model.__name__] += len(batch)
+            reset_queries()  # With DEBUG on, Django would otherwise keep every INSERT in memory.
+        self.seconds[model.__name__] += time.perf_counter() - start
+
+    def seed(self, users: int, on_batch=None):
+        """Creates `users` more synthetic users. Calls `on_batch(users_so_far)` after each batch."""
+        first = seeded_user_count(self.prefix)
+        for offset in range(0, users, self.batch_size):
+            numbers = range(first + offset, first + min(offset + self.batch_size, users))
+            with transaction.atomic():
+                self._seed_users(numbers)
+            if on_batch:
+                on_batch(numbers.stop - first)
+        return self.counts, self.seconds
+
+    def _seed_users(self, numbers):
+        User = get_user_model()
+        joined = now()
+        names = [username(self.prefix, number) for number in numbers]
+        self._bulk_create(User, (
+            User(
+                username=name, email=f"{name}@loadtest.invalid", password=self.password_hash,
+                is_active=True, is_verified=True, date_joined=joined,
+            )
+            for name in names
+        ))
+        user_ids = list(User.objects.filter(username__in=names).values_list('id', flat=True))
+
+        self._bulk_create(Credits, (Credits(user_id=user_id, balance=STARTING_BALANCE) for user_id in user_ids))
+        self._bulk_create(ContentHistory, (
+            self._content(user_id) for user_id in user_ids for _ in range(self.content_per_user)
+        ))
+        self._bulk_create(Transaction, (
+            self._transaction(user_id, number)
+            for user_id in user_ids for number in range(self.transactions_per_user)
+        ))
+        self._bulk_create(SocialConnection, (
+            self._connection(user_id, platform)
+            for user_id in user_ids for platform in PLATFORMS[:self.connections_per_user]
+        ))
+
+    def _content(self, user_id):
+        params = random_params(self.rng)
+        return ContentHistory(
+            user_id=user_id,
+            title=params['title'],
+            input_params=params,
+            generated_text=random_text(self.rng),
+            status=self.rng.choice(CONTENT_STATUSES),
+        )
+
+    def _transaction(self, user_id, number):
+        plan = self.rng.choice(PLANS)
+        return Transaction(
+            user_id=user_id,
+            gateway='RAZORPAY',
+            gateway_txn_id=f"{self.prefix}_{user_id}_{number}",
+            amount=plan['price'],
+            currency=plan['currency'],
+            credits_purchased=plan['credits'],
+            status=self.rng.choice(TRANSACTION_STATUSES),
+        )
+
+    def _connection(self, user_id, platform):
+        connection = SocialConnection(
+            user_id=user_id,
+            platform=platform,
+            expires_at=now() + timedelta(days=60),
+            profile_id=f"{self.prefix}-{user_id}",
+        )
+        # Assigned directly: the pool is already encrypted.
+        connection._access_token = self.rng.choice(self.tokens)
+        connection._refresh_token = self.rng.choice(self.tokens)
+        return connection
@@ -0,0 +1,154 @@
+import asyncio
+import threading
+
+import pytest
+
+from core.admission import AdmissionRejected, FairGate, SlidingWindowLimiter, parse_limits
+
+
+def test_parse_limits():
+    assert parse_limits("10/minute, 100/hours,5/30") == [(10, 60.0), (100, 3600.0), (5, 30.0)]
+    assert parse_limits("") == []
+
+
+class TestSlidingWindowLimiter:
+    def test_limit_within_a_window(self):
+        limiter = SlidingWindowLimiter([(2, 10)])
+
+        assert limiter.hit('alice', now=0) is None
+        assert limiter.hit('alice', now=1) is None
+        assert limiter.hit('alice', now=2) == pytest.approx(8)
+        # Keys are limited separately.
+        assert limiter.hit('bob', now=2) is None
+
+    def test_previous_window_slides_out(self):
+        limiter = SlidingWindowLimiter([(2, 10)])
+        limiter.hit('alice', now=8)
+        limiter.hit('alice', now=9)
+
+        # Just into the next window, all of the previous one still overlaps.
+        assert limiter.hit('alice', now=10) is not None
+        # Halfway through, half of it does: 2 * 0.5 < 2.
+        assert limiter.hit('alice', now=15) is None
+        # Two windows later nothing is left of it.
+        assert limiter.hit('alice', now=30) is None
+        assert limiter.hit('alice', now=31) is None
+        assert limiter.hit('alice', now=32) is not None
+
+    def test_waiting_as_long_as_told_is_enough(self):
+        limiter = SlidingWindowLimiter([(3, 10), (5, 60)])
+        now = 0.0
+        admitted = 0
+        while now < 300:
+            wait = limiter.hit('alice', now=now)
+            if wait is None:
+                admitted += 1
+                now += 0.5
+            else:
+                assert wait > 0
+                assert limiter.hit('alice', now=now + wait + 0.01) is None
+                admitted += 1
+                now += wait + 0.51
+        # About 5 a minute, never a burst over either limit.
+        assert 20 <= admitted <= 30
+
+    def test_rejected_requests_are_not_counted(self):
+        limiter = SlidingWindowLimiter([(1, 10)])
+        limiter.hit('alice', now=0)
+        for second in range(1, 10):
+            assert limiter.hit('alice', now=second) is not None
+
+        assert limiter.hit('alice', now=20) is None
+
+    def test_idle_keys_are_forgotten(self):
+        limiter = SlidingWindowLimiter([(1, 10)])
+        limiter.hit('alice', now=0)
+        limiter.hit('bob', now=25)
+
+        assert list(limiter._windows) == ['bob']
+
+
+class TestFairGate:
+    def test_free_slots_are_taken_at_once(self):
+        gate = FairGate(max_concurrent=2)
+        gate.acquire('alice', timeout=0)
+        gate.acquire('alice', timeout=0)
+
+        assert gate.active == 2
+        assert gate.waiting == 0
+
+    def test_freed_slots_go_round_robin_across_users(self):
+        gate = FairGate(max_concurrent=1, max_queued=3)
+        order = []
+
+        async def request(key, name):
+            await gate.aacquire(key, timeout=5)
+            order.append(name)
+
+        async def scenario():
+            await gate.aacquire('holder', timeout=0)
+            # Alice queues three before Bob and Carol queue one each.
+            tasks = []
+            for key, name in [('alice', 'a1'), ('alice', 'a2'), ('alice', 'a3'), ('bob', 'b1'), ('carol', 'c1')]:
+                tasks.append(asyncio.create_task(request(key, name)))
+                await asyncio.sleep(0)
+            assert gate.waiting == 5
+            for _ in tasks:
+                gate.release(0.1)
+                await asyncio.sleep(0)
+            await asyncio.gather(*tasks)
+
+        asyncio.run(scenario())
+
+        assert order == ['a1', 'b1', 'c1', 'a2', 'a3']
+        assert gate.waiting == 0
+
+    def test_a_user_may_only_queue_so_many(self):
+        gate = FairGate(max_concurrent=1, max_queued=1)
+        gate.acquire('holder', timeout=0)
+        waiter = threading.Thread(target=gate.acquire, args=('alice', 5))
+        waiter.start()
+        while not gate.waiting:
+            pass
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            gate.acquire('alice', timeout=5)
+        assert rejected.value.reason == 'queue_full'
+
+        gate.release(0.1)
+        waiter.join()
+        assert gate.active == 1
+
+    def test_waiting_too_long_gives_up_its_place(self):
+        gate = FairGate(max_concurrent=1)
+        gate.acquire('holder', timeout=0)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            gate.acquire('alice', timeout=0.01)
+        assert rejected.value.reason == 'busy'
+        assert rejected.value.retry_after >= 1
+        assert gate.waiting == 0
+
+        # The slot is not handed to the request that gave up.
+        gate.release(0.1)
+        assert gate.active == 0
+
+    def test_cancelled_waiter_passes_its_slot_on(self):
+        gate = FairGate(max_concurrent=1)
+
+        async def scenario():
+            await gate.aacquire('holder', timeout=0)
+            alice = asyncio.create_task(gate.aacquire('alice', timeout=5))
+            await asyncio.sleep(0)
+            bob = asyncio.create_task(gate.aacquire('bob', timeout=5))
+            await asyncio.sleep(0)
+            # Alice's request is cancelled, then handed the slot before it gets to leave the queue.
+            alice.cancel()
+            gate.release(0.1)
+            with pytest.raises(asyncio.CancelledError):
+                await alice
+            await asyncio.wait_for(bob, 1)
+
+        asyncio.run(scenario())
+        assert gate.active == 1
+        assert gate.waiting == 0
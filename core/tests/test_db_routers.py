@@ -0,0 +1,94 @@
+import pytest
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends.db import SessionStore
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import resolve
+
+from apps.authentication.models import User
+from apps.billing.models import Credits
+from core.db import routers
+from core.db.routers import ReplicaRouter, ReplicaRoutingMiddleware, RoutingState
+
+
+@pytest.fixture
+def state():
+    state = RoutingState(use_replica=True)
+    token = routers._state.set(state)
+    yield state
+    routers._state.reset(token)
+
+
+@pytest.fixture
+def user():
+    user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+    Credits.objects.create(user=user, balance=10)
+    return user
+
+
+@pytest.fixture
+def replica(monkeypatch, settings):
+    monkeypatch.setattr(routers, 'replica_configured', lambda: True)
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@pytest.mark.django_db
+def test_get_or_create_that_finds_its_row_is_not_a_write(user, state):
+    Credits.objects.get_or_create(user=user, defaults={'balance': 1})
+    Credits.objects.select_for_update().filter(user=user).exists()
+
+    assert not state.wrote
+    assert ReplicaRouter().db_for_read(Credits) == routers.REPLICA
+
+
+@pytest.mark.django_db
+def test_row_written_is_a_write(user, state):
+    Credits.objects.filter(user=user).update(balance=5)
+
+    assert state.wrote
+    assert ReplicaRouter().db_for_read(Credits) == 'default'
+
+
+@pytest.mark.django_db
+def test_session_saves_are_not_writes(state):
+    session = SessionStore()
+    session['seen'] = True
+    session.save()
+
+    assert not state.wrote
+
+
+def routed_request(user_id, path='/dashboard/'):
+    request = RequestFactory().get(path)
+    request.session = {SESSION_KEY: str(user_id)}
+    request.resolver_match = resolve(path)
+    return request
+
+
+@pytest.mark.django_db
+def test_user_who_wrote_is_pinned_to_the_primary(user, replica):
+    seen = []
+
+    def view(request, write=False):
+        if write:
+            Credits.objects.filter(user=user).update(balance=5)
+        seen.append(ReplicaRouter().db_for_read(Credits))
+        return HttpResponse()
+
+    def get(write=False):
+        def get_response(request):
+            # As Django's handler does, inside the middleware's __call__.
+            middleware.process_view(request, view, (), {})
+            return view(request, write)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        request = routed_request(user.pk)
+        request.user = user
+        return middleware(request)
+
+    get()
+    get(write=True)
+    get()
+
+    assert seen == [routers.REPLICA, 'default', 'default']
+    assert routers.is_pinned(user.pk)
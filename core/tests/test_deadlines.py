@@ -0,0 +1,136 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from django.db import OperationalError
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from apps.authentication.models import User
+from core import deadlines
+from core.deadlines import (
+    DeadlineExceeded, adeadline_scope, check_deadline, current_deadline, deadline, deadline_scope,
+    enforce_query_deadline, time_left,
+)
+from core.middleware import DeadlineMiddleware
+
+
+@pytest.fixture(autouse=True)
+def stats(monkeypatch):
+    monkeypatch.setattr(deadlines, 'stats', {})
+    return deadlines.stats
+
+
+def test_nested_deadline_cannot_outlast_the_outer_one():
+    with deadline(1, 'outer') as outer:
+        with deadline(60, 'inner') as inner:
+            assert inner is outer
+        with deadline(0.5, 'inner') as inner:
+            assert inner is not outer and current_deadline() is inner
+        assert current_deadline() is outer
+    assert current_deadline() is None
+
+
+def test_time_left_is_capped_by_the_call_and_the_request():
+    assert time_left('gemini.text', 30) == 30  # Outside a request.
+    with deadline(10):
+        assert 9 < time_left('gemini.text') <= 10
+        assert time_left('gemini.text', 2) == 2
+
+
+def test_expired_deadline_refuses_new_work(stats):
+    with deadline(0):
+        with pytest.raises(DeadlineExceeded) as raised:
+            time_left('gemini.text', 30)
+        with pytest.raises(DeadlineExceeded):
+            check_deadline('x.post')
+
+    assert raised.value.stage == 'gemini.text'
+    assert stats == {'gemini.text': 1, 'x.post': 1}
+
+
+def test_deadline_scope_reports_timeouts_after_the_deadline_as_exceeded():
+    with deadline(60):
+        with pytest.raises(TimeoutError):
+            with deadline_scope('linkedin.post'):
+                raise TimeoutError  # The call's own, shorter timeout.
+    with deadline(0):
+        with pytest.raises(DeadlineExceeded):
+            with deadline_scope('linkedin.post'):
+                raise TimeoutError
+
+
+def test_async_scope_cancels_slow_calls(stats):
+    async def slow_call():
+        with deadline(0.05):
+            async with adeadline_scope('gemini.text'):
+                await asyncio.sleep(5)
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(slow_call())
+    assert stats == {'gemini.text': 1}
+
+
+@pytest.mark.django_db
+def test_queries_after_the_deadline_are_refused(stats):
+    with deadline(60):
+        assert User.objects.count() == 0
+    with deadline(0):
+        with pytest.raises(DeadlineExceeded):
+            User.objects.count()
+    assert stats == {'database': 1}
+
+
+def test_cancelled_statement_is_reported_as_exceeded(stats):
+    cancelled = OperationalError('canceling statement due to statement timeout')
+    cancelled.__cause__ = Exception()
+    cancelled.__cause__.pgcode = deadlines.QUERY_CANCELED
+
+    def execute(sql, params, many, context):
+        raise cancelled
+
+    context = {'connection': SimpleNamespace(vendor='sqlite'), 'cursor': None}
+    with deadline(60):
+        with pytest.raises(DeadlineExceeded):
+            enforce_query_deadline(execute, 'SELECT 1', None, False, context)
+    # Outside a request the database error is left alone.
+    with pytest.raises(OperationalError):
+        enforce_query_deadline(execute, 'SELECT 1', None, False, context)
+
+
+def test_statement_timeout_is_only_reset_when_it_overshoots():
+    statements = []
+    cursor = SimpleNamespace(execute=statements.append)
+    conn = SimpleNamespace()
+    current = SimpleNamespace(remaining=lambda: remaining)
+
+    remaining = 20.0
+    deadlines._statement_timeout(conn, cursor, current)
+    remaining = 19.5  # Within a second of the last timeout: left as it is.
+    deadlines._statement_timeout(conn, cursor, current)
+    remaining = 5.0
+    deadlines._statement_timeout(conn, cursor, current)
+    deadlines._statement_timeout(conn, cursor, None)  # Back outside a request.
+    deadlines._statement_timeout(conn, cursor, None)
+
+    assert statements == [
+        'SET statement_timeout = 20000', 'SET statement_timeout = 5000', 'SET statement_timeout = 0',
+    ]
+
+
+def test_middleware_applies_the_views_budget_and_answers_504():
+    class SlowView:
+        request_budget = 120
+
+    def get_response(request):
+        # Django calls process_view once the view is resolved.
+        middleware.process_view(request, SlowView, (), {})
+        return HttpResponse(f"{current_deadline().budget:g}")
+
+    middleware = DeadlineMiddleware(get_response)
+    request = RequestFactory().get('/dashboard/')
+
+    assert middleware(request).content == b'120'
+    response = middleware.process_exception(request, DeadlineExceeded('gemini.text'))
+    assert response.status_code == 504
+    assert middleware.process_exception(request, ValueError()) is None
@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import pytest
+
+from core.hedging import Hedger
+
+# The primary is slow, the hedge answers at once; hedges start after 5ms.
+SLOW = 0.05
+DELAY = 0.005
+
+
+def warmed_up(**options) -> Hedger:
+    # Enough fast samples that a few slow primaries do not move the 95th percentile.
+    hedger = Hedger(min_samples=10, **options)
+    for _ in range(100):
+        hedger.record(DELAY)
+    return hedger
+
+
+async def slow_primary():
+    await asyncio.sleep(SLOW)
+    return 'primary'
+
+
+async def fast_hedge():
+    return 'hedge'
+
+
+def test_no_hedging_until_there_are_enough_samples():
+    hedger = Hedger(min_samples=3)
+    assert hedger.delay() is None
+
+    assert asyncio.run(hedger.acall(slow_primary, fast_hedge)) == 'primary'
+    assert hedger.stats['hedged'] == 0
+
+
+def test_delay_is_the_percentile_of_recent_latencies():
+    hedger = Hedger(percentile=90, min_samples=10, min_delay=0.05)
+    for ms in range(1, 101):
+        hedger.record(ms / 1000)
+
+    assert hedger.delay() == pytest.approx(0.091)
+    hedger.percentile = 10
+    assert hedger.delay() == 0.05
+
+
+def test_hedge_wins_over_a_slow_primary():
+    hedger = warmed_up()
+
+    assert asyncio.run(hedger.acall(slow_primary, fast_hedge)) == 'hedge'
+    assert hedger.stats['hedged'] == hedger.stats['hedge_wins'] == 1
+    # The cancelled primary still counts towards the tail, at a lower bound.
+    assert len(hedger._latencies) == 101
+
+
+def test_token_bucket_rations_hedges():
+    # Two tokens to start with; each call earns a quarter of one.
+    hedger = warmed_up(max_rate=0.25, burst=2)
+
+    async def calls():
+        return [await hedger.acall(slow_primary, fast_hedge) for _ in range(5)]
+
+    assert asyncio.run(calls()) == ['hedge', 'hedge', 'primary', 'primary', 'hedge']
+    assert hedger.stats == {'calls': 5, 'hedged': 3, 'hedge_wins': 3, 'capped': 2}
+
+
+def test_token_bucket_is_capped_at_the_burst():
+    hedger = warmed_up(max_rate=1, burst=1)
+    for _ in range(5):
+        hedger._start()
+
+    assert hedger._tokens == 1
+
+
+def test_failed_hedge_falls_back_to_the_primary():
+    hedger = warmed_up()
+
+    async def failing_hedge():
+        raise ConnectionError("hedge failed")
+
+    assert asyncio.run(hedger.acall(slow_primary, failing_hedge)) == 'primary'
+    assert hedger.stats['hedge_wins'] == 0
+
+
+def test_primary_error_is_raised_when_both_fail():
+    hedger = warmed_up()
+
+    async def failing_primary():
+        await asyncio.sleep(SLOW)
+        raise TimeoutError("primary failed")
+
+    async def failing_hedge():
+        raise ConnectionError("hedge failed")
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(hedger.acall(failing_primary, failing_hedge))
+
+
+def test_sync_calls_are_hedged_and_rationed_the_same_way():
+    hedger = warmed_up(max_rate=0.25, burst=1)
+
+    def primary():
+        time.sleep(SLOW)
+        return 'primary'
+
+    results = [hedger.call(primary, lambda: 'hedge') for _ in range(3)]
+
+    assert results == ['hedge', 'primary', 'primary']
+    assert hedger.stats['capped'] == 2
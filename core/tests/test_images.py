@@ -0,0 +1,97 @@
+import io
+
+import boto3
+import pytest
+from moto import mock_aws
+from PIL import Image, features
+
+from core import images
+from core.images import VARIANT_FORMATS, delete_images, publish_image
+
+BUCKET = 'media'
+
+
+@pytest.fixture
+def bucket(settings, monkeypatch):
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    settings.AWS_ACCESS_KEY_ID = 'testing'
+    settings.AWS_SECRET_ACCESS_KEY = 'testing'
+    settings.AWS_STORAGE_BUCKET_NAME = BUCKET
+    settings.AWS_S3_ENDPOINT_URL = None
+    settings.AWS_S3_CUSTOM_DOMAIN = 'media.example.com'
+    settings.AWS_DEFAULT_ACL = None
+    settings.IMAGE_VARIANT_WIDTHS = [64, 128]
+    settings.IMAGE_WORKERS = 1
+    monkeypatch.setattr(images, '_s3_client', None)
+    with mock_aws():
+        s3 = boto3.client('s3')
+        s3.create_bucket(Bucket=BUCKET)
+        yield s3
+    images._s3_client = None
+
+
+@pytest.fixture(scope='module', autouse=True)
+def pool():
+    yield
+    if images._pool is not None:
+        images._pool.shutdown()
+        images._pool = None
+
+
+def png(width=300, height=200):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (79, 70, 229)).save(buffer, 'PNG')
+    buffer.seek(0)
+    return buffer
+
+
+def stored(s3):
+    return sorted(item['Key'] for item in s3.list_objects_v2(Bucket=BUCKET).get('Contents', []))
+
+
+def test_original_and_variants_are_uploaded(bucket):
+    formats = [fmt for fmt in VARIANT_FORMATS if features.check(fmt[0])]
+
+    urls = publish_image(png(), 'content/1/abc', 'image/png')
+
+    assert urls['original'] == 'https://media.example.com/content/1/abc/original.png'
+    expected = ['content/1/abc/original.png']
+    for name, _, extension, content_type, _ in formats:
+        assert urls[name] == {
+            str(width): f'https://media.example.com/content/1/abc/{width}.{extension}' for width in (64, 128)
+        }
+        expected += [f'content/1/abc/{width}.{extension}' for width in (64, 128)]
+        head = bucket.head_object(Bucket=BUCKET, Key=f'content/1/abc/128.{extension}')
+        assert head['ContentType'] == content_type
+        assert head['CacheControl'] == 'public, max-age=31536000, immutable'
+    assert stored(bucket) == sorted(expected)
+
+    variant = bucket.get_object(Bucket=BUCKET, Key=f'content/1/abc/128.{formats[0][2]}')['Body'].read()
+    with Image.open(io.BytesIO(variant)) as image:
+        assert image.size == (128, 85)
+
+
+def test_failed_publish_leaves_nothing_behind(bucket, monkeypatch):
+    upload = images._upload
+    calls = []
+
+    def failing_upload(path, key, content_type):
+        calls.append(key)
+        if len(calls) == 2:
+            raise OSError("Connection reset")
+        return upload(path, key, content_type)
+
+    monkeypatch.setattr(images, '_upload', failing_upload)
+    with pytest.raises(OSError):
+        publish_image(png(), 'content/1/abc', 'image/png')
+
+    assert stored(bucket) == []
+
+
+def test_delete_images_only_deletes_its_prefix(bucket):
+    for key in ('content/1/abc/original.png', 'content/1/abc/64.webp', 'content/1/abcd/original.png'):
+        bucket.put_object(Bucket=BUCKET, Key=key, Body=b'x')
+
+    delete_images('content/1/abc')
+
+    assert stored(bucket) == ['content/1/abcd/original.png']
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from core.json_stream import JSONArrayItems
+
+VARIANTS = [
+    {'x_com': 'Version 1: "quoted", [bracketed] and {braced}', 'linkedin': 'Line one\nLine two é漢'},
+    {'x_com': 'Version 2 \\ with a backslash', 'linkedin': 'Escaped \\"quote\\"'},
+    [1, 2.5, -3e-2, True, False, None],
+    'a plain string',
+    -12.75e+3,
+    0,
+    None,
+]
+TEXT = json.dumps(VARIANTS, ensure_ascii=False, indent=2)
+
+
+def parse(chunks) -> list:
+    parser = JSONArrayItems()
+    items = []
+    for chunk in chunks:
+        items += parser.feed(chunk)
+    return items
+
+
+def test_whole_array_in_one_chunk():
+    assert parse([TEXT]) == VARIANTS
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64])
+def test_any_chunk_size(size):
+    assert parse([TEXT[i:i + size] for i in range(0, len(TEXT), size)]) == VARIANTS
+
+
+@pytest.mark.parametrize('text', [
+    '[1.5e-3, -20, 3.25, 1e5, 0.5, true, false, null]',
+    '[-0.125,100E+2]',
+])
+def test_numbers_and_literals_split_at_every_position(text):
+    expected = json.loads(text)
+    for cut in range(1, len(text)):
+        assert parse([text[:cut], text[cut:]]) == expected, f"split at {cut}: {text[:cut]!r}"
+
+
+def test_items_are_returned_as_soon_as_they_are_complete():
+    parser = JSONArrayItems()
+
+    assert parser.feed('[{"a": 1}, {"b"') == [{'a': 1}]
+    assert parser.feed(': 2}, 3') == [{'b': 2}]
+    assert parser.feed('4') == []
+    assert parser.feed(']') == [34]
+    assert parser.done
+
+
+def test_text_around_the_array_is_skipped():
+    parser = JSONArrayItems()
+
+    assert parser.feed('Here you go:\n```json\n') == []
+    assert parser.feed('["one", "two"]\n```') == ['one', 'two']
+    assert parser.feed('["ignored"]') == []
+
+
+def test_stream_cut_short_keeps_the_complete_items():
+    assert parse([TEXT[:len(TEXT) // 2]]) == VARIANTS[:1]
+
+
+def test_empty_array():
+    parser = JSONArrayItems()
+    assert parser.feed(' [ ] ') == []
+    assert parser.done
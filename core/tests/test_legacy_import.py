@@ -0,0 +1,140 @@
+import json
+import sqlite3
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from apps.authentication.models import User
+from apps.billing.models import Credits, Transaction
+from apps.dashboard.models import ContentHistory
+from apps.social.models import SocialConnection
+from core import legacy_import
+
+SCHEMA = Path(__file__).resolve().parents[2] / 'migrations' / '0001_initial.sql'
+
+
+@pytest.fixture
+def dump(tmp_path):
+    """A small D1 export: two users, one with a Django password hash, and a content row without its user."""
+    path = tmp_path / 'd1.sqlite3'
+    source = sqlite3.connect(path)
+    source.executescript(SCHEMA.read_text())
+    source.executemany(
+        "INSERT INTO users (id, username, password, email, date_joined, gender, is_verified) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            (1, 'ada', 'pbkdf2_sha256$600000$salt$hash', 'ada@example.com', '2024-01-02 03:04:05', 'female', 1),
+            (2, 'bo', 'plain-text', 'bo@example.com', '2024-02-03 04:05:06', 'unknown', 0),
+        ],
+    )
+    source.executemany("INSERT INTO credits (user_id, balance, last_updated) VALUES (?, ?, ?)",
+                       [(1, 25, '2024-03-01 00:00:00'), (2, 0, '2024-03-01 00:00:00')])
+    source.executemany(
+        "INSERT INTO content_history (id, user_id, title, input_params, generated_text, status, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            (10, 1, 'First', '{"niche": "Food"}', 'Soup.', 'posted_x', '2024-04-01 12:00:00'),
+            (11, 1, 'Second', "{'niche': 'Travel'}", 'Trains.', 'weird', '2024-04-02 12:00:00'),
+            (12, 2, 'Third', '{}', 'Bikes.', 'draft', '2024-04-03 12:00:00'),
+            (13, 99, 'Orphan', '{}', 'Nobody.', 'draft', '2024-04-04 12:00:00'),
+        ],
+    )
+    source.execute(
+        "INSERT INTO transactions (id, user_id, gateway, gateway_txn_id, amount, currency, credits_purchased, status) "
+        "VALUES (1, 1, 'stripe', 'pi_1', 9.999, 'usd', 50, 'succeeded')"
+    )
+    source.execute(
+        "INSERT INTO social_connections (user_id, platform, access_token, profile_id) VALUES (1, 'x_com', 'tok', 'p1')"
+    )
+    source.commit()
+    source.close()
+    return path
+
+
+def import_d1(dump, *args):
+    output = StringIO()
+    call_command('import_d1', str(dump), '--chunk-size', '2', *args, stdout=output)
+    return output.getvalue()
+
+
+@pytest.mark.django_db
+def test_import_converts_the_legacy_rows(dump):
+    import_d1(dump)
+
+    ada, bo = User.objects.order_by('pk')
+    assert (ada.pk, ada.email, ada.gender, ada.is_verified) == (1, 'ada@example.com', 'FEMALE', True)
+    assert ada.password == 'pbkdf2_sha256$600000$salt$hash'
+    assert not bo.has_usable_password()
+    assert bo.gender == 'OTHER'
+    assert Credits.objects.get(user=ada).balance == 25
+
+    contents = {content.pk: content for content in ContentHistory.objects.all()}
+    assert sorted(contents) == [10, 11, 12]  # The orphan is skipped.
+    assert contents[10].status == 'POSTED_X'
+    assert contents[11].status == 'DRAFT'
+    assert contents[11].get_input_params() == {'niche': 'Travel'}
+    assert contents[10].created_at.isoformat() == '2024-04-01T12:00:00+00:00'
+
+    payment = Transaction.objects.get()
+    assert (str(payment.amount), payment.currency, payment.status) == ('10.00', 'USD', 'COMPLETED')
+    connection = SocialConnection.objects.get()
+    assert connection._access_token != 'tok'
+    assert connection.access_token == 'tok'
+
+
+@pytest.mark.django_db
+def test_new_rows_do_not_reuse_imported_ids(dump):
+    import_d1(dump)
+
+    content = ContentHistory.objects.create(user_id=1, title='New', generated_text='Fresh.')
+
+    assert content.pk > 12
+
+
+@pytest.mark.django_db
+def test_reimport_skips_rows_already_imported(dump):
+    import_d1(dump, '--restart')
+    ContentHistory.objects.filter(pk=10).update(title='Edited here')
+
+    output = import_d1(dump, '--restart')
+
+    assert ContentHistory.objects.count() == 3
+    assert ContentHistory.objects.get(pk=10).title == 'Edited here'
+    assert 'content_history: 4 read, 0 written, 4 skipped' in output
+
+
+@pytest.mark.django_db
+def test_interrupted_import_resumes_from_the_state_file(dump, monkeypatch):
+    content_row = legacy_import._content_row
+
+    def failing_row(row):
+        if row['id'] == 12:
+            raise RuntimeError('Connection lost')
+        return content_row(row)
+
+    monkeypatch.setattr(legacy_import, '_content_row', failing_row)
+    with pytest.raises(RuntimeError):
+        import_d1(dump)
+
+    # Chunks of two: the users, the credits and the first content chunk were committed.
+    state = json.loads(Path(f'{dump}.import-state.json').read_text())
+    assert state == {'users': 2, 'credits': 2, 'content_history': 11}
+    assert sorted(ContentHistory.objects.values_list('pk', flat=True)) == [10, 11]
+
+    monkeypatch.setattr(legacy_import, '_content_row', content_row)
+    output = import_d1(dump)
+
+    assert 'Resuming from' in output
+    assert 'users: 0 read' in output
+    assert 'content_history: 2 read, 1 written' in output
+    assert sorted(ContentHistory.objects.values_list('pk', flat=True)) == [10, 11, 12]
+
+
+@pytest.mark.django_db
+def test_import_refuses_taken_user_ids(dump):
+    User.objects.create_user('someone', 'someone@example.com', 'pw', id=1)
+
+    with pytest.raises(CommandError, match='already taken'):
+        import_d1(dump)
@@ -0,0 +1,75 @@
+import asyncio
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils.timezone import now
+
+from apps.authentication.models import User
+from core import lifecycle as lifecycle_module
+from core.lifecycle import Lifecycle
+from core.models import PendingJob
+
+resumed = []
+
+
+def record_resume(job):
+    resumed.append(job.payload)
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user('alice', 'alice@example.com', 'pw')
+
+
+@pytest.fixture
+def resumer(monkeypatch):
+    resumed.clear()
+    monkeypatch.setitem(lifecycle_module.RESUMERS, 'generation', f'{__name__}.record_resume')
+    return resumed
+
+
+@pytest.mark.django_db
+def test_job_cancelled_while_draining_is_checkpointed(user):
+    lifecycle = Lifecycle()
+    with pytest.raises(asyncio.CancelledError):
+        with lifecycle.job('generation', user, {'title': 'AI'}) as job:
+            job.state['step'] = 1
+            lifecycle.draining_since = 0
+            raise asyncio.CancelledError()
+
+    assert lifecycle.stats['interrupted'] == 1
+    assert lifecycle.checkpoint() == 1
+    assert PendingJob.objects.get().state == {'step': 1}
+
+
+@pytest.mark.django_db
+def test_job_abandoned_outside_a_drain_is_dropped(user):
+    lifecycle = Lifecycle()
+    with pytest.raises(asyncio.CancelledError):
+        with lifecycle.job('generation', user, {'title': 'AI'}):
+            # The client went away.
+            raise asyncio.CancelledError()
+
+    assert lifecycle.stats['abandoned'] == 1
+    assert lifecycle.in_flight() == 0
+    # A drain hours later has nothing of it to save.
+    lifecycle.draining_since = 0
+    assert lifecycle.checkpoint() == 0
+    assert not PendingJob.objects.exists()
+
+
+@pytest.mark.django_db
+def test_resume_jobs_gives_up_on_old_jobs(user, resumer):
+    old = PendingJob.objects.create(kind='generation', user=user, payload={'title': 'old'})
+    recent = PendingJob.objects.create(kind='generation', user=user, payload={'title': 'recent'})
+    PendingJob.objects.filter(pk=old.pk).update(created_at=now() - timedelta(hours=2))
+
+    call_command('resume_jobs', '--min-age', '0', '--max-age', '3600', stdout=StringIO())
+
+    assert resumer == [{'title': 'recent'}]
+    assert not PendingJob.objects.filter(pk=recent.pk).exists()
+    old.refresh_from_db()
+    assert old.status == 'FAILED'
+    assert old.error == "Too old to resume."
@@ -0,0 +1,93 @@
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from apps.authentication.models import User
+from apps.billing.models import UsageRecord
+from core import metering
+from core.metering import UsageMeter, record_usage, usage_scope
+
+
+@pytest.fixture
+def meter(monkeypatch):
+    meter = UsageMeter(batch_size=3, flush_interval=60, max_buffer=5)
+    # Flushed by hand here, not by the background thread.
+    meter._pid = os.getpid()
+    monkeypatch.setattr(metering, 'meter', meter)
+    return meter
+
+
+def record(n=0):
+    return UsageRecord(operation='TEXT', model_name='gemini-flash', total_tokens=n, latency_ms=1,
+                       created_at=metering.now())
+
+
+@pytest.mark.django_db
+def test_calls_are_attributed_to_the_scope(meter):
+    alice = User.objects.create_user('alice', 'alice@example.com', 'pw')
+    metadata = SimpleNamespace(prompt_token_count=100, candidates_token_count=50, total_token_count=180)
+
+    with usage_scope(alice, 'x_com-v1') as usage:
+        record_usage('TEXT', 'gemini-flash', time.monotonic(), usage_metadata=metadata)
+        record_usage('IMAGE', 'imagen', time.monotonic())
+    record_usage('TEXT', 'gemini-flash', time.monotonic(), ok=False,
+                 usage_metadata={'promptTokenCount': 10, 'candidatesTokenCount': 5, 'totalTokenCount': 0})
+
+    # The total includes thinking tokens; it is never below prompt + output.
+    assert usage.total_tokens == 180
+    assert meter.flush() == 3
+    text, image, unscoped = UsageRecord.objects.order_by('pk')
+    assert (text.user, text.prompt_version, text.prompt_tokens, text.output_tokens) == (alice, 'x_com-v1', 100, 50)
+    assert image.total_tokens == 0
+    assert (unscoped.user, unscoped.ok, unscoped.total_tokens) == (None, False, 15)
+
+
+@pytest.mark.django_db
+def test_records_are_written_in_one_batch_once_enough_are_waiting(meter, django_assert_num_queries):
+    meter.add(record())
+    meter.add(record())
+    assert not meter._wakeup.is_set()
+    meter.add(record())
+    assert meter._wakeup.is_set()
+
+    with django_assert_num_queries(1):
+        assert meter.flush() == 3
+    assert meter.pending() == 0
+    assert meter.flush() == 0
+    assert meter.stats['written'] == UsageRecord.objects.count() == 3
+
+
+def test_oldest_records_are_dropped_beyond_the_buffer(meter):
+    for n in range(7):
+        meter.add(record(n))
+
+    assert meter.pending() == 5
+    assert [r.total_tokens for r in meter._buffer] == [2, 3, 4, 5, 6]
+    assert meter.stats['dropped'] == 2
+
+
+@pytest.mark.django_db
+def test_failed_write_is_retried_with_the_next_batch(meter, monkeypatch):
+    meter.add(record(1))
+    meter.add(record(2))
+    bulk_create = UsageRecord.objects.bulk_create
+    monkeypatch.setattr(UsageRecord.objects, 'bulk_create', lambda *args, **kwargs: 1 / 0)
+
+    assert meter.flush() == 0
+    meter.add(record(3))
+    assert [r.total_tokens for r in meter._buffer] == [1, 2, 3]
+
+    monkeypatch.setattr(UsageRecord.objects, 'bulk_create', bulk_create)
+    assert meter.flush() == 3
+    assert meter.stats['failed_flushes'] == 1
+    assert sorted(UsageRecord.objects.values_list('total_tokens', flat=True)) == [1, 2, 3]
+
+
+def test_disabled_meter_keeps_nothing():
+    meter = UsageMeter(enabled=False)
+
+    meter.add(record())
+
+    assert meter.pending() == 0 and meter._thread is None
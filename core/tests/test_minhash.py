@@ -0,0 +1,78 @@
+import random
+
+import pytest
+from django.conf import settings
+
+from core import minhash
+
+VOCABULARY = [f"w{i}" for i in range(10_000)]
+
+
+def pair(jaccard: float, size: int, rng: random.Random):
+    """Two sets of `size` features whose Jaccard similarity is `jaccard`."""
+    shared = round(2 * size * jaccard / (1 + jaccard))
+    words = rng.sample(VOCABULARY, shared + 2 * (size - shared))
+    common, rest = words[:shared], words[shared:]
+    return set(common + rest[:size - shared]), set(common + rest[size - shared:])
+
+
+def candidates_found(jaccard: float, trials: int = 200) -> float:
+    """The share of pairs at `jaccard` that the index returns as candidates at all."""
+    rng = random.Random(jaccard)
+    found = 0
+    for _ in range(trials):
+        a, b = pair(jaccard, 60, rng)
+        index = minhash.LSHIndex()
+        index.add('a', minhash.signature(a))
+        found += bool(index.query(minhash.signature(b), threshold=0))
+    return found / trials
+
+
+def test_similarity_estimates_jaccard():
+    rng = random.Random(1)
+    for jaccard in (0.2, 0.5, 0.8):
+        a, b = pair(jaccard, 200, rng)
+        assert minhash.similarity(minhash.signature(a), minhash.signature(b)) == pytest.approx(jaccard, abs=0.1)
+
+
+def test_identical_and_empty_sets():
+    sig = minhash.signature(minhash.shingles("The quick brown fox jumps over the lazy dog"))
+    assert minhash.similarity(sig, sig) == 1.0
+    assert minhash.signature(set()) == minhash.signature(set())
+
+
+@pytest.mark.parametrize('jaccard', [0.2, 0.5, 0.8])
+def test_candidates_follow_the_banding_curve(jaccard):
+    expected = 1 - (1 - jaccard ** minhash.ROWS) ** minhash.BANDS
+    assert candidates_found(jaccard) == pytest.approx(expected, abs=0.06)
+
+
+def test_near_duplicates_at_the_threshold_are_found():
+    assert candidates_found(settings.NEAR_DUPLICATE_THRESHOLD) >= 0.99
+
+
+def test_query_applies_the_threshold_and_ranks_matches():
+    rng = random.Random(2)
+    base, close = pair(0.9, 100, rng)
+    _, far = pair(0.5, 100, rng)
+    index = minhash.LSHIndex()
+    index.add('close', minhash.signature(close))
+    index.add('same', minhash.signature(base))
+    index.add('far', minhash.signature(set(far) | set(list(base)[:10])))
+
+    matches = index.query(minhash.signature(base), threshold=0.8)
+
+    assert [key for key, _ in matches] == ['same', 'close']
+    assert matches[0][1] == 1.0
+
+
+def test_removed_and_replaced_entries():
+    index = minhash.LSHIndex()
+    index.add('a', minhash.signature({'x', 'y', 'z'}))
+    index.add('a', minhash.signature({'p', 'q', 'r'}))
+    assert len(index) == 1
+    assert index.query(minhash.signature({'x', 'y', 'z'}), threshold=0.5) == []
+
+    index.remove('a')
+    assert len(index) == 0
+    assert index.query(minhash.signature({'p', 'q', 'r'}), threshold=0.5) == []
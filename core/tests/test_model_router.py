@@ -0,0 +1,92 @@
+from types import SimpleNamespace
+
+import pytest
+
+from core import model_router as model_router_module
+from core.model_router import ModelRouter, classify
+
+MODELS = {'pro': 'gemini-pro', 'flash': 'gemini-flash'}
+PRO_REQUEST = {'platform': 'linkedin', 'tone': 'Professional'}
+FLASH_REQUEST = {'platform': 'x_com', 'tone': 'Professional'}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(model_router_module, 'time', SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+@pytest.fixture
+def router(clock):
+    return ModelRouter(MODELS, max_latency={'pro': 10.0, 'flash': 5.0}, max_failure_rate=0.3,
+                       alpha=0.5, min_samples=3, probe_interval=30.0)
+
+
+def test_requests_are_classified_by_platform_tone_and_context():
+    assert classify(FLASH_REQUEST) == 'flash'
+    assert classify({**FLASH_REQUEST, 'context': 'x' * 601}) == 'pro'
+    assert classify({'platform': 'linkedin', 'tone': 'Casual'}) == 'flash'
+    assert classify({'platform': 'linkedin', 'tone': 'Casual', 'context': 'x' * 301}) == 'pro'
+    assert classify(PRO_REQUEST) == 'pro'
+
+
+def test_disabled_routing_always_uses_pro(clock):
+    router = ModelRouter(MODELS, max_latency={'pro': 10.0, 'flash': 5.0}, enabled=False)
+
+    assert router.route(FLASH_REQUEST) == 'gemini-pro'
+
+
+def test_slow_tier_is_degraded_after_enough_samples(router):
+    router.route(PRO_REQUEST)
+    router.record('gemini-pro', 30.0, ok=True)
+    router.record('gemini-pro', 30.0, ok=True)
+    assert router.route(PRO_REQUEST) == 'gemini-pro'
+
+    router.record('gemini-pro', 30.0, ok=True)
+
+    assert router.health()['pro']['degraded']
+    assert router.route(PRO_REQUEST) == 'gemini-flash'
+    # The other tier's own traffic is unaffected.
+    assert router.route(FLASH_REQUEST) == 'gemini-flash'
+
+
+def test_failing_tier_is_degraded(router):
+    router.route(FLASH_REQUEST)
+    for ok in (True, False, False):
+        router.record('gemini-flash', 1.0, ok=ok)
+
+    assert router.health()['flash']['failure_rate'] > 0.3
+    assert router.route(FLASH_REQUEST) == 'gemini-pro'
+
+
+def test_degraded_tier_is_probed_then_recovers(router, clock):
+    router.route(PRO_REQUEST)
+    for _ in range(3):
+        router.record('gemini-pro', 30.0, ok=True)
+    assert router.route(PRO_REQUEST) == 'gemini-flash'
+
+    clock.now += 31
+    assert router.route(PRO_REQUEST) == 'gemini-pro'  # The probe.
+    assert router.route(PRO_REQUEST) == 'gemini-flash'
+
+    for _ in range(3):
+        router.record('gemini-pro', 1.0, ok=True)
+
+    assert not router.health()['pro']['degraded']
+    assert router.route(PRO_REQUEST) == 'gemini-pro'
+
+
+def test_with_both_tiers_degraded_requests_stay_on_their_own(router):
+    for model in MODELS.values():
+        for _ in range(3):
+            router.record(model, 60.0, ok=False)
+
+    assert router.route(PRO_REQUEST) == 'gemini-pro'
+    assert router.route(FLASH_REQUEST) == 'gemini-flash'
+
+
+def test_calls_to_unknown_models_are_ignored(router):
+    router.record('gemini-legacy', 60.0, ok=False)
+
+    assert all(health['samples'] == 0 for health in router.health().values())
@@ -0,0 +1,31 @@
+from core.prompts import PromptTemplate, build_prompt
+
+TEMPLATE = PromptTemplate('test-v1', [
+    ("Title: {title}\n", None),
+    ("Tone: {tone}\n", 'tone'),
+    ("Tags: {tags!r:>8}\n", 'tags'),
+    ("{{literal}} 100%", None),
+])
+
+
+def test_optional_lines_are_skipped_when_their_field_is_empty():
+    assert TEMPLATE.render({'title': 'T', 'tone': '', 'tags': 'a'}) == "Title: T\nTags:      'a'\n{literal} 100%"
+    assert TEMPLATE.render({'title': 'T', 'tone': 'Casual'}) == "Title: T\nTone: Casual\n{literal} 100%"
+
+
+def test_missing_fields_render_empty():
+    assert TEMPLATE.render({}) == "Title: \n{literal} 100%"
+
+
+def test_values_are_not_formatted_again():
+    assert TEMPLATE.render({'title': '{tone} %s'}) == "Title: {tone} %s\n{literal} 100%"
+
+
+def test_build_prompt_picks_the_platform_template():
+    prompt, version = build_prompt({'title': 'AI', 'niche': 'Tech', 'platform': 'linkedin', 'context': 'Solar'})
+
+    assert version == 'linkedin-v1'
+    assert prompt.startswith(
+        "Generate content with the following specifications:\n- Title: AI\n- Niche/Industry: Tech\n"
+        "- Context/Details: Solar\n\nWrite a professional LinkedIn post"
+    )
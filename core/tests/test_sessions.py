@@ -0,0 +1,116 @@
+import pytest
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+
+from apps.authentication.models import User
+from core import sessions
+from core.flow_state import load_flow_state, new_token, pop_flow_state, save_flow_state
+from core.sessions import SessionStore
+
+
+@pytest.fixture(autouse=True)
+def caches():
+    cache.clear()
+    sessions._local.clear()
+    yield
+    cache.clear()
+    sessions._local.clear()
+
+
+@pytest.mark.django_db
+def test_anonymous_sessions_live_in_the_cookie():
+    session = SessionStore()
+    session['signup_token'] = 'abc'
+    session.save()
+
+    assert ':' in session.session_key
+    assert not Session.objects.exists()
+    assert SessionStore(session.session_key)['signup_token'] == 'abc'
+
+
+@pytest.mark.django_db
+def test_tampered_cookie_starts_a_new_session():
+    session = SessionStore()
+    session['signup_token'] = 'abc'
+    session.save()
+
+    tampered = SessionStore(session.session_key[:-2] + 'xx')
+
+    assert tampered.get('signup_token') is None
+
+
+@pytest.mark.django_db
+def test_logging_in_moves_the_session_server_side():
+    user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+    session = SessionStore()
+    session['signup_token'] = 'abc'
+    session.save()
+
+    session[SESSION_KEY] = str(user.pk)
+    session.save()
+
+    assert ':' not in session.session_key and len(session.session_key) == 32
+    assert Session.objects.filter(session_key=session.session_key).exists()
+    # Read back from the in-process tier, then from the shared cache and the database.
+    assert SessionStore(session.session_key)[SESSION_KEY] == str(user.pk)
+    sessions._local.clear()
+    cache.clear()
+    assert SessionStore(session.session_key)['signup_token'] == 'abc'
+
+
+@pytest.mark.django_db
+def test_logging_out_deletes_the_server_side_session():
+    user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session.save()
+    server_key = session.session_key
+
+    session.flush()
+
+    assert not Session.objects.filter(session_key=server_key).exists()
+    assert SESSION_KEY not in SessionStore(server_key).load()
+
+
+def test_flow_state_is_used_once():
+    token = new_token()
+    save_flow_state('oauth', token, {'verifier': 'v'})
+
+    assert load_flow_state('oauth', token) == {'verifier': 'v'}
+    assert load_flow_state('signup', token) is None
+    assert pop_flow_state('oauth', token) == {'verifier': 'v'}
+    assert pop_flow_state('oauth', token) is None
+    assert load_flow_state('oauth', None) is None
+
+
+def test_flow_state_expires():
+    save_flow_state('signup', 'token', {'otp': '123456'}, ttl=0)
+
+    assert load_flow_state('signup', 'token') is None
+
+
+@pytest.mark.django_db
+def test_otp_verification_logs_the_user_in(client):
+    user = User.objects.create_user('alice', 'alice@example.com', 'pw', is_active=False)
+    token = new_token()
+    save_flow_state('signup', token, {'user_id': user.pk, 'otp': '123456'})
+    session = SessionStore()
+    session['signup_token'] = token
+    session.save()
+    client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+    # The OTP itself never goes into the cookie.
+    assert SessionStore(session.session_key).load() == {'signup_token': token}
+
+    client.post('/auth/verify-otp/', {'otp': '000000'}, secure=True)
+    assert not User.objects.get(pk=user.pk).is_active
+
+    response = client.post('/auth/verify-otp/', {'otp': '123456'}, secure=True)
+
+    assert response.status_code == 302
+    user.refresh_from_db()
+    assert user.is_active and user.is_verified
+    # The OTP cannot be used again, and the logged-in session is server-side.
+    assert load_flow_state('signup', token) is None
+    assert ':' not in client.cookies[settings.SESSION_COOKIE_NAME].value
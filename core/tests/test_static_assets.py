@@ -0,0 +1,33 @@
+from django.contrib.auth.models import AnonymousUser
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+
+from core import static_assets
+
+
+def render_page():
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    return render_to_string('layouts/base.html', request=request)
+
+
+def test_pages_link_the_built_bundle(monkeypatch, settings):
+    monkeypatch.setattr(static_assets, 'bundle_built', lambda: True)
+    # Without collectstatic's manifest, {% static %} links the file as it is.
+    settings.STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+
+    page = render_page()
+
+    assert '/static/css/app.css' in page
+    assert 'cdn.tailwindcss.com' not in page
+    assert static_assets.check_css_bundle(None) == []
+
+
+def test_pages_fall_back_to_the_cdn_without_the_bundle(monkeypatch):
+    monkeypatch.setattr(static_assets, 'bundle_built', lambda: False)
+
+    page = render_page()
+
+    assert 'cdn.tailwindcss.com' in page
+    assert 'app.css' not in page
+    assert [warning.id for warning in static_assets.check_css_bundle(None)] == ['core.W001']
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from core import http, middleware
+from core.lifecycle import lifecycle
+from core.middleware import HealthCheckMiddleware
+from core.warmup import Warmup
+
+
+def failing_phase():
+    raise ConnectionError("secret-host:5432 refused")
+
+
+@pytest.fixture
+def warm(monkeypatch, settings):
+    settings.WARMUP_ENABLED = True
+    gate = threading.Event()
+    warm = Warmup([('urls', lambda: None), ('slow', lambda: gate.wait(5)), ('http', failing_phase)])
+    warm.gate = gate
+    monkeypatch.setattr(middleware, 'warmup', warm)
+    return warm
+
+
+def probe(path):
+    return HealthCheckMiddleware(lambda request: HttpResponse('view'))(RequestFactory().get(path))
+
+
+@pytest.mark.django_db
+def test_instance_is_ready_once_warmed_up(warm):
+    assert probe('/readyz').status_code == 200  # Not warming up at all.
+
+    warm.start()
+    response = probe('/readyz')
+    assert response.status_code == 503
+    assert json.loads(response.content)['warmed_up'] is False
+    assert probe('/healthz').content == b'ok'
+
+    warm.gate.set()
+    assert warm.finished.wait(5)
+    response = probe('/readyz')
+    body = json.loads(response.content)
+
+    assert response.status_code == 200
+    assert list(body['warmup']) == ['urls', 'slow', 'http']
+    # A failed phase does not hold the instance back, and is reported by type only.
+    assert body['warmup']['http']['error'] == 'ConnectionError'
+    assert 'secret-host' not in response.content.decode()
+    assert probe('/dashboard/').content == b'view'
+
+
+def test_warmup_is_started_once_and_can_be_turned_off(warm, settings, monkeypatch):
+    monkeypatch.setattr(warm, 'run', lambda: None)
+    settings.WARMUP_ENABLED = False
+    warm.start()
+    assert not warm.started
+
+    settings.WARMUP_ENABLED = True
+    warm.start()
+    warm.start()
+    assert warm.started
+
+
+@pytest.mark.django_db
+def test_draining_instance_is_not_ready(warm, monkeypatch):
+    monkeypatch.setattr(lifecycle, 'draining_since', 0)
+
+    ready, details = warm.readiness()
+
+    assert not ready and details['draining']
+
+
+def test_unreachable_database_makes_the_instance_unready(warm, monkeypatch):
+    class Unreachable:
+        def cursor(self):
+            raise ConnectionRefusedError("secret-host:5432")
+
+    monkeypatch.setattr('core.warmup.connections', {'default': Unreachable()})
+
+    ready, details = warm.readiness()
+
+    assert not ready and details['database'] == 'ConnectionRefusedError'
+
+
+def test_async_connections_are_opened_once_per_event_loop(warm, monkeypatch, settings):
+    settings.WARMUP_HTTP_ORIGINS = ['https://api.example.com', 'https://down.example.com']
+    heads = []
+
+    class Client:
+        async def head(self, origin, timeout):
+            heads.append(origin)
+            if 'down' in origin:
+                raise ConnectionError
+
+    monkeypatch.setattr(http, 'async_client', Client)
+
+    async def probes():
+        await warm.awarm_http()
+        await warm.awarm_http()
+
+    asyncio.run(probes())
+    assert heads == settings.WARMUP_HTTP_ORIGINS
+    assert warm.report['http']['error'] == 'ConnectionError'
+    asyncio.run(probes())  # A new loop has a client of its own.
+    assert len(heads) == 4
@@ -0,0 +1,122 @@
+import threading
+import time
+
+import numpy as np
+
+
+class VectorIndex:
+    """
+    Approximate nearest-neighbour search by cosine similarity over unit
+    vectors, held in NumPy arrays.
+
+    Every vector gets `tables` random-hyperplane LSH codes of `bits` bits.
+    Two vectors at cosine similarity s share a given code with probability
+    (1 - acos(s)/π) ** bits, so close neighbours almost always share at
+    least one of the codes, while unrelated vectors rarely do. A search
+    narrows the query's partition to the rows sharing a code (2 bytes per
+    code), then scores only those.
+
+    Each entry has an integer key, a partition (only entries of the
+    query's partition match) and the time it was added (entries older than
+    `ttl` seconds are skipped). Rows live in a ring buffer that grows on
+    demand up to `capacity`; once full, each add overwrites the oldest
+    entry. Vectors are stored as float16, which is ample for ranking.
+    """
+
+    def __init__(self, dim: int, capacity: int = 100_000, tables: int = 8, bits: int = 8, ttl: float = None,
+                 seed: int = 0):
+        if not 0 < bits <= 16:
+            raise ValueError("bits must be between 1 and 16.")
+        self.dim = dim
+        self.capacity = capacity
+        self.tables = tables
+        self.bits = bits
+        self.ttl = ttl
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((dim, tables * bits)).astype(np.float32)
+        self._place_values = (1 << np.arange(bits)).astype(np.uint32)
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._added = 0
+        self._vectors = self._codes = self._keys = self._partitions = self._times = None
+        self._allocate(0)
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the arrays, including rows allocated but not yet used."""
+        return sum(array.nbytes for array in (self._vectors, self._codes, self._keys, self._partitions, self._times))
+
+    def codes(self, vectors: np.ndarray) -> np.ndarray:
+        """The LSH codes of a (n, dim) array of vectors, as a (n, tables) array."""
+        bits = (vectors @ self._planes > 0).reshape(len(vectors), self.tables, self.bits)
+        return (bits @ self._place_values).astype(np.uint16)
+
+    def add(self, key: int, partition: int, vector: np.ndarray):
+        """Adds (or replaces) the entry for `key`."""
+        codes = self.codes(vector[None])[0]
+        with self._lock:
+            self._discard(key)
+            row = self._added % self.capacity
+            if row >= len(self._keys):
+                self._allocate(min(self.capacity, max(1024, 2 * len(self._keys))))
+            elif self._added >= self.capacity:
+                # Overwriting the oldest entry.
+                evicted = int(self._keys[row])
+                if self._rows.get(evicted) == row:
+                    del self._rows[evicted]
+            self._vectors[row] = vector
+            self._codes[row] = codes
+            self._keys[row] = key
+            self._partitions[row] = partition
+            self._times[row] = time.monotonic()
+            self._rows[key] = row
+            self._added += 1
+
+    def remove(self, key: int):
+        with self._lock:
+            self._discard(key)
+
+    def search(self, vector: np.ndarray, partition: int, threshold: float, exact: bool = False):
+        """
+        Returns `(key, similarity)` for the most similar entry of `partition`
+        at or above `threshold`, or None. `exact` scores every entry instead
+        of the LSH candidates (for measuring recall).
+        """
+        codes = None if exact else self.codes(vector[None])[0]
+        with self._lock:
+            size = min(self._added, self.capacity)
+            # Narrowed step by step, cheapest test first.
+            rows = np.flatnonzero(self._partitions[:size] == partition)
+            if self.ttl is not None and len(rows):
+                rows = rows[self._times[rows] >= time.monotonic() - self.ttl]
+            if codes is not None and len(rows):
+                rows = rows[(self._codes[rows] == codes).any(axis=1)]
+            if not len(rows):
+                return None
+            scores = self._vectors[rows].astype(np.float32) @ vector
+            best = int(scores.argmax())
+            if scores[best] < threshold:
+                return None
+            return int(self._keys[rows[best]]), float(scores[best])
+
+    def _discard(self, key):
+        row = self._rows.pop(key, None)
+        if row is not None:
+            self._partitions[row] = -1
+
+    def _allocate(self, rows: int):
+        """Creates the arrays with room for `rows` entries, keeping the current ones."""
+        def grow(array, shape, dtype, fill=0):
+            new = np.full(shape, fill, dtype=dtype)
+            if array is not None:
+                new[:len(array)] = array
+            return new
+
+        self._vectors = grow(self._vectors, (rows, self.dim), np.float16)
+        self._codes = grow(self._codes, (rows, self.tables), np.uint16)
+        self._keys = grow(self._keys, rows, np.int64)
+        self._partitions = grow(self._partitions, rows, np.int32, fill=-1)
+        self._times = grow(self._times, rows, np.float64)
@@ -0,0 +1,244 @@
+import asyncio
+import gc
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+from utils.logger import logging
+
+# Warm-up of a new instance. Left alone, the first requests an instance
+# serves pay for opening database connections, compiling templates, reading
+# the static manifest, loading the encryption key, importing and setting up
+# the Gemini SDK, loading the semantic cache's embedding model, and the TCP
+# and TLS handshakes to Gemini, X and LinkedIn.
+# When the server loads the application (project/wsgi.py, project/asgi.py),
+# a background thread does all of that instead, timing each phase, and the
+# readiness probe (/readyz, see core/middleware.py) fails until it is done.
+
+
+def _load_urls():
+    from django.urls import get_resolver
+
+    # Django loads the URLconf, and with it every view module, on the first
+    # request, and builds the tables for reversing URLs on the first reverse().
+    resolver = get_resolver()
+    resolver.reverse_dict
+    for _prefix, namespace_resolver in resolver.namespace_dict.values():
+        namespace_resolver.reverse_dict
+
+
+def _open_database_connections():
+    for alias in connections:
+        pool = connections[alias].settings_dict.get('POOL')
+        if pool is None:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT 1')
+            continue
+
+        # Pooled (DATABASE_POOL_SIZE): several threads hold a connection at
+        # once, so that many are opened, then leave them idle in the pool.
+        count = min(settings.WARMUP_DB_CONNECTIONS, pool['MAX_SIZE'])
+        barrier = threading.Barrier(count)
+
+        def hold(_):
+            try:
+                connections[alias].ensure_connection()
+                barrier.wait(settings.WARMUP_TIMEOUT)
+            finally:
+                connections[alias].close()
+
+        with ThreadPoolExecutor(count) as executor:
+            list(executor.map(hold, range(count)))
+
+
+def _load_encryption_key():
+    from apps.social.encryption import decrypt_token, encrypt_token
+
+    # The first use of the key also loads the OpenSSL bindings.
+    if decrypt_token(encrypt_token('warm-up')) != 'warm-up':
+        raise ValueError("SOCIAL_ENCRYPTION_KEY does not round-trip.")
+
+
+def _compile_templates():
+    from django.template import engines
+    from django.template.autoreload import get_template_directories
+
+    # The project's own templates; compiled ones are kept by the cached template loader.
+    names = {
+        str(path.relative_to(directory))
+        for directory in get_template_directories()
+        if directory.is_relative_to(settings.BASE_DIR)
+        for path in directory.rglob('*.html')
+    }
+    for engine in engines.all():
+        for name in names:
+            engine.get_template(name)
+        # The context processors are imported on the first render.
+        engine.engine.template_context_processors
+
+
+def _load_static_manifest():
+    from django.contrib.staticfiles.storage import staticfiles_storage
+
+    # Reading an attribute sets the storage up, which reads the manifest.
+    staticfiles_storage.hashed_files
+
+
+def _set_up_ai_client():
+    from core.ai_engine import gemini_client
+
+    # The async views call Gemini over the shared async client (see
+    # Warmup.awarm_http) instead of the SDK, which they never import.
+    if not settings.ASYNC_VIEWS:
+        gemini_client.warm(settings.WARMUP_TIMEOUT)
+
+
+def _load_prompt_cache():
+    from apps.dashboard.prompt_cache import prompt_cache
+
+    prompt_cache.warm()
+
+
+def _open_http_connections():
+    from core.http import session
+
+    # Any response will do: the connection stays open in the shared pool.
+    def head(origin):
+        session().head(origin, timeout=settings.WARMUP_TIMEOUT, allow_redirects=False)
+
+    with ThreadPoolExecutor(len(settings.WARMUP_HTTP_ORIGINS)) as pool:
+        list(pool.map(head, settings.WARMUP_HTTP_ORIGINS))
+
+
+def _freeze_heap():
+    # Everything loaded so far lives as long as the process. A full
+    # collection would otherwise walk all of it during some early request;
+    # frozen, the collector leaves it alone.
+    gc.collect()
+    gc.freeze()
+
+
+PHASES = [
+    ('urls', _load_urls),
+    ('database', _open_database_connections),
+    ('encryption_key', _load_encryption_key),
+    ('templates', _compile_templates),
+    ('static_manifest', _load_static_manifest),
+    ('ai_client', _set_up_ai_client),
+    ('prompt_cache', _load_prompt_cache),
+]
+if not settings.ASYNC_VIEWS:
+    # The async views' connections belong to the server's event loop
+    # instead, and are opened from there (Warmup.awarm_http).
+    PHASES.append(('http', _open_http_connections))
+PHASES.append(('gc', _freeze_heap))
+
+
+class Warmup:
+    """Runs the warm-up phases once, and reports how long each took."""
+
+    def __init__(self, phases: list):
+        self.phases = phases
+        self.started = False
+        self.finished = threading.Event()
+        # Phase name -> {'seconds', 'error'}, in the order they ran.
+        self.report = {}
+        self._lock = threading.Lock()
+        self._async_loops = weakref.WeakSet()
+
+    def start(self):
+        """Starts the warm-up on a thread of its own, unless it has started already or WARMUP_ENABLED is off."""
+        with self._lock:
+            if self.started or not settings.WARMUP_ENABLED:
+                return
+            self.started = True
+        threading.Thread(target=self.run, name='warmup', daemon=True).start()
+
+    def run(self):
+        started = time.perf_counter()
+        try:
+            for name, phase in self.phases:
+                self._time(name, phase)
+        finally:
+            # The connections this thread opened belong to it alone; pooled ones go back to the pool.
+            connections.close_all()
+            self.finished.set()
+        failed = [name for name, result in self.report.items() if result['error']]
+        logging.info(
+            f"Warm-up done in {time.perf_counter() - started:.2f}s: "
+            + ", ".join(f"{name} {result['seconds'] * 1000:.0f}ms" for name, result in self.report.items())
+            + (f"; failed: {', '.join(failed)}" if failed else "")
+        )
+
+    async def awarm_http(self):
+        """
+        Opens keep-alive connections in the running event loop's shared
+        client (see core/http.py), once per loop. Called by the readiness
+        probe, the first request the server's event loop handles.
+        """
+        loop = asyncio.get_running_loop()
+        if loop in self._async_loops:
+            return
+        self._async_loops.add(loop)
+        from core.http import async_client
+
+        started = time.perf_counter()
+        client = async_client()
+        results = await asyncio.gather(
+            *(client.head(origin, timeout=settings.WARMUP_TIMEOUT) for origin in settings.WARMUP_HTTP_ORIGINS),
+            return_exceptions=True,
+        )
+        errors = [result for result in results if isinstance(result, Exception)]
+        for error in errors:
+            logging.warning(f"Warm-up phase http failed: {self._describe(error)}")
+        self.report['http'] = {
+            'seconds': time.perf_counter() - started,
+            'error': type(errors[0]).__name__ if errors else None,
+        }
+
+    def readiness(self) -> tuple:
+        """
+        Returns `(ready, details)`. An instance is ready once warmed up (or
+        if it never started warming up), while it is not shutting down and
+        the database answers. A warm-up phase that failed is reported, but
+        does not keep the instance from serving: its work happens on the
+        first request instead. Errors are given by type only, since the
+        probes are public; the log has the details.
+        """
+        from core.lifecycle import lifecycle
+
+        details = {
+            'warmed_up': self.finished.is_set() or not self.started,
+            'draining': lifecycle.draining,
+            'database': True,
+            'warmup': self.report,
+        }
+        try:
+            with connections['default'].cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except Exception as e:
+            logging.warning(f"Readiness check could not reach the database: {self._describe(e)}")
+            details['database'] = type(e).__name__
+        ready = details['warmed_up'] and not details['draining'] and details['database'] is True
+        return ready, details
+
+    def _time(self, name, phase):
+        started = time.perf_counter()
+        error = None
+        try:
+            phase()
+        except Exception as e:
+            error = type(e).__name__
+            logging.warning(f"Warm-up phase {name} failed: {self._describe(e)}")
+        self.report[name] = {'seconds': time.perf_counter() - started, 'error': error}
+
+    @staticmethod
+    def _describe(error: Exception) -> str:
+        return str(error) or type(error).__name__
+
+
+warmup = Warmup(PHASES)
@@ -0,0 +1,48 @@
+import asyncio
+import signal
+import sys
+
+from gunicorn.arbiter import Arbiter
+from uvicorn.server import Server
+from uvicorn.workers import UvicornWorker as BaseUvicornWorker
+
+
+class DrainingServer(Server):
+    """Uvicorn's server, starting the lifecycle drain (see core/lifecycle.py) when told to exit."""
+
+    def handle_exit(self, sig, frame):
+        # Imported here: the worker class is loaded by gunicorn before Django is set up.
+        from core.lifecycle import lifecycle
+
+        if sig == signal.SIGTERM and not lifecycle.draining:
+            # Requests still running at the end of the drain are cancelled,
+            # which leaves them checkpointed for another instance to finish.
+            self.config.timeout_graceful_shutdown = lifecycle.drain_timeout
+            lifecycle.begin_drain()
+        super().handle_exit(sig, frame)
+
+    async def shutdown(self, sockets=None):
+        await super().shutdown(sockets)
+        from core.lifecycle import lifecycle
+
+        if lifecycle.draining:
+            # Uvicorn re-raises the signal once this returns, ending the process
+            # without running exit hooks: the requests it cancelled unwind, and
+            # the drain writes its final checkpoint, first.
+            await asyncio.to_thread(lifecycle.wait_drained, lifecycle.drain_timeout)
+
+
+class UvicornWorker(BaseUvicornWorker):
+    """
+    Uvicorn's gunicorn worker with a DrainingServer. Uvicorn sets its own
+    signal handlers once it starts serving, over any set while the app was
+    loading, so the drain has to start from its handler.
+    """
+
+    async def _serve(self):
+        self.config.app = self.wsgi
+        server = DrainingServer(config=self.config)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
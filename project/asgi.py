@@ -3,3 +3,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 application = get_asgi_application()
+
+# Warms the instance up in the background (see core/warmup.py).
+from core.warmup import warmup  # noqa: E402
+
+warmup.start()
@@ -46,18 +46,123 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'authentication.User'
 
 MIDDLEWARE = [
+    'core.middleware.DeadlineMiddleware', # Gives each request a time budget (REQUEST_BUDGET)
+    'core.middleware.HealthCheckMiddleware', # Answers the /healthz and /readyz probes (WARMUP_*)
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware', # For serving static files
+    'core.middleware.AsyncWhiteNoiseMiddleware', # For serving static files (WhiteNoise, usable under ASGI)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.DrainMiddleware', # Refuses long-running requests while shutting down (LIFECYCLE_*)
+    'core.middleware.AdmissionMiddleware', # Rate limits and queues generation requests (ADMISSION_*)
+    'core.db.routers.ReplicaRoutingMiddleware', # Sends read-only pages to the replica, if configured
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'project.urls'
 WSGI_APPLICATION = 'project.wsgi.application'
+ASGI_APPLICATION = 'project.asgi.application'
+
+# The production container serves the ASGI application (see Dockerfile), where
+# the I/O-bound views (generation, posting, the OAuth callback, payment
+# webhooks) have async variants that wait on Gemini and the social platforms
+# without holding a thread. Set to False when serving project.wsgi instead.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'True') == 'True'
+# Connection limit of the async views' shared HTTP client (see core/http.py).
+ASYNC_HTTP_MAX_CONNECTIONS = int(os.getenv('ASYNC_HTTP_MAX_CONNECTIONS', '100'))
+# Kept-alive connections per host of the sync views' shared HTTP pool (see core/http.py).
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))
+
+# Warm-up (see core/warmup.py). When the server loads the application, a
+# background thread imports the views, opens database connections, compiles
+# the templates, reads the static manifest, loads the encryption key, sets
+# up the Gemini client, loads the semantic cache's embedding model and opens
+# keep-alive connections to WARMUP_HTTP_ORIGINS, logging how long each
+# phase took. The readiness probe, /readyz, answers 503 until it is done;
+# /healthz is the liveness probe.
+WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'True') == 'True'
+# The longest any one network step of the warm-up may take, in seconds.
+WARMUP_TIMEOUT = float(os.getenv('WARMUP_TIMEOUT', '5'))
+# Connections opened ahead of time in each database's pool (DATABASE_POOL_SIZE).
+WARMUP_DB_CONNECTIONS = int(os.getenv('WARMUP_DB_CONNECTIONS', '2'))
+WARMUP_HTTP_ORIGINS = os.getenv(
+    'WARMUP_HTTP_ORIGINS',
+    'https://generativelanguage.googleapis.com,https://api.twitter.com,https://api.linkedin.com'
+).split(',')
+
+# Budget for the imports made while booting, in milliseconds, checked by
+# `manage.py profile_imports`: heavy imports that are not needed to start
+# serving belong inside the functions that use them.
+STARTUP_IMPORT_BUDGET_MS = float(os.getenv('STARTUP_IMPORT_BUDGET_MS', '750'))
+
+# Time budgets, in seconds (see core/deadlines.py). Every call to Gemini, the
+# social platforms and the database made for a request is bounded by the time
+# the request has left, so a hung upstream cannot hold a worker indefinitely.
+# Generation makes up to two Gemini calls, so it gets a budget of its own.
+REQUEST_BUDGET = float(os.getenv('REQUEST_BUDGET', '30'))
+GENERATION_REQUEST_BUDGET = float(os.getenv('GENERATION_REQUEST_BUDGET', '120'))
+
+# Admission control for generation (see core/admission.py). Each user may make
+# ADMISSION_USER_LIMITS generation requests over sliding windows, e.g.
+# "10/minute,100/hour". Each instance runs at most ADMISSION_MAX_CONCURRENT at
+# once; the rest wait, taking turns across users, for up to
+# ADMISSION_QUEUE_TIMEOUT seconds (never past the request's budget), with at
+# most ADMISSION_MAX_QUEUED_PER_USER waiting per user. Requests turned away
+# get a 429 with Retry-After. The per-user counts are kept per process unless
+# ADMISSION_SHARED_LIMITS is set, which keeps them in the shared cache (see
+# CACHES) so they hold across instances.
+ADMISSION_CONTROL = os.getenv('ADMISSION_CONTROL', 'True') == 'True'
+ADMISSION_USER_LIMITS = os.getenv('ADMISSION_USER_LIMITS', '10/minute,100/hour')
+ADMISSION_MAX_CONCURRENT = int(os.getenv('ADMISSION_MAX_CONCURRENT', '32'))
+ADMISSION_MAX_QUEUED_PER_USER = int(os.getenv('ADMISSION_MAX_QUEUED_PER_USER', '2'))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '10'))
+ADMISSION_SHARED_LIMITS = os.getenv('ADMISSION_SHARED_LIMITS', 'False') == 'True'
+
+# Graceful shutdown (see core/lifecycle.py). On SIGTERM, e.g. when Cloud Run
+# scales an instance down, new generations and posts are refused with a 503
+# and those in flight get LIFECYCLE_DRAIN_TIMEOUT seconds to finish, inside
+# Cloud Run's 10 second grace period. Until then they are checkpointed every
+# LIFECYCLE_CHECKPOINT_INTERVAL seconds; the ones the shutdown cuts off are
+# finished on another instance by `manage.py resume_jobs` (run it on a
+# schedule), which tries each up to LIFECYCLE_MAX_ATTEMPTS times, and gives
+# up on any older than LIFECYCLE_MAX_AGE seconds: its user has moved on.
+LIFECYCLE_DRAIN_TIMEOUT = float(os.getenv('LIFECYCLE_DRAIN_TIMEOUT', '8'))
+LIFECYCLE_CHECKPOINT_INTERVAL = float(os.getenv('LIFECYCLE_CHECKPOINT_INTERVAL', '0.5'))
+LIFECYCLE_MAX_ATTEMPTS = int(os.getenv('LIFECYCLE_MAX_ATTEMPTS', '3'))
+LIFECYCLE_MAX_AGE = float(os.getenv('LIFECYCLE_MAX_AGE', '3600'))
+
+# Gemini model routing (see core/model_router.py). Short, casual requests go
+# to the Flash tier and the rest to Pro. A tier whose recent latency (EWMA,
+# seconds) or failure rate goes over its limit hands its traffic to the other
+# tier until it recovers. With routing off, everything goes to Pro.
+GEMINI_MODEL_ROUTING = os.getenv('GEMINI_MODEL_ROUTING', 'True') == 'True'
+GEMINI_PRO_MODEL = os.getenv('GEMINI_PRO_MODEL', 'gemini-2.5-pro')
+GEMINI_FLASH_MODEL = os.getenv('GEMINI_FLASH_MODEL', 'gemini-2.5-flash')
+GEMINI_PRO_MAX_LATENCY = float(os.getenv('GEMINI_PRO_MAX_LATENCY', '60'))
+GEMINI_FLASH_MAX_LATENCY = float(os.getenv('GEMINI_FLASH_MAX_LATENCY', '20'))
+GEMINI_MAX_FAILURE_RATE = float(os.getenv('GEMINI_MAX_FAILURE_RATE', '0.3'))
+
+# AI usage metering (see core/metering.py). The tokens and latency of every
+# Gemini call are buffered in memory and written to the usage table in
+# batches: once USAGE_BATCH_SIZE records are waiting, or USAGE_FLUSH_INTERVAL
+# seconds after the last write. Beyond USAGE_MAX_BUFFER unwritten records
+# (e.g. while the database is down) the oldest are dropped.
+USAGE_METERING = os.getenv('USAGE_METERING', 'True') == 'True'
+USAGE_BATCH_SIZE = int(os.getenv('USAGE_BATCH_SIZE', '200'))
+USAGE_FLUSH_INTERVAL = float(os.getenv('USAGE_FLUSH_INTERVAL', '10'))
+USAGE_MAX_BUFFER = int(os.getenv('USAGE_MAX_BUFFER', '10000'))
+
+# Credit pricing (see apps/billing/pricing.py). By default a generation's text
+# costs one credit. With TOKEN_PRICING it costs the tokens its AI calls used,
+# at the model's rate in credits per 1,000 tokens (rounded up, and at least
+# one credit). An image costs 3 credits either way.
+TOKEN_PRICING = os.getenv('TOKEN_PRICING', 'False') == 'True'
+CREDITS_PER_1K_TOKENS = {
+    GEMINI_PRO_MODEL: float(os.getenv('GEMINI_PRO_CREDITS_PER_1K_TOKENS', '1')),
+    GEMINI_FLASH_MODEL: float(os.getenv('GEMINI_FLASH_CREDITS_PER_1K_TOKENS', '0.25')),
+}
 
 
 # --- Database Configuration (for Aiven PostgreSQL) ---
@@ -70,6 +175,99 @@ DATABASES = {
     )
 }
 
+# Optional read replica. GET requests for the views below read from it,
+# except for users whose data changed in the last few seconds (see core/db/routers.py).
+if os.getenv('DATABASE_REPLICA_URL'):
+    DATABASES['replica'] = dj_database_url.parse(
+        os.getenv('DATABASE_REPLICA_URL'),
+        conn_max_age=600,
+        ssl_require=os.getenv('DATABASE_SSL_REQUIRE', 'False') == 'True'
+    )
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+DATABASE_REPLICA_VIEWS = os.getenv(
+    'DATABASE_REPLICA_VIEWS',
+    'dashboard:dashboard,dashboard:search,dashboard:analytics,billing:pricing,social:connections'
+).split(',')
+DATABASE_REPLICA_STICKY_SECONDS = int(os.getenv('DATABASE_REPLICA_STICKY_SECONDS', '15'))
+
+# Connection pooling for PostgreSQL (see core/db/pool.py). With gunicorn's
+# threads each holding a persistent connection, an instance keeps one
+# connection per thread open; a pool shares DATABASE_POOL_SIZE between them,
+# borrowed per request. 0 keeps persistent per-thread connections.
+# Under ASGI each request does its database work on a thread of its own,
+# so persistent connections are never reused there: use the pool.
+DATABASE_POOL_SIZE = int(os.getenv('DATABASE_POOL_SIZE', '0'))
+if DATABASE_POOL_SIZE:
+    for database in DATABASES.values():
+        if database['ENGINE'] == 'django.db.backends.postgresql':
+            database['ENGINE'] = 'core.db.backends.postgresql_pool'
+            database['CONN_MAX_AGE'] = 0 # Connections go back to the pool after each request.
+            database['POOL'] = {
+                'MAX_SIZE': DATABASE_POOL_SIZE,
+                'TIMEOUT': float(os.getenv('DATABASE_POOL_TIMEOUT', '10')),
+                'MAX_LIFETIME': float(os.getenv('DATABASE_POOL_MAX_LIFETIME', '1800')),
+                'MAX_IDLE': float(os.getenv('DATABASE_POOL_MAX_IDLE', '300')),
+                'CHECK_AFTER': float(os.getenv('DATABASE_POOL_CHECK_AFTER', '30')),
+            }
+
+
+# --- Caching ---
+# Defaults to an in-process cache. In production, point CACHE_BACKEND/CACHE_LOCATION
+# at a shared cache (e.g. Redis or Memcached) so all instances see the same entries.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Dashboard sidebar fragment cache (credits + recent history).
+DASHBOARD_HISTORY_LIMIT = int(os.getenv('DASHBOARD_HISTORY_LIMIT', '20'))
+DASHBOARD_CACHE_LOCAL_TTL = int(os.getenv('DASHBOARD_CACHE_LOCAL_TTL', '5'))
+DASHBOARD_CACHE_SHARED_TTL = int(os.getenv('DASHBOARD_CACHE_SHARED_TTL', '300'))
+
+
+# Near-duplicate detection for generated content (see apps/dashboard/dedup.py).
+# Content at or above the threshold's estimated Jaccard similarity within the
+# window is offered for reuse instead of paying for another generation.
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_THRESHOLD', '0.8'))
+NEAR_DUPLICATE_WINDOW_DAYS = int(os.getenv('NEAR_DUPLICATE_WINDOW_DAYS', '30'))
+NEAR_DUPLICATE_INDEX_TTL = int(os.getenv('NEAR_DUPLICATE_INDEX_TTL', '60'))
+
+# Content older than this many days has its text moved to the compressed
+# archive table by `manage.py archive_content` (see ArchivedContent). Reads
+# and search stay transparent: the text is indexed as it is archived.
+CONTENT_ARCHIVE_AFTER_DAYS = int(os.getenv('CONTENT_ARCHIVE_AFTER_DAYS', '180'))
+
+# Semantic prompt cache (see apps/dashboard/prompt_cache.py). A request whose
+# title and tags embed at or above SEMANTIC_CACHE_THRESHOLD cosine similarity
+# to one of the same user's recent generations, with the same template, niche,
+# tone and platform, is served that generation's text instead of calling
+# Gemini; the text is not charged again (an image still is, see
+# apps/billing/pricing.py). Requests with a context (which may be private)
+# are never cached. Each process keeps up to SEMANTIC_CACHE_MAX_ENTRIES for SEMANTIC_CACHE_TTL
+# seconds. Prompts are embedded with a hashing vectorizer, or with the
+# sentence-transformers model SEMANTIC_CACHE_MODEL names (e.g.
+# all-MiniLM-L6-v2) if that is installed.
+SEMANTIC_CACHE = os.getenv('SEMANTIC_CACHE', 'True') == 'True'
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.9'))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', '100000'))
+SEMANTIC_CACHE_TTL = int(os.getenv('SEMANTIC_CACHE_TTL', str(24 * 3600)))
+SEMANTIC_CACHE_MODEL = os.getenv('SEMANTIC_CACHE_MODEL', '')
+
+
+# --- Sessions ---
+# 'core.sessions' keeps anonymous sessions in a signed cookie and logged-in
+# sessions in the database behind the shared cache and a short in-process
+# tier (see core/sessions.py). Any Django engine can be used instead, e.g.
+# 'django.contrib.sessions.backends.cached_db' or '...backends.db'.
+SESSION_ENGINE = os.getenv('SESSION_ENGINE', 'core.sessions')
+SESSION_LOCAL_CACHE_TTL = int(os.getenv('SESSION_LOCAL_CACHE_TTL', '5'))
+
+# Lifetime of the state kept between the steps of the OTP and OAuth flows (see core/flow_state.py).
+FLOW_STATE_TTL = int(os.getenv('FLOW_STATE_TTL', '600'))
+
 
 # --- Templates & Internationalization ---
 TEMPLATES = [
@@ -83,6 +281,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.static_assets.static_assets',
             ],
         },
     },
@@ -99,6 +298,10 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Static files (CSS, JavaScript, Images) are served by WhiteNoise.
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATIC_URL = '/static/'
+# Compiled CSS and self-hosted fonts are built into `static/` by `npm run build`.
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+# The manifest storage gives every file a content hash (e.g. app.3f2a9c.css), which
+# WhiteNoise recognises and serves with far-future, immutable cache headers.
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # Media files (User-generated content like AI images) are stored on Cloudflare R2.
@@ -107,7 +310,8 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 AWS_ACCESS_KEY_ID = os.getenv('R2_ACCESS_KEY_ID')
 AWS_SECRET_ACCESS_KEY = os.getenv('R2_SECRET_ACCESS_KEY')
 AWS_STORAGE_BUCKET_NAME = os.getenv('R2_BUCKET_NAME')
-AWS_S3_ENDPOINT_URL = f"https://{os.getenv('R2_ACCOUNT_ID')}.r2.cloudflarestorage.com"
+# AWS_S3_ENDPOINT_URL can be overridden to point at a local S3 stand-in such as MinIO.
+AWS_S3_ENDPOINT_URL = os.getenv('AWS_S3_ENDPOINT_URL') or f"https://{os.getenv('R2_ACCOUNT_ID')}.r2.cloudflarestorage.com"
 AWS_S3_CUSTOM_DOMAIN = os.getenv('R2_CUSTOM_DOMAIN') # e.g., 'media.yourdomain.com'
 AWS_S3_OBJECT_PARAMETERS = {'CacheControl': 'max-age=86400'}
 AWS_DEFAULT_ACL = 'public-read' # Make files publicly accessible
@@ -115,6 +319,13 @@ AWS_DEFAULT_ACL = 'public-read' # Make files publicly accessible
 # This tells Django to use our R2 bucket for any file uploads.
 DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
 
+# AI image pipeline (see core/images.py): derivative widths, encoder worker
+# processes, and the shared upload client's connection pool / multipart chunk size.
+IMAGE_VARIANT_WIDTHS = [int(w) for w in os.getenv('IMAGE_VARIANT_WIDTHS', '256,512,1024').split(',')]
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', '2'))
+IMAGE_UPLOAD_POOL_SIZE = int(os.getenv('IMAGE_UPLOAD_POOL_SIZE', '10'))
+IMAGE_UPLOAD_CHUNK_SIZE = int(os.getenv('IMAGE_UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+
 
 # --- Production Security Settings ---
 # These are ignored if DEBUG is True.
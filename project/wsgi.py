@@ -3,3 +3,8 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 application = get_wsgi_application()
+
+# Warms the instance up in the background (see core/warmup.py).
+from core.warmup import warmup  # noqa: E402
+
+warmup.start()
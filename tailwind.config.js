@@ -0,0 +1,17 @@
+/** @type {import('tailwindcss').Config} */
+module.exports = {
+  // Every file that can contain class names. Python form classes inject
+  // Tailwind classes into widgets in their __init__, so they are scanned too.
+  content: [
+    './templates/**/*.html',
+    './apps/**/*.py',
+  ],
+  theme: {
+    extend: {
+      fontFamily: {
+        sans: ['Inter', 'ui-sans-serif', 'system-ui', 'sans-serif'],
+      },
+    },
+  },
+  plugins: [],
+};